@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de l'index vectoriel persistant (lib.vector_index).
+
+Mesure, sur des vecteurs synthétiques regroupés en clusters (proches de la
+structure d'embeddings de résumés), le temps de construction incrémentale,
+le temps de reconstruction, la latence des requêtes HNSW et leur rappel@k
+par rapport à la recherche exacte NumPy.
+
+Usage:
+    python benchmarks/bench_ann.py --papers 200000 --dimension 1024 --queries 200
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from lib.vector_index import VectorIndex
+
+
+def synthetic_vectors(count: int, dimension: int, clusters: int, rng) -> np.ndarray:
+    """Vecteurs unitaires regroupés autour de centres aléatoires."""
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    assignment = rng.integers(0, clusters, size=count)
+    vectors = centers[assignment] + 0.6 * rng.standard_normal((count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'index ANN")
+    parser.add_argument("--papers", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=5000, help="Taille des ajouts incrémentaux")
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[32, 64, 128, 256],
+                        help="Valeurs de ef à comparer (compromis rappel / latence)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    clusters = max(args.papers // 200, 8)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex(tmp, args.dimension)
+
+        start = time.perf_counter()
+        for first in range(0, args.papers, args.batch):
+            count = min(args.batch, args.papers - first)
+            vectors = synthetic_vectors(count, args.dimension, clusters, rng)
+            index.add(np.arange(first + 1, first + count + 1), vectors, save=False)
+        index.save()
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index.rebuild()
+        rebuild_time = time.perf_counter() - start
+
+        queries = synthetic_vectors(args.queries, args.dimension, clusters, rng)
+
+        start = time.perf_counter()
+        exact_labels = np.vstack([index.exact_search(query, k=args.k)[0] for query in queries])
+        exact_time = (time.perf_counter() - start) / args.queries
+
+        sweep = []
+        for ef in args.ef_search:
+            index.ef_search = ef
+            latencies = []
+            recalls = []
+            for query, expected in zip(queries, exact_labels):
+                start = time.perf_counter()
+                labels, _ = index.search(query, k=args.k)
+                latencies.append(time.perf_counter() - start)
+                recalls.append(len(set(labels[0].tolist()) & set(expected.tolist())) / args.k)
+            latencies = np.array(latencies) * 1000
+            sweep.append((ef, np.percentile(latencies, 50), np.percentile(latencies, 95), np.mean(recalls)))
+
+        size = sum(os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp))
+
+    print(f"{args.papers} vecteurs de dimension {args.dimension}, {args.queries} requêtes, k={args.k}")
+    print(f"construction incrémentale : {build_time:.1f} s")
+    print(f"reconstruction            : {rebuild_time:.1f} s")
+    print(f"taille sur disque         : {size / 1024 / 1024:.0f} Mo")
+    print(f"recherche exacte NumPy    : {exact_time * 1000:.2f} ms / requête")
+    print(f"{'ef':>6}{'p50 (ms)':>12}{'p95 (ms)':>12}{f'rappel@{args.k}':>12}")
+    for ef, p50, p95, recall in sweep:
+        print(f"{ef:>6}{p50:>12.2f}{p95:>12.2f}{recall:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de l'archive des réponses (lib.archive).
+
+Remplit une archive neuve de `--results` réponses synthétiques (Markdown de
+quelques kilo-octets, vocabulaire scientifique complété de mots tirés selon une
+loi de Zipf, comme dans un texte réel), puis mesure la taille sur
+disque et la latence des recherches plein texte (`arxivbuddy history search`).
+
+Usage:
+    python benchmarks/bench_archive.py --results 20000
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+import itertools
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from lib.archive import ResultArchive
+
+VOCABULARY = (
+    "diffusion transformer attention protein folding reinforcement learning policy gradient "
+    "graph neural network quantum error correction retrieval augmented generation language model "
+    "benchmark dataset fine-tuning distillation sparse mixture experts contrastive representation "
+    "robotics manipulation climate forecasting segmentation detection alignment reward hacking "
+    "modèle apprentissage réseau données résultats méthode article synthèse approche performance"
+).split()
+
+# Vocabulaire complet : termes scientifiques, puis mots plus rares (fréquences de Zipf)
+WORDS = VOCABULARY + [f"terme{i}" for i in range(20000)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 10) for rank in range(len(WORDS))))
+
+QUERIES = ["modèles de diffusion pour les protéines", "apprentissage par renforcement et robotique",
+           "correction d'erreurs quantiques", "RAG et modèles de langage", "graph neural network benchmark"]
+
+
+def synthetic_answer(rng: random.Random, query: str) -> str:
+    sections = [f"# {query}\n"]
+    for title in ("⚡ Réponse", "🔍 Résumé", "📚 Articles", "🧠 Synthèse"):
+        words = " ".join(rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=rng.randint(120, 250)))
+        sections.append(f"## {title}\n\n{words}\n")
+    for _ in range(5):
+        sections.append(f"- **{rng.choice(VOCABULARY).title()}** https://arxiv.org/abs/{rng.randint(2001, 2412)}."
+                        f"{rng.randint(10000, 99999)}\n")
+    return "\n".join(sections)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'archive des réponses")
+    parser.add_argument("--results", type=int, default=20000)
+    parser.add_argument("--searches", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        archive = ResultArchive(directory)
+        raw_bytes = 0
+        fill_s = 0.0
+        for first in range(0, args.results, 1000):
+            batch = []
+            for i in range(first, min(first + 1000, args.results)):
+                query = f"{rng.choice(QUERIES)} {rng.choice(VOCABULARY)} ({i})"
+                answer = synthetic_answer(rng, query)
+                raw_bytes += len(answer.encode("utf-8"))
+                batch.append({"query": query, "answer": answer, "model": "openai/gpt-4.1-mini",
+                              "level": "medium", "elapsed": rng.uniform(20, 90)})
+            start = time.perf_counter()
+            archive.add_many(batch)
+            fill_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        archive.add("question isolée", synthetic_answer(rng, "question isolée"), model="openai/gpt-4.1-mini")
+        add_ms = (time.perf_counter() - start) * 1000
+
+        stats = archive.stats()
+        searches = [" ".join(rng.sample(WORDS[:2000], rng.randint(1, 3))) for _ in range(args.searches)]
+        latencies = []
+        for text in searches:
+            start = time.perf_counter()
+            archive.search(text, limit=20)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+
+        print(f"{stats['results']} réponses archivées en {fill_s:.1f} s (ajout isolé: {add_ms:.1f} ms)")
+        print(f"Texte brut {raw_bytes / 1e6:.1f} Mo → segments {stats['segment_bytes'] / 1e6:.1f} Mo "
+              f"({stats['codec']}) + index {stats['index_bytes'] / 1e6:.1f} Mo")
+        print(f"Recherche (20 résultats avec extraits), {len(latencies)} requêtes: "
+              f"p50 {latencies[len(latencies) // 2]:.1f} ms, p95 {latencies[int(len(latencies) * 0.95)]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark du pipeline asynchrone (lib.async_pipeline) face à un thread par requête.
+
+Simule `--queries` requêtes simultanées, chacune composée des étapes de
+`process_query` en flux : analyse de la question (un appel LLM), recherche
+ArXiv paginée (`--page-latency` par page de `--page-size`) avec analyse de
+chaque article dès sa lecture (un appel LLM), puis résumé, synthèse,
+professeur et mise en forme (un appel LLM chacun). Les appels LLM attendent
+`--llm-latency` secondes (loi log-normale) sans calcul local, comme une
+requête HTTP.
+
+- threads : une requête par thread, recherche et analyses par
+  `streaming.stream_search_analysis` (un thread de recherche et des workers
+  d'analyse par requête) ;
+- asyncio : toutes les requêtes dans une seule boucle, par
+  `astream_search_analysis` et `run_task_graph`, la pagination ArXiv restant
+  bloquante dans le pool d'E/S.
+
+Usage:
+    python benchmarks/bench_async.py --queries 10 50 200 --papers 5 --io-workers 16
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+import argparse
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+os.environ.setdefault("ARXIVBUDDY_CACHE_DIR", tempfile.mkdtemp(prefix="arxivbuddy_bench_"))
+
+from lib import async_pipeline, streaming
+from lib.memory_budget import rss_bytes
+
+# Tâches après l'étape en flux, avec les tâches de leur contexte
+TASK_GRAPH = (("summary", ()), ("synthesis", ("summary",)), ("professor", ("synthesis",)),
+              ("final_formatting", ("summary", "synthesis", "professor")))
+
+
+def fake_results(page_size, page_latency):
+    """Remplace iter_results : pages téléchargées à la demande (attente bloquante)."""
+    counter = iter(range(10 ** 9))
+    lock = threading.Lock()
+
+    def iter_results(query, max_results, *args, predicate=None, **kwargs):
+        for index in range(max_results):
+            if index % page_size == 0:
+                time.sleep(page_latency)
+            with lock:
+                number = next(counter)
+            result = SimpleNamespace(
+                entry_id=f"http://arxiv.org/abs/2401.{number:05d}v1",
+                title=f"Article simulé {number} {query}",
+                authors=[SimpleNamespace(name="A. Auteur")],
+                summary=f"Résumé simulé {number}. " * 10,
+                published=datetime(2024, 1, 1),
+                pdf_url="",
+                categories=["cs.LG"],
+            )
+            if predicate is None or predicate(result):
+                yield result
+    return iter_results
+
+
+class Latency:
+    """Latences LLM tirées d'une loi log-normale (reproductibles)."""
+
+    def __init__(self, median):
+        self.median = median
+        self.rng = random.Random(0)
+        self.lock = threading.Lock()
+
+    def draw(self):
+        with self.lock:
+            return self.median * self.rng.lognormvariate(0, 0.3)
+
+
+class Sampler:
+    """Relève le nombre de threads et la RSS du processus pendant une mesure."""
+
+    def __init__(self):
+        self.threads = 0
+        self.rss = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def _loop(self):
+        while not self._stop.wait(0.02):
+            self.threads = max(self.threads, threading.active_count())
+            self.rss = max(self.rss, rss_bytes())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def threaded_query(index, args, latency):
+    """Une requête synchrone, comme process_query(streaming=True)."""
+    start = time.perf_counter()
+    time.sleep(latency.draw())
+
+    def analyze(paper):
+        time.sleep(latency.draw())
+        return {"arxiv_id": paper["arxiv_id"]}
+
+    streaming.stream_search_analysis(f"q{index}", args.papers, analyze, workers=args.workers)
+    for _ in TASK_GRAPH:
+        time.sleep(latency.draw())
+    return time.perf_counter() - start
+
+
+async def async_query(index, args, latency):
+    """La même requête dans la boucle d'événements, comme aprocess_query."""
+    start = time.perf_counter()
+    await asyncio.sleep(latency.draw())
+
+    async def analyze(paper):
+        await asyncio.sleep(latency.draw())
+        return {"arxiv_id": paper["arxiv_id"]}
+
+    await async_pipeline.astream_search_analysis(f"q{index}", args.papers, analyze, concurrency=args.workers)
+    tasks = {}
+    for name, context in TASK_GRAPH:
+        tasks[name] = SimpleNamespace(name=name, context=[tasks[other] for other in context], output=None)
+
+    async def execute(task):
+        await asyncio.sleep(latency.draw())
+        task.output = "..."
+
+    await async_pipeline.run_task_graph(list(tasks.values()), execute)
+    return time.perf_counter() - start
+
+
+def run_threads(queries, args):
+    latency = Latency(args.llm_latency)
+    durations = [0.0] * queries
+
+    def run(index):
+        durations[index] = threaded_query(index, args, latency)
+
+    with Sampler() as sampler:
+        start = time.perf_counter()
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(queries)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+    return wall, durations, sampler
+
+
+def run_async(queries, args):
+    latency = Latency(args.llm_latency)
+
+    async def main():
+        return await asyncio.gather(*[async_query(index, args, latency) for index in range(queries)])
+
+    with Sampler() as sampler:
+        start = time.perf_counter()
+        durations = asyncio.run(main())
+        wall = time.perf_counter() - start
+    return wall, list(durations), sampler
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline asynchrone")
+    parser.add_argument("--queries", type=int, nargs="+", default=[10, 50, 200],
+                        help="Nombres de requêtes simultanées")
+    parser.add_argument("--papers", type=int, default=5, help="Articles par requête")
+    parser.add_argument("--workers", type=int, default=4, help="Analyses simultanées par requête")
+    parser.add_argument("--page-size", type=int, default=5)
+    parser.add_argument("--page-latency", type=float, default=0.5, help="Latence d'une page ArXiv (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.4, help="Latence médiane d'un appel LLM (s)")
+    parser.add_argument("--io-workers", type=int, default=async_pipeline.ASYNC_IO_WORKERS,
+                        help="Threads du pool d'E/S du mode asyncio (ASYNC_IO_WORKERS)")
+    args = parser.parse_args()
+    async_pipeline.ASYNC_IO_WORKERS = args.io_workers
+
+    fake = fake_results(args.page_size, args.page_latency)
+    streaming.iter_results = fake
+    async_pipeline.iter_results = fake
+    # Variantes des outils sans effet de bord : pas d'écriture dans la base locale des articles
+    streaming.record_papers = async_pipeline.record_papers = lambda papers: None
+
+    print(f"{args.papers} articles par requête, appels LLM de {args.llm_latency:.1f} s, "
+          f"pages ArXiv de {args.page_latency:.1f} s, pool d'E/S de {async_pipeline.ASYNC_IO_WORKERS} threads")
+    print(f"{'requêtes':>9}{'mode':>9}{'durée (s)':>11}{'req/s':>8}{'p50 (s)':>9}{'p95 (s)':>9}"
+          f"{'threads':>9}{'RSS (Mo)':>10}")
+    for queries in args.queries:
+        for mode, run in (("threads", run_threads), ("asyncio", run_async)):
+            wall, durations, sampler = run(queries, args)
+            print(f"{queries:>9}{mode:>9}{wall:>11.2f}{queries / wall:>8.1f}{percentile(durations, 0.5):>9.2f}"
+                  f"{percentile(durations, 0.95):>9.2f}{sampler.threads:>9}{sampler.rss / 1024 / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
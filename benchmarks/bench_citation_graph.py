@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark du graphe de citations (lib.citation_graph).
+
+Construit un graphe synthétique de `--papers` articles citant chacun
+`--references` articles antérieurs par attachement préférentiel (les articles
+déjà très cités sont plus souvent cités, comme dans une vraie bibliographie),
+puis mesure l'enregistrement des arêtes, la compilation CSR et la latence de
+`related` (outil related_papers) à profondeur 1 et 2.
+
+Usage:
+    python benchmarks/bench_citation_graph.py --papers 100000 --references 30
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from lib.citation_graph import CitationGraph
+
+
+def paper_name(index: int) -> str:
+    return f"{2000 + index // 100000}.{index % 100000:05d}"
+
+
+def synthetic_references(rng: random.Random, papers: int, references: int):
+    """Références par attachement préférentiel : chaque citation reçue augmente les chances d'être recité."""
+    targets = []
+    for index in range(papers):
+        paper_id = paper_name(index)
+        cited = set()
+        if index:
+            while len(cited) < min(references, index):
+                # Moitié uniforme, moitié proportionnelle aux citations déjà reçues
+                cited.add(rng.choice(targets) if targets and rng.random() < 0.5
+                          else paper_name(rng.randrange(index)))
+        targets.extend(cited)
+        yield paper_id, cited
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du graphe de citations")
+    parser.add_argument("--papers", type=int, default=100000)
+    parser.add_argument("--references", type=int, default=30, help="Références par article")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        graph = CitationGraph(directory)
+        start = time.perf_counter()
+        batch = {}
+        for paper_id, cited in synthetic_references(rng, args.papers, args.references):
+            batch[paper_id] = cited
+            if len(batch) == 5000:
+                graph.add_many(batch)
+                batch = {}
+        graph.add_many(batch)
+        ingest_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        meta = graph.compile()
+        compile_s = time.perf_counter() - start
+        csr_bytes = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+                        if name.endswith(".npy"))
+
+        start = time.perf_counter()
+        graph.related(["2000.00042"])
+        load_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{meta['nodes']} articles, {meta['edges']} citations : enregistrement {ingest_s:.1f} s, "
+              f"compilation CSR {compile_s:.2f} s ({csr_bytes / 1e6:.1f} Mo), premier appel {load_ms:.0f} ms")
+        print(f"{'profondeur':>10}{'départ':>8}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}")
+        for depth in (1, 2):
+            for seeds in (1, 3):
+                latencies = []
+                for _ in range(args.queries):
+                    ids = [paper_name(rng.randrange(args.papers)) for _ in range(seeds)]
+                    start = time.perf_counter()
+                    graph.related(ids, depth=depth, k=10)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                print(f"{depth:>10}{seeds:>8}{percentile(latencies, 0.5):>10.2f}"
+                      f"{percentile(latencies, 0.95):>10.2f}{percentile(latencies, 0.99):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de la fusion des requêtes identiques (lib.coalescing).
+
+Simule `--requests` requêtes simultanées réparties sur `--distinct` questions
+différentes (une question tendance posée par beaucoup d'utilisateurs). Chaque
+requête exécutée enchaîne `--llm-calls` appels LLM de `--llm-latency`
+secondes, sous un plafond de `--concurrency` appels simultanés (comme
+l'ordonnanceur). Compare threads et asyncio, avec et sans fusion : durée
+totale, latences p50/p95 et nombre de requêtes réellement exécutées.
+
+Usage:
+    python benchmarks/bench_coalescing.py --requests 100 --distinct 1 5 20 100
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from lib import coalescing
+from lib.coalescing import SingleFlight, make_key
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run_threads(questions, args):
+    flight = SingleFlight("bench")
+    slots = threading.BoundedSemaphore(args.concurrency)
+    durations = [0.0] * len(questions)
+
+    def pipeline(question):
+        for _ in range(args.llm_calls):
+            with slots:
+                time.sleep(args.llm_latency)
+        return f"réponse à {question}"
+
+    def request(index):
+        start = time.perf_counter()
+        flight.do(make_key("process_query", questions[index]), pipeline, questions[index])
+        durations[index] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=request, args=(index,)) for index in range(len(questions))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, durations, flight.stats()
+
+
+def run_async(questions, args):
+    flight = SingleFlight("bench")
+
+    async def main():
+        slots = asyncio.Semaphore(args.concurrency)
+
+        async def pipeline(question):
+            for _ in range(args.llm_calls):
+                async with slots:
+                    await asyncio.sleep(args.llm_latency)
+            return f"réponse à {question}"
+
+        async def request(question):
+            start = time.perf_counter()
+            await flight.ado(make_key("process_query", question), pipeline, question)
+            return time.perf_counter() - start
+
+        return await asyncio.gather(*[request(question) for question in questions])
+
+    start = time.perf_counter()
+    durations = asyncio.run(main())
+    return time.perf_counter() - start, list(durations), flight.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la fusion des requêtes identiques")
+    parser.add_argument("--requests", type=int, default=100, help="Requêtes simultanées")
+    parser.add_argument("--distinct", type=int, nargs="+", default=[1, 5, 20, 100],
+                        help="Nombres de questions différentes parmi les requêtes")
+    parser.add_argument("--llm-calls", type=int, default=5, help="Appels LLM par requête exécutée")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Latence d'un appel LLM (s)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Appels LLM simultanés (ordonnanceur)")
+    args = parser.parse_args()
+
+    print(f"{args.requests} requêtes, {args.llm_calls} appels LLM de {args.llm_latency:.2f} s par requête, "
+          f"{args.concurrency} appels simultanés au plus")
+    print(f"{'questions':>10}{'mode':>9}{'fusion':>8}{'exécutées':>11}{'durée (s)':>11}{'p50 (s)':>9}{'p95 (s)':>9}")
+    for distinct in args.distinct:
+        rng = random.Random(0)
+        questions = [f"question {rng.randrange(distinct)}" for _ in range(args.requests)]
+        for mode, run in (("threads", run_threads), ("asyncio", run_async)):
+            for enabled in (False, True):
+                coalescing.COALESCE = enabled
+                wall, durations, stats = run(questions, args)
+                executed = stats["leaders"] if enabled else len(questions)
+                print(f"{distinct:>10}{mode:>9}{'oui' if enabled else 'non':>8}{executed:>11}{wall:>11.2f}"
+                      f"{percentile(durations, 0.5):>9.2f}{percentile(durations, 0.95):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
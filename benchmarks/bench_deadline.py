@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Plans retenus par le planificateur d'échéance (lib.latency_planner) selon le budget.
+
+Enregistre `--requests` requêtes simulées dans une base de durées temporaire
+(durées tirées d'une loi log-normale autour de `--llm-latency` par tâche LLM),
+puis affiche, pour chaque budget, la durée prévue et les allègements retenus,
+ainsi que le coût de la planification elle-même.
+
+Usage:
+    python benchmarks/bench_deadline.py --budgets 120 60 40 25 15 8 --papers 8
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from lib.latency_planner import DeadlinePlanner, StageTimings
+
+# Appels LLM par étape (relatifs à --llm-latency) ; arxiv_search et extractive sont locales
+STAGE_FACTORS = {
+    "query_parser": 0.5,
+    "paper_analysis": 1.0,
+    "summary": 1.5,
+    "synthesis": 1.5,
+    "translation": 2.0,
+    "professor": 2.0,
+    "final_formatting": 1.5,
+}
+
+
+def record_history(timings, requests, llm_latency, search_latency, papers):
+    rng = random.Random(0)
+    for _ in range(requests):
+        durations = {stage: [llm_latency * factor * rng.lognormvariate(0, 0.3)]
+                     for stage, factor in STAGE_FACTORS.items()}
+        durations["paper_analysis"] = [llm_latency * rng.lognormvariate(0, 0.3) for _ in range(papers)]
+        durations["arxiv_search"] = [search_latency * rng.lognormvariate(0, 0.2)]
+        durations["extractive"] = [0.05 * rng.lognormvariate(0, 0.2)]
+        timings.record_many(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plans du planificateur d'échéance selon le budget")
+    parser.add_argument("--budgets", type=float, nargs="+", default=[120, 60, 40, 25, 15, 8])
+    parser.add_argument("--papers", type=int, default=8, help="Articles demandés")
+    parser.add_argument("--workers", type=int, default=4, help="Analyses simultanées (stream_workers)")
+    parser.add_argument("--translation", choices=["direct", "merged", "separate"], default="separate")
+    parser.add_argument("--requests", type=int, default=50, help="Requêtes simulées enregistrées")
+    parser.add_argument("--llm-latency", type=float, default=6.0, help="Latence médiane d'un appel LLM (s)")
+    parser.add_argument("--search-latency", type=float, default=2.0, help="Durée de la recherche ArXiv (s)")
+    args = parser.parse_args()
+
+    timings = StageTimings(os.path.join(tempfile.mkdtemp(prefix="arxivbuddy_bench_"), "timings.db"))
+    record_history(timings, args.requests, args.llm_latency, args.search_latency, args.papers)
+    planner = DeadlinePlanner(timings)
+
+    print("Durées prévues: " + ", ".join(f"{stage} {seconds:.1f} s" for stage, seconds in timings.estimates().items()))
+    print(f"{'budget (s)':>11}{'prévu (s)':>11}{'articles':>10}  allègements")
+    for budget in args.budgets:
+        plan = planner.plan(budget, max_results=args.papers, translation=args.translation, workers=args.workers)
+        print(f"{budget:>11.0f}{plan.estimate:>11.1f}{plan.max_results:>10}  "
+              + ("; ".join(plan.degradations) or "pipeline complet"))
+
+    rounds = 200
+    start = time.perf_counter()
+    for _ in range(rounds):
+        planner.plan(args.budgets[-1], max_results=args.papers, translation=args.translation, workers=args.workers)
+    print(f"\nPlanification: {(time.perf_counter() - start) / rounds * 1000:.2f} ms par requête")
+
+
+if __name__ == "__main__":
+    main()
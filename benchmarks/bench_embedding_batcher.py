@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark du regroupement des encodages concurrents (lib.embedding_batcher).
+
+`--callers` threads encodent chacun `--calls` petites listes de `--texts`
+textes (une question, quelques passages), comme les outils et mémoires de
+plusieurs équipages simultanés. Compare un encodage par appel (chaque thread
+appelle le modèle) au thread d'encodage partagé : débit (textes/s), latence
+p50/p95 d'un appel, et taille des lots effectivement encodés.
+
+Sans `--model`, le modèle est une pile de couches denses NumPy de la taille
+de multilingual-e5-small (coût dominé, comme un transformeur sur CPU, par la
+lecture des poids à chaque appel) ; avec `--model`, un modèle
+SentenceTransformers réel est chargé.
+
+Usage:
+    python benchmarks/bench_embedding_batcher.py --callers 1 4 16 32 --texts 2
+    python benchmarks/bench_embedding_batcher.py --model intfloat/multilingual-e5-small
+"""
+
+import os
+import sys
+import time
+import zlib
+import argparse
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from lib.embedding_batcher import EMBED_BATCH_WINDOW_MS, EMBED_MAX_BATCH, EmbeddingBatcher
+
+
+class DenseModel:
+    """Couches denses NumPy : 12 couches 384 → 1536 → 384, comme e5-small, sur un vecteur par texte."""
+
+    def __init__(self, dimension=384, hidden=1536, layers=12):
+        rng = np.random.default_rng(0)
+        self.layers = [(rng.standard_normal((dimension, hidden), dtype=np.float32) / np.sqrt(dimension),
+                        rng.standard_normal((hidden, dimension), dtype=np.float32) / np.sqrt(hidden))
+                       for _ in range(layers)]
+        self.dimension = dimension
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        x = np.stack([np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(
+            self.dimension, dtype=np.float32) for text in texts])
+        for up, down in self.layers:
+            x = x + np.maximum(x @ up, 0) @ down
+        return x
+
+
+def load_model(name):
+    if not name:
+        return DenseModel()
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run(callers, args, encode):
+    latencies = []
+    lock = threading.Lock()
+
+    def caller(index):
+        local = []
+        for call in range(args.calls):
+            texts = [f"passage: appelant {index} appel {call} texte {i}" for i in range(args.texts)]
+            start = time.perf_counter()
+            encode(texts)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=caller, args=(index,)) for index in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du regroupement des encodages")
+    parser.add_argument("--callers", type=int, nargs="+", default=[1, 4, 16, 32], help="Appelants simultanés")
+    parser.add_argument("--calls", type=int, default=50, help="Appels par appelant")
+    parser.add_argument("--texts", type=int, default=2, help="Textes par appel")
+    parser.add_argument("--window-ms", type=float, default=EMBED_BATCH_WINDOW_MS)
+    parser.add_argument("--max-batch", type=int, default=EMBED_MAX_BATCH)
+    parser.add_argument("--model", help="Modèle SentenceTransformers (par défaut: couches denses NumPy)")
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    model.encode(["passage: échauffement"])
+
+    print(f"{args.texts} textes par appel, fenêtre {args.window_ms:.1f} ms, lots de {args.max_batch} textes au plus")
+    print(f"{'appelants':>10}{'mode':>10}{'textes/s':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'lot moyen':>11}"
+          f"{'file max':>10}")
+    for callers in args.callers:
+        wall, latencies = run(callers, args, lambda texts: model.encode(texts, convert_to_numpy=True))
+        texts = callers * args.calls * args.texts
+        print(f"{callers:>10}{'par appel':>10}{texts / wall:>10.0f}{percentile(latencies, 0.5) * 1000:>10.1f}"
+              f"{percentile(latencies, 0.95) * 1000:>10.1f}{args.texts:>11.1f}{'-':>10}")
+
+        batcher = EmbeddingBatcher(lambda batch, size: model.encode(batch, batch_size=size, convert_to_numpy=True),
+                                   window_ms=args.window_ms, max_batch=args.max_batch)
+        wall, latencies = run(callers, args, batcher.encode)
+        stats = batcher.stats()
+        print(f"{callers:>10}{'en lots':>10}{texts / wall:>10.0f}{percentile(latencies, 0.5) * 1000:>10.1f}"
+              f"{percentile(latencies, 0.95) * 1000:>10.1f}{stats['mean_batch']:>11.1f}{stats['max_queue_depth']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de la file de travaux (lib.job_queue).
+
+Dépose des travaux dans une file neuve, puis lance 1, 2, 4... processus
+workers (un processus par « machine ») et mesure le débit jusqu'à ce que la
+file soit vide. Chaque travail simule un process_query limité par les appels
+LLM : une attente tirée d'une loi log-normale autour de `--job-latency`.
+Avec `--backend http`, les workers passent par le broker HTTP comme des
+machines distantes.
+
+Usage:
+    python benchmarks/bench_job_queue.py --jobs 200 --workers 1,2,4,8 --backend http
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+import argparse
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from lib.job_queue import SQLiteJobQueue, Worker, open_queue, start_broker
+
+
+def simulated_query(payload):
+    """Travail simulé : durée d'un pipeline limité par le LLM, sans calcul local."""
+    latency = payload["latency"] * random.lognormvariate(0, 0.25)
+    time.sleep(latency)
+    return {"answer": f"Réponse simulée à {payload['query']}", "elapsed": latency}
+
+
+def worker_process(spec, ready, start):
+    queue = open_queue(spec)
+    worker = Worker(queue, simulated_query, poll_interval=0.02, lease_seconds=30)
+    # Démarrage simultané, une fois tous les processus importés
+    ready.set()
+    start.wait()
+    worker.run(idle_timeout=0.5)
+
+
+def run(spec, queue, jobs, workers, latency):
+    job_ids = [queue.enqueue({"query": f"question {i}", "latency": latency}) for i in range(jobs)]
+    context = multiprocessing.get_context("spawn")
+    start = context.Event()
+    readies = [context.Event() for _ in range(workers)]
+    processes = [context.Process(target=worker_process, args=(spec, ready, start)) for ready in readies]
+    for process in processes:
+        process.start()
+    for ready in readies:
+        ready.wait()
+    began = time.perf_counter()
+    start.set()
+    while sum(queue.stats()[status] for status in ("done", "failed")) < jobs:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - began
+    for process in processes:
+        process.join()
+    assert all(queue.get(job_id)["status"] == "done" for job_id in job_ids)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la file de travaux")
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--workers", default="1,2,4,8", help="Nombres de workers, séparés par des virgules")
+    parser.add_argument("--job-latency", type=float, default=0.2, help="Durée médiane d'un travail (s)")
+    parser.add_argument("--backend", choices=["sqlite", "http"], default="sqlite")
+    args = parser.parse_args()
+
+    counts = [int(count) for count in args.workers.split(",")]
+    print(f"{args.jobs} travaux de ~{args.job_latency * 1000:.0f} ms, file {args.backend}")
+    print(f"{'workers':>8}{'durée (s)':>12}{'travaux/s':>12}{'accélération':>14}{'efficacité':>12}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in counts:
+            queue = SQLiteJobQueue(os.path.join(tmp, f"jobs_{args.backend}_{count}.db"))
+            broker = None
+            spec = queue.db_path
+            if args.backend == "http":
+                broker = start_broker(queue)
+                spec = f"http://127.0.0.1:{broker.server_address[1]}"
+            elapsed = run(spec, queue, args.jobs, count, args.job_latency)
+            if broker:
+                broker.shutdown()
+            throughput = args.jobs / elapsed
+            baseline = baseline or throughput / count
+            speedup = throughput / baseline
+            print(f"{count:>8}{elapsed:>12.2f}{throughput:>12.1f}{speedup:>13.2f}x{speedup / count:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de l'ordonnanceur des appels LLM (lib.llm_scheduler).
+
+Lance le faux serveur compatible OpenAI (fake_llm_server.py) avec une traîne
+lente et des erreurs transitoires, puis envoie des appels concurrents :
+- directement (sans ordonnanceur) ;
+- via l'ordonnanceur sans hedging (plafonds + nouvelles tentatives) ;
+- via l'ordonnanceur avec hedging.
+
+Le client HTTP est litellm s'il est installé (`--client litellm`), sinon un
+client urllib minimal qui lève les mêmes types d'erreurs transitoires.
+
+Usage:
+    python benchmarks/bench_llm_scheduler.py --calls 600 --tail-rate 0.02
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lib.llm_scheduler import LLMScheduler, DeadlineExceeded, deadline
+from fake_llm_server import start_server
+
+
+def urllib_completion(base_url: str):
+    """Fonction d'appel minimale au format de litellm.completion."""
+    def completion(model, messages, timeout=None, **kwargs):
+        request = urllib.request.Request(
+            f"{base_url}/chat/completions",
+            data=json.dumps({"model": model, "messages": messages}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=timeout or 30) as response:
+            return json.loads(response.read())
+    return completion
+
+
+def litellm_completion(base_url: str):
+    import litellm
+
+    def completion(model, messages, timeout=None, **kwargs):
+        return litellm.completion(model=f"openai/{model}", messages=messages, timeout=timeout,
+                                  api_base=base_url, api_key="fake")
+    return completion
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] if values else float("nan")
+
+
+def run(label, call, calls, concurrency, deadline_seconds):
+    """Envoie `calls` appels avec `concurrency` clients et mesure les latences."""
+    latencies, errors = [], 0
+
+    def one(_):
+        start = time.perf_counter()
+        try:
+            with deadline(deadline_seconds):
+                call(model="fake", messages=[{"role": "user", "content": "Bonjour"}])
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, e
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, error in pool.map(one, range(calls)):
+            if error is None:
+                latencies.append(latency)
+            else:
+                errors += 1
+    total = time.perf_counter() - start
+    print(f"{label:<26}{percentile(latencies, 0.5) * 1000:>9.0f}{percentile(latencies, 0.95) * 1000:>9.0f}"
+          f"{percentile(latencies, 0.99) * 1000:>9.0f}{errors:>8}{total:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'ordonnanceur des appels LLM")
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--median-latency", type=float, default=0.1)
+    parser.add_argument("--tail-rate", type=float, default=0.02)
+    parser.add_argument("--tail-latency", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.03)
+    parser.add_argument("--deadline", type=float, default=10.0, help="Échéance de chaque appel (secondes)")
+    parser.add_argument("--client", choices=["auto", "litellm", "urllib"], default="auto")
+    args = parser.parse_args()
+
+    server = start_server(median_latency=args.median_latency, tail_rate=args.tail_rate,
+                          tail_latency=args.tail_latency, error_rate=args.error_rate)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    client = args.client
+    if client == "auto":
+        try:
+            import litellm  # noqa: F401
+            client = "litellm"
+        except ImportError:
+            client = "urllib"
+    completion = litellm_completion(base_url) if client == "litellm" else urllib_completion(base_url)
+
+    print(f"{args.calls} appels, {args.concurrency} clients, client {client}, "
+          f"traîne {args.tail_rate:.0%} à {args.tail_latency:.1f} s, erreurs {args.error_rate:.0%}")
+    print(f"{'':<26}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'échecs':>8}{'total s':>10}")
+
+    run("direct", completion, args.calls, args.concurrency, args.deadline)
+
+    for label, hedge in (("ordonnanceur", False), ("ordonnanceur + hedging", True)):
+        # Marge de 50 % au-dessus du nombre de clients pour les doublons
+        limit = args.concurrency + args.concurrency // 2
+        scheduler = LLMScheduler(max_concurrency=limit, default_model_concurrency=limit,
+                                 max_retries=3, backoff_base=0.05, hedge=hedge,
+                                 hedge_min_samples=20, hedge_min_delay=0.0)
+        requests_before = server.requests
+        run(label, lambda **params: scheduler.call(completion, **params),
+            args.calls, args.concurrency, args.deadline)
+        stats = scheduler.stats()
+        print(f"{'':<26}requêtes serveur {server.requests - requests_before}, "
+              f"nouvelles tentatives {stats['retries']}, doublons {stats['hedges']} "
+              f"({stats['hedge_wins']} gagnants)")
+
+    print(f"Concurrence maximale observée par le serveur: {server.max_active}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
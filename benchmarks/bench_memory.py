@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark du budget mémoire (lib.memory_budget).
+
+Mesure la mémoire résidente (RSS) d'un processus soumis à une charge continue
+de recherches sémantiques (encodage de la question puis recherche dans l'index
+du corpus), par cycles de `--active` secondes de requêtes à `--qps` suivis de
+`--idle` secondes sans requête, dans deux profils :
+- défaut : multilingual-e5-large, graphe HNSW chargé, jamais libéré ;
+- basse mémoire : e5-small quantifié, recherche exacte sur les vecteurs mappés,
+  libération après `--idle-unload` secondes d'inactivité.
+
+Chaque profil tourne dans un processus neuf. Sans sentence-transformers,
+l'embedder est simulé : ses poids sont alloués à la taille réelle du modèle
+(`--large-mb`, `--small-mb`) et son chargement dure `--load-seconds-per-gb`
+par Go, les vecteurs sont pseudo-aléatoires.
+
+Usage:
+    python benchmarks/bench_memory.py --vectors 20000 --cycles 3 --active 10 --idle 15
+"""
+
+import os
+import sys
+import time
+import zlib
+import tempfile
+import argparse
+import threading
+import multiprocessing
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from lib.memory_budget import UsageTracker, get_reaper, release_memory, reset_peak_rss, rss_bytes, peak_rss_bytes
+
+PROFILES = {
+    "défaut": {"low_memory": False, "dimension": 1024, "weights": "large_mb", "dtype": np.float32},
+    "basse mémoire": {"low_memory": True, "dimension": 384, "weights": "small_mb", "dtype": np.int8},
+}
+
+
+class SimulatedEmbedder(UsageTracker):
+    """Embedder dont seule l'empreinte mémoire et la durée de chargement sont réalistes."""
+
+    def __init__(self, dimension, weight_mb, dtype, load_seconds_per_gb):
+        self._dimension = dimension
+        self.weight_mb = weight_mb
+        self.dtype = dtype
+        self.load_seconds = weight_mb / 1024 * load_seconds_per_gb
+        self.loads = 0
+        self._weights = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._weights is not None
+
+    def dimension(self):
+        return self._dimension
+
+    def _acquire(self):
+        with self._lock:
+            if self._weights is None:
+                time.sleep(self.load_seconds)
+                # np.ones écrit chaque page : la mémoire est réellement résidente
+                self._weights = np.ones(int(self.weight_mb * 1024 * 1024) // np.dtype(self.dtype).itemsize,
+                                        dtype=self.dtype)
+                self.loads += 1
+            self._begin()
+            return self._weights
+
+    def encode(self, texts, prefix="passage", batch_size=32):
+        weights = self._acquire()
+        try:
+            vectors = []
+            for text in texts:
+                rng = np.random.default_rng(zlib.crc32(f"{prefix}: {text}".encode("utf-8")))
+                vectors.append(rng.standard_normal(self._dimension, dtype=np.float32))
+            # Parcours d'une partie des poids, comme une passe avant
+            weights[::4096].sum()
+        finally:
+            with self._lock:
+                self._end()
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def unload(self):
+        with self._lock:
+            if self._weights is None or self._active:
+                return False
+            self._weights = None
+        release_memory()
+        return True
+
+
+def make_embedder(profile, args):
+    if args.embedder == "real":
+        from lib.custom_embedder import get_embedder
+        return get_embedder()
+    embedder = SimulatedEmbedder(profile["dimension"], getattr(args, profile["weights"]), profile["dtype"],
+                                 args.load_seconds_per_gb)
+    get_reaper().register("embedder", embedder)
+    return embedder
+
+
+def run_profile(name, args, results):
+    """Processus d'un profil : construction de l'index, puis charge cyclique."""
+    profile = PROFILES[name]
+    os.environ["ARXIVBUDDY_LOW_MEMORY"] = "1" if profile["low_memory"] else ""
+    os.environ["MODEL_IDLE_SECONDS"] = str(args.idle_unload if profile["low_memory"] else 0)
+    os.environ["ARXIVBUDDY_CACHE_DIR"] = tempfile.mkdtemp(prefix="arxivbuddy_bench_")
+    from lib.vector_index import VectorIndex
+
+    embedder = make_embedder(profile, args)
+    dimension = embedder.dimension()
+    index = VectorIndex(os.path.join(os.environ["ARXIVBUDDY_CACHE_DIR"], "ann"), dimension)
+    rng = np.random.default_rng(0)
+    for start in range(0, args.vectors, 5000):
+        count = min(5000, args.vectors - start)
+        index.add(range(start + 1, start + count + 1), rng.standard_normal((count, dimension), dtype=np.float32),
+                  save=False)
+    index.save()
+    # État de départ : un worker qui vient de démarrer, index sur disque
+    index.unload()
+    release_memory()
+    reset_peak_rss()
+    baseline = rss_bytes()
+
+    samples = {"active": [], "idle": []}
+    state = {"phase": "active"}
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(0.1):
+            samples[state["phase"]].append(rss_bytes())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    latencies = []
+    for cycle in range(args.cycles):
+        state["phase"] = "active"
+        end = time.perf_counter() + args.active
+        query = 0
+        while time.perf_counter() < end:
+            begin = time.perf_counter()
+            vector = embedder.encode([f"question {cycle}-{query}"], prefix="query")
+            index.search(vector, k=10)
+            latencies.append(time.perf_counter() - begin)
+            query += 1
+            time.sleep(max(1 / args.qps - (time.perf_counter() - begin), 0))
+        state["phase"] = "idle"
+        time.sleep(args.idle)
+    stop.set()
+    sampler.join()
+
+    latencies.sort()
+    results.put((name, {
+        "baseline": baseline,
+        "peak": peak_rss_bytes(),
+        "active": float(np.mean(samples["active"])) if samples["active"] else 0.0,
+        "idle_end": samples["idle"][-1] if samples["idle"] else 0,
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[int(len(latencies) * 0.99)],
+        "loads": getattr(embedder, "loads", 0),
+        "unloads": get_reaper().unloads,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du budget mémoire")
+    parser.add_argument("--vectors", type=int, default=20000, help="Taille du corpus indexé")
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--active", type=float, default=10.0, help="Durée d'une période de requêtes (s)")
+    parser.add_argument("--idle", type=float, default=15.0, help="Durée d'une période sans requête (s)")
+    parser.add_argument("--qps", type=float, default=5.0, help="Requêtes par seconde pendant les périodes actives")
+    parser.add_argument("--idle-unload", type=float, default=5.0,
+                        help="Délai de libération du profil basse mémoire (s, MODEL_IDLE_SECONDS)")
+    parser.add_argument("--embedder", choices=["simulated", "real"], default="simulated")
+    parser.add_argument("--large-mb", type=float, default=2240.0, help="Poids simulés de e5-large (float32)")
+    parser.add_argument("--small-mb", type=float, default=410.0,
+                        help="Poids simulés de e5-small quantifié (couches linéaires int8, plongements float32)")
+    parser.add_argument("--load-seconds-per-gb", type=float, default=1.5)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    mb = 1024 * 1024
+    print(f"{args.vectors} vecteurs, {args.cycles} cycles de {args.active:.0f} s à {args.qps:.0f} req/s "
+          f"puis {args.idle:.0f} s d'inactivité, embedder {args.embedder}")
+    print(f"{'profil':<15}{'départ':>9}{'charge':>9}{'pic':>9}{'repos':>9}{'p50 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'chargements':>13}")
+    for name in PROFILES:
+        process = context.Process(target=run_profile, args=(name, args, results))
+        process.start()
+        _, stats = results.get()
+        process.join()
+        print(f"{name:<15}{stats['baseline'] / mb:>8.0f}M{stats['active'] / mb:>8.0f}M{stats['peak'] / mb:>8.0f}M"
+              f"{stats['idle_end'] / mb:>8.0f}M{stats['p50'] * 1000:>10.1f}{stats['p99'] * 1000:>10.1f}"
+              f"{stats['loads']:>13}")
+    print("RSS en Mo : au départ (index sur disque), moyenne sous charge, pic, fin de période d'inactivité")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de la représentation des articles (lib.paper).
+
+Compare, pour un corpus synthétique, les anciens dictionnaires d'articles et
+les objets Paper : mémoire occupée (tracemalloc) et coût de sérialisation
+(JSON contre pack_papers, msgpack ou marshal selon l'installation, utilisé
+pour les articles des réponses archivées).
+
+Usage:
+    python benchmarks/bench_paper.py --papers 100000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from lib.paper import Paper, pack_papers, unpack_papers, msgpack
+
+CATEGORIES = ["cs.AI", "cs.CL", "cs.LG", "cs.CV", "stat.ML", "q-bio.QM", "physics.comp-ph"]
+
+
+def synthetic_dicts(count: int, rng: random.Random) -> list:
+    """Dictionnaires au format des outils (chaînes non partagées, comme après décodage JSON)."""
+    authors = [f"Author {i}" for i in range(count // 4 + 1)]
+    papers = []
+    for i in range(count):
+        papers.append({
+            "title": f"Paper {i} on " + " ".join(rng.choice(["deep", "graph", "protein", "language"]) for _ in range(6)),
+            "authors": ["".join(rng.choice(authors)) for _ in range(rng.randint(2, 8))],
+            "published_date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "arxiv_id": f"24{rng.randint(1, 12):02d}.{i:05d}",
+            "url": f"https://arxiv.org/abs/24{rng.randint(1, 12):02d}.{i:05d}v1",
+            "pdf_url": f"https://arxiv.org/pdf/24{rng.randint(1, 12):02d}.{i:05d}v1",
+            "abstract": " ".join(rng.choice(["model", "data", "we", "propose", "results", "show"]) for _ in range(150)),
+            "categories": ["".join(c) for c in rng.sample(CATEGORIES, rng.randint(1, 3))],
+        })
+    return papers
+
+
+def measure(build):
+    """Mémoire allouée (Mo) et durée de construction d'une structure."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, size / 1024 / 1024, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la représentation des articles")
+    parser.add_argument("--papers", type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    payload = json.dumps(synthetic_dicts(args.papers, rng))
+
+    dicts, dict_mb, dict_time = measure(lambda: json.loads(payload))
+    papers, paper_mb, paper_time = measure(lambda: [Paper.from_dict(d) for d in json.loads(payload)])
+
+    start = time.perf_counter()
+    encoded_json = json.dumps(dicts, ensure_ascii=False).encode("utf-8")
+    json_dump = time.perf_counter() - start
+    start = time.perf_counter()
+    json.loads(encoded_json)
+    json_load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoded_papers = json.dumps([paper.to_dict() for paper in papers], ensure_ascii=False).encode("utf-8")
+    papers_dump = time.perf_counter() - start
+    start = time.perf_counter()
+    [Paper.from_dict(d) for d in json.loads(encoded_papers)]
+    papers_load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoded = pack_papers(papers)
+    pack_time = time.perf_counter() - start
+    start = time.perf_counter()
+    unpack_papers(encoded)
+    unpack_time = time.perf_counter() - start
+
+    backend = "msgpack" if msgpack is not None else "marshal"
+    print(f"{args.papers} articles")
+    print(f"{'':<22}{'mémoire (Mo)':>14}{'taille (Mo)':>14}{'écriture (s)':>14}{'lecture (s)':>14}")
+    print(f"{'dict + JSON':<22}{dict_mb:>14.1f}{len(encoded_json) / 1024 / 1024:>14.1f}"
+          f"{json_dump:>14.3f}{json_load:>14.3f}")
+    print(f"{'Paper + JSON':<22}{paper_mb:>14.1f}{len(encoded_papers) / 1024 / 1024:>14.1f}"
+          f"{papers_dump:>14.3f}{papers_load:>14.3f}")
+    print(f"{'Paper + ' + backend:<22}{paper_mb:>14.1f}{len(encoded) / 1024 / 1024:>14.1f}"
+          f"{pack_time:>14.3f}{unpack_time:>14.3f}")
+    print(f"(construction: dict {dict_time:.2f} s, Paper {paper_time:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
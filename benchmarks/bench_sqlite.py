@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Microbenchmark du débit SQLite en lecture/écriture sous contention multiprocessus.
+
+Compare la configuration par défaut de sqlite3 (journal rollback, une
+connexion et une transaction par écriture) à la couche `lib.sqlite_store`
+(WAL, pragmas ajustés, connexion réutilisée, écritures par lots).
+
+Usage:
+    python benchmarks/bench_sqlite.py --processes 4 --writes 2000 --reads 2000
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+import multiprocessing as mp
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from lib.sqlite_store import BatchWriter, SQLiteDatabase
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, worker INTEGER, payload TEXT)"
+INSERT = "INSERT INTO items (worker, payload) VALUES (?, ?)"
+SELECT = "SELECT COUNT(*), MAX(id) FROM items WHERE worker = ?"
+
+
+def _worker_default(path, worker, writes, reads, barrier, results):
+    """Écritures et lectures avec les réglages par défaut de sqlite3."""
+    barrier.wait()
+    errors = 0
+    start = time.perf_counter()
+    for i in range(writes):
+        try:
+            with sqlite3.connect(path, timeout=30) as conn:
+                conn.execute(INSERT, (worker, f"payload-{i}"))
+        except sqlite3.OperationalError:
+            errors += 1
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(reads):
+        with sqlite3.connect(path, timeout=30) as conn:
+            conn.execute(SELECT, (worker,)).fetchone()
+    results.put(("default", worker, write_time, time.perf_counter() - start, errors))
+
+
+def _worker_tuned(path, worker, writes, reads, barrier, results):
+    """Écritures par lots et lectures via SQLiteDatabase."""
+    database = SQLiteDatabase(path)
+    writer = BatchWriter(database, INSERT, batch_size=64)
+    barrier.wait()
+    start = time.perf_counter()
+    for i in range(writes):
+        writer.add((worker, f"payload-{i}"))
+    writer.flush()
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(reads):
+        database.query(SELECT, (worker,))
+    results.put(("tuned", worker, write_time, time.perf_counter() - start, 0))
+    database.close()
+
+
+def run(mode: str, processes: int, writes: int, reads: int) -> dict:
+    """Lance un scénario et retourne les débits agrégés."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute(SCHEMA)
+
+        target = _worker_default if mode == "default" else _worker_tuned
+        barrier = mp.Barrier(processes)
+        results = mp.Queue()
+        workers = [
+            mp.Process(target=target, args=(path, i, writes, reads, barrier, results))
+            for i in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        rows = [results.get() for _ in workers]
+        for process in workers:
+            process.join()
+
+    write_time = max(row[2] for row in rows)
+    read_time = max(row[3] for row in rows)
+    return {
+        "mode": mode,
+        "writes_per_s": processes * writes / write_time,
+        "reads_per_s": processes * reads / read_time,
+        "errors": sum(row[4] for row in rows),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite sous contention")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=1000)
+    parser.add_argument("--reads", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{args.processes} processus, {args.writes} écritures et {args.reads} lectures chacun")
+    print(f"{'mode':<10}{'écritures/s':>14}{'lectures/s':>14}{'erreurs':>10}")
+    for mode in ("default", "tuned"):
+        result = run(mode, args.processes, args.writes, args.reads)
+        print(f"{result['mode']:<10}{result['writes_per_s']:>14.0f}"
+              f"{result['reads_per_s']:>14.0f}{result['errors']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de la recherche et des analyses en flux (lib.streaming).
+
+Simule une recherche ArXiv paginée (`--page-latency` par page de
+`--page-size` résultats) et des analyses d'articles limitées par le LLM
+(`--analysis-latency`, loi log-normale), puis compare :
+- séquentiel : toute la recherche, la reformulation de la liste par le LLM
+  (`--restatement`), puis les analyses (mêmes workers) ;
+- en flux : analyses démarrées dès la lecture de chaque article.
+
+Usage:
+    python benchmarks/bench_streaming.py --papers 10 --page-size 5 --page-latency 1.5
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+import argparse
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+os.environ.setdefault("ARXIVBUDDY_CACHE_DIR", tempfile.mkdtemp(prefix="arxivbuddy_bench_"))
+
+from lib import streaming
+from lib.paper import Paper
+
+
+def fake_results(count, page_size, page_latency):
+    """Remplace iter_results : pages téléchargées à la demande, articles lus un à un."""
+    def iter_results(query, max_results, *args, predicate=None, **kwargs):
+        for index in range(min(count, max_results)):
+            if index % page_size == 0:
+                time.sleep(page_latency)
+            result = SimpleNamespace(
+                entry_id=f"http://arxiv.org/abs/2401.{index:05d}v1",
+                title=f"Article simulé {index}",
+                authors=[SimpleNamespace(name="A. Auteur")],
+                summary="Résumé simulé. " * 20,
+                published=datetime(2024, 1, 1),
+                pdf_url="",
+                categories=["cs.LG"],
+            )
+            if predicate is None or predicate(result):
+                yield result
+    return iter_results
+
+
+def make_analyze(latency):
+    """Analyse simulée : un appel LLM, sans calcul local."""
+    rng, rng_lock = random.Random(0), threading.Lock()
+
+    def analyze(paper):
+        with rng_lock:
+            delay = latency * rng.lognormvariate(0, 0.3)
+        time.sleep(delay)
+        return {"arxiv_id": paper["arxiv_id"], "main_findings": "..."}
+    return analyze
+
+
+def sequential(args, analyze):
+    start = time.perf_counter()
+    results = list(streaming.iter_results("requête", args.papers))
+    papers = [Paper.from_result(result).to_dict() for result in results]
+    time.sleep(args.restatement)
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        analyses = list(pool.map(analyze, papers))
+    return time.perf_counter() - start, len(analyses)
+
+
+def streamed(args, analyze):
+    start = time.perf_counter()
+    result = streaming.stream_search_analysis("requête", args.papers, analyze,
+                                              workers=args.workers, queue_size=args.queue_size)
+    return time.perf_counter() - start, len(result.analyses), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la recherche et des analyses en flux")
+    parser.add_argument("--papers", type=int, default=10)
+    parser.add_argument("--page-size", type=int, default=5)
+    parser.add_argument("--page-latency", type=float, default=1.5, help="Durée d'une page ArXiv (s)")
+    parser.add_argument("--analysis-latency", type=float, default=2.0, help="Durée médiane d'une analyse (s)")
+    parser.add_argument("--restatement", type=float, default=0.0,
+                        help="Reformulation de la liste par l'agent de recherche (s, séquentiel seulement)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=4)
+    args = parser.parse_args()
+
+    streaming.iter_results = fake_results(args.papers, args.page_size, args.page_latency)
+    analyze = make_analyze(args.analysis_latency)
+
+    sequential_s, sequential_count = sequential(args, analyze)
+    streamed_s, streamed_count, result = streamed(args, analyze)
+
+    print(f"{args.papers} articles, pages de {args.page_size} ({args.page_latency:.1f} s), "
+          f"analyses ~{args.analysis_latency:.1f} s, {args.workers} workers")
+    print(f"{'':<14}{'durée (s)':>12}{'analyses':>10}")
+    print(f"{'séquentiel':<14}{sequential_s:>12.2f}{sequential_count:>10}")
+    print(f"{'en flux':<14}{streamed_s:>12.2f}{streamed_count:>10}")
+    print(f"Premier article à {result.timings['first_paper']:.2f} s, recherche terminée à "
+          f"{result.timings['search']:.2f} s, gain {sequential_s - streamed_s:.2f} s "
+          f"({1 - streamed_s / sequential_s:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de la préparation d'une requête (lib.crew_templates).
+
+Mesure, pour les huit tâches du pipeline :
+- l'ancienne préparation (lecture de la configuration des prompts, format()
+  de chaque gabarit, table des publics reconstruite à chaque tâche) ;
+- la liaison des modèles précompilés (CrewTemplates.bind) ;
+- si CrewAI est installé, la construction des agents contre leur réutilisation.
+
+Usage:
+    python benchmarks/bench_templates.py --queries 20000
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from lib.config import get_config
+from lib.crew_templates import CrewTemplates
+
+QUERY = "Quelles sont les dernières avancées sur les modèles de diffusion pour la génération de protéines ?"
+
+
+def task_values(query: str, level: str) -> dict:
+    audience = {
+        "expert": "un chercheur spécialisé dans le domaine",
+        "medium": "un étudiant de master ou doctorant",
+        "beginner": "une personne avec des connaissances scientifiques de base"
+    }.get(level, "un étudiant de master")
+    return {
+        "query_parser": {"question": query},
+        "arxiv_search": {"max_results": 5},
+        "paper_analysis": {},
+        "summary": {"audience": audience},
+        "synthesis": {"audience": audience},
+        "translation": {"audience": audience},
+        "professor": {"query": query},
+        "final_formatting": {"query": query},
+    }
+
+
+def legacy_setup(config, query, level):
+    """Préparation d'une requête avant les modèles précompilés."""
+    tasks = []
+    for prompt_type, context in task_values(query, level).items():
+        prompt_config = config.get_prompt_config(prompt_type)
+        description = prompt_config.get("task_description", "").format(**context)
+        expected_output = prompt_config.get("expected_output", "")
+        if "{" in expected_output and "}" in expected_output:
+            expected_output = expected_output.format(**context)
+        tasks.append((description, expected_output))
+    return tasks
+
+
+def template_setup(templates, query, level):
+    """Préparation d'une requête avec les modèles précompilés."""
+    return [templates.task(prompt_type).bind(**context)
+            for prompt_type, context in task_values(query, level).items()]
+
+
+def timed(function, repeat, rounds=5):
+    """Durée moyenne d'un appel (µs), meilleure de plusieurs séries."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return best / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la préparation d'une requête")
+    parser.add_argument("--queries", type=int, default=20000)
+    args = parser.parse_args()
+
+    config = get_config()
+    start = time.perf_counter()
+    templates = CrewTemplates.from_config(config)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    assert legacy_setup(config, QUERY, "medium") == template_setup(templates, QUERY, "medium")
+
+    # Une question différente par requête, comme en usage serveur ou par lots
+    queries = [f"{QUERY} ({i})" for i in range(args.queries)]
+    legacy_iter, template_iter = iter(queries * 5), iter(queries * 5)
+    legacy_us = timed(lambda: legacy_setup(config, next(legacy_iter), "medium"), args.queries)
+    template_us = timed(lambda: template_setup(templates, next(template_iter), "medium"), args.queries)
+
+    print(f"Compilation des modèles (une fois): {compile_ms:.2f} ms")
+    print(f"{'gabarits, par requête':<34}{'µs':>10}")
+    print(f"{'ancienne préparation':<34}{legacy_us:>10.1f}")
+    print(f"{'modèles précompilés':<34}{template_us:>10.1f}")
+
+    try:
+        from crewai import Agent, LLM
+    except ImportError:
+        print("(CrewAI non installé : construction des agents non mesurée)")
+        return
+
+    llm = LLM(model="openai/gpt-4.1-mini", api_key="fake")
+    agent_types = [name for name in config.config.get("agents", {})]
+
+    def build_agents():
+        return [Agent(role=config.get_agent_config(name).get("role", ""),
+                      goal=config.get_agent_config(name).get("goal", ""),
+                      backstory=config.get_agent_config(name).get("backstory", ""),
+                      verbose=True, allow_delegation=False, llm=llm)
+                for name in agent_types]
+
+    cache = {}
+
+    def cached_agents():
+        if not cache:
+            cache["agents"] = build_agents()
+        return cache["agents"]
+
+    repeat = max(args.queries // 100, 10)
+    build_us = timed(build_agents, repeat)
+    cached_us = timed(cached_agents, repeat)
+    print(f"{'agents, par requête':<34}{'µs':>10}")
+    print(f"{'construits à chaque requête':<34}{build_us:>10.1f}")
+    print(f"{'réutilisés':<34}{cached_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
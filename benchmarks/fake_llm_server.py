@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Faux serveur LLM compatible OpenAI (bibliothèque standard uniquement).
+
+Répond à `POST /v1/chat/completions` avec une latence tirée d'une loi
+log-normale, une traîne lente (`--tail-rate`, `--tail-latency`) et un taux
+d'erreurs 429/503 (`--error-rate`). Il permet de tester l'ordonnanceur des
+appels LLM (lib.llm_scheduler) sans clé d'API : pointez le modèle
+`openai/fake` vers http://127.0.0.1:<port>/v1.
+
+Usage:
+    python benchmarks/fake_llm_server.py --port 8099 --tail-rate 0.05
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """Serveur HTTP multi-thread avec ses paramètres de latence et d'erreurs."""
+
+    daemon_threads = True
+
+    def __init__(self, address, median_latency: float = 0.2, sigma: float = 0.3,
+                 tail_rate: float = 0.0, tail_latency: float = 3.0, error_rate: float = 0.0,
+                 seed: int = 0):
+        super().__init__(address, _Handler)
+        self.median_latency = median_latency
+        self.sigma = sigma
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+
+    def draw(self):
+        """Tire la latence et le statut d'une réponse."""
+        with self.lock:
+            self.requests += 1
+            if self.rng.random() < self.error_rate:
+                return 0.01, self.rng.choice((429, 503))
+            if self.rng.random() < self.tail_rate:
+                return self.tail_latency, 200
+            return self.median_latency * self.rng.lognormvariate(0, self.sigma), 200
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        latency, status = server.draw()
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(latency)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+        if status != 200:
+            payload = {"error": {"message": "fake error", "type": "server_error", "code": status}}
+        else:
+            content = f"Réponse simulée ({latency * 1000:.0f} ms)"
+            payload = {
+                "id": f"chatcmpl-{server.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+            }
+        data = json.dumps(payload).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client parti (timeout côté client)
+            pass
+
+
+def start_server(port: int = 0, **settings) -> FakeLLMServer:
+    """
+    Démarre le faux serveur dans un thread.
+
+    Args:
+        port: Port d'écoute (0: port libre choisi par le système)
+        **settings: Paramètres de FakeLLMServer
+
+    Returns:
+        Serveur démarré (adresse dans `server_address`)
+    """
+    server = FakeLLMServer(("127.0.0.1", port), **settings)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Faux serveur LLM compatible OpenAI")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--median-latency", type=float, default=0.2)
+    parser.add_argument("--tail-rate", type=float, default=0.0)
+    parser.add_argument("--tail-latency", type=float, default=3.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(("127.0.0.1", args.port), median_latency=args.median_latency,
+                           tail_rate=args.tail_rate, tail_latency=args.tail_latency,
+                           error_rate=args.error_rate)
+    print(f"Faux serveur LLM sur http://127.0.0.1:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
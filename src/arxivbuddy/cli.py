@@ -10,7 +10,9 @@ depuis ArXiv en réponse à une question de l'utilisateur.
 
 import sys
 import os
+import time
 import argparse
+import contextlib
 from pathlib import Path
 import warnings
 from dotenv import load_dotenv
@@ -24,6 +26,24 @@ load_dotenv(dotenv_path=env_path)
 
 try:
     from lib.agents import ArxivAgents
+    from lib.cassette import open_cassette
+    from lib.profiling import profile_run, PROFILE_MODES
+    from lib.config import get_config
+    from lib.memory_maintenance import MemoryMaintenance
+    from lib.llm_routing import get_route_report
+    from lib.coalescing import coalescing_stats
+    from lib.custom_embedder import embedding_stats
+    from lib.llm_scheduler import get_scheduler
+    from lib.paper_store import get_paper_store, get_semantic_index
+    from lib.arxiv_api import ArxivSearcher
+    from lib.summarizer import Summarizer
+    from lib.utils import extract_json, extract_keywords, create_output_directory, sanitize_filename, save_results
+    from lib.watch import Watcher, get_watch_store
+    from lib.chat import ChatEngine
+    from lib.job_queue import QueryHandler, Worker, QueueBroker, open_queue, submit_query
+    from lib.archive import get_archive
+    from lib.citation_graph import get_citation_graph
+    from lib.memory_budget import enable_low_memory, get_reaper, memory_snapshot
     
     # Vérifier que les modules nécessaires sont installés
     import crewai
@@ -35,9 +55,501 @@ except ImportError as e:
     print("Assurez-vous d'activer l'environnement virtuel : source venv/bin/activate")
     sys.exit(1)
 
+def _print_cassette_report(cassette, elapsed: float):
+    """
+    Affiche le bilan d'une exécution enregistrée ou rejouée.
+    
+    Args:
+        cassette: Cassette utilisée pendant l'exécution
+        elapsed: Durée totale de `process_query` en secondes
+    """
+    stats = cassette.summary()
+    network = sum(kind["elapsed"] for kind in stats.values())
+    action = "enregistrée dans" if cassette.mode == "record" else "rejouée depuis"
+    print(f"\n📼 Cassette {action}: {cassette.path}")
+    for kind, values in stats.items():
+        print(f"   - {kind}: {values['count']} échanges, {values['elapsed']:.2f}s enregistrées")
+    print(f"   - Durée totale: {elapsed:.2f}s")
+    if cassette.mode == "replay" and cassette.latency == "zero":
+        print(f"   - Surcoût propre du pipeline: {elapsed:.2f}s")
+    else:
+        print(f"   - Surcoût propre du pipeline (estimé): {max(elapsed - network, 0.0):.2f}s")
+
+def _format_size(size: int) -> str:
+    """Formate une taille en octets de façon lisible."""
+    for unit in ["o", "Ko", "Mo", "Go"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} To"
+
+def memory_main(argv):
+    """
+    Sous-commande `arxivbuddy memory stats|compact|prune`.
+    
+    Args:
+        argv: Arguments de la ligne de commande après "memory"
+    """
+    parser = argparse.ArgumentParser(prog="arxivbuddy memory",
+                                     description="Maintenance des mémoires CrewAI d'ArxivBuddy")
+    parser.add_argument("action", choices=["stats", "compact", "prune"], help="Action à effectuer")
+    parser.add_argument("--path", help="Répertoire de mémoire (par défaut: CREWAI_STORAGE_DIR ou ./arxivbuddy_memory)")
+    parser.add_argument("--ttl-days", type=float, help="Durée de vie des entrées en jours")
+    parser.add_argument("--max-entries", type=int, help="Nombre maximal d'entrées par mémoire")
+    parser.add_argument("--dry-run", action="store_true", help="Affiche ce qui serait supprimé sans rien supprimer")
+    args = parser.parse_args(argv)
+    
+    maintenance = MemoryMaintenance.from_config(get_config(), storage_path=args.path)
+    if args.ttl_days is not None:
+        maintenance.ttl_days = args.ttl_days
+    if args.max_entries is not None:
+        maintenance.max_entries = args.max_entries
+    
+    try:
+        if args.action == "stats":
+            stats = maintenance.stats()
+            print(f"🧠 Mémoire: {stats['storage_path']}")
+            for name, size in stats["files"].items():
+                print(f"   - {name}: {_format_size(size)}")
+            for name, values in stats["memories"].items():
+                print(f"   • {name}: {values['entries']} entrées")
+            if stats.get("orphan_segments"):
+                print(f"   ⚠️ {len(stats['orphan_segments'])} segments HNSW orphelins (lancez 'compact')")
+        elif args.action == "prune":
+            removed = maintenance.prune(dry_run=args.dry_run)
+            verb = "à supprimer" if args.dry_run else "supprimées"
+            for name, counts in removed.items():
+                details = ", ".join(f"{reason}: {count}" for reason, count in counts.items())
+                print(f"🧹 {name}: {sum(counts.values())} entrées {verb} ({details})")
+        else:
+            result = maintenance.compact()
+            print(f"🗜️ Compaction terminée: {_format_size(result['bytes_before'])} → "
+                  f"{_format_size(result['bytes_after'])}")
+            if result["removed_segments"]:
+                print(f"   {len(result['removed_segments'])} segments orphelins supprimés")
+            if result["recovered"]:
+                print(f"   Compaction interrompue terminée: {', '.join(result['recovered'])}")
+    except Exception as e:
+        print(f"❌ Erreur lors de la maintenance de la mémoire: {str(e)}")
+        sys.exit(1)
+
+def corpus_main(argv):
+    """
+    Sous-commande `arxivbuddy corpus stats|sync|search`.
+    
+    Args:
+        argv: Arguments de la ligne de commande après "corpus"
+    """
+    parser = argparse.ArgumentParser(prog="arxivbuddy corpus",
+                                     description="Base locale des articles déjà rencontrés")
+    parser.add_argument("action", choices=["stats", "sync", "search"], help="Action à effectuer")
+    parser.add_argument("query", nargs="?", help="Question pour l'action 'search'")
+    parser.add_argument("-k", type=int, default=10, help="Nombre de résultats (par défaut: 10)")
+    parser.add_argument("--rebuild", action="store_true", help="Reconstruit le graphe HNSW ('sync')")
+    args = parser.parse_args(argv)
+    
+    if args.action == "search" and not args.query:
+        parser.error("l'action 'search' nécessite une question")
+    
+    try:
+        if args.action == "stats":
+            store = get_paper_store()
+            print(f"📚 Corpus: {store.db_path}")
+            print(f"   • {store.count()} articles enregistrés")
+        elif args.action == "sync":
+            index = get_semantic_index()
+            start = time.time()
+            added = index.sync()
+            if args.rebuild:
+                index.index.rebuild()
+            print(f"🧭 {added} articles indexés en {time.time() - start:.1f} s "
+                  f"({len(index.index)} au total)")
+        else:
+            start = time.time()
+            papers = get_semantic_index().search(args.query, k=args.k)
+            for paper in papers:
+                print(f"{paper['score']:.3f}  {paper['arxiv_id']}  {paper['title']}")
+            print(f"⏱️ {len(papers)} résultats en {(time.time() - start) * 1000:.0f} ms")
+    except Exception as e:
+        print(f"❌ Erreur lors de l'accès au corpus local: {str(e)}")
+        sys.exit(1)
+
+def citations_main(argv):
+    """
+    Sous-commande `arxivbuddy citations stats|sync|related`.
+    
+    Args:
+        argv: Arguments de la ligne de commande après "citations"
+    """
+    parser = argparse.ArgumentParser(prog="arxivbuddy citations",
+                                     description="Graphe local des citations entre articles")
+    parser.add_argument("action", choices=["stats", "sync", "related"], help="Action à effectuer")
+    parser.add_argument("papers", nargs="*", help="IDs ArXiv des articles de départ ('related')")
+    parser.add_argument("--depth", type=int, default=1, help="Niveaux d'expansion ('related', par défaut: 1)")
+    parser.add_argument("-k", type=int, default=10, help="Nombre de résultats (par défaut: 10)")
+    parser.add_argument("--full", action="store_true",
+                        help="Retraite tous les textes en cache ('sync'), par exemple après l'ajout d'articles")
+    args = parser.parse_args(argv)
+    
+    if args.action == "related" and not args.papers:
+        parser.error("l'action 'related' nécessite au moins un ID d'article")
+    
+    try:
+        graph = get_citation_graph()
+        if args.action == "stats":
+            stats = graph.stats()
+            print(f"🕸️ Graphe de citations: {graph.directory}")
+            print(f"   • {stats['sources']} articles analysés, {stats['nodes']} articles, {stats['edges']} citations")
+        elif args.action == "sync":
+            start = time.time()
+            processed = graph.sync(full=args.full)
+            meta = graph.compile()
+            print(f"🕸️ {processed} bibliographies analysées en {time.time() - start:.1f} s "
+                  f"({meta['nodes']} articles, {meta['edges']} citations)")
+        else:
+            start = time.perf_counter()
+            related = graph.related(args.papers, depth=args.depth, k=args.k)
+            elapsed = time.perf_counter() - start
+            known = get_paper_store().get_by_ids(entry["arxiv_id"] for entry in related)
+            for entry in related:
+                paper = known.get(entry["arxiv_id"])
+                details = ", ".join(f"{name} {value:g}" for name, value in entry.items()
+                                    if name not in ("arxiv_id", "score"))
+                print(f"{entry['score']:.3f}  {entry['arxiv_id']}  {paper.title if paper else '(hors corpus)'}"
+                      f"  [{details}]")
+            print(f"⏱️ {len(related)} articles liés en {elapsed * 1000:.1f} ms")
+    except Exception as e:
+        print(f"❌ Erreur du graphe de citations: {str(e)}")
+        sys.exit(1)
+
+def watch_main(argv):
+    """
+    Sous-commande `arxivbuddy watch add|list|run|show|remove`.
+    
+    Args:
+        argv: Arguments de la ligne de commande après "watch"
+    """
+    parser = argparse.ArgumentParser(prog="arxivbuddy watch",
+                                     description="Veille : digests incrémentaux des nouveaux articles")
+    parser.add_argument("action", choices=["add", "list", "run", "show", "remove"], help="Action à effectuer")
+    parser.add_argument("name", nargs="?", help="Nom de l'abonnement ('run' sans nom: tous)")
+    parser.add_argument("question", nargs="?", help="Question permanente pour l'action 'add'")
+    parser.add_argument("--categories", help="Catégories ArXiv séparées par des virgules (ex: cs.AI,cs.CL)")
+    parser.add_argument("--max-results", type=int, default=20,
+                        help="Nombre maximal de nouveaux articles par exécution (par défaut: 20)")
+    parser.add_argument("--level", choices=["expert", "medium", "beginner"], default="medium",
+                        help="Niveau de simplification des résumés")
+    parser.add_argument("--since-days", type=float,
+                        help="Période couverte par la première exécution, en jours (par défaut: WATCH_INITIAL_DAYS, 7)")
+    args = parser.parse_args(argv)
+    
+    if args.action in ("add", "show", "remove") and not args.name:
+        parser.error(f"l'action '{args.action}' nécessite un nom d'abonnement")
+    if args.action == "add" and not args.question:
+        parser.error("l'action 'add' nécessite une question")
+    
+    try:
+        store = get_watch_store()
+        watcher = Watcher(store)
+        if args.action == "add":
+            categories = [cat.strip() for cat in args.categories.split(",")] if args.categories else None
+            subscription = store.add(args.name, args.question, categories=categories,
+                                     max_results=args.max_results, level=args.level,
+                                     since_days=args.since_days)
+            print(f"👀 Abonnement '{args.name}' créé (requête ArXiv: {subscription['search_query']})")
+        elif args.action == "list":
+            subscriptions = store.list()
+            if not subscriptions:
+                print("Aucun abonnement.")
+            for subscription in subscriptions:
+                print(f"👀 {subscription['name']}: \"{subscription['question']}\" — "
+                      f"{subscription['papers']} articles, filigrane {subscription['watermark'][:16]} UTC")
+        elif args.action == "run":
+            names = [args.name] if args.name else [subscription["name"] for subscription in store.list()]
+            for name in names:
+                result = watcher.run(name)
+                output_path = os.path.join(create_output_directory(), f"watch_{sanitize_filename(name)}.md")
+                with open(output_path, "w", encoding="utf-8") as f:
+                    f.write(watcher.digest_markdown(name))
+                print(f"👀 {name}: {result['new_papers']} nouveaux articles en {result['elapsed']:.1f} s "
+                      f"→ {output_path}")
+                if result["more"]:
+                    print(f"⚠️ {name}: plafond d'articles atteint, les suivants seront traités à la prochaine exécution")
+        elif args.action == "show":
+            print(watcher.digest_markdown(args.name))
+        elif store.remove(args.name):
+            print(f"🗑️ Abonnement '{args.name}' supprimé")
+        else:
+            print(f"⚠️ Abonnement inconnu: {args.name}")
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Erreur lors de la veille: {str(e)}")
+        sys.exit(1)
+
+def chat_main(argv):
+    """
+    Sous-commande `arxivbuddy chat` : conversation qui réutilise les articles et analyses.
+    
+    Args:
+        argv: Arguments de la ligne de commande après "chat"
+    """
+    parser = argparse.ArgumentParser(prog="arxivbuddy chat",
+                                     description="Conversation de suivi sur les articles trouvés")
+    parser.add_argument("question", nargs="?", help="Question initiale (sinon demandée au clavier)")
+    parser.add_argument("--session", help="Reprend une session existante")
+    parser.add_argument("--list", action="store_true", help="Liste les sessions actives")
+    parser.add_argument("--max-results", type=int, default=5, help="Nombre maximum de papiers à récupérer")
+    parser.add_argument("--level", choices=["expert", "medium", "beginner"], default="medium",
+                        help="Niveau de simplification (expert, medium, beginner)")
+    parser.add_argument("--api-key", help="Clé API pour le modèle LLM (si non défini dans .env)")
+    parser.add_argument("--model", help="Nom du modèle LLM à utiliser (défini dans .env par défaut)")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="Profil basse mémoire : embedder réduit et quantifié, index mappés, "
+                             "libération des modèles inactifs")
+    args = parser.parse_args(argv)
+    
+    if args.low_memory:
+        enable_low_memory()
+    
+    try:
+        engine = ChatEngine(ArxivAgents(api_key=args.api_key, model=args.model))
+        if args.list:
+            sessions = engine.store.list()
+            if not sessions:
+                print("Aucune session active.")
+            for session_id, query, updated in sessions:
+                print(f"💬 {session_id}  {time.strftime('%Y-%m-%d %H:%M', time.localtime(updated))}  \"{query}\"")
+            return
+        
+        session = None
+        if args.session:
+            session = engine.store.load(args.session)
+            if session is None:
+                print(f"❌ Session inconnue ou expirée: {args.session}")
+                sys.exit(1)
+            print(f"💬 Reprise de la session {session.session_id} : \"{session.query}\"")
+        
+        print("Commandes : /papers (articles de la session), /new (nouvelle session), /quit")
+        question = args.question
+        while True:
+            if not question:
+                try:
+                    question = input("\n❓ ").strip()
+                except (EOFError, KeyboardInterrupt):
+                    print()
+                    break
+            if not question:
+                continue
+            if question in ("/quit", "/exit"):
+                break
+            if question == "/papers":
+                print(session.paper_list() if session and session.papers else "Aucun article dans la session.")
+            elif question == "/new":
+                session = None
+                print("💬 Nouvelle session : posez votre question de recherche.")
+            else:
+                start = time.perf_counter()
+                if session is None:
+                    session = engine.start(question, max_results=args.max_results, level=args.level)
+                    route, answer = "search", session.answer
+                else:
+                    route, answer = engine.ask(session, question, max_results=args.max_results)
+                print(f"\n{answer}")
+                print(f"\n⏱️ {route} en {time.perf_counter() - start:.1f} s — session {session.session_id}")
+            question = None
+    except Exception as e:
+        print(f"❌ Erreur lors de la conversation: {str(e)}")
+        sys.exit(1)
+
+def queue_main(argv):
+    """
+    Sous-commande `arxivbuddy queue submit|status|result|stats|worker|serve`.
+    
+    Args:
+        argv: Arguments de la ligne de commande après "queue"
+    """
+    parser = argparse.ArgumentParser(prog="arxivbuddy queue",
+                                     description="File de travaux : process_query sur plusieurs workers")
+    parser.add_argument("action", choices=["submit", "status", "result", "stats", "worker", "serve"],
+                        help="Action à effectuer")
+    parser.add_argument("argument", nargs="?", help="Question ('submit') ou identifiant du travail ('status', 'result')")
+    parser.add_argument("--queue", help="Base SQLite ou adresse du broker http://hôte:port "
+                                        "(par défaut: ARXIVBUDDY_QUEUE, puis la base locale)")
+    parser.add_argument("--max-results", type=int, default=5, help="Nombre maximum de papiers à récupérer")
+    parser.add_argument("--level", choices=["expert", "medium", "beginner"], default="medium",
+                        help="Niveau de simplification (expert, medium, beginner)")
+    parser.add_argument("--wait", action="store_true", help="'submit' : attend et affiche le résultat")
+    parser.add_argument("--deadline", type=float, metavar="SECONDES",
+                        help="'submit' : échéance de la réponse, attente dans la file comprise ; "
+                             "le worker allège le pipeline pour la tenir")
+    parser.add_argument("--max-jobs", type=int, help="'worker' : s'arrête après ce nombre de travaux")
+    parser.add_argument("--cache-dir", help="'worker' : répertoire de cache partagé (ARXIVBUDDY_CACHE_DIR)")
+    parser.add_argument("--api-key", help="'worker' : clé API pour le modèle LLM (si non défini dans .env)")
+    parser.add_argument("--model", help="'worker' : nom du modèle LLM à utiliser")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="'worker' : profil basse mémoire (embedder réduit et quantifié, index mappés, "
+                             "libération des modèles inactifs)")
+    parser.add_argument("--host", default="127.0.0.1", help="'serve' : adresse d'écoute (par défaut: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="'serve' : port d'écoute (par défaut: 8765)")
+    args = parser.parse_args(argv)
+    
+    if args.action in ("submit", "status", "result") and not args.argument:
+        parser.error(f"l'action '{args.action}' nécessite un argument")
+    if args.cache_dir:
+        os.environ["ARXIVBUDDY_CACHE_DIR"] = args.cache_dir
+    if args.low_memory:
+        enable_low_memory()
+    
+    try:
+        queue = open_queue(args.queue)
+        if args.action == "submit":
+            options = {"deadline_seconds": args.deadline, "adaptive": True} if args.deadline else {}
+            job_id = submit_query(queue, args.argument, max_results=args.max_results, level=args.level, **options)
+            print(f"📥 Travail {job_id} déposé")
+            if args.wait:
+                job = queue.wait(job_id)
+                print(job["result"]["answer"] if job["status"] == "done" else f"❌ {job['error']}")
+                degradations = job["result"].get("plan", {}).get("degradations") if job["status"] == "done" else None
+                if degradations:
+                    print("⏱️ Allègements: " + "; ".join(degradations))
+        elif args.action == "status":
+            job = queue.get(args.argument)
+            if job is None:
+                print(f"⚠️ Travail inconnu: {args.argument}")
+            else:
+                print(f"📋 {job['job_id']}: {job['status']} (tentatives {job['attempts']}/{job['max_attempts']})"
+                      + (f" — {job['error']}" if job["error"] else ""))
+        elif args.action == "result":
+            job = queue.get(args.argument)
+            if job is None or job["status"] != "done":
+                print(f"⚠️ Aucun résultat pour {args.argument} ({job['status'] if job else 'inconnu'})")
+                sys.exit(1)
+            print(job["result"]["answer"])
+        elif args.action == "stats":
+            print("📊 " + ", ".join(f"{status}: {count}" for status, count in queue.stats().items()))
+        elif args.action == "worker":
+            worker = Worker(queue, QueryHandler(api_key=args.api_key, model=args.model))
+            print(f"👷 Worker {worker.worker_id} à l'écoute (Ctrl+C pour arrêter)")
+            try:
+                worker.run(max_jobs=args.max_jobs)
+            except KeyboardInterrupt:
+                pass
+            memory = memory_snapshot()
+            print(f"👷 {worker.processed} travaux traités, {worker.failed} échecs "
+                  f"(RSS {memory['rss_mb']:.0f} Mo, pic {memory['peak_rss_mb']:.0f} Mo)")
+        else:
+            broker = QueueBroker((args.host, args.port), queue)
+            print(f"📡 Broker sur http://{args.host}:{args.port} (Ctrl+C pour arrêter)")
+            try:
+                broker.serve_forever()
+            except KeyboardInterrupt:
+                pass
+    except (RuntimeError, OSError, TimeoutError) as e:
+        print(f"❌ Erreur de la file de travaux: {str(e)}")
+        sys.exit(1)
+
+def history_main(argv):
+    """
+    Sous-commande `arxivbuddy history search|list|show|stats|import`.
+    
+    Args:
+        argv: Arguments de la ligne de commande après "history"
+    """
+    parser = argparse.ArgumentParser(prog="arxivbuddy history",
+                                     description="Archive des réponses : recherche plein texte et consultation")
+    parser.add_argument("action", choices=["search", "list", "show", "stats", "import"], help="Action à effectuer")
+    parser.add_argument("argument", nargs="?",
+                        help="Mots recherchés ('search'), identifiant ('show') ou répertoire de fichiers .md ('import')")
+    parser.add_argument("--limit", type=int, default=20, help="Nombre maximal de résultats (par défaut: 20)")
+    args = parser.parse_args(argv)
+    
+    if args.action in ("search", "show", "import") and not args.argument:
+        parser.error(f"l'action '{args.action}' nécessite un argument")
+    
+    def describe(entry):
+        date = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["created"]))
+        return f"#{entry['id']:<6} {date}  {entry['query']}  ({len(entry['papers'])} articles)"
+    
+    try:
+        archive = get_archive()
+        if args.action == "search":
+            start = time.perf_counter()
+            results = archive.search(args.argument, limit=args.limit)
+            for entry in results:
+                print(describe(entry))
+                print(f"        {entry['snippet']}")
+            print(f"⏱️ {len(results)} résultats en {(time.perf_counter() - start) * 1000:.1f} ms")
+        elif args.action == "list":
+            for entry in archive.recent(args.limit):
+                print(describe(entry))
+        elif args.action == "show":
+            entry = archive.get(int(args.argument))
+            if entry is None:
+                print(f"⚠️ Réponse inconnue: {args.argument}")
+                sys.exit(1)
+            print(entry["answer"])
+            details = ", ".join(f"{key}: {value}" for key, value in entry["metadata"].items())
+            print(f"\n📎 {entry['model'] or '?'} — {details}\n📚 {', '.join(entry['papers'])}")
+            for paper in archive.paper_details(entry["id"]):
+                print(f"   - {paper.arxiv_id}: {paper.title}")
+        elif args.action == "stats":
+            stats = archive.stats()
+            print(f"🗄️ {stats['results']} réponses, {stats['segments']} segments "
+                  f"({_format_size(stats['segment_bytes'])}, {stats['codec']}), "
+                  f"index {_format_size(stats['index_bytes'])}")
+        else:
+            # Reprise des anciennes réponses enregistrées en fichiers Markdown
+            entries = []
+            for path in sorted(Path(args.argument).rglob("*.md")):
+                answer = path.read_text(encoding="utf-8", errors="ignore")
+                query = next((line.lstrip("# ").strip() for line in answer.splitlines() if line.startswith("#")),
+                             path.stem)
+                entries.append({"query": query, "answer": answer, "created": path.stat().st_mtime,
+                                "source": str(path)})
+            ids = archive.add_many(entries)
+            print(f"🗄️ {len(ids)} réponses importées depuis {args.argument}")
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"❌ Erreur de l'archive: {str(e)}")
+        sys.exit(1)
+
+def run_extractive(query, max_results, level):
+    """
+    Recherche ArXiv et résumé extractif local, sans appel au LLM.
+    
+    Args:
+        query: Question de l'utilisateur
+        max_results: Nombre maximum d'articles
+        level: Niveau de simplification
+        
+    Returns:
+        Résultat au format Markdown
+    """
+    # L'API ArXiv attend des mots-clés plutôt qu'une question en langage naturel
+    search_query = " ".join(extract_keywords(query, max_keywords=6)) or query
+    papers = ArxivSearcher().search(search_query, max_results=max_results, date_range=None)
+    summarizer = Summarizer()
+    summary = summarizer.summarize_papers(papers, level=level, query=query)
+    return summarizer.to_markdown(query, summary, papers, level=level)
+
+# Sous-commandes disponibles (le premier argument est sinon la question)
+SUBCOMMANDS = {
+    "memory": memory_main,
+    "corpus": corpus_main,
+    "citations": citations_main,
+    "watch": watch_main,
+    "chat": chat_main,
+    "queue": queue_main,
+    "history": history_main
+}
+
 def main():
     """Point d'entrée principal de l'application ArxivBuddy."""
     
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        return SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
+    
     # Configurer l'analyseur d'arguments
     parser = argparse.ArgumentParser(description="ArxivBuddy - L'IA qui lit les papiers de recherche pour toi")
     parser.add_argument("query", type=str, nargs="?", help="Votre question de recherche")
@@ -47,35 +559,158 @@ def main():
                        help="Niveau de simplification (expert, medium, beginner)")
     parser.add_argument("--api-key", help="Clé API pour le modèle LLM (si non défini dans .env)")
     parser.add_argument("--model", help="Nom du modèle LLM à utiliser (défini dans .env par défaut)")
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument("--record", metavar="CASSETTE",
+                                help="Enregistre les échanges ArXiv et LLM dans un fichier cassette")
+    cassette_group.add_argument("--replay", metavar="CASSETTE",
+                                help="Rejoue les échanges d'un fichier cassette sans accès réseau")
+    parser.add_argument("--replay-latency", choices=["original", "zero"], default="original",
+                        help="Latence du rejeu : celle enregistrée ou nulle (par défaut: original)")
+    parser.add_argument("--profile", choices=PROFILE_MODES,
+                        help="Profile l'exécution par phase (cpu: cProfile, mem: tracemalloc, wall: échantillonnage, "
+                             "rss: mémoire résidente)")
+    parser.add_argument("--extractive", action="store_true",
+                        help="Résumé extractif local, sans appel au LLM (quelques dizaines de millisecondes)")
+    parser.add_argument("--translation", choices=["direct", "merged", "separate"],
+                        help="Traduction: rédaction directe en français, fusionnée à la mise en forme, "
+                             "ou tâche dédiée (par défaut: defaults.pipeline.translation)")
+    streaming_group = parser.add_mutually_exclusive_group()
+    streaming_group.add_argument("--streaming", dest="streaming", action="store_const", const=True,
+                                 help="Analyse chaque article dès sa lecture dans les résultats ArXiv, "
+                                      "sans attendre la fin de la recherche (par défaut: defaults.pipeline.streaming)")
+    streaming_group.add_argument("--no-streaming", dest="streaming", action="store_const", const=False,
+                                 help="Recherche puis analyse par l'équipage d'agents (pipeline séquentiel)")
+    parser.add_argument("--llm-report", action="store_true",
+                        help="Affiche la latence, les jetons et le coût des appels LLM par agent / tâche")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="Profil basse mémoire : embedder réduit et quantifié, index mappés, "
+                             "libération des modèles inactifs")
+    parser.add_argument("--deadline", type=float, metavar="SECONDES",
+                        help="Répond en SECONDES au plus : allège le pipeline selon les durées observées "
+                             "(moins d'articles, résumé extractif, tâches omises) et indique ce qui a été omis")
     
     args = parser.parse_args()
     
+    if args.low_memory:
+        enable_low_memory()
+    
+    try:
+        cassette = open_cassette(record=args.record, replay=args.replay, latency=args.replay_latency)
+    except (OSError, ValueError) as e:
+        print(f"❌ Impossible d'ouvrir la cassette: {str(e)}")
+        sys.exit(1)
+    
+    # En rejeu, la question et les options peuvent venir de la cassette
+    if cassette and cassette.mode == "replay":
+        args.query = args.query or cassette.metadata.get("query")
+        args.max_results = cassette.metadata.get("max_results", args.max_results)
+        args.level = cassette.metadata.get("level", args.level)
+    
     # Si aucune requête n'est fournie, afficher l'aide
     if not args.query:
         parser.print_help()
         sys.exit(1)
     
+    if cassette and cassette.mode == "record":
+        cassette.metadata.update({
+            "query": args.query,
+            "max_results": args.max_results,
+            "level": args.level,
+            "model": args.model
+        })
+    
     try:
         print(f"🔍 Analyse de votre question : \"{args.query}\"")
         
-        # Initialiser l'agent ArxivBuddy
-        arxiv_agents = ArxivAgents(api_key=args.api_key, model=args.model)
+        # Initialiser l'agent ArxivBuddy (inutile en mode extractif) ; sous cassette, sans
+        # mémoires CrewAI, pour que les prompts soient identiques à l'enregistrement et au rejeu
+        arxiv_agents = None if args.extractive else ArxivAgents(api_key=args.api_key, model=args.model,
+                                                                memory=cassette is None)
         
-        # Traiter la requête avec l'équipe d'agents
-        result = arxiv_agents.process_query(
-            query=args.query,
-            max_results=args.max_results,
-            level=args.level
-        )
+        # Échéance : pipeline le plus complet qui tient dans le budget
+        plan = None
+        if args.deadline and arxiv_agents:
+            plan = arxiv_agents.plan_for_deadline(args.deadline, max_results=args.max_results,
+                                                  translation=args.translation)
+            print(f"⏱️ Plan: {plan.describe()}")
+        
+        # Traiter la requête avec l'équipe d'agents (éventuellement sous cassette)
+        outputs = {}
+        start = time.perf_counter()
+        with cassette if cassette else contextlib.nullcontext():
+            with profile_run(args.profile) as profiler:
+                if args.extractive:
+                    result = run_extractive(args.query, args.max_results, args.level)
+                else:
+                    result = arxiv_agents.process_query(
+                        query=args.query,
+                        max_results=args.max_results,
+                        level=args.level,
+                        translation=args.translation,
+                        streaming=args.streaming,
+                        outputs=outputs,
+                        deadline_seconds=args.deadline,
+                        plan=plan
+                    )
+        elapsed = time.perf_counter() - start
         
         # Afficher le résultat
         print(result)
         
-        # Enregistrer le résultat dans un fichier
-        output_filename = f"arxiv_reponse_{args.query[:30].replace(' ', '_').replace('?', '')}.md"
-        with open(output_filename, 'w', encoding='utf-8') as f:
-            f.write(result)
+        if plan and plan.degradations:
+            print(f"\n⏱️ Réponse en {elapsed:.1f} s (échéance {args.deadline:.0f} s), allègements:")
+            for degradation in plan.degradations:
+                print(f"   - {degradation}")
+        
+        if profiler:
+            print(f"\n⏱️ Rapports de profilage ({args.profile}) enregistrés dans: {profiler.output_dir}")
+        
+        if cassette:
+            _print_cassette_report(cassette, elapsed)
+        
+        memory = memory_snapshot()
+        if args.low_memory:
+            reaper = get_reaper()
+            print(f"\n🧠 Mémoire résidente: {memory['rss_mb']:.0f} Mo (pic {memory['peak_rss_mb']:.0f} Mo), "
+                  f"libération après {reaper.idle_seconds:.0f} s d'inactivité")
+        
+        if args.llm_report:
+            print("\n🧭 Appels LLM par route:")
+            print(get_route_report().format())
+            stats = get_scheduler().stats()
+            print(f"Ordonnanceur: {stats['calls']} appels, {stats['retries']} nouvelles tentatives, "
+                  f"{stats['hedges']} doublons ({stats['hedge_wins']} gagnants), "
+                  f"{stats['deadline_exceeded']} échéances dépassées")
+            shared = {name: flight["shared"] for name, flight in coalescing_stats().items() if flight["shared"]}
+            if shared:
+                print("Appels fusionnés: " + ", ".join(f"{name} {count}" for name, count in sorted(shared.items())))
+            embedding = embedding_stats()
+            if embedding.get("batches"):
+                print(f"Embeddings: {embedding['texts']} textes en {embedding['batches']} lots "
+                      f"(moyenne {embedding['mean_batch']}, p95 {embedding['p95_batch']}), "
+                      f"file max {embedding['max_queue_depth']} textes, attente moyenne {embedding['mean_wait_ms']} ms")
+        
+        # Enregistrer le résultat (fichier daté et archive consultable)
+        output_filename = save_results(args.query, result)
         print(f"\n✅ Résultat enregistré dans: {output_filename}")
+        try:
+            search = extract_json(outputs.get("arxiv_search", ""))
+            papers = [paper.get("arxiv_id") for paper in search.get("papers", [])
+                      if isinstance(paper, dict) and paper.get("arxiv_id")] if isinstance(search, dict) else []
+            routes = get_route_report().summary()
+            result_id = get_archive().add(
+                args.query, result, papers=papers,
+                model=None if args.extractive else arxiv_agents.model,
+                level=args.level, max_results=args.max_results, elapsed=round(elapsed, 2),
+                extractive=args.extractive, translation=args.translation, streaming=args.streaming,
+                llm_calls=sum(row["calls"] for row in routes),
+                tokens=sum(row["prompt_tokens"] + row["completion_tokens"] for row in routes),
+                low_memory=args.low_memory, peak_rss_mb=memory["peak_rss_mb"],
+                deadline=args.deadline, plan=plan.to_dict() if plan else None
+            )
+            print(f"🗄️ Archivé sous #{result_id} (arxivbuddy history show {result_id})")
+        except Exception as e:
+            print(f"⚠️ Impossible d'archiver le résultat: {e}")
         
     except Exception as e:
         print(f"❌ Une erreur est survenue: {str(e)}")
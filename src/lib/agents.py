@@ -2,23 +2,65 @@
 # -*- coding: utf-8 -*-
 
 import os
+import json
+import time
 from typing import List, Dict, Any
 from crewai import Agent, Task, Crew, Process
-from crewai import LLM as CrewLLM
 from crewai.memory import LongTermMemory, ShortTermMemory, EntityMemory
-from crewai.memory.storage.ltm_sqlite_storage import LTMSQLiteStorage
-from crewai.memory.storage.rag_storage import RAGStorage
+from crewai.tasks.task_output import TaskOutput
+from crewai.utilities.formatter import aggregate_raw_outputs_from_tasks
 
 # Import des outils spécifiques à ArxivBuddy
-from .tools import search_arxiv, get_paper_by_id, get_paper_abstract, get_papers_by_query
+from .tools import (
+    search_arxiv, get_paper_by_id, get_paper_abstract, get_papers_by_query,
+    get_paper_sections, retrieve_passages, semantic_search_papers, related_papers,
+    SORT_CRITERION, SORT_ORDER
+)
+from .arxiv_api import ArxivSearcher
+from .async_pipeline import (
+    acall_llm, afulltext_evidence, alocal_papers, astream_search_analysis, run_blocking, run_task_graph
+)
+from .coalescing import get_flight, make_key
 from .config import get_config
-from .custom_embedder import MultilingualE5Embedder
+from .crew_templates import CrewTemplates
+from .llm_routing import LLMRouter
+from .latency_planner import DeadlinePlanner, PipelinePlan, StageClock, record_timings
+from .llm_scheduler import deadline, get_scheduler
+from .streaming import stream_search_analysis
+from .summarizer import Summarizer
+from .translation_cache import output_language, record_translations
+from .utils import extract_json, extract_keywords
+from .custom_embedder import get_embedder
+from .memory_maintenance import (
+    MemoryMaintenance, PooledLTMSQLiteStorage, TimestampedRAGStorage, get_memory_storage_path
+)
+
+# Modes de traduction des résultats (defaults.pipeline.translation)
+TRANSLATION_MODES = ("direct", "merged", "separate")
+# Nom des langues de sortie dans les consignes des tâches
+LANGUAGE_NAMES = {"fr": "français", "en": "anglais"}
+# Tâches de l'étape en flux (analyse de la requête, recherche, analyses des articles)
+STREAM_STAGES = ("query_parser", "arxiv_search", "paper_analysis")
+# Public visé selon le niveau d'explication
+AUDIENCES = {
+    "expert": "un chercheur spécialisé dans le domaine",
+    "medium": "un étudiant de master ou doctorant",
+    "beginner": "une personne avec des connaissances scientifiques de base"
+}
+DEFAULT_AUDIENCE = "un étudiant de master"
 
 class ArxivAgents:
     """Classe pour gérer les agents CrewAI pour ArxivBuddy."""
     
-    def __init__(self, api_key: str = None, model: str = None):
-        """Initialise les agents avec les configurations depuis le système de config."""
+    def __init__(self, api_key: str = None, model: str = None, memory: bool = True):
+        """
+        Initialise les agents avec les configurations depuis le système de config.
+        
+        Args:
+            api_key: Clé d'API du LLM (par défaut: configuration)
+            model: Modèle du LLM (par défaut: configuration)
+            memory: Mémoires CrewAI (long terme, court terme, entités) de l'équipage
+        """
         # Chargement de la configuration
         self.config = get_config()
         
@@ -29,55 +71,69 @@ class ArxivAgents:
         self.max_tokens = self.config.get("crew", "max_tokens", default=4000)
         self.base_url = self.config.get("crew", "base_url", default="https://openrouter.ai/api/v1")
         
-        # Configuration du LLM pour CrewAI
-        try:
-            self.llm = CrewLLM(
-                model=self.model,
-                api_key=self.api_key,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                base_url=self.base_url
-            )
-        except Exception as e:
-            print(f"⚠️ Erreur lors de l'initialisation du LLM: {e}")
-            print("Tentative avec une configuration simplifiée...")
-            self.llm = CrewLLM(
-                model=self.model,
-                api_key=self.api_key
-            )
+        # Configuration du LLM pour CrewAI : route par défaut, puis routes par agent
+        # et par tâche (section `llm` de agents.yaml)
+        self.router = LLMRouter({
+            "model": self.model,
+            "api_key": self.api_key,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "base_url": self.base_url,
+            "timeout": self.config.get("crew", "timeout")
+        })
+        self.llm = self.router.get("default")
+        # Plafonds de concurrence, nouvelles tentatives et hedging de tous les appels LLM
+        self.scheduler = get_scheduler(self.config)
+        self.scheduler.install()
+        # Modèles de tâches compilés et validés une fois ; la configuration validée des
+        # agents (et leur LLM routé) est gardée, mais chaque requête construit ses propres
+        # agents : leur état (outils, exécuteur, historique) n'est pas partagé entre
+        # requêtes simultanées
+        self.templates = CrewTemplates.from_config(self.config)
+        self._agent_args: Dict[str, Dict[str, Any]] = {}
         # ------------------------------------------------------------------
         # Configuration du custom embedder et de la mémoire
         # ------------------------------------------------------------------
-        # Embedder personnalisé pour les mémoires (multilingual-e5-large)
-        self.custom_embedder = MultilingualE5Embedder()
-        # Répertoire de stockage pour les données de mémoire
-        storage_path = os.getenv("CREWAI_STORAGE_DIR", "./arxivbuddy_memory")
-        os.makedirs(storage_path, exist_ok=True)
-        print(f"Memory storage path configured at: {storage_path}")
-        # Mémoire long terme (historique des interactions)
-        self.long_term_memory = LongTermMemory(
-            storage=LTMSQLiteStorage(db_path=f"{storage_path}/arxivbuddy_ltm.db")
-        )
-        # Mémoire court terme (RAG) avec embedder personnalisé
-        self.short_term_memory = ShortTermMemory(
-            storage=RAGStorage(
-                type="short_term",
-                embedder_config={"provider": "custom", "config": {"embedder": self.custom_embedder}},
-                path=storage_path
+        # Embedder personnalisé pour les mémoires (multilingual-e5-large, chargé à la première
+        # utilisation ; e5-small quantifié dans le profil basse mémoire)
+        self.custom_embedder = get_embedder()
+        # Mémoires CrewAI (désactivées sous cassette : leur contenu, différent d'une exécution
+        # à l'autre, entre dans les prompts et rendrait les appels LLM impossibles à rejouer)
+        self.memory = memory
+        self.long_term_memory = self.short_term_memory = self.entity_memory = None
+        if memory:
+            # Répertoire de stockage pour les données de mémoire
+            storage_path = get_memory_storage_path()
+            os.makedirs(storage_path, exist_ok=True)
+            print(f"Memory storage path configured at: {storage_path}")
+            # Élagage périodique (TTL, taille, doublons) pour borner la croissance des mémoires
+            MemoryMaintenance.from_config(self.config, storage_path).maybe_run(
+                self.config.get("memory", "maintenance_interval_hours", default=24)
             )
-        )
-        # Mémoire d'entités pour le suivi des concepts
-        self.entity_memory = EntityMemory(
-            storage=RAGStorage(
-                type="entity",
-                embedder_config={"provider": "custom", "config": {"embedder": self.custom_embedder}},
-                path=storage_path
+            # Mémoire long terme (historique des interactions), en WAL avec écritures par lots
+            self.long_term_memory = LongTermMemory(
+                storage=PooledLTMSQLiteStorage(db_path=f"{storage_path}/arxivbuddy_ltm.db")
+            )
+            # Mémoire court terme (RAG) avec embedder personnalisé
+            self.short_term_memory = ShortTermMemory(
+                storage=TimestampedRAGStorage(
+                    type="short_term",
+                    embedder_config={"provider": "custom", "config": {"embedder": self.custom_embedder}},
+                    path=storage_path
+                )
+            )
+            # Mémoire d'entités pour le suivi des concepts
+            self.entity_memory = EntityMemory(
+                storage=TimestampedRAGStorage(
+                    type="entity",
+                    embedder_config={"provider": "custom", "config": {"embedder": self.custom_embedder}},
+                    path=storage_path
+                )
             )
-        )
     
     def _create_agent_from_config(self, agent_type: str, tools: List = None) -> Agent:
         """
-        Crée un agent à partir de sa configuration YAML.
+        Crée un agent à partir de sa configuration YAML (validée une seule fois par type d'agent).
         
         Args:
             agent_type: Type d'agent (query_parser, arxiv_searcher, etc.)
@@ -86,24 +142,32 @@ class ArxivAgents:
         Returns:
             Agent CrewAI configuré
         """
+        if agent_type in self._agent_args:
+            return Agent(**self._agent_args[agent_type])
+        
         agent_config = self.config.get_agent_config(agent_type)
         if not agent_config:
             raise ValueError(f"Configuration non trouvée pour l'agent '{agent_type}'")
             
+        # Modèle propre à l'agent s'il est configuré, sinon LLM par défaut
+        llm = self.router.get(f"agent:{agent_type}", agent_config["llm"]) if agent_config.get("llm") else self.llm
+        
         agent_args = {
             "role": agent_config.get("role", ""),
             "goal": agent_config.get("goal", ""),
             "backstory": agent_config.get("backstory", ""),
             "verbose": True,
             "allow_delegation": False,
-            "llm": self.llm
+            "llm": llm
         }
         
         # Ajouter les outils si fournis
         if tools:
             agent_args["tools"] = tools
             
-        return Agent(**agent_args)
+        agent = Agent(**agent_args)
+        self._agent_args[agent_type] = agent_args
+        return agent
     
     def create_query_parser_agent(self) -> Agent:
         """
@@ -121,7 +185,7 @@ class ArxivAgents:
         Returns:
             Agent CrewAI pour la recherche ArXiv
         """
-        return self._create_agent_from_config("arxiv_searcher", tools=[search_arxiv])
+        return self._create_agent_from_config("arxiv_searcher", tools=[search_arxiv, semantic_search_papers, related_papers])
     
     def create_paper_analyzer_agent(self) -> Agent:
         """
@@ -130,7 +194,7 @@ class ArxivAgents:
         Returns:
             Agent CrewAI pour l'analyse d'articles
         """
-        return self._create_agent_from_config("paper_analyzer", tools=[search_arxiv])
+        return self._create_agent_from_config("paper_analyzer", tools=[search_arxiv, get_paper_sections, retrieve_passages])
     
     def create_summarizer_agent(self) -> Agent:
         """
@@ -182,20 +246,19 @@ class ArxivAgents:
         Returns:
             Tâche CrewAI configurée
         """
-        prompt_config = self.config.get_prompt_config(prompt_type)
-        if not prompt_config:
-            raise ValueError(f"Configuration de prompt non trouvée pour '{prompt_type}'")
-            
-        # Formater la description de la tâche avec le contexte
-        description = prompt_config.get("task_description", "")
-        description = description.format(**task_context)
+        # Gabarit précompilé : seules les variables de la requête sont liées
+        template = self.templates.task(prompt_type)
+        description, expected_output = template.bind(**task_context)
         
-        # Formater le résultat attendu avec le contexte
-        expected_output = prompt_config.get("expected_output", "")
-        if "{" in expected_output and "}" in expected_output:
-            expected_output = expected_output.format(**task_context)
+        # Modèle propre à la tâche : copie de l'agent de la requête avec le LLM de la route
+        # (LLM partagé par route, copie propre à la requête)
+        if template.llm:
+            routed = agent.copy()
+            routed.llm = self.router.get(f"task:{prompt_type}", template.llm)
+            agent = routed
         
         task_args = {
+            "name": prompt_type,
             "description": description,
             "agent": agent,
             "expected_output": expected_output
@@ -275,12 +338,7 @@ class ArxivAgents:
         Returns:
             Tâche CrewAI
         """
-        audience_map = {
-            "expert": "un chercheur spécialisé dans le domaine",
-            "medium": "un étudiant de master ou doctorant",
-            "beginner": "une personne avec des connaissances scientifiques de base"
-        }
-        audience = audience_map.get(level, "un étudiant de master")
+        audience = AUDIENCES.get(level, DEFAULT_AUDIENCE)
         
         return self._create_task_from_prompt_config(
             "summary", 
@@ -304,12 +362,7 @@ class ArxivAgents:
         Returns:
             Tâche CrewAI
         """
-        audience_map = {
-            "expert": "un chercheur spécialisé dans le domaine",
-            "medium": "un étudiant de master ou doctorant",
-            "beginner": "une personne avec des connaissances scientifiques de base"
-        }
-        audience = audience_map.get(level, "un étudiant de master")
+        audience = AUDIENCES.get(level, DEFAULT_AUDIENCE)
         
         return self._create_task_from_prompt_config(
             "synthesis", 
@@ -332,12 +385,7 @@ class ArxivAgents:
         Returns:
             Tâche CrewAI
         """
-        audience_map = {
-            "expert": "un chercheur spécialisé dans le domaine",
-            "medium": "un étudiant de master ou doctorant",
-            "beginner": "une personne avec des connaissances scientifiques de base"
-        }
-        audience = audience_map.get(level, "un étudiant de master")
+        audience = AUDIENCES.get(level, DEFAULT_AUDIENCE)
         
         return self._create_task_from_prompt_config(
             "translation", 
@@ -371,7 +419,8 @@ class ArxivAgents:
         
     def _create_final_formatting_task(self, agent: Agent, search_task: Task, summary_task: Task,
                                      synthesis_task: Task, translation_task: Task = None,
-                                     french: bool = True, query: str = "", professor_task: Task = None) -> Task:
+                                     french: bool = True, query: str = "", professor_task: Task = None,
+                                     analysis_task: Task = None) -> Task:
         """
         Crée une tâche de formatage final des résultats.
         
@@ -384,11 +433,14 @@ class ArxivAgents:
             french: Si True, utilise les versions françaises (par défaut: True)
             query: Question originale de l'utilisateur
             professor_task: Tâche du professeur pédagogue
+            analysis_task: Tâche d'analyse (résumés traduits par article, optionnelle)
             
         Returns:
             Tâche CrewAI
         """
         context_tasks = [search_task, summary_task, synthesis_task]
+        if analysis_task:
+            context_tasks.append(analysis_task)
         if translation_task:
             context_tasks.append(translation_task)
         if professor_task:
@@ -406,27 +458,232 @@ class ArxivAgents:
             context_tasks=context_tasks
         )
     
-    def process_query(self, query: str, max_results: int = 5, french: bool = True, 
-                     level: str = "medium") -> str:
+    def _add_language_directive(self, task: Task, directive: str, language: str = "fr") -> None:
         """
-        Traite une requête utilisateur en déployant une équipe d'agents.
+        Ajoute à la description d'une tâche une consigne de langue (prompts.output_language).
+        
+        Args:
+            task: Tâche à compléter
+            directive: Nom de la consigne (direct, merged, per_paper, formatting)
+            language: Code de la langue de sortie
+        """
+        text = self.templates.directive(directive, language=LANGUAGE_NAMES.get(language, language))
+        if text:
+            task.description = f"{task.description.rstrip()}\n\n{text}"
+    
+    def _prompt_messages(self, prompt_type: str, agent: Agent, directive: str = None, **values: Any) -> tuple:
+        """
+        Prépare l'appel LLM unique du prompt d'une tâche, hors équipage.
+        
+        Args:
+            prompt_type: Type de prompt (query_parser, paper_analysis_item...)
+            agent: Agent dont le rôle et le modèle sont repris
+            directive: Consigne de langue à ajouter (optionnelle)
+            **values: Variables du prompt
+            
+        Returns:
+            Tuple (LLM de la route, messages)
+        """
+        template = self.templates.task(prompt_type)
+        description, expected_output = template.bind(**values)
+        if directive:
+            text = self.templates.directive(directive, language=LANGUAGE_NAMES["fr"])
+            description = f"{description.rstrip()}\n\n{text}" if text else description
+        llm = self.router.get(f"task:{prompt_type}", template.llm) if template.llm else agent.llm
+        return llm, self._messages(agent, description, expected_output)
+    
+    @staticmethod
+    def _messages(agent: Agent, description: str, expected_output: str, context: str = "") -> List[Dict[str, str]]:
+        """Messages d'une tâche exécutée en un seul appel LLM (rôle de l'agent, consigne, contexte)."""
+        user = f"{description}\n\nRésultat attendu: {expected_output}"
+        if context:
+            user = f"{user}\n\nContexte:\n{context}"
+        return [
+            {"role": "system", "content": f"{agent.role}\n{agent.goal}\n{agent.backstory}"},
+            {"role": "user", "content": user}
+        ]
+    
+    def _call_prompt(self, prompt_type: str, agent: Agent, directive: str = None, **values: Any) -> str:
+        """
+        Exécute le prompt d'une tâche en un seul appel LLM, hors équipage.
+        
+        Args:
+            prompt_type: Type de prompt (query_parser, paper_analysis_item...)
+            agent: Agent dont le rôle et le modèle sont repris
+            directive: Consigne de langue à ajouter (optionnelle)
+            **values: Variables du prompt
+            
+        Returns:
+            Réponse brute du LLM
+        """
+        llm, messages = self._prompt_messages(prompt_type, agent, directive, **values)
+        return str(llm.call(messages))
+    
+    async def _acall_prompt(self, prompt_type: str, agent: Agent, directive: str = None, **values: Any) -> str:
+        """Version asynchrone de `_call_prompt`."""
+        llm, messages = self._prompt_messages(prompt_type, agent, directive, **values)
+        return await acall_llm(llm, messages)
+    
+    async def _aexecute_task(self, task: Task, clock: StageClock = None) -> None:
+        """Exécute une tâche de l'équipage en un appel LLM asynchrone, avec les sorties de son contexte."""
+        context = aggregate_raw_outputs_from_tasks(task.context) if task.context else ""
+        messages = self._messages(task.agent, task.description, task.expected_output, context)
+        start = time.perf_counter()
+        self._set_output(task, await acall_llm(task.agent.llm, messages))
+        if clock is not None:
+            clock.add(task.name, time.perf_counter() - start)
+    
+    @staticmethod
+    def _set_output(task: Task, raw: str) -> None:
+        """Donne à une tâche exécutée hors équipage sa sortie, reprise comme contexte des suivantes."""
+        task.output = TaskOutput(description=task.description, name=task.name,
+                                 expected_output=task.expected_output, raw=raw, agent=task.agent.role)
+    
+    @staticmethod
+    def _search_query(query: str, parsed: str) -> str:
+        """Requête ArXiv proposée par l'analyse de la question (sinon ses mots-clés)."""
+        data = extract_json(parsed)
+        search_query = data.get("search_query") if isinstance(data, dict) else None
+        return search_query or " ".join(extract_keywords(query, max_keywords=6)) or query
+    
+    @staticmethod
+    def _analysis_from_response(raw: str, paper: Dict[str, Any]) -> Dict[str, Any]:
+        """Analyse JSON d'un article extraite de la réponse du LLM."""
+        analysis = extract_json(raw)
+        if not isinstance(analysis, dict):
+            raise ValueError("réponse sans objet JSON")
+        analysis["arxiv_id"] = paper["arxiv_id"]
+        return analysis
+    
+    def _set_stream_outputs(self, parsed: str, search_query: str, stream, parsing_task: Task,
+                            search_task: Task, analysis_task: Task, clock: StageClock = None,
+                            local_papers: List[Dict[str, Any]] = None) -> None:
+        """Fournit aux tâches de l'étape en flux leurs sorties, reprises comme contexte des suivantes."""
+        timings = stream.timings
+        if clock is not None:
+            clock.add("arxiv_search", timings["search"])
+            if stream.analyses:
+                # Durée d'analyse d'un article (les analyses simultanées sont comptées séparément)
+                clock.add("paper_analysis", timings["analysis_busy"] / len(stream.analyses))
+        print(f"🌊 {len(stream.papers)} articles, {len(stream.analyses)} analyses en {timings['total']:.1f} s "
+              f"(recherche {timings['search']:.1f} s, premier article à {timings.get('first_paper', 0):.1f} s, "
+              f"recouvrement {stream.overlap():.1f} s)")
+        
+        self._set_output(parsing_task, parsed)
+        search_output = {
+            "query": search_query,
+            "papers": stream.papers,
+            "total_results": len(stream.papers),
+            "duplicates_removed": stream.duplicates_removed
+        }
+        if local_papers:
+            # Articles connus localement (corpus, graphe de citations), non analysés
+            search_output["local_papers"] = local_papers
+        self._set_output(search_task, json.dumps(search_output, ensure_ascii=False, indent=2))
+        self._set_output(analysis_task, json.dumps({"paper_analyses": stream.analyses},
+                                                   ensure_ascii=False, indent=2))
+    
+    def _run_streaming_stage(self, query: str, max_results: int, french: bool, parsing_task: Task,
+                             search_task: Task, analysis_task: Task, clock: StageClock = None) -> None:
+        """
+        Exécute en flux l'analyse de la requête, la recherche et les analyses d'articles.
+        
+        Chaque article est analysé (un appel LLM) dès sa lecture dans le flux ArXiv ;
+        les sorties des trois tâches sont ensuite fournies aux tâches de l'équipage.
+        
+        Args:
+            query: Question de l'utilisateur
+            max_results: Nombre maximum d'articles à récupérer
+            french: Si True, chaque analyse comporte son résumé traduit
+            parsing_task: Tâche d'analyse de la requête
+            search_task: Tâche de recherche
+            analysis_task: Tâche d'analyse des articles
+            clock: Chronomètre des étapes (optionnel)
+        """
+        start = time.perf_counter()
+        parsed = self._call_prompt("query_parser", parsing_task.agent, question=query)
+        if clock is not None:
+            clock.add("query_parser", time.perf_counter() - start)
+        search_query = self._search_query(query, parsed)
+        
+        def analyze(paper: Dict[str, Any]) -> Dict[str, Any]:
+            raw = self._call_prompt(
+                "paper_analysis_item", analysis_task.agent, directive="per_paper" if french else None,
+                paper=json.dumps(paper, ensure_ascii=False, indent=2), query=query
+            )
+            return self._analysis_from_response(raw, paper)
+        
+        stream = stream_search_analysis(
+            search_query, max_results, analyze,
+            workers=self.config.get("pipeline", "stream_workers", default=4),
+            queue_size=self.config.get("pipeline", "stream_queue_size", default=4),
+            sort_by=SORT_CRITERION, sort_order=SORT_ORDER
+        )
+        self._set_stream_outputs(parsed, search_query, stream, parsing_task, search_task, analysis_task, clock)
+    
+    async def _arun_streaming_stage(self, query: str, max_results: int, french: bool, parsing_task: Task,
+                                    search_task: Task, analysis_task: Task, clock: StageClock = None) -> None:
+        """Version asynchrone de `_run_streaming_stage` (mêmes arguments)."""
+        start = time.perf_counter()
+        parsed = await self._acall_prompt("query_parser", parsing_task.agent, question=query)
+        if clock is not None:
+            clock.add("query_parser", time.perf_counter() - start)
+        search_query = self._search_query(query, parsed)
+        passages = self.config.get("pipeline", "async_passages", default=3)
+        
+        async def analyze(paper: Dict[str, Any]) -> Dict[str, Any]:
+            # Extraits du texte intégral (outils retrieve_passages / get_paper_sections)
+            evidence = await afulltext_evidence(query, paper.get("arxiv_id"), passages)
+            raw = await self._acall_prompt(
+                "paper_analysis_item", analysis_task.agent, directive="per_paper" if french else None,
+                paper=json.dumps(dict(paper, **evidence), ensure_ascii=False, indent=2), query=query
+            )
+            return self._analysis_from_response(raw, paper)
+        
+        stream = await astream_search_analysis(
+            search_query, max_results, analyze,
+            concurrency=self.config.get("pipeline", "stream_workers", default=4),
+            sort_by=SORT_CRITERION, sort_order=SORT_ORDER
+        )
+        local_papers = await alocal_papers(query, [paper["arxiv_id"] for paper in stream.papers],
+                                           self.config.get("pipeline", "async_local_papers", default=5))
+        self._set_stream_outputs(parsed, search_query, stream, parsing_task, search_task, analysis_task, clock,
+                                 local_papers)
+    
+    def _build_tasks(self, query: str, max_results: int, french: bool, level: str,
+                     translation: str = None, plan: PipelinePlan = None) -> tuple:
+        """
+        Crée les agents et les tâches d'une requête.
         
         Args:
             query: Question de l'utilisateur
             max_results: Nombre maximum d'articles à récupérer
             french: Si True, traduit les résultats en français
             level: Niveau d'explication (expert, medium, beginner)
+            translation: Mode de traduction (direct, merged, separate ; par défaut:
+                         defaults.pipeline.translation)
+            plan: Plan allégé pour tenir une échéance (tâches omises et consignes de la
+                  mise en forme ; optionnel)
             
         Returns:
-            Résultat formaté au format markdown
+            Tuple (agents, tâches dans l'ordre d'exécution ; analyse de la requête,
+            recherche et analyse des articles en tête, mise en forme finale en dernier)
         """
+        translation = translation or self.config.get("pipeline", "translation", default="direct")
+        if translation not in TRANSLATION_MODES:
+            print(f"⚠️ Mode de traduction inconnu '{translation}', utilisation de 'direct'")
+            translation = "direct"
+        # Hors mode "separate", pas de passe de traduction complète : les agents écrivent
+        # directement en français, ou la mise en forme finale traduit
+        separate_translation = french and translation == "separate"
+        
         # Créer les agents
         query_parser = self.create_query_parser_agent()
         arxiv_searcher = self.create_arxiv_searcher_agent()
         paper_analyzer = self.create_paper_analyzer_agent()
         summarizer = self.create_summarizer_agent()
         synthesizer = self.create_synthesizer_agent()
-        translator = self.create_translator_agent() if french else None
+        translator = self.create_translator_agent() if separate_translation else None
         
         # Créer les tâches
         parsing_task = self._create_query_parsing_task(query_parser, query)
@@ -445,7 +702,7 @@ class ArxivAgents:
         
         # Ajouter la tâche de traduction si nécessaire
         translation_task = None
-        if french:
+        if separate_translation:
             translation_task = self._create_translation_task(translator, summary_task, synthesis_task, level)
             agents.append(translator)
             tasks.append(translation_task)
@@ -453,38 +710,363 @@ class ArxivAgents:
         # Ajouter la tâche de formatage final
         formatting_task = self._create_final_formatting_task(
             summarizer, search_task, summary_task, synthesis_task, 
-            translation_task, french, query, professor_task
+            translation_task, french, query, professor_task,
+            analysis_task=analysis_task if french else None
         )
         tasks.append(formatting_task)
         
-        # Créer et exécuter l'équipage avec mémoire activée
-        crew = Crew(
-            agents=agents,
-            tasks=tasks,
-            verbose=True,
-            process=Process.sequential,
-            memory=True,
-            long_term_memory=self.long_term_memory,
-            short_term_memory=self.short_term_memory,
-            entity_memory=self.entity_memory
+        if french:
+            # Résumé traduit de chaque article, mis en cache et repris d'une requête à l'autre
+            self._add_language_directive(analysis_task, "per_paper")
+            self._add_language_directive(formatting_task, "formatting")
+            if translation == "direct":
+                for task in (summary_task, synthesis_task, professor_task, formatting_task):
+                    self._add_language_directive(task, "direct")
+            elif translation == "merged":
+                self._add_language_directive(formatting_task, "merged")
+        
+        if plan is not None and plan.skip:
+            # Tâches omises pour tenir l'échéance : la mise en forme rédige leur section
+            tasks = [task for task in tasks if task.name not in plan.skip]
+            for task in tasks:
+                if task.context:
+                    task.context = [other for other in task.context if other.name not in plan.skip]
+            agents = [agent for agent in agents if any(task.agent is agent for task in tasks)]
+            if "professor" in plan.skip:
+                self._add_language_directive(formatting_task, "no_professor")
+            if "synthesis" in plan.skip:
+                self._add_language_directive(formatting_task, "merged_synthesis")
+        if plan is not None and plan.extractive_summary:
+            self._add_language_directive(formatting_task, "extractive_summary", "fr" if french else "en")
+        
+        # Les tâches routées vers un autre modèle utilisent une copie de leur agent
+        for task in tasks:
+            if not any(task.agent is agent for agent in agents):
+                agents.append(task.agent)
+        
+        return agents, tasks
+    
+    def plan_for_deadline(self, budget: float, max_results: int = 5, french: bool = True,
+                          translation: str = None) -> PipelinePlan:
+        """
+        Choisit le pipeline le plus complet qui tient dans un budget de temps.
+        
+        Args:
+            budget: Temps disponible pour la requête (secondes)
+            max_results: Nombre d'articles demandé
+            french: Sortie en français
+            translation: Mode de traduction demandé (par défaut: defaults.pipeline.translation)
+            
+        Returns:
+            PipelinePlan, à passer à `process_query` ou `aprocess_query`
+        """
+        return DeadlinePlanner().plan(
+            budget, max_results=max_results, french=french,
+            translation=translation or self.config.get("pipeline", "translation", default="direct"),
+            workers=self.config.get("pipeline", "stream_workers", default=4)
         )
+    
+    @staticmethod
+    def _found_papers(search_task: Task) -> List[Dict[str, Any]]:
+        """Articles de la sortie de la tâche de recherche."""
+        data = extract_json(search_task.output.raw) if search_task.output is not None else None
+        papers = data.get("papers", []) if isinstance(data, dict) else []
+        return [paper for paper in papers if isinstance(paper, dict)]
+    
+    def _set_extractive_summary(self, summary_task: Task, search_task: Task, query: str, level: str,
+                                clock: StageClock = None) -> None:
+        """Remplace le résumé rédigé par le LLM par un résumé extractif local des articles trouvés."""
+        start = time.perf_counter()
+        summary = Summarizer().summarize_papers(self._found_papers(search_task), level=level, query=query)
+        self._set_output(summary_task, json.dumps({
+            "résumé_simplifié": summary["global_summary"],
+            "résumés_par_article": [{"titre": item["title"], "résumé": item["summary"]}
+                                    for item in summary["paper_summaries"]]
+        }, ensure_ascii=False, indent=2))
+        if clock is not None:
+            clock.add("extractive", time.perf_counter() - start)
+    
+    def _extractive_answer(self, query: str, max_results: int, level: str, papers: List[Any] = None,
+                           clock: StageClock = None) -> str:
+        """
+        Réponse par résumé extractif local, sans appel au LLM.
+        
+        Args:
+            query: Question de l'utilisateur
+            max_results: Nombre maximum d'articles (si une recherche est nécessaire)
+            level: Niveau de simplification
+            papers: Articles déjà trouvés (sinon: recherche ArXiv par mots-clés)
+            clock: Chronomètre des étapes (optionnel)
+            
+        Returns:
+            Résultat au format Markdown
+        """
+        if papers is None:
+            start = time.perf_counter()
+            search_query = " ".join(extract_keywords(query, max_keywords=6)) or query
+            papers = ArxivSearcher().search(search_query, max_results=max_results, date_range=None)
+            if clock is not None:
+                clock.add("arxiv_search", time.perf_counter() - start)
+        start = time.perf_counter()
+        summarizer = Summarizer()
+        summary = summarizer.summarize_papers(papers, level=level, query=query)
+        if clock is not None:
+            clock.add("extractive", time.perf_counter() - start)
+        return summarizer.to_markdown(query, summary, papers, level=level)
+    
+    def _deadline_fallback(self, plan: PipelinePlan, search_task: Task, query: str, level: str,
+                           error: Exception) -> str:
+        """
+        Meilleure réponse possible quand l'échéance interrompt le pipeline.
         
+        Returns:
+            Résumé extractif des articles déjà trouvés
+            
+        Raises:
+            Exception: L'erreur d'origine, si aucun article n'a été trouvé
+        """
+        papers = self._found_papers(search_task)
+        if not papers:
+            raise error
+        print(f"⚠️ Pipeline interrompu ({error}) : résumé extractif des {len(papers)} articles trouvés")
+        plan.degradations.append("échéance atteinte en cours d'exécution : résumé extractif des articles trouvés")
+        return self._extractive_answer(query, len(papers), level, papers=papers)
+    
+    def _request_key(self, query: str, max_results: int, french: bool, level: str, translation: str,
+                     streaming: bool, plan: PipelinePlan) -> str:
+        """Clé de fusion d'une requête : modèle, question normalisée et options qui changent la réponse."""
+        if plan is not None:
+            max_results, translation, streaming = plan.max_results, plan.translation, True
+        return make_key(
+            "process_query", self.model, self.base_url, " ".join(query.lower().split()),
+            max_results, french, level,
+            translation or self.config.get("pipeline", "translation", default="direct"),
+            self.config.get("pipeline", "streaming", default=False) if streaming is None else streaming,
+            plan.to_dict() if plan is not None else None
+        )
+    
+    def process_query(self, query: str, max_results: int = 5, french: bool = True, 
+                     level: str = "medium", deadline_seconds: float = None,
+                     translation: str = None, outputs: Dict[str, str] = None,
+                     streaming: bool = None, plan: PipelinePlan = None, raise_errors: bool = False) -> str:
+        """
+        Traite une requête utilisateur en déployant une équipe d'agents.
+        
+        Une requête identique à une requête en cours (même question, mêmes options)
+        n'est pas exécutée une seconde fois : elle attend et partage sa réponse,
+        dans la limite de sa propre échéance.
+        
+        Args:
+            query: Question de l'utilisateur
+            max_results: Nombre maximum d'articles à récupérer
+            french: Si True, traduit les résultats en français
+            level: Niveau d'explication (expert, medium, beginner)
+            deadline_seconds: Échéance de la requête ; chaque appel LLM des tâches
+                              reçoit le temps restant comme timeout (None: aucune)
+            translation: Mode de traduction (direct, merged, separate ; par défaut:
+                         defaults.pipeline.translation)
+            outputs: Dictionnaire rempli avec la sortie brute de chaque tâche (optionnel,
+                     ex: pour conserver articles et analyses dans une session de chat)
+            streaming: Recherche et analyses d'articles en flux, hors équipage (par défaut:
+                       defaults.pipeline.streaming)
+            plan: Plan allégé de `plan_for_deadline` (remplace max_results et translation,
+                  impose le flux ; les allègements imprévus y sont ajoutés)
+            raise_errors: Propage les erreurs au lieu de retourner un message d'erreur
+                          (ex: file de travaux, qui relance les travaux en échec)
+            
+        Returns:
+            Résultat formaté au format markdown
+        """
+        key = self._request_key(query, max_results, french, level, translation, streaming, plan)
         try:
-            result = crew.kickoff()
+            with deadline(deadline_seconds):
+                answer, task_outputs, degradations = get_flight("process_query").do(
+                    key, self._run_query, query, max_results, french, level, translation, streaming, plan
+                )
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"⚠️ Erreur lors du traitement de la requête: {str(e)}")
+            return f"❌ Une erreur est survenue lors du traitement de votre requête: {str(e)}"
+        if outputs is not None:
+            outputs.update(task_outputs)
+        if plan is not None:
+            plan.degradations[:] = degradations
+        return answer
+    
+    def _run_query(self, query: str, max_results: int, french: bool, level: str, translation: str,
+                   streaming: bool, plan: PipelinePlan) -> tuple:
+        """
+        Exécution de `process_query` (dans l'échéance de l'appelant).
+        
+        Returns:
+            Tuple (réponse, sorties brutes des tâches, allègements du plan)
+        """
+        clock = StageClock()
+        if plan is not None:
+            max_results, translation, streaming = plan.max_results, plan.translation, True
+            if plan.extractive_only:
+                answer = self._extractive_answer(query, max_results, level, clock=clock)
+                record_timings(clock)
+                return answer, {}, list(plan.degradations)
+        if streaming is None:
+            streaming = self.config.get("pipeline", "streaming", default=False)
+        
+        agents, tasks = self._build_tasks(query, max_results, french, level, translation, plan)
+        parsing_task, search_task, analysis_task = tasks[:3]
+        
+        def on_task_done(output: TaskOutput) -> None:
+            # Hors flux, les trois premières tâches ne sont pas comparables à l'étape en flux
+            if streaming or output.name not in STREAM_STAGES:
+                clock.lap(output.name)
+            else:
+                clock.restart()
+        
+        try:
+            with output_language("fr" if french else None):
+                # En flux, l'analyse de la requête, la recherche et les analyses sont exécutées
+                # avant l'équipage, qui reprend leurs sorties comme contexte
+                if streaming:
+                    self._run_streaming_stage(query, max_results, french, parsing_task, search_task,
+                                              analysis_task, clock)
+                    if plan is not None and plan.extractive_summary:
+                        self._set_extractive_summary(tasks[3], search_task, query, level, clock)
+                crew_tasks = [task for task in tasks if task.output is None]
+                crew_agents = [agent for agent in agents if any(task.agent is agent for task in crew_tasks)]
+                
+                # Créer et exécuter l'équipage (avec mémoire sauf sous cassette)
+                crew = Crew(
+                    agents=crew_agents,
+                    tasks=crew_tasks,
+                    verbose=True,
+                    process=Process.sequential,
+                    memory=self.memory,
+                    long_term_memory=self.long_term_memory,
+                    short_term_memory=self.short_term_memory,
+                    entity_memory=self.entity_memory,
+                    task_callback=on_task_done
+                )
+                clock.restart()
+                result = crew.kickoff()
+            
+            if french and analysis_task.output is not None:
+                record_translations(analysis_task.output.raw, "fr")
+            record_timings(clock)
             
             # Extraire le texte du résultat et le formater correctement
             if hasattr(result, 'raw'):
                 result_text = result.raw
             else:
                 result_text = str(result)
-                
-            # Si le résultat contient "## Final Answer:", extraire seulement la partie après
-            if "## Final Answer:" in result_text:
-                parts = result_text.split("## Final Answer:")
-                if len(parts) > 1:
-                    return parts[1].strip()
+            answer = self._final_answer(result_text)
+        except Exception as e:
+            if plan is None:
+                raise
+            print(f"⚠️ Erreur lors du traitement de la requête: {str(e)}")
+            answer = self._deadline_fallback(plan, search_task, query, level, e)
+        return answer, self._task_outputs(tasks), list(plan.degradations) if plan is not None else []
+    
+    @staticmethod
+    def _task_outputs(tasks: List[Task]) -> Dict[str, str]:
+        """Sorties brutes des tâches exécutées, par nom de tâche."""
+        return {task.name: task.output.raw for task in tasks if task.output is not None}
+    
+    async def aprocess_query(self, query: str, max_results: int = 5, french: bool = True,
+                             level: str = "medium", deadline_seconds: float = None,
+                             translation: str = None, outputs: Dict[str, str] = None,
+                             plan: PipelinePlan = None, raise_errors: bool = False) -> str:
+        """
+        Version asynchrone de `process_query`, pour servir de nombreuses requêtes dans une seule boucle.
+        
+        Les tâches sont celles de l'équipage, exécutées hors équipage : analyse de
+        la requête, recherche et analyses en flux (comme `streaming=True`), puis
+        chaque tâche en un appel LLM asynchrone dès que les tâches de son contexte
+        sont terminées (le professeur et la traduction s'exécutent ensemble). Les
+        appels bloquants (ArXiv, SQLite, embedder) passent par les pools de
+        lib.async_pipeline. Sans boucle d'appels d'outils, le pipeline utilise les
+        variantes asynchrones des outils des agents : chaque analyse reçoit des
+        passages du texte intégral de l'article (retrieve_passages, ou
+        get_paper_sections en repli ; defaults.pipeline.async_passages), et la
+        recherche est complétée des articles du corpus local et du graphe de
+        citations (semantic_search_papers, related_papers ;
+        defaults.pipeline.async_local_papers). Les mémoires CrewAI ne sont ni
+        consultées ni alimentées.
+        Les requêtes identiques simultanées partagent une exécution ; l'annulation
+        d'un appelant n'interrompt pas les autres.
+        
+        Args:
+            query: Question de l'utilisateur
+            max_results: Nombre maximum d'articles à récupérer
+            french: Si True, traduit les résultats en français
+            level: Niveau d'explication (expert, medium, beginner)
+            deadline_seconds: Échéance de la requête (None: aucune)
+            translation: Mode de traduction (direct, merged, separate ; par défaut:
+                         defaults.pipeline.translation)
+            outputs: Dictionnaire rempli avec la sortie brute de chaque tâche (optionnel)
+            plan: Plan allégé de `plan_for_deadline` (comme pour `process_query`)
+            raise_errors: Propage les erreurs au lieu de retourner un message d'erreur
             
-            return result_text
+        Returns:
+            Résultat formaté au format markdown
+        """
+        key = self._request_key(query, max_results, french, level, translation, True, plan)
+        try:
+            with deadline(deadline_seconds):
+                answer, task_outputs, degradations = await get_flight("process_query").ado(
+                    key, self._arun_query, query, max_results, french, level, translation, plan
+                )
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"⚠️ Erreur lors du traitement de la requête: {str(e)}")
-            return f"❌ Une erreur est survenue lors du traitement de votre requête: {str(e)}"
\ No newline at end of file
+            return f"❌ Une erreur est survenue lors du traitement de votre requête: {str(e)}"
+        if outputs is not None:
+            outputs.update(task_outputs)
+        if plan is not None:
+            plan.degradations[:] = degradations
+        return answer
+    
+    async def _arun_query(self, query: str, max_results: int, french: bool, level: str, translation: str,
+                          plan: PipelinePlan) -> tuple:
+        """Exécution de `aprocess_query` (mêmes résultats que `_run_query`)."""
+        clock = StageClock()
+        if plan is not None:
+            max_results, translation = plan.max_results, plan.translation
+            if plan.extractive_only:
+                answer = await run_blocking(self._extractive_answer, query, max_results, level, clock=clock)
+                await run_blocking(record_timings, clock)
+                return answer, {}, list(plan.degradations)
+        
+        _, tasks = self._build_tasks(query, max_results, french, level, translation, plan)
+        parsing_task, search_task, analysis_task = tasks[:3]
+        
+        async def execute(task: Task) -> None:
+            await self._aexecute_task(task, clock)
+        
+        try:
+            with output_language("fr" if french else None):
+                await self._arun_streaming_stage(query, max_results, french, parsing_task, search_task,
+                                                 analysis_task, clock)
+                if plan is not None and plan.extractive_summary:
+                    await run_blocking(self._set_extractive_summary, tasks[3], search_task, query, level, clock)
+                await run_task_graph([task for task in tasks if task.output is None], execute)
+            
+            if french and analysis_task.output is not None:
+                await run_blocking(record_translations, analysis_task.output.raw, "fr")
+            await run_blocking(record_timings, clock)
+            answer = self._final_answer(tasks[-1].output.raw)
+        except Exception as e:
+            if plan is None:
+                raise
+            print(f"⚠️ Erreur lors du traitement de la requête: {str(e)}")
+            answer = await run_blocking(self._deadline_fallback, plan, search_task, query, level, e)
+        return answer, self._task_outputs(tasks), list(plan.degradations) if plan is not None else []
+    
+    @staticmethod
+    def _final_answer(result_text: str) -> str:
+        """Texte de la réponse finale (la partie après "## Final Answer:" si elle est présente)."""
+        if "## Final Answer:" in result_text:
+            parts = result_text.split("## Final Answer:")
+            if len(parts) > 1:
+                return parts[1].strip()
+        return result_text
\ No newline at end of file
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Archive consultable des réponses d'ArxivBuddy.
+
+Chaque réponse est ajoutée, compressée, à la fin d'un fichier segment
+(`results-0000.log`, jamais réécrit) sous forme d'un enregistrement encadré :
+en-tête (marque, format de compression, longueur), données, CRC32. Une base
+SQLite indexe les enregistrements : métadonnées (articles cités, modèle,
+durées...) et index plein texte FTS5 des questions et réponses. L'index FTS
+est sans contenu (`content=''`, positions non conservées) : le texte n'est
+stocké qu'une fois, compressé, dans les segments. La compression utilise
+zstandard lorsqu'il est installé, sinon zlib.
+
+Les métadonnées des articles connus de la base locale au moment de l'ajout
+(titre, auteurs, résumé...) sont conservées avec l'index sous forme binaire
+(`lib.paper.pack_papers`) : une réponse ancienne reste lisible même si la
+base des articles a été vidée entre-temps.
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .paper import Paper, pack_papers, unpack_papers
+from .paper_store import get_paper_store
+from .sqlite_store import get_database
+from .utils import get_cache_dir
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    zstandard = None
+
+# Format de compression d'un enregistrement
+_CODEC_ZSTD = 1
+_CODEC_ZLIB = 2
+
+_MAGIC = b"AB"
+_HEADER = struct.Struct("<2sBI")
+_TRAILER = struct.Struct("<I")
+
+# Taille au-delà de laquelle un nouveau segment est commencé
+SEGMENT_BYTES = int(os.getenv("ARCHIVE_SEGMENT_MB", "64")) * 1024 * 1024
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+# Articles cités : identifiants au nouveau format, ou anciens identifiants dans une URL ArXiv
+# (ARXIV_ID_PATTERN, non ancré, est trop lent sur de longues réponses)
+_CITATION = re.compile(r"(?<![\d.])(\d{4}\.\d{4,5})(?:v\d+)?(?![\d])"
+                       r"|arxiv\.org/(?:abs|pdf)/([a-z\-]+(?:\.[A-Z]{2})?/\d{7})")
+# Au-delà, la pertinence (BM25) n'est calculée que pour les correspondances les plus récentes
+RANK_CANDIDATES = int(os.getenv("ARCHIVE_RANK_CANDIDATES", "2000"))
+
+
+def _compress(data: bytes) -> Tuple[int, bytes]:
+    if zstandard is not None:
+        return _CODEC_ZSTD, zstandard.ZstdCompressor(level=10).compress(data)
+    return _CODEC_ZLIB, zlib.compress(data, 9)
+
+
+def _decompress(codec: int, payload: bytes) -> bytes:
+    if codec == _CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Enregistrement compressé avec zstd : installez le paquet zstandard")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if codec == _CODEC_ZLIB:
+        return zlib.decompress(payload)
+    raise ValueError(f"Format de compression inconnu: {codec}")
+
+
+def fts_query(text: str) -> str:
+    """
+    Convertit une recherche libre en requête FTS5 (tous les mots, le dernier en préfixe).
+
+    Args:
+        text: Texte recherché
+
+    Returns:
+        Requête FTS5 (chaîne vide si le texte ne contient aucun mot)
+    """
+    tokens = _TOKEN.findall(text)
+    if not tokens:
+        return ""
+    terms = [f'"{token}"' for token in tokens[:-1]] + [f'"{tokens[-1]}"*']
+    return " ".join(terms)
+
+
+def cited_papers(text: str) -> List[str]:
+    """Identifiants ArXiv cités dans un texte, dans l'ordre d'apparition et sans doublon."""
+    return list(dict.fromkeys(match.group(1) or match.group(2) for match in _CITATION.finditer(text or "")))
+
+
+class ResultArchive:
+    """Archive compressée en ajout seul, indexée en plein texte."""
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Initialise l'archive.
+
+        Args:
+            directory: Répertoire de l'archive (par défaut: get_cache_dir("archive"))
+        """
+        self.directory = directory or get_cache_dir("archive")
+        os.makedirs(self.directory, exist_ok=True)
+        self.database = get_database(os.path.join(self.directory, "archive.db"))
+        with self.database.transaction() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    id INTEGER PRIMARY KEY,
+                    created REAL NOT NULL,
+                    query TEXT NOT NULL,
+                    model TEXT,
+                    papers TEXT NOT NULL,
+                    paper_data BLOB,
+                    metadata TEXT NOT NULL,
+                    segment INTEGER NOT NULL,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL
+                )
+                """
+            )
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(results)")}
+            if "paper_data" not in columns:
+                # Archive créée avant la conservation des métadonnées des articles
+                connection.execute("ALTER TABLE results ADD COLUMN paper_data BLOB")
+            connection.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created)")
+            try:
+                connection.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS results_fts USING fts5("
+                    "query, answer, content='', detail=column, tokenize='unicode61 remove_diacritics 2')"
+                )
+                self.full_text = True
+            except Exception as e:
+                print(f"⚠️ FTS5 indisponible, recherche limitée aux questions: {e}")
+                self.full_text = False
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"results-{segment:04d}.log")
+
+    def _append(self, connection, records: List[Tuple[bytes, Dict[str, Any]]]) -> List[int]:
+        """Ajoute des enregistrements (dans la transaction d'écriture, qui sérialise les ajouts)."""
+        row = connection.execute("SELECT MAX(segment) FROM results").fetchone()
+        segment = row[0] or 0
+        path = self._segment_path(segment)
+        if os.path.exists(path) and os.path.getsize(path) >= SEGMENT_BYTES:
+            segment += 1
+            path = self._segment_path(segment)
+
+        ids = []
+        with open(path, "ab") as f:
+            for data, entry in records:
+                codec, payload = _compress(data)
+                offset = f.tell()
+                frame = _HEADER.pack(_MAGIC, codec, len(payload)) + payload + _TRAILER.pack(zlib.crc32(payload))
+                f.write(frame)
+                cursor = connection.execute(
+                    "INSERT INTO results (created, query, model, papers, paper_data, metadata, segment, offset, "
+                    "length) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (entry["created"], entry["query"], entry.get("model"),
+                     json.dumps(entry["papers"]), entry.get("paper_data"),
+                     json.dumps(entry["metadata"], ensure_ascii=False), segment, offset, len(frame))
+                )
+                if self.full_text:
+                    connection.execute("INSERT INTO results_fts (rowid, query, answer) VALUES (?, ?, ?)",
+                                       (cursor.lastrowid, entry["query"], entry["answer"]))
+                ids.append(cursor.lastrowid)
+            f.flush()
+            os.fsync(f.fileno())
+        return ids
+
+    @staticmethod
+    def _entry(query: str, answer: str, papers: Optional[Iterable[str]] = None, model: Optional[str] = None,
+               created: Optional[float] = None, **metadata: Any) -> Tuple[bytes, Dict[str, Any]]:
+        papers = list(dict.fromkeys([*(papers or []), *cited_papers(answer)]))
+        entry = {"query": query, "answer": answer, "papers": papers, "model": model,
+                 "created": created or time.time(), "metadata": metadata}
+        return json.dumps(entry, ensure_ascii=False).encode("utf-8"), entry
+
+    @staticmethod
+    def _snapshot(records: List[Tuple[bytes, Dict[str, Any]]]) -> None:
+        """Joint à chaque enregistrement les métadonnées binaires de ses articles connus."""
+        try:
+            known = get_paper_store().get_by_ids(
+                paper_id for _, entry in records for paper_id in entry["papers"])
+        except Exception as e:
+            print(f"⚠️ Métadonnées des articles non archivées: {e}")
+            return
+        for _, entry in records:
+            papers = [known[paper_id] for paper_id in entry["papers"] if paper_id in known]
+            if papers:
+                entry["paper_data"] = pack_papers(papers)
+
+    def add(self, query: str, answer: str, papers: Optional[Iterable[str]] = None, model: Optional[str] = None,
+            **metadata: Any) -> int:
+        """
+        Archive une réponse.
+
+        Args:
+            query: Question
+            answer: Réponse (Markdown)
+            papers: Identifiants ArXiv des articles trouvés (ceux cités dans la réponse sont ajoutés)
+            model: Modèle LLM utilisé
+            **metadata: Autres métadonnées (niveau, durée, options...)
+
+        Returns:
+            Identifiant de la réponse archivée
+        """
+        records = [self._entry(query, answer, papers, model, **metadata)]
+        self._snapshot(records)
+        with self.database.transaction() as connection:
+            return self._append(connection, records)[0]
+
+    def add_many(self, entries: Iterable[Dict[str, Any]]) -> List[int]:
+        """
+        Archive plusieurs réponses en une transaction (import).
+
+        Args:
+            entries: Dictionnaires avec query, answer et, optionnellement, papers, model,
+                     created et d'autres métadonnées
+
+        Returns:
+            Identifiants des réponses archivées
+        """
+        records = [self._entry(**entry) for entry in entries]
+        if not records:
+            return []
+        self._snapshot(records)
+        with self.database.transaction() as connection:
+            return self._append(connection, records)
+
+    def _read(self, segment: int, offset: int, length: int) -> Dict[str, Any]:
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            frame = f.read(length)
+        magic, codec, size = _HEADER.unpack_from(frame)
+        payload = frame[_HEADER.size:_HEADER.size + size]
+        (crc,) = _TRAILER.unpack_from(frame, _HEADER.size + size)
+        if magic != _MAGIC or zlib.crc32(payload) != crc:
+            raise ValueError(f"Enregistrement corrompu (segment {segment}, position {offset})")
+        return json.loads(_decompress(codec, payload))
+
+    _COLUMNS = "id, created, query, model, papers, metadata, segment, offset, length"
+
+    def _row(self, row, with_answer: bool = False) -> Dict[str, Any]:
+        result_id, created, query, model, papers, metadata, segment, offset, length = row
+        result = {"id": result_id, "created": created, "query": query, "model": model,
+                  "papers": json.loads(papers), "metadata": json.loads(metadata)}
+        if with_answer:
+            result["answer"] = self._read(segment, offset, length)["answer"]
+        return result
+
+    def get(self, result_id: int) -> Optional[Dict[str, Any]]:
+        """Réponse archivée complète (None si elle n'existe pas)."""
+        rows = self.database.query(f"SELECT {self._COLUMNS} FROM results WHERE id = ?", (result_id,))
+        return self._row(rows[0], with_answer=True) if rows else None
+
+    def paper_details(self, result_id: int) -> List[Paper]:
+        """
+        Métadonnées des articles d'une réponse, telles qu'au moment de l'archivage.
+
+        Args:
+            result_id: Identifiant de la réponse archivée
+
+        Returns:
+            Articles connus de la base locale lors de l'ajout (liste vide sinon)
+        """
+        rows = self.database.query("SELECT paper_data FROM results WHERE id = ?", (result_id,))
+        if not rows or rows[0][0] is None:
+            return []
+        try:
+            return unpack_papers(bytes(rows[0][0]))
+        except (ValueError, TypeError, EOFError, RuntimeError) as e:
+            print(f"⚠️ Métadonnées des articles illisibles (réponse {result_id}): {e}")
+            return []
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Dernières réponses archivées (métadonnées seulement)."""
+        return [self._row(row) for row in self.database.query(
+            f"SELECT {self._COLUMNS} FROM results ORDER BY id DESC LIMIT ?", (limit,))]
+
+    def search(self, text: str, limit: int = 20, snippets: bool = True) -> List[Dict[str, Any]]:
+        """
+        Recherche plein texte dans les questions et réponses archivées.
+
+        Args:
+            text: Mots recherchés (le dernier est complété en préfixe)
+            limit: Nombre maximal de résultats
+            snippets: Ajoute un extrait de la réponse (lecture des seuls résultats renvoyés)
+
+        Returns:
+            Réponses triées par pertinence (BM25, question pondérée double), parmi les
+            RANK_CANDIDATES correspondances les plus récentes
+        """
+        match = fts_query(text)
+        if not match:
+            return []
+        if self.full_text:
+            # Classement BM25 (question pondérée double) des correspondances les plus récentes
+            rows = self.database.query(
+                f"SELECT {', '.join('r.' + column for column in self._COLUMNS.split(', '))} FROM ("
+                "  SELECT rowid, bm25(results_fts, 2.0, 1.0) AS score FROM results_fts"
+                "  WHERE results_fts MATCH ? ORDER BY rowid DESC LIMIT ?"
+                ") AS matches JOIN results r ON r.id = matches.rowid ORDER BY matches.score LIMIT ?",
+                (match, RANK_CANDIDATES, limit)
+            )
+        else:
+            rows = self.database.query(
+                f"SELECT {self._COLUMNS} FROM results WHERE query LIKE ? ORDER BY id DESC LIMIT ?",
+                (f"%{text}%", limit)
+            )
+        results = [self._row(row, with_answer=snippets) for row in rows]
+        if snippets:
+            terms = [token.lower() for token in _TOKEN.findall(text)]
+            for result in results:
+                result["snippet"] = self._snippet(result.pop("answer"), terms)
+        return results
+
+    @staticmethod
+    def _snippet(answer: str, terms: List[str], width: int = 160) -> str:
+        """Extrait de la réponse autour du premier mot recherché."""
+        lowered = answer.lower()
+        positions = [lowered.find(term) for term in terms]
+        position = min((p for p in positions if p >= 0), default=0)
+        start = max(position - width // 3, 0)
+        snippet = " ".join(answer[start:start + width].split())
+        return ("…" if start else "") + snippet + ("…" if start + width < len(answer) else "")
+
+    def stats(self) -> Dict[str, Any]:
+        """Nombre de réponses, taille des segments et de l'index."""
+        count = self.database.query("SELECT COUNT(*) FROM results")[0][0]
+        segments = [name for name in os.listdir(self.directory) if name.startswith("results-")]
+        return {
+            "results": count,
+            "segments": len(segments),
+            "segment_bytes": sum(os.path.getsize(os.path.join(self.directory, name)) for name in segments),
+            "index_bytes": os.path.getsize(os.path.join(self.directory, "archive.db")),
+            "codec": "zstd" if zstandard is not None else "zlib",
+        }
+
+
+_archive: Optional[ResultArchive] = None
+
+
+def get_archive() -> ResultArchive:
+    """
+    Récupère l'instance partagée de l'archive des réponses.
+
+    Returns:
+        Instance de ResultArchive
+    """
+    global _archive
+    if _archive is None:
+        _archive = ResultArchive()
+    return _archive
@@ -3,8 +3,165 @@
 
 import os
 import arxiv
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from typing import Callable, Iterator, List, Dict, Any, Optional
+from datetime import datetime, timedelta, timezone
+
+from .dedup import NearDuplicateFilter
+from .paper import Paper
+
+# Taille des pages demandées à l'API ArXiv et nombre maximal de pages par recherche
+PAGE_SIZE = int(os.getenv('ARXIV_PAGE_SIZE', '50'))
+MAX_PAGES = int(os.getenv('ARXIV_MAX_PAGES', '4'))
+
+_clients: Dict[int, arxiv.Client] = {}
+
+
+def get_arxiv_client(page_size: int = PAGE_SIZE) -> arxiv.Client:
+    """
+    Récupère un client ArXiv partagé (session HTTP réutilisée entre les recherches).
+    
+    Args:
+        page_size: Nombre de résultats par page
+        
+    Returns:
+        Instance de arxiv.Client
+    """
+    if page_size not in _clients:
+        _clients[page_size] = arxiv.Client(page_size=page_size, delay_seconds=3.0, num_retries=3)
+    return _clients[page_size]
+
+
+def _to_utc(value: datetime) -> datetime:
+    """Convertit une date (naïve = heure locale) en date UTC avec fuseau horaire."""
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return value.astimezone(timezone.utc)
+
+
+def _end_of_day(value: datetime) -> datetime:
+    """Dernière minute du jour (UTC) d'une date."""
+    return _to_utc(value).replace(hour=23, minute=59, second=59, microsecond=0)
+
+
+def date_window(days: Optional[int]) -> Optional[tuple]:
+    """
+    Fenêtre de dates couvrant les `days` derniers jours, arrondie au jour (UTC).
+    
+    Les bornes restent identiques toute la journée : la requête envoyée à ArXiv,
+    et donc les clés de cache et de fusion qui en dépendent, ne changent pas
+    d'une minute à l'autre.
+    
+    Args:
+        days: Nombre de jours (None ou 0 pour aucune limite)
+        
+    Returns:
+        Tuple (début, fin) en UTC, ou None
+    """
+    if not days:
+        return None
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=days), _end_of_day(today)
+
+
+def build_query(query: str, categories: Optional[List[str]] = None,
+                start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> str:
+    """
+    Construit une requête ArXiv avec filtres de catégories et de date appliqués côté serveur.
+    
+    Args:
+        query: Chaîne de recherche
+        categories: Liste des catégories ArXiv à inclure
+        start_date: Date de soumission minimale
+        end_date: Date de soumission maximale (par défaut: fin du jour UTC en cours)
+        
+    Returns:
+        Requête au format de l'API ArXiv
+    """
+    search_query = query
+    
+    # Ajouter les filtres de catégorie si spécifiés
+    if categories:
+        search_query = f"({search_query}) AND (" + " OR ".join([f"cat:{cat}" for cat in categories]) + ")"
+    
+    # Filtre de date : l'API attend des bornes YYYYMMDDHHMM en GMT
+    if start_date or end_date:
+        start = _to_utc(start_date).strftime("%Y%m%d%H%M") if start_date else "190001010000"
+        end = (_to_utc(end_date) if end_date else _end_of_day(datetime.now(timezone.utc))).strftime("%Y%m%d%H%M")
+        search_query = f"({search_query}) AND submittedDate:[{start} TO {end}]"
+    
+    return search_query
+
+
+def page_size_for(max_results: int, filtered: bool = False) -> int:
+    """
+    Taille des pages demandées pour produire `max_results` résultats.
+
+    Args:
+        max_results: Nombre de résultats retenus à produire
+        filtered: Un prédicat côté client peut écarter des résultats
+
+    Returns:
+        Nombre de résultats par page
+    """
+    # Le filtre de date est appliqué côté serveur : presque tous les résultats sont
+    # retenus, inutile de télécharger des pages bien plus grandes que nécessaire
+    # (marge x2 quand un prédicat, par exemple la déduplication, peut en écarter)
+    wanted = max_results * 2 if filtered else max_results
+    return max(min(PAGE_SIZE, wanted), 1)
+
+
+def iter_results(query: str, max_results: int,
+                 sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance,
+                 sort_order: arxiv.SortOrder = arxiv.SortOrder.Descending,
+                 categories: Optional[List[str]] = None,
+                 start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                 predicate: Optional[Callable[[arxiv.Result], bool]] = None,
+                 max_pages: Optional[int] = None) -> Iterator[arxiv.Result]:
+    """
+    Parcourt les résultats ArXiv page par page jusqu'à obtenir `max_results` résultats retenus.
+    
+    Les pages sont téléchargées à la demande : la recherche s'arrête dès que
+    `max_results` résultats passent le filtre, ou après `max_pages` pages.
+    
+    Args:
+        query: Chaîne de recherche
+        max_results: Nombre de résultats retenus à produire
+        sort_by: Critère de tri
+        sort_order: Ordre de tri
+        categories: Liste des catégories ArXiv à inclure
+        start_date: Date de soumission minimale (filtre côté serveur)
+        end_date: Date de soumission maximale (filtre côté serveur)
+        predicate: Filtre supplémentaire appliqué côté client
+        max_pages: Budget de pages (par défaut: ARXIV_MAX_PAGES)
+        
+    Yields:
+        Résultats arxiv.Result
+    """
+    page_size = page_size_for(max_results, predicate is not None)
+    client = get_arxiv_client(page_size)
+    budget = max(max_pages or MAX_PAGES, 1) * page_size
+    search = arxiv.Search(
+        query=build_query(query, categories, start_date, end_date),
+        max_results=max(budget, max_results),
+        sort_by=sort_by,
+        sort_order=sort_order
+    )
+    
+    # Garde-fou côté client, sur des dates UTC (ArXiv renvoie des dates avec fuseau horaire)
+    start = _to_utc(start_date) if start_date else None
+    end = _to_utc(end_date) if end_date else None
+    
+    found = 0
+    for result in client.results(search):
+        published = _to_utc(result.published)
+        if (start and published < start) or (end and published > end):
+            continue
+        if predicate and not predicate(result):
+            continue
+        yield result
+        found += 1
+        if found >= max_results:
+            return
 
 class ArxivSearcher:
     """Classe pour rechercher des articles sur ArXiv."""
@@ -19,7 +176,7 @@ class ArxivSearcher:
     
     def search(self, query: str, max_results: Optional[int] = None, 
                categories: Optional[List[str]] = None, 
-               date_range: Optional[int] = 365) -> List[Dict[str, Any]]:
+               date_range: Optional[int] = 365) -> List[Paper]:
         """
         Recherche des articles sur ArXiv selon les critères spécifiés.
         
@@ -27,56 +184,29 @@ class ArxivSearcher:
             query: Chaîne de recherche
             max_results: Nombre maximum de résultats (par défaut: valeur de .env)
             categories: Liste des catégories ArXiv à inclure
-            date_range: Limite de date en jours (par défaut: 1 an)
+            date_range: Limite de date en jours (par défaut: 1 an, None pour aucune limite)
             
         Returns:
-            Liste de dictionnaires contenant les informations des articles
+            Liste d'articles (Paper, accessibles aussi comme des dictionnaires)
         """
         if max_results is None:
             max_results = self.max_results
         
-        # Préparer la requête
-        search_query = query
-        
-        # Ajouter les filtres de catégorie si spécifiés
-        if categories:
-            cat_filter = " AND (" + " OR ".join([f"cat:{cat}" for cat in categories]) + ")"
-            search_query += cat_filter
+        # Filtrer par date côté serveur (submittedDate) plutôt qu'après téléchargement
+        window = date_window(date_range)
+        start_date, end_date = window if window else (None, None)
         
-        # Configuration de la recherche
-        search = arxiv.Search(
-            query=search_query,
-            max_results=max_results,
-            sort_by=self.sort_criterion,
-            sort_order=self.sort_order
-        )
-        
-        # Récupérer et filtrer les résultats
+        # Récupérer les résultats page par page, sans versions multiples ni quasi-doublons
+        dedup = NearDuplicateFilter()
         papers = []
-        for result in search.results():
-            # On ne filtre plus par date car les dates de publication ArXiv peuvent être
-            # dans un format différent (timezone aware vs naive)
-            # Le tri par SubmittedDate fourni par l'API ArXiv est suffisant
-                
-            # Extraire les informations pertinentes
-            paper = {
-                'id': result.entry_id,
-                'title': result.title,
-                'authors': [author.name for author in result.authors],
-                'summary': result.summary,
-                'published': result.published,
-                'pdf_url': result.pdf_url,
-                'categories': result.categories
-            }
-            papers.append(paper)
-            
-            # Arrêter si on a atteint le nombre maximal de résultats
-            if len(papers) >= max_results:
-                break
+        for result in iter_results(query, max_results, self.sort_criterion, self.sort_order,
+                                   categories=categories, start_date=start_date, end_date=end_date,
+                                   predicate=dedup.accept):
+            papers.append(Paper.from_result(result))
         
         return papers
     
-    def get_paper_by_id(self, paper_id: str) -> Dict[str, Any]:
+    def get_paper_by_id(self, paper_id: str) -> Paper:
         """
         Récupère un article spécifique par son ID ArXiv.
         
@@ -84,19 +214,11 @@ class ArxivSearcher:
             paper_id: ID ArXiv de l'article
             
         Returns:
-            Dictionnaire contenant les informations de l'article
+            Article (Paper)
         """
         search = arxiv.Search(id_list=[paper_id])
         result = next(search.results())
         
-        paper = {
-            'id': result.entry_id,
-            'title': result.title,
-            'authors': [author.name for author in result.authors],
-            'summary': result.summary,
-            'published': result.published,
-            'pdf_url': result.pdf_url,
-            'categories': result.categories
-        }
+        paper = Paper.from_result(result)
         
         return paper
\ No newline at end of file
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Exécution asynchrone des requêtes ArxivBuddy.
+
+`process_query` est synchrone de bout en bout (`crew.kickoff()`, générateurs
+ArXiv, appels à l'embedder) : servir N utilisateurs simultanés demande N
+threads ou N processus. Ce module fournit les briques de
+`ArxivAgents.aprocess_query`, qui fait tenir des dizaines de requêtes en cours
+dans une seule boucle asyncio :
+- `run_blocking` exécute une fonction bloquante dans un pool de threads, avec
+  les variables de contexte de l'appelant (échéance, langue de sortie) ;
+- un pool d'E/S borné (HTTP ArXiv, SQLite, PDF) et un pool d'embedding
+  réduit pour les outils d'embedding, dont les encodages sont regroupés en
+  lots par le thread d'encodage de l'embedder (lib.embedding_batcher) ;
+- `acall_llm`, appel LLM asynchrone (`litellm.acompletion` via l'ordonnanceur) ;
+- les variantes asynchrones des outils des agents, et ce que le pipeline en
+  tire sans boucle d'appels d'outils : passages du texte intégral de chaque
+  article analysé (`afulltext_evidence`), articles du corpus local et du graphe
+  de citations proches de la recherche (`alocal_papers`) ;
+- `astream_search_analysis`, recherche et analyses en flux (équivalent de
+  lib.streaming sans thread par article) ;
+- `run_task_graph`, exécution des tâches dès que leur contexte est prêt.
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import arxiv
+
+from .arxiv_api import iter_results
+from .dedup import NearDuplicateFilter
+from .paper import Paper
+from .paper_store import record_papers
+from .streaming import StreamResult
+from .translation_cache import attach_translations
+
+# Threads du pool d'E/S (appels bloquants : HTTP ArXiv, SQLite, PDF)
+ASYNC_IO_WORKERS = int(os.getenv("ASYNC_IO_WORKERS", "32"))
+# Threads du pool d'embedding ; les encodages eux-mêmes passent par le thread unique
+# de lib.embedding_batcher (le modèle utilise déjà tous les cœurs)
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "4"))
+
+# Fin d'un itérateur bloquant
+_DONE = object()
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _executor(name: str, workers: int) -> ThreadPoolExecutor:
+    with _executors_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(max_workers=max(workers, 1),
+                                                  thread_name_prefix=f"arxivbuddy-{name}")
+        return _executors[name]
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Pool partagé des appels bloquants d'E/S (ASYNC_IO_WORKERS threads)."""
+    return _executor("io", ASYNC_IO_WORKERS)
+
+
+def get_embedding_executor() -> ThreadPoolExecutor:
+    """Pool partagé des appels à l'embedder (EMBEDDING_WORKERS threads)."""
+    return _executor("embedding", EMBEDDING_WORKERS)
+
+
+async def run_blocking(function: Callable[..., Any], *args: Any, executor: Optional[Executor] = None,
+                       **kwargs: Any) -> Any:
+    """
+    Exécute une fonction bloquante hors de la boucle d'événements.
+
+    Args:
+        function: Fonction à exécuter
+        *args: Arguments positionnels
+        executor: Pool de threads (par défaut: pool d'E/S)
+        **kwargs: Arguments nommés
+
+    Returns:
+        Valeur retournée par la fonction
+    """
+    context = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor or get_io_executor(),
+                                      lambda: context.run(function, *args, **kwargs))
+
+
+async def aiter_blocking(iterable: Iterable[Any], executor: Optional[Executor] = None) -> AsyncIterator[Any]:
+    """
+    Parcourt un itérateur bloquant (ex: générateur de pages HTTP) sans bloquer la boucle.
+
+    Chaque élément est obtenu dans le pool ; l'itérateur n'est jamais avancé
+    par deux threads à la fois.
+
+    Args:
+        iterable: Itérable bloquant
+        executor: Pool de threads (par défaut: pool d'E/S)
+    """
+    iterator = iter(iterable)
+    try:
+        while True:
+            item = await run_blocking(next, iterator, _DONE, executor=executor)
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            try:
+                close()
+            except ValueError:
+                # Itération abandonnée pendant un `next` encore en cours dans le pool
+                pass
+
+
+async def acall_llm(llm: Any, messages: List[Dict[str, str]]) -> str:
+    """
+    Appelle un LLM sans bloquer la boucle d'événements.
+
+    Args:
+        llm: LLM CrewAI ; un RoutedLLM est appelé via `litellm.acompletion`,
+             les autres dans le pool d'E/S
+        messages: Messages de l'appel
+
+    Returns:
+        Texte de la réponse
+    """
+    if hasattr(llm, "acall"):
+        return str(await llm.acall(messages))
+    return str(await run_blocking(llm.call, messages))
+
+
+# ----------------------------------------------------------------------
+# Variantes asynchrones des outils
+# ----------------------------------------------------------------------
+def _tools():
+    # Import différé : lib.tools importe les outils CrewAI et le texte intégral
+    from . import tools
+    return tools
+
+
+async def asearch_arxiv(query: str, max_results: int = 5, categories: str = None) -> str:
+    """Variante asynchrone de l'outil search_arxiv (pool d'E/S)."""
+    return await run_blocking(_tools().search_arxiv.func, query, max_results, categories)
+
+
+async def aget_paper_sections(paper_id: str, sections: str = None, max_chars: int = 4000) -> str:
+    """Variante asynchrone de l'outil get_paper_sections (pool d'E/S)."""
+    return await run_blocking(_tools().get_paper_sections.func, paper_id, sections, max_chars)
+
+
+async def arelated_papers(paper_ids: str, depth: int = 1, max_results: int = 10) -> str:
+    """Variante asynchrone de l'outil related_papers (pool d'E/S)."""
+    return await run_blocking(_tools().related_papers.func, paper_ids, depth, max_results)
+
+
+async def asemantic_search_papers(query: str, max_results: int = 5) -> str:
+    """Variante asynchrone de l'outil semantic_search_papers (pool d'embedding)."""
+    return await run_blocking(_tools().semantic_search_papers.func, query, max_results,
+                              executor=get_embedding_executor())
+
+
+async def aretrieve_passages(question: str, paper_ids: str, k: int = 5) -> str:
+    """Variante asynchrone de l'outil retrieve_passages (pool d'embedding)."""
+    return await run_blocking(_tools().retrieve_passages.func, question, paper_ids, k,
+                              executor=get_embedding_executor())
+
+
+def _tool_result(raw: str) -> Dict[str, Any]:
+    """Sortie JSON d'un outil ({} en cas d'erreur, signalée)."""
+    try:
+        data = json.loads(raw)
+    except (TypeError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    if "error" in data:
+        print(f"⚠️ {data['error']}")
+        return {}
+    return data
+
+
+async def afulltext_evidence(question: str, paper_id: str, passages: int = 3,
+                             fallback_sections: str = "conclusion", max_chars: int = 1500) -> Dict[str, Any]:
+    """
+    Extraits du texte intégral d'un article à joindre à son analyse.
+
+    Les passages les plus proches de la question (retrieve_passages) sont
+    retenus ; si l'index de passages est indisponible, les sections de repli
+    (get_paper_sections, sans embedder) les remplacent.
+
+    Args:
+        question: Question de l'utilisateur
+        paper_id: ID ArXiv de l'article
+        passages: Nombre de passages (0 : aucun extrait)
+        fallback_sections: Sections de repli séparées par des virgules
+        max_chars: Taille maximale d'une section de repli
+
+    Returns:
+        {"full_text_passages": [...]} ou {"full_text_sections": {...}}, ou {} si rien n'est disponible
+    """
+    if passages <= 0 or not paper_id:
+        return {}
+    found = _tool_result(await aretrieve_passages(question, paper_id, passages)).get("passages")
+    if found:
+        return {"full_text_passages": [{"section": item.get("section"), "text": item["text"]} for item in found]}
+    sections = _tool_result(await aget_paper_sections(paper_id, fallback_sections, max_chars)).get("sections")
+    return {"full_text_sections": sections} if sections else {}
+
+
+async def alocal_papers(query: str, paper_ids: List[str], max_results: int = 5) -> List[Dict[str, Any]]:
+    """
+    Articles déjà connus localement, proches d'une recherche, sans appel à ArXiv.
+
+    La recherche sémantique dans le corpus local (semantic_search_papers) et le
+    graphe de citations des articles trouvés (related_papers) sont interrogés
+    simultanément ; les articles déjà trouvés sont écartés.
+
+    Args:
+        query: Question de l'utilisateur
+        paper_ids: IDs ArXiv des articles trouvés
+        max_results: Nombre maximal d'articles de chaque source
+
+    Returns:
+        Articles (titre, identifiant, résumé, source), sans doublons
+    """
+    if max_results <= 0:
+        return []
+    calls = [asemantic_search_papers(query, max_results)]
+    if paper_ids:
+        calls.append(arelated_papers(",".join(paper_ids), 1, max_results))
+    results = await asyncio.gather(*calls)
+    seen = set(paper_ids)
+    papers = []
+    for source, raw in zip(("semantic_search_papers", "related_papers"), results):
+        for paper in _tool_result(raw).get("papers", []):
+            paper_id = paper.get("arxiv_id")
+            if not paper_id or paper_id in seen:
+                continue
+            seen.add(paper_id)
+            papers.append({"arxiv_id": paper_id, "title": paper.get("title", ""),
+                           "abstract": paper.get("abstract", ""), "source": source})
+    return papers
+
+
+# ----------------------------------------------------------------------
+# Pipeline
+# ----------------------------------------------------------------------
+async def astream_search_analysis(search_query: str, max_results: int,
+                                  analyze: Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]],
+                                  concurrency: int = 4,
+                                  sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance,
+                                  sort_order: arxiv.SortOrder = arxiv.SortOrder.Descending,
+                                  categories: Optional[List[str]] = None) -> StreamResult:
+    """
+    Recherche des articles et les analyse au fil de l'eau, dans la boucle d'événements.
+
+    Équivalent de `streaming.stream_search_analysis` : chaque article lu dans le
+    flux ArXiv est analysé aussitôt, au plus `concurrency` à la fois par requête.
+
+    Args:
+        search_query: Requête ArXiv
+        max_results: Nombre d'articles retenus
+        analyze: Coroutine d'analyse d'un article (dictionnaire au format des outils → analyse, ou None)
+        concurrency: Nombre d'analyses simultanées
+        sort_by: Critère de tri
+        sort_order: Ordre de tri
+        categories: Catégories ArXiv à inclure
+
+    Returns:
+        StreamResult (articles, analyses réussies et durées des étapes)
+
+    Raises:
+        Exception: Erreur de la recherche, si aucun article n'a pu être lu
+    """
+    concurrency = max(1, min(concurrency, max_results))
+    slots = asyncio.Semaphore(concurrency)
+    papers: List[Dict[str, Any]] = []
+    found: List[Paper] = []
+    analyses: Dict[int, Dict[str, Any]] = {}
+    dedup = NearDuplicateFilter()
+    timings: Dict[str, float] = {"workers": concurrency, "analysis_busy": 0.0}
+    pending: List[asyncio.Future] = []
+    error: Optional[Exception] = None
+    started = time.perf_counter()
+
+    async def run(index: int, paper: Dict[str, Any]) -> None:
+        async with slots:
+            begin = time.perf_counter()
+            try:
+                analysis = await analyze(paper)
+            except Exception as e:
+                print(f"⚠️ Analyse impossible pour {paper.get('arxiv_id')}: {e}")
+                analysis = None
+            timings["analysis_busy"] += time.perf_counter() - begin
+            if analysis:
+                analyses[index] = analysis
+
+    def prepared():
+        # Lecture, conversion et traductions en cache dans le même passage par le pool
+        for result in iter_results(search_query, max_results, sort_by, sort_order,
+                                   categories=categories, predicate=dedup.accept):
+            paper = Paper.from_result(result)
+            yield paper, attach_translations([paper.to_dict()])[0]
+
+    try:
+        try:
+            async for paper, data in aiter_blocking(prepared()):
+                found.append(paper)
+                papers.append(data)
+                timings.setdefault("first_paper", time.perf_counter() - started)
+                pending.append(asyncio.ensure_future(run(len(papers) - 1, data)))
+        except Exception as e:
+            error = e
+        timings["search"] = time.perf_counter() - started
+        await asyncio.gather(*pending)
+    finally:
+        # Requête annulée (échéance, client parti) : les analyses en cours le sont aussi
+        for future in pending:
+            future.cancel()
+    timings["total"] = time.perf_counter() - started
+    await run_blocking(record_papers, found)
+
+    if error is not None and not papers:
+        raise error
+    if error is not None:
+        print(f"⚠️ Recherche interrompue après {len(papers)} articles: {error}")
+    return StreamResult(papers, [analyses[index] for index in sorted(analyses)], timings,
+                        duplicates_removed=len(dedup.rejected))
+
+
+async def run_task_graph(tasks: List[Any], execute: Callable[[Any], Awaitable[None]]) -> None:
+    """
+    Exécute des tâches CrewAI dès que les tâches de leur contexte sont terminées.
+
+    Les tâches indépendantes l'une de l'autre (ex: professeur et traduction)
+    s'exécutent simultanément ; une tâche du contexte absente de `tasks` doit
+    déjà avoir une sortie.
+
+    Args:
+        tasks: Tâches à exécuter
+        execute: Coroutine exécutant une tâche et renseignant sa sortie
+    """
+    futures: Dict[int, asyncio.Future] = {}
+
+    async def run(task: Any) -> None:
+        dependencies = [futures[id(other)] for other in (task.context or []) if id(other) in futures]
+        await asyncio.gather(*dependencies)
+        await execute(task)
+
+    # Aucune tâche ne démarre avant la fin de cette boucle : toutes les dépendances sont connues
+    for task in tasks:
+        futures[id(task)] = asyncio.ensure_future(run(task))
+    try:
+        await asyncio.gather(*futures.values())
+    finally:
+        for future in futures.values():
+            future.cancel()
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Enregistrement et rejeu des échanges réseau d'ArxivBuddy.
+
+Une "cassette" capture toutes les réponses de l'API ArXiv et tous les échanges
+avec le LLM d'une exécution réelle de `process_query`. En mode rejeu, ces
+réponses sont servies sans accès réseau, avec la latence d'origine ou une
+latence nulle, ce qui permet de mesurer le coût propre du pipeline et de
+transformer des requêtes réelles en tests de performance reproductibles.
+
+Les clés des requêtes ArXiv ignorent les bornes de date (une fenêtre "N
+derniers jours" change chaque jour). Les clés des appels LLM dépendent des
+prompts, donc des sorties des outils : sous cassette, les caches locaux sont
+isolés (`isolated_caches` : répertoire vide et jetable, traductions en cache
+ni lues ni enregistrées) et la ligne de commande désactive les mémoires
+CrewAI, pour qu'enregistrement et rejeu construisent les mêmes prompts.
+"""
+
+import asyncio
+import base64
+import contextlib
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .utils import isolated_caches
+
+# Hôtes dont les échanges HTTP sont enregistrés (les autres passent tels quels)
+DEFAULT_HTTP_HOSTS = ("export.arxiv.org", "arxiv.org")
+
+CASSETTE_VERSION = 1
+
+# Bornes de date des requêtes ArXiv : elles dépendent du jour de l'exécution
+_DATE_RANGE = re.compile(r"submittedDate:\[\d+ TO (?:\d+|\*)\]")
+
+
+def _llm_key(kwargs: Dict[str, Any]) -> str:
+    """
+    Calcule la clé d'un appel LLM à partir du modèle et des messages.
+
+    Args:
+        kwargs: Arguments passés à `litellm.completion`
+
+    Returns:
+        Empreinte SHA-256 de l'appel
+    """
+    payload = {
+        "model": kwargs.get("model"),
+        "messages": kwargs.get("messages"),
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _http_key(method: str, url: str, params: Any = None) -> str:
+    """
+    Calcule la clé d'une requête HTTP (méthode + URL complète).
+
+    Args:
+        method: Méthode HTTP
+        url: URL de la requête
+        params: Paramètres de requête éventuels
+
+    Returns:
+        Clé de la requête
+    """
+    prepared = requests.Request(method=method.upper(), url=url, params=params).prepare()
+    return _normalize_http_key(f"{method.upper()} {prepared.url}")
+
+
+def _normalize_http_key(key: str) -> str:
+    """
+    Retire d'une clé HTTP les bornes de date de la requête ArXiv.
+
+    Une fenêtre "N derniers jours" change chaque jour : sans cette normalisation,
+    une cassette ne se rejouerait que le jour de son enregistrement.
+
+    Args:
+        key: Clé "MÉTHODE URL"
+
+    Returns:
+        Clé dont les plages submittedDate sont remplacées par une plage générique
+    """
+    method, _, url = key.partition(" ")
+    parts = urlsplit(url)
+    if "submittedDate" not in parts.query:
+        return key
+    query = urlencode([(name, _DATE_RANGE.sub("submittedDate:[*]", value))
+                       for name, value in parse_qsl(parts.query, keep_blank_values=True)])
+    return f"{method} {urlunsplit(parts._replace(query=query))}"
+
+
+class Cassette:
+    """Capture ou rejoue les échanges ArXiv et LLM d'une exécution."""
+
+    def __init__(self, path: str, mode: str = "record", latency: str = "original",
+                 http_hosts: Tuple[str, ...] = DEFAULT_HTTP_HOSTS):
+        """
+        Initialise la cassette.
+
+        Args:
+            path: Chemin du fichier cassette (JSON)
+            mode: "record" pour enregistrer, "replay" pour rejouer
+            latency: En rejeu, "original" reproduit la latence enregistrée, "zero" la supprime
+            http_hosts: Hôtes HTTP à enregistrer/rejouer
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Mode de cassette inconnu: '{mode}'")
+        if latency not in ("original", "zero"):
+            raise ValueError(f"Mode de latence inconnu: '{latency}'")
+
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.http_hosts = tuple(http_hosts)
+        self.metadata: Dict[str, Any] = {}
+        self.interactions: List[Dict[str, Any]] = []
+
+        self._lock = threading.Lock()
+        self._queues: Dict[str, deque] = defaultdict(deque)
+        self._originals: Dict[str, Any] = {}
+        self._isolation: Optional[contextlib.ExitStack] = None
+
+        if mode == "replay":
+            self.load()
+
+    # ------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------
+    def load(self) -> None:
+        """Charge la cassette depuis le disque et prépare les files de rejeu."""
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Version de cassette non supportée: {data.get('version')}")
+
+        self.metadata = data.get("metadata", {})
+        self.interactions = data.get("interactions", [])
+        self._queues.clear()
+        for interaction in self.interactions:
+            if interaction["kind"] == "http":
+                # Cassettes enregistrées avant la normalisation des dates
+                interaction["key"] = _normalize_http_key(interaction["key"])
+            self._queues[interaction["key"]].append(interaction)
+
+    def save(self) -> None:
+        """Écrit la cassette sur le disque."""
+        data = {
+            "version": CASSETTE_VERSION,
+            "created": datetime.now().isoformat(),
+            "metadata": self.metadata,
+            "interactions": self.interactions,
+        }
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+
+    # ------------------------------------------------------------------
+    # Installation des interceptions
+    # ------------------------------------------------------------------
+    def __enter__(self) -> "Cassette":
+        import litellm
+
+        self._isolation = contextlib.ExitStack()
+        self._isolation.enter_context(isolated_caches())
+
+        self._originals["http"] = requests.Session.request
+        self._originals["llm"] = litellm.completion
+        self._originals["allm"] = getattr(litellm, "acompletion", None)
+
+        cassette = self
+        original_request = self._originals["http"]
+
+        def patched_request(session, method, url, *args, **kwargs):
+            return cassette._handle_http(original_request, session, method, url, *args, **kwargs)
+
+        def patched_completion(*args, **kwargs):
+            return cassette._handle_llm(*args, **kwargs)
+
+        async def patched_acompletion(*args, **kwargs):
+            return await cassette._ahandle_llm(*args, **kwargs)
+
+        requests.Session.request = patched_request
+        litellm.completion = patched_completion
+        if self._originals["allm"] is not None:
+            litellm.acompletion = patched_acompletion
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        import litellm
+
+        requests.Session.request = self._originals.pop("http")
+        litellm.completion = self._originals.pop("llm")
+        original_async = self._originals.pop("allm")
+        if original_async is not None:
+            litellm.acompletion = original_async
+        self._isolation.close()
+        self._isolation = None
+
+        if self.mode == "record":
+            self.save()
+
+    # ------------------------------------------------------------------
+    # Gestion des échanges
+    # ------------------------------------------------------------------
+    def _record(self, interaction: Dict[str, Any]) -> None:
+        """Ajoute un échange enregistré de façon thread-safe."""
+        with self._lock:
+            interaction["index"] = len(self.interactions)
+            self.interactions.append(interaction)
+
+    def _next(self, key: str, description: str, wait: bool = True) -> Dict[str, Any]:
+        """
+        Récupère le prochain échange enregistré pour une clé.
+
+        Args:
+            key: Clé de l'échange
+            description: Description lisible pour le message d'erreur
+            wait: Reproduire ici la latence d'origine (mode "original")
+
+        Returns:
+            Échange enregistré
+        """
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                raise LookupError(f"Aucun enregistrement dans la cassette pour {description}")
+            interaction = queue.popleft()
+
+        if wait and self.latency == "original":
+            time.sleep(interaction.get("elapsed", 0.0))
+        return interaction
+
+    def _handle_http(self, original_request, session, method, url, *args, **kwargs):
+        """Intercepte une requête HTTP de `requests`."""
+        if urlparse(url).hostname not in self.http_hosts:
+            return original_request(session, method, url, *args, **kwargs)
+
+        key = _http_key(method, url, kwargs.get("params"))
+
+        if self.mode == "replay":
+            interaction = self._next(key, key)
+            response = requests.Response()
+            response.status_code = interaction["status"]
+            response.headers = CaseInsensitiveDict(interaction["headers"])
+            response._content = base64.b64decode(interaction["body"])
+            response.encoding = interaction.get("encoding")
+            response.url = interaction["url"]
+            response.reason = interaction.get("reason", "")
+            return response
+
+        start = time.perf_counter()
+        response = original_request(session, method, url, *args, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        self._record({
+            "kind": "http",
+            "key": key,
+            "url": response.url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "encoding": response.encoding,
+            "body": base64.b64encode(response.content).decode("ascii"),
+            "elapsed": elapsed,
+        })
+        return response
+
+    @staticmethod
+    def _llm_kwargs(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Arguments nommés d'un appel LLM (modèle et messages éventuellement positionnels)."""
+        if args:
+            # litellm.completion(model, messages, ...) en positionnel
+            kwargs.setdefault("model", args[0])
+            if len(args) > 1:
+                kwargs.setdefault("messages", args[1])
+        if kwargs.get("stream"):
+            raise ValueError("Les réponses LLM en streaming ne sont pas supportées par la cassette")
+        return kwargs
+
+    @staticmethod
+    def _response(interaction: Dict[str, Any]):
+        """Réponse LLM rejouée."""
+        import litellm
+
+        return litellm.ModelResponse(**interaction["response"])
+
+    def _record_llm(self, key: str, kwargs: Dict[str, Any], response: Any, elapsed: float) -> None:
+        """Enregistre un échange LLM."""
+        if hasattr(response, "model_dump"):
+            payload = response.model_dump()
+        else:
+            payload = dict(response)
+
+        self._record({
+            "kind": "llm",
+            "key": key,
+            "model": kwargs.get("model"),
+            "response": payload,
+            "elapsed": elapsed,
+        })
+
+    def _handle_llm(self, *args, **kwargs):
+        """Intercepte un appel `litellm.completion`."""
+        kwargs = self._llm_kwargs(args, kwargs)
+        key = _llm_key(kwargs)
+
+        if self.mode == "replay":
+            return self._response(self._next(key, f"l'appel LLM au modèle {kwargs.get('model')}"))
+
+        start = time.perf_counter()
+        response = self._originals["llm"](**kwargs)
+        self._record_llm(key, kwargs, response, time.perf_counter() - start)
+        return response
+
+    async def _ahandle_llm(self, *args, **kwargs):
+        """Intercepte un appel `litellm.acompletion` (mêmes clés que les appels synchrones)."""
+        kwargs = self._llm_kwargs(args, kwargs)
+        key = _llm_key(kwargs)
+
+        if self.mode == "replay":
+            interaction = self._next(key, f"l'appel LLM au modèle {kwargs.get('model')}", wait=False)
+            if self.latency == "original":
+                # La latence enregistrée est attendue sans bloquer la boucle d'événements
+                await asyncio.sleep(interaction.get("elapsed", 0.0))
+            return self._response(interaction)
+
+        start = time.perf_counter()
+        response = await self._originals["allm"](**kwargs)
+        self._record_llm(key, kwargs, response, time.perf_counter() - start)
+        return response
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Résume le contenu de la cassette.
+
+        Returns:
+            Nombre d'échanges et latence cumulée par type
+        """
+        stats: Dict[str, Dict[str, float]] = {}
+        for interaction in self.interactions:
+            kind = stats.setdefault(interaction["kind"], {"count": 0, "elapsed": 0.0})
+            kind["count"] += 1
+            kind["elapsed"] += interaction.get("elapsed", 0.0)
+        return stats
+
+
+def open_cassette(record: Optional[str] = None, replay: Optional[str] = None,
+                  latency: str = "original") -> Optional[Cassette]:
+    """
+    Crée une cassette selon les options de la ligne de commande.
+
+    Args:
+        record: Chemin de la cassette à enregistrer
+        replay: Chemin de la cassette à rejouer
+        latency: Mode de latence du rejeu (original, zero)
+
+    Returns:
+        Cassette configurée ou None si aucune option n'est fournie
+    """
+    if record and replay:
+        raise ValueError("Les options --record et --replay sont incompatibles")
+    if record:
+        return Cassette(record, mode="record")
+    if replay:
+        return Cassette(replay, mode="replay", latency=latency)
+    return None
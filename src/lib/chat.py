@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Sessions de chat d'ArxivBuddy.
+
+La première question d'une session déroule le pipeline complet ; la session
+conserve ensuite les articles trouvés, leurs analyses, le résumé et la
+synthèse. Les questions de suivi sont aiguillées vers un sous-pipeline
+minimal :
+- "paper"   : question sur un article précis ("le deuxième article", "[2]",
+              un identifiant ArXiv) : un appel LLM sur cet article, son analyse
+              et quelques passages de son texte intégral ;
+- "papers"  : question sur plusieurs articles ("compare les deux premiers
+              articles", "[1] et [3]") : un appel LLM sur ces articles seuls ;
+- "context" : autre question de suivi : un appel LLM sur le contexte conservé ;
+- "search"  : demande explicite de nouveaux articles ("trouve d'autres
+              articles", "find newer papers") : pipeline complet, qui
+              remplace le contexte de la session.
+Les sessions sont enregistrées dans SQLite et expirent après inactivité.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from .paper import Paper
+from .sqlite_store import get_database
+from .translation_cache import TRANSLATED_FIELD
+from .utils import extract_json, get_cache_dir, parse_arxiv_id, ARXIV_ID_PATTERN
+
+# Ordinaux reconnus dans les questions de suivi (français et anglais) ; -1 : le dernier
+_ORDINALS = {
+    "premier": 1, "première": 1, "first": 1, "1er": 1, "1re": 1,
+    "deuxième": 2, "second": 2, "seconde": 2, "2e": 2, "2ème": 2,
+    "troisième": 3, "third": 3, "3e": 3, "3ème": 3,
+    "quatrième": 4, "fourth": 4, "4e": 4, "4ème": 4,
+    "cinquième": 5, "fifth": 5, "5e": 5, "5ème": 5,
+    "sixième": 6, "sixth": 6, "septième": 7, "seventh": 7,
+    "huitième": 8, "eighth": 8, "neuvième": 9, "ninth": 9, "dixième": 10, "tenth": 10,
+    "dernier": -1, "dernière": -1, "last": -1,
+}
+_PAPER_WORDS = r"(?:article|papier|paper|publication|étude|study)s?"
+_ORDINAL_WORDS = "|".join(sorted(map(re.escape, _ORDINALS), key=len, reverse=True))
+# Nombre d'articles désignés ensemble ("les deux premiers articles", "the first two papers")
+_COUNTS = {"deux": 2, "two": 2, "trois": 3, "three": 3, "quatre": 4, "four": 4, "cinq": 5, "five": 5}
+_COUNT = rf"({'|'.join(_COUNTS)}|\d)"
+_SPAN_PATTERN = re.compile(
+    rf"\b(first|top|last)\s+{_COUNT}\s+{_PAPER_WORDS}\b"
+    rf"|\b{_COUNT}\s+(premiers|premières|derniers|dernières)\s+{_PAPER_WORDS}\b",
+    re.IGNORECASE
+)
+# Un ou plusieurs ordinaux ("le premier et le troisième article"), numéros ("articles 1 et 3",
+# "papers 2-4"), renvois "[2]" ou "#2"
+_ORDINAL_PATTERN = re.compile(
+    rf"\b((?:{_ORDINAL_WORDS})(?:\s*(?:,|et|and|&)\s*(?:(?:le|la|the)\s+|l['’])?(?:{_ORDINAL_WORDS}))*)"
+    rf"\s+(?:\w+\s+)?{_PAPER_WORDS}\b"
+    rf"|\b{_PAPER_WORDS}\s+((?:n°\s*|no\.?\s*|#)?\d{{1,2}}"
+    rf"(?:\s*(?:,|et|and|&|à|to|-)\s*(?:n°\s*|no\.?\s*|#)?\d{{1,2}})*)\b"
+    rf"|\[(\d{{1,2}})\]|#(\d{{1,2}})\b",
+    re.IGNORECASE
+)
+_NUMBER_LIST = re.compile(r"(\d{1,2})|(à|to|-)", re.IGNORECASE)
+# Demandes explicites de nouveaux articles : verbe de recherche suivi d'articles nouveaux ou
+# autres ("trouve-moi d'autres articles", "find newer papers"), ou "nouvelle recherche"
+_SEARCH_PATTERN = re.compile(
+    r"\b(?:cherche|recherche|trouve|chercher|rechercher|trouver|donne|montre|propose)[sz]?"
+    r"(?:[-\s](?:moi|nous))?\s+(?:encore\s+)?"
+    r"(?:d['’]autres|de\s+nouveaux|des\s+nouveaux|plus\s+d['’]|davantage\s+d['’]|des|quelques)\s*"
+    rf"{_PAPER_WORDS}\b"
+    r"|\bnouvelle\s+recherche\b"
+    r"|\b(?:find|search\s+for|look\s+for|look\s+up|show\s+me|get\s+me|fetch|pull\s+up)\s+(?:me\s+)?"
+    r"(?:some\s+|a\s+few\s+)?(?:more|other|new|newer|additional|different|recent|more\s+recent)\s+"
+    rf"{_PAPER_WORDS}\b"
+    r"|\bnew\s+search\b",
+    re.IGNORECASE
+)
+
+
+def _positions(match: "re.Match", count: int) -> List[int]:
+    """Positions (à partir de 1, -1 : le dernier) désignées par une référence."""
+    if match.re is _SPAN_PATTERN:
+        which = (match.group(1) or match.group(4)).lower()
+        number = match.group(2) or match.group(3)
+        size = _COUNTS.get(number.lower()) or int(number)
+        if which.startswith(("last", "dernier", "dernière")):
+            return list(range(max(count - size + 1, 1), count + 1))
+        return list(range(1, size + 1))
+    if match.group(1):
+        return [_ORDINALS[word.lower()] for word in re.findall(_ORDINAL_WORDS, match.group(1), re.IGNORECASE)]
+    if match.group(2):
+        positions: List[int] = []
+        span = False
+        for number, separator in _NUMBER_LIST.findall(match.group(2)):
+            if separator:
+                span = True
+            elif span and positions:
+                positions.extend(range(positions[-1] + 1, int(number) + 1))
+                span = False
+            else:
+                positions.append(int(number))
+        return positions
+    return [int(match.group(3) or match.group(4))]
+
+
+def resolve_paper_references(question: str, papers: List[Dict[str, Any]]) -> List[int]:
+    """
+    Trouve les articles désignés par une question de suivi.
+
+    Args:
+        question: Question de suivi
+        papers: Articles de la session (dans l'ordre présenté)
+
+    Returns:
+        Indices des articles (à partir de 0, dans l'ordre de la question, sans doublons)
+    """
+    if not papers:
+        return []
+    found: List[Tuple[int, int]] = []
+    for match in ARXIV_ID_PATTERN.finditer(question):
+        for index, paper in enumerate(papers):
+            if paper.get("arxiv_id") == match.group(1):
+                found.append((match.start(), index))
+    covered: List[Tuple[int, int]] = []
+    for pattern in (_SPAN_PATTERN, _ORDINAL_PATTERN):
+        for match in pattern.finditer(question):
+            # "the first two papers" ne désigne pas aussi "the first paper"
+            if any(start < match.end() and match.start() < end for start, end in covered):
+                continue
+            covered.append(match.span())
+            for position in _positions(match, len(papers)):
+                if position == -1:
+                    found.append((match.start(), len(papers) - 1))
+                elif 1 <= position <= len(papers):
+                    found.append((match.start(), position - 1))
+    indices: List[int] = []
+    for _, index in sorted(found, key=lambda item: item[0]):
+        if index not in indices:
+            indices.append(index)
+    return indices
+
+
+def resolve_paper_reference(question: str, papers: List[Dict[str, Any]]) -> Optional[int]:
+    """
+    Trouve l'article désigné par une question de suivi.
+
+    Args:
+        question: Question de suivi
+        papers: Articles de la session (dans l'ordre présenté)
+
+    Returns:
+        Indice de l'article (à partir de 0), ou None si aucun ou plusieurs articles sont désignés
+    """
+    indices = resolve_paper_references(question, papers)
+    return indices[0] if len(indices) == 1 else None
+
+
+def classify_followup(question: str, papers: List[Dict[str, Any]]) -> Tuple[str, List[int]]:
+    """
+    Choisit le sous-pipeline d'une question de suivi.
+
+    Args:
+        question: Question de suivi
+        papers: Articles de la session
+
+    Returns:
+        Tuple (route, indices des articles désignés) ; route parmi "paper" (un article),
+        "papers" (plusieurs articles), "context", "search"
+    """
+    # Une demande explicite de nouveaux articles l'emporte ("trouve d'autres articles
+    # comme le deuxième")
+    if not papers or _SEARCH_PATTERN.search(question):
+        return "search", []
+    indices = resolve_paper_references(question, papers)
+    if len(indices) == 1:
+        return "paper", indices
+    if indices:
+        return "papers", indices
+    return "context", []
+
+
+class ChatSession:
+    """État d'une conversation : articles, analyses, synthèse et échanges."""
+
+    def __init__(self, session_id: Optional[str] = None, query: str = "", level: str = "medium",
+                 french: bool = True, papers: Optional[List[Dict[str, Any]]] = None,
+                 analyses: Optional[Dict[str, Any]] = None, summary: str = "", synthesis: str = "",
+                 answer: str = "", turns: Optional[List[Dict[str, str]]] = None,
+                 created: Optional[float] = None, updated: Optional[float] = None):
+        self.session_id = session_id or uuid.uuid4().hex[:12]
+        self.query = query
+        self.level = level
+        self.french = french
+        self.papers = papers or []
+        self.analyses = analyses or {}
+        self.summary = summary
+        self.synthesis = synthesis
+        self.answer = answer
+        self.turns = turns or []
+        self.created = created or time.time()
+        self.updated = updated or self.created
+
+    @classmethod
+    def from_outputs(cls, query: str, answer: str, outputs: Dict[str, str], level: str = "medium",
+                     french: bool = True, session_id: Optional[str] = None) -> "ChatSession":
+        """
+        Construit une session à partir des sorties des tâches du pipeline complet.
+
+        Args:
+            query: Question initiale
+            answer: Réponse finale du pipeline
+            outputs: Sorties brutes par tâche (paramètre `outputs` de process_query)
+            level: Niveau d'explication
+            french: Réponses en français
+            session_id: Identifiant à conserver (nouvelle recherche dans une session existante)
+
+        Returns:
+            Instance de ChatSession
+        """
+        search = extract_json(outputs.get("arxiv_search", ""))
+        raw_papers = search.get("papers", []) if isinstance(search, dict) else []
+        papers = []
+        for raw in raw_papers:
+            paper = Paper.from_dict(raw) if isinstance(raw, dict) else None
+            if paper is not None:
+                data = paper.to_dict()
+                if raw.get(TRANSLATED_FIELD):
+                    data[TRANSLATED_FIELD] = raw[TRANSLATED_FIELD]
+                papers.append(data)
+
+        analysis = extract_json(outputs.get("paper_analysis", ""))
+        analyses = {}
+        for item in (analysis.get("paper_analyses", []) if isinstance(analysis, dict) else []):
+            if isinstance(item, dict) and item.get("arxiv_id"):
+                analyses[parse_arxiv_id(str(item["arxiv_id"]))[0]] = item
+
+        return cls(session_id=session_id, query=query, level=level, french=french, papers=papers,
+                   analyses=analyses, summary=outputs.get("summary", ""),
+                   synthesis=outputs.get("synthesis", ""), answer=answer,
+                   turns=[{"role": "user", "content": query}, {"role": "assistant", "content": answer}])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id, "query": self.query, "level": self.level,
+            "french": self.french, "papers": self.papers, "analyses": self.analyses,
+            "summary": self.summary, "synthesis": self.synthesis, "answer": self.answer,
+            "turns": self.turns, "created": self.created, "updated": self.updated,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChatSession":
+        return cls(**data)
+
+    def add_turn(self, role: str, content: str) -> None:
+        """Ajoute un échange à l'historique."""
+        self.turns.append({"role": role, "content": content})
+        self.updated = time.time()
+
+    def history(self, max_turns: int = 6, max_chars: int = 1200) -> str:
+        """Derniers échanges (chaque message tronqué à `max_chars` caractères)."""
+        lines = []
+        for turn in self.turns[-max_turns:]:
+            speaker = "Utilisateur" if turn["role"] == "user" else "ArxivBuddy"
+            content = turn["content"]
+            if len(content) > max_chars:
+                content = content[:max_chars].rsplit(" ", 1)[0] + " […]"
+            lines.append(f"{speaker}: {content}")
+        return "\n".join(lines) or "(aucun)"
+
+    def paper_list(self) -> str:
+        """Liste numérotée des articles de la session."""
+        lines = []
+        for position, paper in enumerate(self.papers, start=1):
+            authors = ", ".join(paper.get("authors", [])[:3])
+            line = f"[{position}] {paper.get('title', '')} — {authors} ({paper.get('published_date', '')}) {paper.get('url', '')}"
+            if paper.get(TRANSLATED_FIELD):
+                line += f"\n    {paper[TRANSLATED_FIELD]}"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def context(self) -> str:
+        """Contexte conservé pour une question de suivi générale."""
+        return "\n\n".join(part for part in (
+            f"QUESTION INITIALE: {self.query}",
+            f"ARTICLES:\n{self.paper_list()}" if self.papers else "",
+            f"RÉSUMÉ:\n{self.summary}" if self.summary else "",
+            f"SYNTHÈSE:\n{self.synthesis}" if self.synthesis else "",
+        ) if part)
+
+    def paper_context(self, index: int, passages: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Contexte d'une question sur un article précis."""
+        paper = self.papers[index]
+        passages = [passage for passage in passages or []
+                    if passage.get("arxiv_id") in (None, paper.get("arxiv_id"))]
+        parts = [
+            f"ARTICLE [{index + 1}]: {paper.get('title', '')}\n"
+            f"Auteurs: {', '.join(paper.get('authors', []))}\n"
+            f"Publié le: {paper.get('published_date', '')} — {paper.get('url', '')}",
+            f"Résumé (abstract):\n{paper.get('abstract', '')}",
+        ]
+        analysis = self.analyses.get(paper.get("arxiv_id", ""))
+        if analysis:
+            parts.append(f"Analyse:\n{json.dumps(analysis, ensure_ascii=False, indent=2)}")
+        for passage in passages:
+            section = f" ({passage['section']})" if passage.get("section") else ""
+            parts.append(f"Passage du texte intégral{section}:\n{passage['text']}")
+        return "\n\n".join(parts)
+
+    def papers_context(self, indices: List[int], passages: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Contexte d'une question sur plusieurs articles (chacun avec ses passages)."""
+        return "\n\n---\n\n".join([f"QUESTION INITIALE: {self.query}"]
+                                      + [self.paper_context(index, passages) for index in indices])
+
+
+class SessionStore:
+    """Sessions de chat persistantes (SQLite), avec expiration après inactivité."""
+
+    def __init__(self, db_path: Optional[str] = None, ttl_hours: float = 24.0):
+        """
+        Initialise la base des sessions.
+
+        Args:
+            db_path: Chemin de la base (par défaut: get_cache_dir("sessions")/sessions.db)
+            ttl_hours: Durée de vie d'une session inactive (heures)
+        """
+        self.db_path = db_path or os.path.join(get_cache_dir("sessions"), "sessions.db")
+        self.ttl_hours = ttl_hours
+        self.database = get_database(self.db_path)
+        self.database.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                data TEXT NOT NULL,
+                updated REAL NOT NULL
+            )
+            """
+        )
+
+    def _cutoff(self) -> float:
+        return time.time() - self.ttl_hours * 3600
+
+    def save(self, session: ChatSession) -> None:
+        """Enregistre une session."""
+        self.database.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, query, data, updated) VALUES (?, ?, ?, ?)",
+            (session.session_id, session.query, json.dumps(session.to_dict(), ensure_ascii=False),
+             session.updated)
+        )
+
+    def load(self, session_id: str) -> Optional[ChatSession]:
+        """Charge une session (None si elle n'existe pas ou a expiré)."""
+        rows = self.database.query(
+            "SELECT data FROM sessions WHERE session_id = ? AND updated >= ?", (session_id, self._cutoff())
+        )
+        return ChatSession.from_dict(json.loads(rows[0][0])) if rows else None
+
+    def list(self) -> List[Tuple[str, str, float]]:
+        """Sessions actives : tuples (identifiant, question initiale, dernière activité)."""
+        return self.database.query(
+            "SELECT session_id, query, updated FROM sessions WHERE updated >= ? ORDER BY updated DESC",
+            (self._cutoff(),)
+        )
+
+    def delete(self, session_id: str) -> bool:
+        """Supprime une session."""
+        return self.database.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)) > 0
+
+    def prune(self) -> int:
+        """Supprime les sessions expirées et renvoie leur nombre."""
+        return self.database.execute("DELETE FROM sessions WHERE updated < ?", (self._cutoff(),))
+
+
+class ChatEngine:
+    """Répond aux questions d'une session avec le sous-pipeline le plus léger possible."""
+
+    def __init__(self, agents, store: Optional[SessionStore] = None):
+        """
+        Initialise le moteur de chat.
+
+        Args:
+            agents: Instance d'ArxivAgents (pipeline complet, routeur LLM et modèles de tâches)
+            store: Base des sessions (par défaut: durée de vie de defaults.chat.ttl_hours)
+        """
+        self.agents = agents
+        config = agents.config
+        self.history_turns = config.get("chat", "history_turns", default=6)
+        self.passages = config.get("chat", "passages", default=4)
+        self.store = store or SessionStore(ttl_hours=config.get("chat", "ttl_hours", default=24))
+        self.store.prune()
+
+    def start(self, question: str, max_results: int = 5, level: str = "medium", french: bool = True,
+              session_id: Optional[str] = None, **options) -> ChatSession:
+        """
+        Ouvre une session en déroulant le pipeline complet.
+
+        Args:
+            question: Question initiale
+            max_results: Nombre maximum d'articles
+            level: Niveau d'explication
+            french: Réponses en français
+            session_id: Identifiant à conserver (nouvelle recherche dans une session existante)
+            **options: Options supplémentaires de process_query
+
+        Returns:
+            Session (réponse dans `session.answer`)
+        """
+        outputs: Dict[str, str] = {}
+        answer = self.agents.process_query(query=question, max_results=max_results, french=french,
+                                           level=level, outputs=outputs, **options)
+        session = ChatSession.from_outputs(question, answer, outputs, level=level, french=french,
+                                           session_id=session_id)
+        self.store.save(session)
+        return session
+
+    def _retrieve_passages(self, question: str, papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Passages du texte intégral des articles (liste vide si indisponibles)."""
+        if not self.passages:
+            return []
+        try:
+            from .passage_index import get_passage_index
+            paper_ids = [f"{paper['arxiv_id']}v{paper['version']}" if paper.get("version") else paper["arxiv_id"]
+                         for paper in papers]
+            return get_passage_index().retrieve(question, paper_ids, k=self.passages)
+        except Exception as e:
+            print(f"⚠️ Passages du texte intégral indisponibles: {e}")
+            return []
+
+    def _answer(self, session: ChatSession, question: str, context: str) -> str:
+        """Un seul appel LLM sur le contexte conservé."""
+        from .agents import AUDIENCES, DEFAULT_AUDIENCE, LANGUAGE_NAMES
+
+        template = self.agents.templates.task("chat_followup")
+        prompt, _ = template.bind(
+            context=context,
+            history=session.history(self.history_turns),
+            question=question,
+            language=LANGUAGE_NAMES["fr"] if session.french else "English",
+            audience=AUDIENCES.get(session.level, DEFAULT_AUDIENCE),
+        )
+        llm = self.agents.router.get("task:chat_followup", template.llm)
+        return str(llm.call([{"role": "user", "content": prompt}])).strip()
+
+    def ask(self, session: ChatSession, question: str, max_results: int = 5) -> Tuple[str, str]:
+        """
+        Répond à une question de suivi.
+
+        Args:
+            session: Session en cours (mise à jour et enregistrée)
+            question: Question de suivi
+            max_results: Nombre maximum d'articles pour une nouvelle recherche
+
+        Returns:
+            Tuple (route utilisée, réponse)
+        """
+        route, indices = classify_followup(question, session.papers)
+        if route == "search":
+            turns = session.turns
+            fresh = self.start(question, max_results=max_results, level=session.level,
+                               french=session.french, session_id=session.session_id)
+            # La session conserve l'historique complet de la conversation
+            fresh.turns = turns + fresh.turns
+            fresh.created = session.created
+            session.__dict__.update(fresh.__dict__)
+            self.store.save(session)
+            return route, session.answer
+
+        if route in ("paper", "papers"):
+            passages = self._retrieve_passages(question, [session.papers[index] for index in indices])
+            if route == "paper":
+                context = session.paper_context(indices[0], passages)
+            else:
+                context = session.papers_context(indices, passages)
+        else:
+            context = session.context()
+        try:
+            answer = self._answer(session, question, context)
+        except Exception as e:
+            print(f"⚠️ Erreur lors de la réponse de suivi: {e}")
+            answer = f"❌ Une erreur est survenue lors de la réponse: {str(e)}"
+        session.add_turn("user", question)
+        session.add_turn("assistant", answer)
+        self.store.save(session)
+        return route, answer
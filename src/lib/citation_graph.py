@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Graphe local des citations entre articles ArXiv.
+
+Les références sont extraites de la section « References » des textes
+intégraux déjà en cache (lib.fulltext) : identifiants ArXiv cités
+explicitement, et titres des articles de la base locale (lib.paper_store)
+reconnus dans la bibliographie. Les arêtes sont conservées dans SQLite, puis
+compilées en deux matrices d'adjacence CSR (références et citations),
+mappées en mémoire. Un texte nouvellement mis en cache est ajouté en
+arrière-plan (`schedule_sync`) : seule sa bibliographie est lue, et les
+titres de la base locale sont indexés une fois puis complétés des seuls
+articles ajoutés depuis.
+
+`related` étend un ensemble d'articles de départ sans aucun appel réseau :
+- couplage bibliographique : articles qui citent les mêmes références ;
+- co-citation : articles cités par les mêmes articles ;
+- liens directs : références et citations des articles de départ.
+Les références très citées pèsent moins (pondération 1 / log2(2 + degré)),
+comme les mots fréquents en recherche plein texte.
+"""
+
+import os
+import re
+import json
+import time
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .paper_store import get_paper_store
+from .sqlite_store import get_database
+from .utils import get_cache_dir, parse_arxiv_id
+
+# Nombre d'articles développés à chaque niveau au-delà du premier
+CITATION_BEAM = int(os.getenv("CITATION_BEAM", "50"))
+# Atténuation du score à chaque niveau de profondeur
+DEPTH_DECAY = 0.5
+
+# Identifiants cités explicitement : arXiv:2107.12345, arxiv.org/abs/hep-th/9901001v2,
+# math.AG/0101001 (la sous-catégorie ne fait pas partie de l'identifiant)
+_CITED_ID = re.compile(
+    r"(?:arxiv\s*:\s*|arxiv\.org/(?:abs|pdf)/)(?:(\d{4}\.\d{4,5})|([a-z][a-z\-]*)(?:\.[a-z]{2})?/(\d{7}))",
+    re.IGNORECASE
+)
+_HYPHEN = re.compile(r"-\s*")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Titres plus courts : trop ambigus pour être reconnus dans une bibliographie
+MIN_TITLE_TOKENS = 4
+_KEY_TOKENS = 4
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """
+    Découpe un texte en mots normalisés (minuscules, sans accents ni traits d'union).
+
+    Les traits d'union sont supprimés des deux côtés de la comparaison : un
+    titre « Self-Supervised » et une bibliographie coupée en « self-\\nsupervised »
+    donnent le même mot.
+    """
+    text = unicodedata.normalize("NFKD", _HYPHEN.sub("", text)).encode("ascii", "ignore").decode("ascii")
+    return _TOKEN.findall(text.lower())
+
+
+class TitleMatcher:
+    """Reconnaissance des titres de la base locale dans un texte de bibliographie."""
+
+    def __init__(self, titles: Iterable[Tuple[str, str]]):
+        """
+        Indexe les titres par leurs premiers mots.
+
+        Args:
+            titles: Couples (identifiant ArXiv, titre)
+        """
+        self._by_key: Dict[Tuple[str, ...], List[Tuple[Tuple[str, ...], str]]] = defaultdict(list)
+        self.add(titles)
+
+    def add(self, titles: Iterable[Tuple[str, str]]) -> None:
+        """
+        Ajoute des titres à l'index.
+
+        Args:
+            titles: Couples (identifiant ArXiv, titre)
+        """
+        for paper_id, title in titles:
+            tokens = tuple(normalize_tokens(title or ""))
+            if len(tokens) >= MIN_TITLE_TOKENS:
+                self._by_key[tokens[:_KEY_TOKENS]].append((tokens, paper_id))
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._by_key.values())
+
+    def find(self, text: str) -> Set[str]:
+        """
+        Identifiants des articles dont le titre complet apparaît dans le texte.
+
+        Args:
+            text: Texte de la bibliographie
+
+        Returns:
+            Ensemble d'identifiants ArXiv
+        """
+        tokens = normalize_tokens(text)
+        found = set()
+        for i in range(len(tokens) - _KEY_TOKENS + 1):
+            entries = self._by_key.get(tuple(tokens[i:i + _KEY_TOKENS]))
+            if not entries:
+                continue
+            for title, paper_id in entries:
+                if tuple(tokens[i:i + len(title)]) == title:
+                    found.add(paper_id)
+        return found
+
+
+def extract_citations(references: str, matcher: Optional[TitleMatcher] = None) -> Set[str]:
+    """
+    Articles ArXiv cités dans une bibliographie.
+
+    Args:
+        references: Texte de la section « References »
+        matcher: Reconnaissance des titres de la base locale (optionnel)
+
+    Returns:
+        Ensemble d'identifiants ArXiv (sans version)
+    """
+    cited = {match.group(1) or f"{match.group(2).lower()}/{match.group(3)}"
+             for match in _CITED_ID.finditer(references)}
+    if matcher is not None:
+        cited |= matcher.find(references)
+    return cited
+
+
+def _gather(indptr: np.ndarray, indices: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Voisins de plusieurs lignes d'une matrice CSR, sans boucle Python.
+
+    Returns:
+        Tuple (voisins, position dans `rows` de la ligne d'origine de chaque voisin)
+    """
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    total = int(counts.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    owners = np.repeat(np.arange(len(rows)), counts)
+    # Position de chaque voisin : début de sa ligne + rang dans la ligne
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.asarray(indices[starts[owners] + offsets], dtype=np.int64), owners
+
+
+def _top(candidates: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+    """Les k candidats de meilleur score, triés (sélection partielle puis tri des seuls retenus)."""
+    values = scores[candidates]
+    if len(candidates) > k:
+        kept = np.argpartition(-values, k - 1)[:k]
+        candidates, values = candidates[kept], values[kept]
+    return candidates[np.argsort(-values, kind="stable")]
+
+
+class CitationGraph:
+    """Graphe de citations persistant (arêtes SQLite, adjacence CSR mappée en mémoire)."""
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Initialise le graphe.
+
+        Args:
+            directory: Répertoire du graphe (par défaut: get_cache_dir("citations"))
+        """
+        self.directory = directory or get_cache_dir("citations")
+        os.makedirs(self.directory, exist_ok=True)
+        self.database = get_database(os.path.join(self.directory, "citations.db"))
+        with self.database.transaction() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS nodes (
+                    id INTEGER PRIMARY KEY,
+                    paper_id TEXT NOT NULL UNIQUE
+                )
+                """
+            )
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS citations (
+                    citing INTEGER NOT NULL,
+                    cited INTEGER NOT NULL,
+                    PRIMARY KEY (citing, cited)
+                ) WITHOUT ROWID
+                """
+            )
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sources (
+                    paper_id TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    references_found INTEGER NOT NULL,
+                    extracted REAL NOT NULL
+                )
+                """
+            )
+            connection.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._lock = threading.RLock()
+        self._csr: Optional[Dict[str, Any]] = None
+        # Titres de la base locale déjà indexés (étiquette du dernier article lu)
+        self._matcher: Optional[TitleMatcher] = None
+        self._matcher_label = 0
+        # Articles à ajouter en arrière-plan : {identifiant: (version, cache de texte intégral)}
+        self._sync_lock = threading.Lock()
+        self._pending: Dict[str, Tuple[int, Any]] = {}
+        self._sync_thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Extraction des références
+    # ------------------------------------------------------------------
+    def _generation(self) -> int:
+        rows = self.database.query("SELECT value FROM state WHERE key = 'generation'")
+        return rows[0][0] if rows else 0
+
+    def _title_matcher(self) -> TitleMatcher:
+        """Reconnaissance des titres, complétée des articles ajoutés à la base locale depuis le dernier appel."""
+        if self._matcher is None:
+            self._matcher = TitleMatcher(())
+        for rows in get_paper_store().titles_after(self._matcher_label):
+            self._matcher.add((paper_id, title) for _, paper_id, title in rows)
+            self._matcher_label = rows[-1][0]
+        return self._matcher
+
+    def _extract(self, text_store, todo: Iterable[Tuple[str, int]]) -> int:
+        """Lit la bibliographie des articles (déjà en cache) et remplace leurs arêtes."""
+        matcher = self._title_matcher()
+        extracted: Dict[str, Tuple[int, Set[str]]] = {}
+        for paper_id, version in todo:
+            try:
+                sections = text_store.get_sections(f"{paper_id}v{version}", names=["references"])
+            except Exception as e:
+                print(f"⚠️ Références illisibles pour {paper_id}v{version}: {e}")
+                continue
+            cited = extract_citations(sections["sections"].get("references", ""), matcher)
+            cited.discard(paper_id)
+            extracted[paper_id] = (version, cited)
+        self._store_edges(extracted)
+        return len(extracted)
+
+    def sync(self, full: bool = False) -> int:
+        """
+        Extrait les références des textes intégraux en cache pas encore traités.
+
+        Aucun téléchargement : seuls les articles déjà présents dans le cache
+        de texte intégral sont lus.
+
+        Args:
+            full: Si True, retraite tous les articles (par exemple pour
+                reconnaître les titres ajoutés depuis à la base locale)
+
+        Returns:
+            Nombre d'articles traités
+        """
+        from .fulltext import get_text_store
+
+        with self._lock:
+            text_store = get_text_store()
+            done = {} if full else dict(self.database.query("SELECT paper_id, version FROM sources"))
+            todo = [(paper_id, version) for paper_id, version in text_store.cached_papers()
+                    if done.get(paper_id, 0) < version]
+            if not todo:
+                return 0
+            return self._extract(text_store, todo)
+
+    def sync_paper(self, paper_id: str, version: int, text_store=None) -> bool:
+        """
+        Extrait les références d'un seul article en cache, s'il n'est pas déjà traité dans cette version.
+
+        Args:
+            paper_id: Identifiant ArXiv (sans version)
+            version: Version dont le texte intégral est en cache
+            text_store: Cache de texte intégral (par défaut: instance partagée)
+
+        Returns:
+            True si l'article a été traité
+        """
+        if text_store is None:
+            from .fulltext import get_text_store
+            text_store = get_text_store()
+        with self._lock:
+            rows = self.database.query("SELECT version FROM sources WHERE paper_id = ?", (paper_id,))
+            if rows and rows[0][0] >= version:
+                return False
+            return self._extract(text_store, [(paper_id, version)]) > 0
+
+    def schedule_sync(self, paper_id: str, version: int, text_store=None) -> None:
+        """
+        Ajoute en arrière-plan les références d'un article nouvellement mis en cache.
+
+        Les demandes arrivées pendant une extraction sont regroupées et traitées
+        par le même thread (un seul à la fois). Un article dont l'ajout n'a pas
+        abouti (arrêt du processus) est repris par `sync()`.
+
+        Args:
+            paper_id: Identifiant ArXiv (sans version)
+            version: Version dont le texte intégral est en cache
+            text_store: Cache de texte intégral qui contient l'article (par défaut: instance partagée)
+        """
+        with self._sync_lock:
+            known = self._pending.get(paper_id)
+            if known is None or known[0] < version:
+                self._pending[paper_id] = (version, text_store)
+            if self._sync_thread is None:
+                self._sync_thread = threading.Thread(target=self._sync_loop, name="arxivbuddy-citation-sync",
+                                                     daemon=True)
+                self._sync_thread.start()
+
+    def _sync_loop(self) -> None:
+        while True:
+            with self._sync_lock:
+                if not self._pending:
+                    self._sync_thread = None
+                    return
+                pending, self._pending = self._pending, {}
+            for paper_id, (version, text_store) in pending.items():
+                try:
+                    self.sync_paper(paper_id, version, text_store)
+                except Exception as e:
+                    print(f"⚠️ Graphe de citations non mis à jour pour {paper_id}v{version}: {e}")
+
+    def wait_sync(self, timeout: Optional[float] = None) -> bool:
+        """
+        Attend la fin des ajouts en arrière-plan.
+
+        Args:
+            timeout: Délai maximal (secondes, None : sans limite)
+
+        Returns:
+            True si aucun ajout n'est plus en cours
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._sync_lock:
+                thread = self._sync_thread
+            if thread is None:
+                return True
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            thread.join(remaining)
+
+    def add_references(self, paper_id: str, cited: Iterable[str], version: int = 1) -> None:
+        """
+        Enregistre directement les références d'un article (remplace les précédentes).
+
+        Args:
+            paper_id: Identifiant ArXiv de l'article citant
+            cited: Identifiants ArXiv des articles cités
+            version: Version de l'article dont les références sont extraites
+        """
+        with self._lock:
+            self._store_edges({paper_id: (version, set(cited) - {paper_id})})
+
+    def add_many(self, references: Dict[str, Iterable[str]]) -> None:
+        """
+        Enregistre les références de plusieurs articles en une transaction (import).
+
+        Args:
+            references: Dictionnaire {article citant: articles cités}
+        """
+        with self._lock:
+            self._store_edges({paper_id: (1, set(cited) - {paper_id}) for paper_id, cited in references.items()})
+
+    def _store_edges(self, extracted: Dict[str, Tuple[int, Set[str]]]) -> None:
+        """Remplace les arêtes sortantes des articles traités et invalide l'adjacence CSR."""
+        if not extracted:
+            return
+        now = time.time()
+        with self.database.transaction() as connection:
+            names = set(extracted)
+            for _, cited in extracted.values():
+                names |= cited
+            connection.executemany("INSERT OR IGNORE INTO nodes (paper_id) VALUES (?)",
+                                   ((name,) for name in sorted(names)))
+            ids = {}
+            names = sorted(names)
+            for start in range(0, len(names), 500):
+                chunk = names[start:start + 500]
+                ids.update(connection.execute(
+                    f"SELECT paper_id, id FROM nodes WHERE paper_id IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall())
+            connection.executemany("DELETE FROM citations WHERE citing = ?",
+                                   ((ids[paper_id],) for paper_id in extracted))
+            connection.executemany(
+                "INSERT OR IGNORE INTO citations (citing, cited) VALUES (?, ?)",
+                ((ids[paper_id], ids[name]) for paper_id, (_, cited) in extracted.items() for name in cited)
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO sources (paper_id, version, references_found, extracted) "
+                "VALUES (?, ?, ?, ?)",
+                ((paper_id, version, len(cited), now) for paper_id, (version, cited) in extracted.items())
+            )
+            connection.execute("INSERT INTO state (key, value) VALUES ('generation', 1) "
+                               "ON CONFLICT(key) DO UPDATE SET value = value + 1")
+
+    # ------------------------------------------------------------------
+    # Adjacence CSR
+    # ------------------------------------------------------------------
+    def _csr_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.npy")
+
+    def compile(self) -> Dict[str, Any]:
+        """
+        Compile les arêtes en matrices CSR (références et citations) sur disque.
+
+        Returns:
+            Métadonnées du graphe compilé (génération, nœuds, arêtes)
+        """
+        with self._lock:
+            generation = self._generation()
+            count = self.database.query("SELECT COALESCE(MAX(id), 0) FROM nodes")[0][0]
+            edges = np.array(self.database.query("SELECT citing, cited FROM citations"),
+                             dtype=np.int64).reshape(-1, 2)
+            # Les identifiants SQLite commencent à 1 : la ligne 0 reste vide
+            nodes = [""] * (count + 1)
+            for node_id, paper_id in self.database.query("SELECT id, paper_id FROM nodes"):
+                nodes[node_id] = paper_id
+            width = max([len(node) for node in nodes] + [1])
+            np.save(self._csr_path("nodes"), np.array(nodes, dtype=f"<U{width}"))
+
+            for name, rows, columns in (("references", edges[:, 0], edges[:, 1]),
+                                        ("citations", edges[:, 1], edges[:, 0])):
+                order = np.argsort(rows, kind="stable")
+                indptr = np.zeros(count + 2, dtype=np.int64)
+                np.cumsum(np.bincount(rows, minlength=count + 1), out=indptr[1:])
+                np.save(self._csr_path(f"{name}_indptr"), indptr)
+                np.save(self._csr_path(f"{name}_indices"), columns[order].astype(np.int32))
+
+            meta = {"generation": generation, "nodes": count, "edges": len(edges)}
+            with open(os.path.join(self.directory, "csr.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            self._csr = None
+            return meta
+
+    def _load(self) -> Dict[str, Any]:
+        """Adjacence CSR mappée en mémoire, recompilée si les arêtes ont changé."""
+        with self._lock:
+            generation = self._generation()
+            if self._csr is not None and self._csr["generation"] == generation:
+                return self._csr
+            meta_path = os.path.join(self.directory, "csr.json")
+            meta = None
+            if os.path.exists(meta_path):
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            if meta is None or meta["generation"] != generation:
+                meta = self.compile()
+
+            csr = dict(meta)
+            for name in ("references_indptr", "references_indices", "citations_indptr", "citations_indices"):
+                # Vue ndarray sur le fichier mappé : l'indexation d'un np.memmap est plus coûteuse
+                csr[name] = np.load(self._csr_path(name), mmap_mode="r").view(np.ndarray)
+            names = np.load(self._csr_path("nodes"))
+            csr["names"] = names
+            csr["ids"] = {str(paper_id): i for i, paper_id in enumerate(names) if paper_id}
+            indptr = csr["citations_indptr"]
+            # Poids des références (co-citation : des citants) selon leur popularité
+            csr["reference_weight"] = 1.0 / np.log2(2.0 + np.diff(indptr))
+            csr["citer_weight"] = 1.0 / np.log2(2.0 + np.diff(csr["references_indptr"]))
+            self._csr = csr
+            return csr
+
+    # ------------------------------------------------------------------
+    # Articles liés
+    # ------------------------------------------------------------------
+    def related(self, paper_ids: Iterable[str], depth: int = 1, k: int = 10,
+                beam: int = CITATION_BEAM) -> List[Dict[str, Any]]:
+        """
+        Articles liés aux articles de départ par le graphe de citations.
+
+        Args:
+            paper_ids: Identifiants ArXiv des articles de départ (versions ignorées)
+            depth: Nombre de niveaux d'expansion (1 : voisins des articles de départ)
+            k: Nombre d'articles à retourner
+            beam: Nombre d'articles développés à chaque niveau suivant
+
+        Returns:
+            Articles triés par score décroissant, avec le détail du score
+            (coupling, cocitation ; cited : cité par, citing : cite les articles développés)
+        """
+        if k < 1:
+            return []
+        csr = self._load()
+        n = csr["nodes"] + 1
+        seeds = {parse_arxiv_id(paper_id)[0] for paper_id in paper_ids}
+        seeds = np.array(sorted(csr["ids"][paper_id] for paper_id in seeds if paper_id in csr["ids"]),
+                         dtype=np.int64)
+        if not len(seeds):
+            return []
+
+        ref_ptr, ref_idx = csr["references_indptr"], csr["references_indices"]
+        cit_ptr, cit_idx = csr["citations_indptr"], csr["citations_indices"]
+        parts = {name: np.zeros(n) for name in ("coupling", "cocitation", "cited", "citing")}
+        expanded = np.zeros(n, dtype=bool)
+        frontier, weight = seeds, 1.0
+        for level in range(max(depth, 1)):
+            expanded[frontier] = True
+            references, _ = _gather(ref_ptr, ref_idx, frontier)
+            citers, _ = _gather(cit_ptr, cit_idx, frontier)
+            parts["cited"] += weight * np.bincount(references, minlength=n)
+            parts["citing"] += weight * np.bincount(citers, minlength=n)
+            # Couplage : les autres citants des mêmes références
+            coupled, owners = _gather(cit_ptr, cit_idx, references)
+            parts["coupling"] += np.bincount(coupled, weights=weight * csr["reference_weight"][references][owners],
+                                             minlength=n)
+            # Co-citation : les autres références des mêmes citants
+            cocited, owners = _gather(ref_ptr, ref_idx, citers)
+            parts["cocitation"] += np.bincount(cocited, weights=weight * csr["citer_weight"][citers][owners],
+                                               minlength=n)
+            if level + 1 >= depth:
+                break
+            scores = sum(parts.values())
+            scores[expanded] = 0.0
+            candidates = np.flatnonzero(scores)
+            if not len(candidates):
+                break
+            frontier = _top(candidates, scores, beam)
+            weight *= DEPTH_DECAY
+
+        scores = sum(parts.values())
+        scores[seeds] = 0.0
+        candidates = np.flatnonzero(scores)
+        top = _top(candidates, scores, k)
+        return [
+            dict({"arxiv_id": str(csr["names"][i]), "score": round(float(scores[i]), 4)},
+                 **{name: round(float(values[i]), 4) for name, values in parts.items() if values[i]})
+            for i in top
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Statistiques du graphe.
+
+        Returns:
+            Dictionnaire {sources, nodes, edges, generation}
+        """
+        return {
+            "sources": self.database.query("SELECT COUNT(*) FROM sources")[0][0],
+            "nodes": self.database.query("SELECT COUNT(*) FROM nodes")[0][0],
+            "edges": self.database.query("SELECT COUNT(*) FROM citations")[0][0],
+            "generation": self._generation(),
+        }
+
+
+_graph: Optional[CitationGraph] = None
+_graph_lock = threading.Lock()
+
+
+def get_citation_graph() -> CitationGraph:
+    """
+    Récupère l'instance partagée du graphe de citations.
+
+    Returns:
+        Instance de CitationGraph
+    """
+    global _graph
+    with _graph_lock:
+        if _graph is None:
+            _graph = CitationGraph()
+    return _graph
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Fusion des appels identiques en cours (single-flight).
+
+Sous charge, plusieurs utilisateurs posent souvent la même question au même
+moment, et les agents d'un même équipage lancent parfois la même recherche
+simultanément. Un appel identique à un appel déjà en cours n'est pas exécuté
+une seconde fois : il attend le résultat du premier (le « meneur ») et le
+partage. Le module est utilisé à trois niveaux :
+- requêtes entières (`ArxivAgents.process_query` et `aprocess_query`) ;
+- outils des agents (`search_arxiv`, `get_paper_sections`...) ;
+- appels LLM (clé : modèle, messages et paramètres, hors timeout).
+
+Chaque appelant garde sa propre échéance : s'il n'a plus le temps d'attendre,
+lui seul abandonne (DeadlineExceeded). Si le meneur échoue sur sa propre
+échéance, les appelants qui ont encore du temps relancent l'appel. En asyncio,
+l'exécution partagée est une tâche distincte : l'annulation d'un appelant
+n'annule que son attente, et la tâche n'est annulée que lorsque plus personne
+ne l'attend.
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import inspect
+import functools
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from .llm_scheduler import DeadlineExceeded, remaining_time
+from .translation_cache import current_language
+
+# Fusion des appels identiques (0 : chaque appel est exécuté)
+COALESCE = os.getenv("ARXIVBUDDY_COALESCE", "1") != "0"
+
+
+def make_key(*parts: Any) -> str:
+    """
+    Clé d'un appel : empreinte de ses paramètres.
+
+    Les valeurs non sérialisables en JSON sont représentées par `repr` (deux
+    objets distincts donnent donc deux clés distinctes, jamais une fusion à tort).
+
+    Args:
+        *parts: Nom de l'appel et paramètres
+
+    Returns:
+        Empreinte SHA-256 hexadécimale
+    """
+    text = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=repr)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _has_time() -> bool:
+    remaining = remaining_time()
+    return remaining is None or remaining > 0
+
+
+class _AsyncFlight:
+    """Exécution partagée en cours dans une boucle d'événements."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Fusionne les appels identiques simultanés, en threads ou en asyncio."""
+
+    def __init__(self, name: str):
+        """
+        Initialise un groupe d'appels fusionnables.
+
+        Args:
+            name: Nom du groupe (rapports)
+        """
+        self.name = name
+        self._flights: Dict[Hashable, Future] = {}
+        self._async_flights: Dict[Hashable, _AsyncFlight] = {}
+        self._lock = threading.Lock()
+        # leaders : exécutions ; shared : résultats partagés ; abandoned : appelants partis avant
+        # le résultat ; cancelled : exécutions annulées faute d'appelant
+        self.counters = {"leaders": 0, "shared": 0, "retries": 0, "abandoned": 0, "cancelled": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def do(self, key: Hashable, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Exécute un appel, ou attend le résultat de l'appel identique déjà en cours.
+
+        Args:
+            key: Clé de l'appel (voir `make_key`)
+            function: Fonction à exécuter
+            *args: Arguments positionnels
+            **kwargs: Arguments nommés
+
+        Returns:
+            Résultat de la fonction (partagé entre les appelants)
+
+        Raises:
+            DeadlineExceeded: Échéance de l'appelant atteinte pendant l'attente
+        """
+        if not COALESCE:
+            return function(*args, **kwargs)
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = Future()
+            if leader:
+                self._count("leaders")
+                try:
+                    result = function(*args, **kwargs)
+                except BaseException as e:
+                    flight.set_exception(e)
+                    raise
+                else:
+                    flight.set_result(result)
+                    return result
+                finally:
+                    with self._lock:
+                        if self._flights.get(key) is flight:
+                            del self._flights[key]
+
+            self._count("shared")
+            remaining = remaining_time()
+            try:
+                return flight.result(timeout=None if remaining is None else max(remaining, 0.0))
+            except DeadlineExceeded:
+                # Échéance du meneur : l'appelant relance s'il a encore du temps
+                if not _has_time():
+                    raise
+                self._count("retries")
+            except FutureTimeout:
+                if flight.done():
+                    raise
+                self._count("abandoned")
+                raise DeadlineExceeded("Échéance atteinte en attendant un appel identique en cours") from None
+
+    async def ado(self, key: Hashable, function: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        """
+        Version asynchrone de `do` : la coroutine partagée s'exécute dans une tâche distincte.
+
+        Args:
+            key: Clé de l'appel (voir `make_key`)
+            function: Fonction retournant la coroutine à exécuter (contexte du meneur)
+            *args: Arguments positionnels
+            **kwargs: Arguments nommés
+
+        Returns:
+            Résultat de la coroutine (partagé entre les appelants)
+
+        Raises:
+            DeadlineExceeded: Échéance de l'appelant atteinte pendant l'attente
+        """
+        if not COALESCE:
+            return await function(*args, **kwargs)
+        # Les tâches n'ont de sens que dans leur boucle
+        key = (id(asyncio.get_running_loop()), key)
+        while True:
+            flight = self._async_flights.get(key)
+            leader = flight is None
+            if leader:
+                self._count("leaders")
+                flight = self._async_flights[key] = _AsyncFlight(asyncio.ensure_future(function(*args, **kwargs)))
+                flight.task.add_done_callback(functools.partial(self._forget, key, flight))
+            else:
+                self._count("shared")
+            flight.waiters += 1
+            try:
+                remaining = remaining_time()
+                waiting = asyncio.shield(flight.task)
+                if remaining is None:
+                    return await waiting
+                return await asyncio.wait_for(waiting, max(remaining, 0.0))
+            except DeadlineExceeded:
+                # Échéance du meneur : un autre appelant relance s'il a encore du temps
+                # (le meneur lui-même, comme dans `do`, ne relance jamais son propre appel)
+                if leader or not _has_time():
+                    raise
+                self._count("retries")
+            except asyncio.TimeoutError:
+                if flight.task.done():
+                    raise
+                self._count("abandoned")
+                raise DeadlineExceeded("Échéance atteinte en attendant un appel identique en cours") from None
+            finally:
+                flight.waiters -= 1
+                if flight.waiters == 0 and not flight.task.done():
+                    # Plus personne n'attend : l'exécution partagée est annulée
+                    self._count("cancelled")
+                    self._forget(key, flight)
+                    flight.task.cancel()
+
+    def _forget(self, key: Hashable, flight: _AsyncFlight, *_: Any) -> None:
+        if self._async_flights.get(key) is flight:
+            del self._async_flights[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Compteurs du groupe."""
+        with self._lock:
+            return dict(self.counters)
+
+
+_flights: Dict[str, SingleFlight] = {}
+_flights_lock = threading.Lock()
+
+
+def get_flight(name: str) -> SingleFlight:
+    """
+    Récupère le groupe d'appels fusionnables d'un nom donné.
+
+    Args:
+        name: Nom du groupe (ex: "process_query", "llm", "tool:search_arxiv")
+
+    Returns:
+        Instance de SingleFlight
+    """
+    with _flights_lock:
+        if name not in _flights:
+            _flights[name] = SingleFlight(name)
+        return _flights[name]
+
+
+def coalescing_stats() -> Dict[str, Dict[str, int]]:
+    """Compteurs de tous les groupes d'appels fusionnables."""
+    with _flights_lock:
+        flights = list(_flights.values())
+    return {flight.name: flight.stats() for flight in flights}
+
+
+def coalesced(name: str, flight: Optional[SingleFlight] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Décorateur : les appels simultanés avec les mêmes arguments partagent une exécution.
+
+    Les arguments sont normalisés (valeurs par défaut comprises) avant le calcul
+    de la clé, qui comprend aussi la langue de sortie du contexte (les outils
+    joignent les résumés traduits) ; la signature et la docstring sont
+    conservées (outils CrewAI).
+
+    Args:
+        name: Nom de l'appel (clé et groupe "tool:<name>" par défaut)
+        flight: Groupe d'appels (par défaut: get_flight(f"tool:{name}"))
+    """
+    def decorate(function: Callable[..., Any]) -> Callable[..., Any]:
+        signature = inspect.signature(function)
+        group = flight or get_flight(f"tool:{name}")
+
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return group.do(make_key(name, bound.arguments, current_language()), function, *args, **kwargs)
+
+        return wrapper
+
+    return decorate
@@ -68,19 +68,29 @@ class Config:
             "CREW_MODEL": ["crew", "model"],
             "CREW_TEMPERATURE": ["crew", "temperature"],
             "CREW_MAX_TOKENS": ["crew", "max_tokens"],
+            "CREW_TIMEOUT": ["crew", "timeout"],
             "ARXIV_MAX_RESULTS": ["arxiv", "max_results"],
             "ARXIV_SORT_BY": ["arxiv", "sort_by"],
-            "ARXIV_SORT_ORDER": ["arxiv", "sort_order"]
+            "ARXIV_SORT_ORDER": ["arxiv", "sort_order"],
+            "MEMORY_TTL_DAYS": ["memory", "ttl_days"],
+            "MEMORY_MAX_ENTRIES": ["memory", "max_entries"],
+            "LLM_MAX_CONCURRENCY": ["scheduler", "max_concurrency"],
+            "LLM_MAX_RETRIES": ["scheduler", "max_retries"],
+            "LLM_HEDGE": ["scheduler", "hedge"],
+            "CHAT_SESSION_TTL_HOURS": ["chat", "ttl_hours"]
         }
         
         for env_var, keys in mappings.items():
             value = os.getenv(env_var)
             if value is not None:
                 # Convertir les types si nécessaire
-                if env_var == "CREW_TEMPERATURE":
+                if env_var in ["CREW_TEMPERATURE", "CREW_TIMEOUT", "MEMORY_TTL_DAYS", "CHAT_SESSION_TTL_HOURS"]:
                     value = float(value)
-                elif env_var in ["CREW_MAX_TOKENS", "ARXIV_MAX_RESULTS"]:
+                elif env_var in ["CREW_MAX_TOKENS", "ARXIV_MAX_RESULTS", "MEMORY_MAX_ENTRIES",
+                                 "LLM_MAX_CONCURRENCY", "LLM_MAX_RETRIES"]:
                     value = int(value)
+                elif env_var == "LLM_HEDGE":
+                    value = value.lower() in ("1", "true", "yes", "on")
                 
                 # Mettre à jour la configuration
                 current = self.defaults
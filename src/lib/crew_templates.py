@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Modèles de tâches précompilés.
+
+Les prompts de agents.yaml sont analysés une seule fois au démarrage : les
+variables de chaque tâche sont validées (noms simples, déclarés pour la
+tâche) et les textes sans variable sont résolus d'avance. Pour chaque
+requête, il ne reste qu'à lier les valeurs (`bind`), sans relire la
+configuration ; une erreur de gabarit apparaît au démarrage plutôt qu'au
+milieu d'une requête.
+"""
+
+import string
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Variables attendues par les prompts des tâches du pipeline
+TASK_VARIABLES = {
+    "query_parser": ("question",),
+    "arxiv_search": ("max_results",),
+    "paper_analysis": (),
+    "paper_analysis_item": ("paper", "query"),
+    "summary": ("audience",),
+    "synthesis": ("audience",),
+    "translation": ("audience",),
+    "professor": ("query",),
+    "final_formatting": ("query",),
+    "chat_followup": ("context", "history", "question", "language", "audience"),
+}
+
+# Sections de consignes ajoutées aux tâches : langue de sortie, pipeline allégé (--deadline)
+DIRECTIVE_SECTIONS = ("output_language", "degraded")
+# Variables des consignes
+DIRECTIVE_VARIABLES = ("language",)
+
+
+class PromptTemplate:
+    """Gabarit de texte à variables `{nom}`, analysé une seule fois."""
+
+    __slots__ = ("name", "fields", "_text", "_static", "_order", "_memo", "_literals", "_slots")
+
+    # Textes liés conservés par gabarit (public, nombre de résultats... reviennent d'une requête à l'autre)
+    MEMO_SIZE = 64
+
+    def __init__(self, name: str, text: str, allowed: Optional[Iterable[str]] = None):
+        """
+        Analyse et valide un gabarit.
+
+        Args:
+            name: Nom du gabarit (pour les messages d'erreur)
+            text: Texte au format str.format (`{{` et `}}` pour les accolades littérales)
+            allowed: Variables autorisées (None: toute variable au nom simple)
+
+        Raises:
+            ValueError: Gabarit mal formé ou variable non autorisée
+        """
+        allowed = set(allowed) if allowed is not None else None
+        fields = set()
+        literals, slots, pending = [], [], ""
+        try:
+            parsed = list(string.Formatter().parse(text or ""))
+        except ValueError as e:
+            raise ValueError(f"Gabarit '{name}' mal formé: {e}") from e
+
+        for literal, field, spec, conversion in parsed:
+            pending += literal
+            if field is None:
+                continue
+            if not field.isidentifier() or conversion:
+                raise ValueError(f"Gabarit '{name}': variable '{{{field}}}' invalide "
+                                 f"(seuls les noms simples sont acceptés)")
+            if allowed is not None and field not in allowed:
+                raise ValueError(f"Gabarit '{name}': variable '{{{field}}}' inconnue "
+                                 f"(attendues: {', '.join(sorted(allowed)) or 'aucune'})")
+            fields.add(field)
+            literals.append(pending)
+            slots.append((field, spec or ""))
+            pending = ""
+        literals.append(pending)
+
+        self.name = name
+        self.fields = frozenset(fields)
+        self._text = text or ""
+        # Sans variable, le texte final (accolades doublées résolues) est calculé une fois
+        self._static = pending if not fields else None
+        # Segments littéraux (accolades doublées déjà résolues) entre les variables
+        self._literals = tuple(literals)
+        self._slots = tuple(slots)
+        self._order = tuple(sorted(fields))
+        self._memo: Dict[tuple, str] = {}
+
+    def bind(self, **values: Any) -> str:
+        """
+        Produit le texte avec les valeurs données.
+
+        Args:
+            **values: Valeurs des variables (les valeurs en trop sont ignorées)
+
+        Returns:
+            Texte final
+
+        Raises:
+            ValueError: Variable manquante
+        """
+        if self._static is not None:
+            return self._static
+        try:
+            key = tuple(values[field] for field in self._order)
+        except KeyError as e:
+            raise ValueError(f"Gabarit '{self.name}': valeur manquante pour {e.args[0]}") from None
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Valeur non hachable : pas de mémorisation
+            return self._render(values)
+        text = self._render(values)
+        if len(self._memo) >= self.MEMO_SIZE:
+            self._memo.clear()
+        self._memo[key] = text
+        return text
+
+
+    def _render(self, values: Dict[str, Any]) -> str:
+        chunks = [self._literals[0]]
+        for (field, spec), literal in zip(self._slots, self._literals[1:]):
+            value = values[field]
+            chunks.append(value if not spec and isinstance(value, str) else format(value, spec))
+            chunks.append(literal)
+        return "".join(chunks)
+
+
+class TaskTemplate:
+    """Description et résultat attendu précompilés d'une tâche, et sa route LLM éventuelle."""
+
+    __slots__ = ("name", "description", "expected_output", "llm", "fields")
+
+    def __init__(self, name: str, prompt_config: Dict[str, Any], allowed: Optional[Iterable[str]] = None):
+        self.name = name
+        self.description = PromptTemplate(f"{name}.task_description",
+                                          prompt_config.get("task_description", ""), allowed)
+        self.expected_output = PromptTemplate(f"{name}.expected_output",
+                                              prompt_config.get("expected_output", ""), allowed)
+        self.llm = prompt_config.get("llm")
+        self.fields = self.description.fields | self.expected_output.fields
+
+    def bind(self, **values: Any) -> Tuple[str, str]:
+        """
+        Lie les variables de la requête.
+
+        Returns:
+            Tuple (description, résultat attendu)
+        """
+        return self.description.bind(**values), self.expected_output.bind(**values)
+
+
+class CrewTemplates:
+    """Ensemble des modèles de tâches et des consignes de langue de la configuration."""
+
+    def __init__(self, prompts: Dict[str, Any], task_variables: Optional[Dict[str, Iterable[str]]] = None):
+        """
+        Compile les prompts.
+
+        Args:
+            prompts: Section `prompts` de agents.yaml
+            task_variables: Variables autorisées par tâche (par défaut: TASK_VARIABLES ;
+                            les tâches absentes acceptent toute variable au nom simple)
+
+        Raises:
+            ValueError: Gabarit invalide
+        """
+        task_variables = TASK_VARIABLES if task_variables is None else task_variables
+        self.tasks: Dict[str, TaskTemplate] = {}
+        self.directives: Dict[str, PromptTemplate] = {}
+        for name, prompt_config in (prompts or {}).items():
+            if not isinstance(prompt_config, dict):
+                continue
+            if name in DIRECTIVE_SECTIONS:
+                self.directives.update({
+                    key: PromptTemplate(f"{name}.{key}", text, DIRECTIVE_VARIABLES)
+                    for key, text in prompt_config.items() if isinstance(text, str)
+                })
+            elif "task_description" in prompt_config:
+                self.tasks[name] = TaskTemplate(name, prompt_config, task_variables.get(name))
+
+    @classmethod
+    def from_config(cls, config) -> "CrewTemplates":
+        """
+        Compile les prompts d'une configuration.
+
+        Args:
+            config: Instance de Config
+
+        Returns:
+            Instance de CrewTemplates
+        """
+        return cls(config.config.get("prompts", {}))
+
+    def task(self, name: str) -> TaskTemplate:
+        """
+        Récupère le modèle d'une tâche.
+
+        Raises:
+            ValueError: Tâche inconnue
+        """
+        try:
+            return self.tasks[name]
+        except KeyError:
+            raise ValueError(f"Configuration de prompt non trouvée pour '{name}'") from None
+
+    def directive(self, name: str, **values: Any) -> str:
+        """Texte d'une consigne (langue ou pipeline allégé ; chaîne vide si elle n'est pas configurée)."""
+        template = self.directives.get(name)
+        return template.bind(**values) if template else ""
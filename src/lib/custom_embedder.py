@@ -3,20 +3,169 @@ Module contenant un embedder personnalisé pour ArxivBuddy.
 
 Cette classe définit un embedder basé sur SentenceTransformers,
 utilisant le modèle multilingual-e5-large pour la création d'embeddings.
+Le modèle est chargé à la première utilisation et peut être libéré après
+une période d'inactivité (voir lib.memory_budget). Les petits encodages
+concurrents sont regroupés en lots par un thread partagé (voir
+lib.embedding_batcher).
 """
 
-from typing import List
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
 from chromadb.api.types import Documents, Embeddings
 from chromadb.utils.embedding_functions import EmbeddingFunction
-from sentence_transformers import SentenceTransformer
 
-class MultilingualE5Embedder(EmbeddingFunction):
+from .embedding_batcher import EMBED_MICROBATCH, EmbeddingBatcher
+from .memory_budget import UsageTracker, get_reaper, low_memory_enabled, release_memory
+
+DEFAULT_EMBEDDER_MODEL = "intfloat/multilingual-e5-large"
+# Modèle du profil basse mémoire (~470 Mo, quatre fois moins que e5-large)
+LOW_MEMORY_EMBEDDER_MODEL = os.getenv("LOW_MEMORY_EMBEDDER_MODEL", "intfloat/multilingual-e5-small")
+
+# Dimensions connues, pour ouvrir les index sans charger le modèle
+_KNOWN_DIMENSIONS = {
+    "intfloat/multilingual-e5-large": 1024,
+    "intfloat/multilingual-e5-base": 768,
+    "intfloat/multilingual-e5-small": 384,
+}
+
+
+def embedder_model() -> str:
+    """Modèle d'embedding configuré (EMBEDDER_MODEL, sinon selon le profil mémoire)."""
+    default = LOW_MEMORY_EMBEDDER_MODEL if low_memory_enabled() else DEFAULT_EMBEDDER_MODEL
+    return os.getenv("EMBEDDER_MODEL", default)
+
+
+def embedder_quantization() -> bool:
+    """Quantification int8 des couches linéaires (EMBEDDER_QUANTIZE, active par défaut en basse mémoire)."""
+    value = os.getenv("EMBEDDER_QUANTIZE")
+    if value is None:
+        return low_memory_enabled()
+    return value.lower() in ("1", "true", "yes", "on", "int8")
+
+
+class MultilingualE5Embedder(UsageTracker, EmbeddingFunction):
     """
-    Embedder personnalisé utilisant le modèle 'intfloat/multilingual-e5-large'.
+    Embedder personnalisé utilisant les modèles E5 multilingues
+    (par défaut 'intfloat/multilingual-e5-large').
     """
-    def __init__(self):
-        # Initialiser le modèle SentenceTransformer
-        self.model = SentenceTransformer('intfloat/multilingual-e5-large')
+    def __init__(self, model_name: Optional[str] = None, quantize: Optional[bool] = None):
+        """
+        Initialise l'embedder sans charger le modèle.
+
+        Args:
+            model_name: Modèle SentenceTransformers (par défaut: embedder_model())
+            quantize: Quantification dynamique int8 sur CPU (par défaut: embedder_quantization())
+        """
+        self.model_name = model_name or embedder_model()
+        self.quantize = embedder_quantization() if quantize is None else quantize
+        self.loads = 0
+        self._model = None
+        self._dimension = _KNOWN_DIMENSIONS.get(self.model_name)
+        self._lock = threading.Lock()
+        self._batcher: Optional[EmbeddingBatcher] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def model(self):
+        """Modèle SentenceTransformer, chargé à la demande."""
+        with self._lock:
+            if self._model is None:
+                self._model = self._load()
+                self.loads += 1
+            self._touch()
+            return self._model
+
+    def _load(self):
+        # Import différé : torch et sentence_transformers pèsent plusieurs centaines de Mo
+        from sentence_transformers import SentenceTransformer
+
+        model = SentenceTransformer(self.model_name)
+        if self.quantize and model.device.type == "cpu":
+            try:
+                import torch
+                torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+            except Exception as e:
+                print(f"⚠️ Quantification de l'embedder impossible: {e}")
+        self._dimension = model.get_sentence_embedding_dimension()
+        return model
+
+    def unload(self) -> bool:
+        """
+        Libère le modèle ; il sera rechargé à la prochaine utilisation.
+
+        Returns:
+            True si un modèle chargé a été libéré
+        """
+        with self._lock:
+            if self._model is None or self._active:
+                return False
+            self._model = None
+        release_memory()
+        return True
+
+    def dimension(self) -> int:
+        """Dimension des vecteurs (sans charger le modèle s'il est connu)."""
+        if self._dimension is None:
+            return self.model.get_sentence_embedding_dimension()
+        return self._dimension
+
+    @property
+    def storage_key(self) -> str:
+        """
+        Suffixe des répertoires de vecteurs propres à ce modèle.
+
+        Vide pour le modèle par défaut non quantifié, afin de conserver les
+        index existants ; les vecteurs d'autres modèles ne sont pas comparables.
+        """
+        if self.model_name == DEFAULT_EMBEDDER_MODEL and not self.quantize:
+            return ""
+        key = re.sub(r"[^A-Za-z0-9._-]+", "_", self.model_name.rsplit("/", 1)[-1])
+        return f"{key}-int8" if self.quantize else key
+
+    def _acquire(self):
+        """Modèle chargé, marqué comme en cours d'utilisation (à relâcher par `_end`)."""
+        model = self.model
+        with self._lock:
+            self._begin()
+        return model
+
+    def _release(self) -> None:
+        with self._lock:
+            self._end()
+
+    @property
+    def batcher(self) -> EmbeddingBatcher:
+        """Regroupement des encodages concurrents de cet embedder (créé à la demande)."""
+        with self._lock:
+            if self._batcher is None:
+                self._batcher = EmbeddingBatcher(self._encode_batch)
+            return self._batcher
+
+    def _encode_batch(self, processed: List[str], batch_size: int) -> np.ndarray:
+        """Encodage brut de textes préfixés (vecteurs non normalisés)."""
+        model = self._acquire()
+        try:
+            return model.encode(processed, batch_size=batch_size, convert_to_numpy=True)
+        finally:
+            self._release()
+
+    def _encode(self, processed: List[str], normalize: bool, batch_size: int = 32) -> np.ndarray:
+        if EMBED_MICROBATCH:
+            return self.batcher.encode(processed, normalize=normalize)
+        model = self._acquire()
+        try:
+            embeddings = model.encode(processed, batch_size=batch_size, convert_to_numpy=True,
+                                      normalize_embeddings=normalize)
+        finally:
+            self._release()
+        return embeddings.astype(np.float32, copy=False)
 
     def __call__(self, input_texts: Documents) -> Embeddings:
         # Retourner une liste vide si aucun texte
@@ -24,7 +173,53 @@ class MultilingualE5Embedder(EmbeddingFunction):
             return []
         # Préfixe recommandé pour ce modèle
         processed = [f"passage: {text}" for text in input_texts]
-        # Générer les embeddings
-        embeddings = self.model.encode(processed, convert_to_tensor=False)
-        # Convertir en liste simple
-        return embeddings.tolist()
\ No newline at end of file
+        # Générer les embeddings et les convertir en liste simple
+        return self._encode(processed, normalize=False).tolist()
+
+    def encode(self, texts: List[str], prefix: str = "passage", batch_size: int = 32) -> np.ndarray:
+        """
+        Calcule des embeddings normalisés sous forme de matrice NumPy.
+
+        Args:
+            texts: Textes à encoder
+            prefix: Préfixe E5 ("passage" pour les documents, "query" pour les questions)
+            batch_size: Taille des lots envoyés au modèle (sans regroupement des encodages)
+
+        Returns:
+            Matrice float32 (len(texts), dimension) de vecteurs unitaires
+        """
+        if not texts:
+            return np.zeros((0, self.dimension()), dtype=np.float32)
+        return self._encode([f"{prefix}: {text}" for text in texts], normalize=True, batch_size=batch_size)
+
+# Instance partagée : le modèle (~2 Go) n'est chargé qu'une fois par processus
+_embedder: Optional[MultilingualE5Embedder] = None
+_embedder_lock = threading.Lock()
+
+def get_embedder() -> MultilingualE5Embedder:
+    """
+    Récupère l'instance partagée de l'embedder.
+
+    Returns:
+        Instance de MultilingualE5Embedder
+    """
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            _embedder = MultilingualE5Embedder()
+            get_reaper().register("embedder", _embedder)
+    return _embedder
+
+
+def embedding_stats() -> Dict[str, Any]:
+    """
+    Statistiques du regroupement des encodages de l'embedder partagé.
+
+    Returns:
+        Compteurs de lib.embedding_batcher (dictionnaire vide si rien n'a été regroupé)
+    """
+    with _embedder_lock:
+        embedder = _embedder
+    if embedder is None or embedder._batcher is None:
+        return {}
+    return embedder._batcher.stats()
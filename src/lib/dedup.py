@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Déduplication des résultats de recherche ArXiv.
+
+Avant l'analyse, chaque article candidat passe par un filtre qui écarte :
+- les autres versions (ou listes croisées) d'un article déjà retenu ;
+- les quasi-doublons (même titre, résumé presque identique), détectés par
+  MinHash et LSH sur des triplets de mots du titre et du résumé.
+
+Le filtre s'utilise comme prédicat de `arxiv_api.iter_results` : les
+candidats écartés sont remplacés par les suivants de la liste de résultats.
+"""
+
+import os
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .paper import Paper
+from .utils import parse_arxiv_id
+
+DEDUP_THRESHOLD = float(os.getenv('ARXIV_DEDUP_THRESHOLD', '0.7'))
+
+# Nombre premier de Mersenne 2^31 - 1 : a * h reste inférieur à 2^62 en uint64
+_PRIME = np.uint64((1 << 31) - 1)
+_TOKEN = re.compile(r"\w+")
+
+
+def _fields(paper: Any) -> Tuple[str, str, str]:
+    """
+    Extrait (identifiant, titre, résumé) d'un Paper, d'un arxiv.Result ou d'un dictionnaire d'article.
+    """
+    if isinstance(paper, Paper):
+        return paper.arxiv_id, paper.title, paper.abstract
+    if isinstance(paper, dict):
+        raw_id = paper.get("arxiv_id") or paper.get("id") or paper.get("url") or ""
+        abstract = paper.get("abstract") or paper.get("summary") or ""
+        title = paper.get("title", "")
+    else:
+        raw_id = getattr(paper, "entry_id", "") or ""
+        abstract = getattr(paper, "summary", "") or ""
+        title = getattr(paper, "title", "") or ""
+    paper_id, _ = parse_arxiv_id(str(raw_id)) if raw_id else ("", None)
+    return paper_id, title, abstract
+
+
+class NearDuplicateFilter:
+    """Filtre incrémental des versions et quasi-doublons d'articles."""
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = 64,
+                 bands: int = 16, shingle_size: int = 3, seed: int = 1):
+        """
+        Initialise le filtre.
+
+        Args:
+            threshold: Similarité de Jaccard estimée au-delà de laquelle deux articles sont des doublons
+            num_perm: Nombre de permutations MinHash
+            bands: Nombre de bandes LSH (num_perm doit en être un multiple)
+            shingle_size: Nombre de mots par triplet (shingle)
+            seed: Graine des permutations (signatures reproductibles)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm doit être un multiple de bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+        self.seen_ids: set = set()
+        self._titles: Dict[str, str] = {}
+        self._ids: List[str] = []
+        self._signatures: List[np.ndarray] = []
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        self.rejected: List[Dict[str, str]] = []
+
+    @staticmethod
+    def _normalize_title(title: str) -> str:
+        return " ".join(_TOKEN.findall(title.lower()))
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        Calcule la signature MinHash d'un texte.
+
+        Args:
+            text: Titre et résumé
+
+        Returns:
+            Signature uint64 (num_perm,) ou None si le texte est vide
+        """
+        tokens = _TOKEN.findall(text.lower())
+        if not tokens:
+            return None
+        size = min(self.shingle_size, len(tokens))
+        shingles = {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles),
+                             dtype=np.uint64, count=len(shingles)) & _PRIME
+        # (a * h + b) mod p pour chaque permutation, minimum sur les triplets
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)]
+
+    def find_duplicate(self, paper: Any) -> Optional[str]:
+        """
+        Cherche un article déjà retenu dont `paper` est une version ou un quasi-doublon.
+
+        Args:
+            paper: Paper, arxiv.Result ou dictionnaire d'article
+
+        Returns:
+            Identifiant de l'article déjà retenu, ou None
+        """
+        paper_id, title, abstract = _fields(paper)
+        if paper_id and paper_id in self.seen_ids:
+            return paper_id
+        normalized = self._normalize_title(title)
+        if normalized and normalized in self._titles:
+            return self._titles[normalized]
+
+        signature = self.signature(f"{title} {abstract}")
+        if signature is None:
+            return None
+        candidates = {index for key in self._band_keys(signature) for index in self._buckets.get(key, [])}
+        for index in candidates:
+            similarity = float(np.mean(self._signatures[index] == signature))
+            if similarity >= self.threshold:
+                return self._ids[index]
+        return None
+
+    def add(self, paper: Any) -> None:
+        """Enregistre un article retenu."""
+        paper_id, title, abstract = _fields(paper)
+        signature = self.signature(f"{title} {abstract}")
+        if signature is None:
+            signature = np.full(self.rows * self.bands, _PRIME, dtype=np.uint64)
+        if paper_id:
+            self.seen_ids.add(paper_id)
+        normalized = self._normalize_title(title)
+        if normalized:
+            self._titles.setdefault(normalized, paper_id)
+        index = len(self._signatures)
+        self._ids.append(paper_id)
+        self._signatures.append(signature)
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(index)
+
+    def accept(self, paper: Any) -> bool:
+        """
+        Prédicat : retient l'article s'il n'est pas un doublon d'un article déjà retenu.
+
+        Args:
+            paper: Paper, arxiv.Result ou dictionnaire d'article
+
+        Returns:
+            True si l'article est retenu
+        """
+        duplicate_of = self.find_duplicate(paper)
+        if duplicate_of is not None:
+            paper_id, title, _ = _fields(paper)
+            self.rejected.append({"arxiv_id": paper_id, "title": title, "duplicate_of": duplicate_of})
+            return False
+        self.add(paper)
+        return True
+
+
+def deduplicate(papers: List[Dict[str, Any]], threshold: float = DEDUP_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Retire les versions multiples et quasi-doublons d'une liste d'articles (l'ordre est conservé).
+
+    Args:
+        papers: Articles au format des outils ArxivBuddy
+        threshold: Similarité de Jaccard estimée au-delà de laquelle deux articles sont des doublons
+
+    Returns:
+        Articles distincts
+    """
+    dedup = NearDuplicateFilter(threshold=threshold)
+    return [paper for paper in papers if dedup.accept(paper)]
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Regroupement des encodages concurrents en lots (micro-batching).
+
+Chaque appel à l'embedder (recherche sémantique, passages, mémoires CrewAI)
+encode souvent une poignée de textes. Avec plusieurs équipages simultanés, le
+modèle enchaîne alors de tout petits lots, coûteux par texte. Un thread
+d'encodage unique reçoit les demandes de tous les appelants, les regroupe
+pendant une courte fenêtre (`EMBED_BATCH_WINDOW_MS`, seulement lorsque le lot
+précédent réunissait plusieurs demandes) jusqu'à une taille maximale
+(`EMBED_MAX_BATCH` textes), encode le lot en un seul appel au modèle et
+renvoie à chaque appelant ses vecteurs. Les demandes plus grandes qu'un lot
+(indexation) sont encodées directement par l'appelant.
+"""
+
+import os
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+# Regroupement des encodages concurrents (0 : chaque appel encode son propre lot)
+EMBED_MICROBATCH = os.getenv("EMBED_MICROBATCH", "1") != "0"
+# Attente maximale d'autres demandes après la première d'un lot (millisecondes)
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "3"))
+# Nombre maximal de textes d'un lot
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+# Tailles de lots conservées pour les statistiques
+_RECENT_BATCHES = 1000
+
+
+class _Request:
+    """Demande d'encodage d'un appelant."""
+
+    __slots__ = ("texts", "normalize", "future", "submitted")
+
+    def __init__(self, texts: List[str], normalize: bool):
+        self.texts = texts
+        self.normalize = normalize
+        self.future: Future = Future()
+        self.submitted = time.monotonic()
+
+
+class EmbeddingBatcher:
+    """Thread d'encodage partagé : regroupe les demandes concurrentes en lots."""
+
+    def __init__(self, encode: Callable[[List[str], int], np.ndarray], window_ms: float = EMBED_BATCH_WINDOW_MS,
+                 max_batch: int = EMBED_MAX_BATCH):
+        """
+        Initialise le regroupement (le thread démarre à la première demande).
+
+        Args:
+            encode: Encodage brut d'une liste de textes préfixés, avec la taille des lots
+                    du modèle (vecteurs non normalisés)
+            window_ms: Attente maximale d'autres demandes après la première d'un lot
+            max_batch: Nombre maximal de textes d'un lot
+        """
+        self._encode = encode
+        self.window = window_ms / 1000.0
+        self.max_batch = max(max_batch, 1)
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._pending_texts = 0
+        self._last_requests = 0
+        self._batch_sizes: Deque[int] = deque(maxlen=_RECENT_BATCHES)
+        self.counters = {"requests": 0, "texts": 0, "batches": 0, "direct": 0, "errors": 0,
+                         "max_queue_depth": 0, "wait_seconds": 0.0, "encode_seconds": 0.0}
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="arxivbuddy-embedding-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, texts: List[str], normalize: bool = True) -> Future:
+        """
+        Dépose une demande d'encodage.
+
+        Args:
+            texts: Textes déjà préfixés ("query: ...", "passage: ...")
+            normalize: Vecteurs unitaires
+
+        Returns:
+            Future de la matrice float32 (len(texts), dimension)
+        """
+        request = _Request(list(texts), normalize)
+        with self._lock:
+            self.counters["requests"] += 1
+            self._pending_texts += len(request.texts)
+            self.counters["max_queue_depth"] = max(self.counters["max_queue_depth"], self._pending_texts)
+        self._start()
+        self._queue.put(request)
+        return request.future
+
+    def encode(self, texts: List[str], normalize: bool = True) -> np.ndarray:
+        """
+        Encode des textes préfixés, en lot avec les demandes concurrentes s'ils sont peu nombreux.
+
+        Args:
+            texts: Textes déjà préfixés
+            normalize: Vecteurs unitaires
+
+        Returns:
+            Matrice float32 (len(texts), dimension)
+        """
+        if len(texts) >= self.max_batch:
+            # Assez de textes pour un lot plein : pas d'attente ni de passage par le thread
+            with self._lock:
+                self.counters["direct"] += 1
+            return self._finish(self._encode(list(texts), self.max_batch), normalize)
+        return self.submit(texts, normalize).result()
+
+    @staticmethod
+    def _finish(embeddings: np.ndarray, normalize: bool) -> np.ndarray:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if normalize and len(embeddings):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+        return embeddings
+
+    def _collect(self) -> List[_Request]:
+        """Première demande en attente, puis celles qui arrivent pendant la fenêtre."""
+        batch = [self._queue.get()]
+        size = len(batch[0].texts)
+        # Sans concurrence au lot précédent, pas d'attente : un appelant seul ne paie pas la fenêtre
+        limit = time.monotonic() + (self.window if self._last_requests > 1 else 0.0)
+        while size < self.max_batch:
+            try:
+                # Demandes déjà en file : prises sans attendre
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = limit - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            batch.append(request)
+            size += len(request.texts)
+        self._last_requests = len(batch)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            texts = [text for request in batch for text in request.texts]
+            start = time.monotonic()
+            with self._lock:
+                self._pending_texts -= len(texts)
+                self.counters["batches"] += 1
+                self.counters["texts"] += len(texts)
+                self.counters["wait_seconds"] += sum(start - request.submitted for request in batch)
+                self._batch_sizes.append(len(texts))
+            try:
+                embeddings = np.asarray(self._encode(texts, self.max_batch), dtype=np.float32)
+            except BaseException as e:
+                with self._lock:
+                    self.counters["errors"] += 1
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            with self._lock:
+                self.counters["encode_seconds"] += time.monotonic() - start
+            offset = 0
+            for request in batch:
+                rows = embeddings[offset:offset + len(request.texts)]
+                offset += len(request.texts)
+                request.future.set_result(self._finish(rows, request.normalize))
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs, profondeur de file (textes en attente) et tailles des lots récents."""
+        with self._lock:
+            stats = dict(self.counters)
+            stats["queue_depth"] = self._pending_texts
+            sizes = sorted(self._batch_sizes)
+        stats["mean_batch"] = round(stats["texts"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["p50_batch"] = sizes[len(sizes) // 2] if sizes else 0
+        stats["p95_batch"] = sizes[min(int(len(sizes) * 0.95), len(sizes) - 1)] if sizes else 0
+        stats["mean_wait_ms"] = round(stats["wait_seconds"] / stats["requests"] * 1000, 2) \
+            if stats["requests"] else 0.0
+        return stats
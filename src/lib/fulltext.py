@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Récupération du texte intégral des articles ArXiv.
+
+Le PDF est téléchargé en streaming vers un cache adressé par contenu
+(empreinte SHA-256), le texte est extrait page par page vers un fichier
+sur disque, puis découpé en sections (introduction, méthode, résultats,
+conclusion...). Les positions des sections sont indexées par identifiant
+et version : un accès ultérieur est une simple lecture mappée en mémoire,
+sans nouveau téléchargement ni nouvelle analyse.
+"""
+
+import os
+import re
+import json
+import mmap
+import time
+import hashlib
+import tempfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import arxiv
+import requests
+
+from .sqlite_store import get_database
+from .utils import get_cache_dir, parse_arxiv_id
+
+# Sections canoniques et intitulés reconnus
+SECTION_ALIASES = {
+    "abstract": ["abstract"],
+    "introduction": ["introduction"],
+    "background": ["related work", "related works", "background", "preliminaries"],
+    "method": ["method", "methods", "methodology", "approach", "proposed method",
+               "model", "our approach", "framework"],
+    "results": ["results", "experiments", "experimental results", "experimental setup",
+                "evaluation", "experiments and results"],
+    "discussion": ["discussion", "limitations"],
+    "conclusion": ["conclusion", "conclusions", "concluding remarks", "conclusion and future work",
+                   "conclusions and future work", "summary"],
+    "references": ["references", "bibliography"],
+}
+
+MAIN_SECTIONS = ("introduction", "method", "results", "conclusion")
+
+_ALIAS_TO_SECTION = {alias: name for name, aliases in SECTION_ALIASES.items() for alias in aliases}
+_HEADING = re.compile(
+    r"^\s*(?:(?:\d+(?:\.\d+)*|[IVX]+|[A-Z])[.)]?\s+)?([A-Za-z][A-Za-z ]{2,40}?)\s*:?\s*$"
+)
+
+CHUNK_SIZE = 1 << 16
+
+
+def _match_heading(line: str) -> Optional[str]:
+    """
+    Reconnaît un intitulé de section.
+
+    Args:
+        line: Ligne de texte extraite du PDF
+
+    Returns:
+        Nom canonique de la section ou None
+    """
+    if len(line) > 60:
+        return None
+    match = _HEADING.match(line)
+    if not match:
+        return None
+    return _ALIAS_TO_SECTION.get(match.group(1).strip().lower())
+
+
+class PaperTextStore:
+    """Cache local des PDF, textes et sections des articles ArXiv."""
+
+    def __init__(self, cache_dir: Optional[str] = None, timeout: float = 60.0):
+        """
+        Initialise le cache.
+
+        Args:
+            cache_dir: Répertoire racine (par défaut: get_cache_dir("fulltext"))
+            timeout: Délai maximal d'un téléchargement en secondes
+        """
+        self.cache_dir = cache_dir or get_cache_dir("fulltext")
+        self.pdf_dir = os.path.join(self.cache_dir, "pdf")
+        self.text_dir = os.path.join(self.cache_dir, "text")
+        os.makedirs(self.pdf_dir, exist_ok=True)
+        os.makedirs(self.text_dir, exist_ok=True)
+        self.timeout = timeout
+
+        self.database = get_database(os.path.join(self.cache_dir, "fulltext.db"))
+        self.database.execute(
+            """
+            CREATE TABLE IF NOT EXISTS papers (
+                paper_id TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                text_path TEXT NOT NULL,
+                sections TEXT NOT NULL,
+                created REAL NOT NULL,
+                PRIMARY KEY (paper_id, version)
+            )
+            """
+        )
+
+    # ------------------------------------------------------------------
+    # Résolution et téléchargement
+    # ------------------------------------------------------------------
+    def _lookup(self, paper_id: str, version: Optional[int]) -> Optional[Tuple]:
+        """Cherche une entrée indexée (dernière version si non précisée)."""
+        if version is None:
+            rows = self.database.query(
+                "SELECT version, sha256, text_path, sections FROM papers "
+                "WHERE paper_id = ? ORDER BY version DESC LIMIT 1", (paper_id,)
+            )
+        else:
+            rows = self.database.query(
+                "SELECT version, sha256, text_path, sections FROM papers "
+                "WHERE paper_id = ? AND version = ?", (paper_id, version)
+            )
+        return rows[0] if rows else None
+
+    def _resolve(self, paper_id: str, version: Optional[int]) -> Tuple[int, str]:
+        """
+        Détermine la version et l'URL du PDF via l'API ArXiv.
+
+        Returns:
+            Tuple (version, pdf_url)
+        """
+        query_id = f"{paper_id}v{version}" if version else paper_id
+        search = arxiv.Search(id_list=[query_id])
+        try:
+            result = next(search.results())
+        except StopIteration:
+            raise LookupError(f"Article non trouvé avec l'ID: {query_id}")
+        _, resolved_version = parse_arxiv_id(result.entry_id)
+        return resolved_version or version or 1, result.pdf_url
+
+    def download_pdf(self, pdf_url: str) -> Tuple[str, str]:
+        """
+        Télécharge un PDF en streaming vers le cache adressé par contenu.
+
+        Le fichier est écrit par blocs et haché au fil de l'eau : il n'est
+        jamais chargé entièrement en mémoire.
+
+        Args:
+            pdf_url: URL du PDF
+
+        Returns:
+            Tuple (empreinte SHA-256, chemin du fichier en cache)
+        """
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.pdf_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                with requests.get(pdf_url, stream=True, timeout=self.timeout) as response:
+                    response.raise_for_status()
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        digest.update(chunk)
+                        f.write(chunk)
+            sha256 = digest.hexdigest()
+            target = self.pdf_path(sha256)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(tmp_path, target)
+            return sha256, target
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def pdf_path(self, sha256: str) -> str:
+        """Chemin du PDF en cache pour une empreinte donnée."""
+        return os.path.join(self.pdf_dir, sha256[:2], f"{sha256}.pdf")
+
+    # ------------------------------------------------------------------
+    # Extraction et découpage
+    # ------------------------------------------------------------------
+    def _iter_pages(self, pdf_path: str) -> Iterator[str]:
+        """Itère sur le texte des pages, une page à la fois."""
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            raise ImportError("L'extraction du texte intégral nécessite pypdf : pip install pypdf")
+
+        with open(pdf_path, "rb") as f:
+            reader = PdfReader(f)
+            for page in reader.pages:
+                yield page.extract_text() or ""
+
+    def extract_text(self, pdf_path: str, text_path: str) -> Dict[str, List[int]]:
+        """
+        Extrait le texte d'un PDF vers un fichier et repère les sections.
+
+        Le texte est écrit page par page et les intitulés sont repérés au fil
+        de l'écriture : seules les positions (en octets) sont conservées.
+
+        Args:
+            pdf_path: Chemin du PDF
+            text_path: Chemin du fichier texte à écrire
+
+        Returns:
+            Dictionnaire {section: [début, fin]} en octets dans le fichier texte
+        """
+        sections: Dict[str, List[int]] = {}
+        current: Optional[str] = None
+        offset = 0
+
+        # Nom temporaire unique : deux extractions simultanées du même PDF ne se mélangent pas
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(text_path), suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for page_text in self._iter_pages(pdf_path):
+                    for line in page_text.splitlines():
+                        heading = _match_heading(line)
+                        if heading and heading not in sections:
+                            if current:
+                                sections[current][1] = offset
+                            current = heading
+                            sections[current] = [offset, offset]
+                        data = (line + "\n").encode("utf-8")
+                        out.write(data)
+                        offset += len(data)
+                    out.write(b"\f\n")
+                    offset += 2
+            if current:
+                sections[current][1] = offset
+            os.replace(tmp_path, text_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return sections
+
+    # ------------------------------------------------------------------
+    # Accès
+    # ------------------------------------------------------------------
+    def fetch(self, paper: str) -> Tuple[str, int, str, Dict[str, List[int]]]:
+        """
+        Garantit la présence du texte d'un article dans le cache.
+
+        Args:
+            paper: ID ou URL ArXiv (avec ou sans version)
+
+        Returns:
+            Tuple (identifiant, version, chemin du texte, positions des sections)
+        """
+        paper_id, version = parse_arxiv_id(paper)
+        row = self._lookup(paper_id, version)
+        if row and os.path.exists(row[2]):
+            return paper_id, row[0], row[2], json.loads(row[3])
+
+        version, pdf_url = self._resolve(paper_id, version)
+        row = self._lookup(paper_id, version)
+        if row and os.path.exists(row[2]):
+            return paper_id, row[0], row[2], json.loads(row[3])
+
+        sha256, pdf_path = self.download_pdf(pdf_url)
+        text_path = os.path.join(self.text_dir, sha256[:2], f"{sha256}.txt")
+        os.makedirs(os.path.dirname(text_path), exist_ok=True)
+        # Un même PDF (même contenu) n'est analysé qu'une fois
+        known_sections = self._by_sha(sha256) if os.path.exists(text_path) else None
+        if known_sections:
+            sections = json.loads(known_sections)
+        else:
+            sections = self.extract_text(pdf_path, text_path)
+
+        self.database.execute(
+            "INSERT OR REPLACE INTO papers (paper_id, version, sha256, text_path, sections, created) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (paper_id, version, sha256, text_path, json.dumps(sections), time.time())
+        )
+        self._update_citations(paper_id, version)
+        return paper_id, version, text_path, sections
+
+    def _update_citations(self, paper_id: str, version: int) -> None:
+        """Ajoute en arrière-plan au graphe des citations la bibliographie du texte nouvellement mis en cache."""
+        try:
+            from .citation_graph import get_citation_graph
+            get_citation_graph().schedule_sync(paper_id, version, self)
+        except Exception as e:
+            print(f"⚠️ Graphe de citations non mis à jour: {e}")
+
+    def _by_sha(self, sha256: str) -> Optional[str]:
+        """Positions des sections déjà extraites pour un même PDF (autre ID/version)."""
+        rows = self.database.query("SELECT sections FROM papers WHERE sha256 = ? LIMIT 1", (sha256,))
+        return rows[0][0] if rows else None
+
+    def cached_papers(self) -> List[Tuple[str, int]]:
+        """
+        Articles dont le texte intégral est en cache (dernière version de chacun).
+
+        Returns:
+            Liste de tuples (identifiant, version)
+        """
+        return self.database.query("SELECT paper_id, MAX(version) FROM papers GROUP BY paper_id")
+
+    def text_path(self, paper: str) -> str:
+        """
+        Chemin du texte intégral en cache d'un article (téléchargé si besoin).
+
+        Args:
+            paper: ID ou URL ArXiv
+
+        Returns:
+            Chemin du fichier texte UTF-8
+        """
+        return self.fetch(paper)[2]
+
+    def get_sections(self, paper: str, names: Optional[List[str]] = None,
+                     max_chars: Optional[int] = None) -> Dict[str, object]:
+        """
+        Retourne les sections d'un article, lues par mappage mémoire.
+
+        Args:
+            paper: ID ou URL ArXiv
+            names: Sections souhaitées (par défaut: introduction, method, results, conclusion)
+            max_chars: Nombre maximal de caractères par section (optionnel)
+
+        Returns:
+            Dictionnaire avec l'identifiant, la version et le texte des sections trouvées
+        """
+        paper_id, version, text_path, offsets = self.fetch(paper)
+        names = names or list(MAIN_SECTIONS)
+
+        sections: Dict[str, str] = {}
+        with open(text_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    for name in names:
+                        if name not in offsets:
+                            continue
+                        start, end = offsets[name]
+                        if max_chars:
+                            # 4 octets max par caractère UTF-8 : on borne la lecture
+                            end = min(end, start + max_chars * 4)
+                        text = mapped[start:end].decode("utf-8", errors="ignore").replace("\f", "")
+                        sections[name] = text[:max_chars] if max_chars else text
+
+        return {
+            "arxiv_id": paper_id,
+            "version": version,
+            "sections": sections,
+            "missing_sections": [name for name in names if name not in sections],
+        }
+
+
+_store: Optional[PaperTextStore] = None
+
+
+def get_text_store() -> PaperTextStore:
+    """
+    Récupère l'instance partagée du cache de texte intégral.
+
+    Returns:
+        Instance de PaperTextStore
+    """
+    global _store
+    if _store is None:
+        _store = PaperTextStore()
+    return _store
@@ -0,0 +1,631 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+File de travaux pour exécuter process_query sur plusieurs machines.
+
+Une file expose la même interface quel que soit son support :
+- enqueue   : dépose un travail (dictionnaire JSON) et renvoie son identifiant ;
+- lease     : attribue le prochain travail à un worker pour une durée limitée (bail) ;
+- heartbeat : prolonge le bail d'un travail en cours ;
+- complete / fail : enregistre le résultat, ou remet le travail en file avec un
+  délai croissant tant qu'il lui reste des tentatives ;
+- get       : état et résultat d'un travail par identifiant.
+
+Un travail dont le worker disparaît (bail expiré) est réattribué. Supports :
+- SQLiteJobQueue : base locale (tests, une machine, plusieurs processus) ;
+- HTTPJobQueue   : client d'un broker réseau (`QueueBroker`, bibliothèque
+  standard) qui sert une file SQLite aux workers des autres machines.
+"""
+
+import os
+import abc
+import json
+import time
+import uuid
+import socket
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+from .memory_budget import memory_snapshot
+from .sqlite_store import get_database
+from .utils import get_cache_dir
+
+JOB_STATUSES = ("queued", "leased", "done", "failed")
+
+# Durée d'un bail : un worker silencieux plus longtemps perd son travail
+DEFAULT_LEASE_SECONDS = float(os.getenv("QUEUE_LEASE_SECONDS", "300"))
+DEFAULT_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))
+# Délai avant une nouvelle tentative (doublé à chaque échec)
+DEFAULT_RETRY_DELAY = float(os.getenv("QUEUE_RETRY_DELAY", "5"))
+
+
+class JobQueue(abc.ABC):
+    """Interface commune des files de travaux."""
+
+    @abc.abstractmethod
+    def enqueue(self, payload: Dict[str, Any], max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                priority: int = 0) -> str:
+        """
+        Dépose un travail.
+
+        Args:
+            payload: Paramètres du travail (sérialisables en JSON)
+            max_attempts: Nombre maximal de tentatives
+            priority: Priorité (les plus élevées sont attribuées d'abord)
+
+        Returns:
+            Identifiant du travail
+        """
+
+    @abc.abstractmethod
+    def lease(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        """
+        Attribue le prochain travail disponible.
+
+        Args:
+            worker_id: Identifiant du worker
+            lease_seconds: Durée du bail
+
+        Returns:
+            Travail (job_id, payload, attempts, max_attempts) ou None si la file est vide
+        """
+
+    @abc.abstractmethod
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Prolonge un bail ; False si le worker ne détient plus le travail."""
+
+    @abc.abstractmethod
+    def complete(self, job_id: str, worker_id: str, result: Any) -> bool:
+        """Enregistre le résultat d'un travail ; False si le worker ne détient plus le travail."""
+
+    @abc.abstractmethod
+    def fail(self, job_id: str, worker_id: str, error: str, retry: bool = True,
+             retry_delay: float = DEFAULT_RETRY_DELAY) -> Optional[str]:
+        """
+        Signale l'échec d'une tentative.
+
+        Args:
+            job_id: Identifiant du travail
+            worker_id: Identifiant du worker
+            error: Message d'erreur
+            retry: Remettre le travail en file s'il lui reste des tentatives
+            retry_delay: Délai avant la deuxième tentative (doublé ensuite)
+
+        Returns:
+            Nouveau statut ("queued" ou "failed"), None si le worker ne détient plus le travail
+        """
+
+    @abc.abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """État d'un travail (None s'il est inconnu)."""
+
+    @abc.abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Nombre de travaux par statut."""
+
+    def release(self) -> None:
+        """Libère les ressources du thread courant (connexion SQLite) ; rien à faire par défaut."""
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, poll_interval: float = 0.5) -> Dict[str, Any]:
+        """
+        Attend la fin d'un travail.
+
+        Args:
+            job_id: Identifiant du travail
+            timeout: Attente maximale en secondes (None: illimitée)
+            poll_interval: Intervalle d'interrogation
+
+        Returns:
+            Travail terminé (statut "done" ou "failed")
+
+        Raises:
+            KeyError: Travail inconnu
+            TimeoutError: Travail toujours en cours après `timeout`
+        """
+        limit = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                raise KeyError(f"Travail inconnu: {job_id}")
+            if job["status"] in ("done", "failed"):
+                return job
+            if limit is not None and time.monotonic() >= limit:
+                raise TimeoutError(f"Travail {job_id} toujours '{job['status']}' après {timeout:.0f} s")
+            time.sleep(poll_interval)
+
+
+class SQLiteJobQueue(JobQueue):
+    """File de travaux dans une base SQLite (attribution atomique par BEGIN IMMEDIATE)."""
+
+    _COLUMNS = ("job_id", "status", "payload", "priority", "attempts", "max_attempts", "worker",
+                "lease_until", "available_at", "result", "error", "created", "updated")
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialise la file.
+
+        Args:
+            db_path: Chemin de la base (par défaut: get_cache_dir("queue")/jobs.db)
+        """
+        self.db_path = db_path or os.path.join(get_cache_dir("queue"), "jobs.db")
+        self.database = get_database(self.db_path)
+        with self.database.transaction() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    worker TEXT,
+                    lease_until REAL,
+                    available_at REAL NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL
+                )
+                """
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority DESC, available_at)"
+            )
+
+    def enqueue(self, payload: Dict[str, Any], max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                priority: int = 0) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self.database.execute(
+            "INSERT INTO jobs (job_id, status, payload, priority, max_attempts, available_at, created, updated) "
+            "VALUES (?, 'queued', ?, ?, ?, ?, ?, ?)",
+            (job_id, json.dumps(payload, ensure_ascii=False), priority, max(1, max_attempts), now, now, now)
+        )
+        return job_id
+
+    def lease(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self.database.transaction() as connection:
+            # Bails expirés : le worker a disparu, la tentative compte comme un échec
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', error = 'bail expiré', worker = NULL, updated = ? "
+                "WHERE status = 'leased' AND lease_until < ? AND attempts >= max_attempts",
+                (now, now)
+            )
+            row = connection.execute(
+                "SELECT job_id, payload, attempts, max_attempts FROM jobs "
+                "WHERE (status = 'queued' AND available_at <= ?) OR (status = 'leased' AND lease_until < ?) "
+                "ORDER BY priority DESC, available_at LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, payload, attempts, max_attempts = row
+            connection.execute(
+                "UPDATE jobs SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                "updated = ? WHERE job_id = ?",
+                (worker_id, now + lease_seconds, now, job_id)
+            )
+        return {"job_id": job_id, "payload": json.loads(payload), "attempts": attempts + 1,
+                "max_attempts": max_attempts}
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        now = time.time()
+        return self.database.execute(
+            "UPDATE jobs SET lease_until = ?, updated = ? WHERE job_id = ? AND worker = ? AND status = 'leased'",
+            (now + lease_seconds, now, job_id, worker_id)
+        ) > 0
+
+    def complete(self, job_id: str, worker_id: str, result: Any) -> bool:
+        return self.database.execute(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_until = NULL, updated = ? "
+            "WHERE job_id = ? AND worker = ? AND status = 'leased'",
+            (json.dumps(result, ensure_ascii=False), time.time(), job_id, worker_id)
+        ) > 0
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry: bool = True,
+             retry_delay: float = DEFAULT_RETRY_DELAY) -> Optional[str]:
+        now = time.time()
+        with self.database.transaction() as connection:
+            row = connection.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE job_id = ? AND worker = ? AND status = 'leased'",
+                (job_id, worker_id)
+            ).fetchone()
+            if row is None:
+                return None
+            attempts, max_attempts = row
+            status = "queued" if retry and attempts < max_attempts else "failed"
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, worker = NULL, lease_until = NULL, "
+                "available_at = ?, updated = ? WHERE job_id = ?",
+                (status, error, now + retry_delay * (2 ** (attempts - 1)), now, job_id)
+            )
+        return status
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        rows = self.database.query(f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,))
+        if not rows:
+            return None
+        job = dict(zip(self._COLUMNS, rows[0]))
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        counts = dict(self.database.query("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+        return {status: counts.get(status, 0) for status in JOB_STATUSES}
+
+    def release(self) -> None:
+        """Ferme la connexion SQLite du thread courant (fin d'une requête du broker, d'un battement)."""
+        self.database.release_connection()
+
+    def purge(self, older_than_days: float = 7.0) -> int:
+        """Supprime les travaux terminés depuis plus de `older_than_days` jours."""
+        return self.database.execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated < ?",
+            (time.time() - older_than_days * 86400,)
+        )
+
+
+class HTTPJobQueue(JobQueue):
+    """Client d'un broker de file (QueueBroker) joignable par HTTP."""
+
+    def __init__(self, url: str, token: Optional[str] = None, timeout: float = 30.0):
+        """
+        Initialise le client.
+
+        Args:
+            url: Adresse du broker (ex: http://queue.local:8765)
+            token: Jeton partagé (par défaut: QUEUE_TOKEN)
+            timeout: Délai maximal d'une requête
+        """
+        self.url = url.rstrip("/")
+        self.token = token if token is not None else os.getenv("QUEUE_TOKEN")
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Any:
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method=method)
+        request.add_header("Content-Type", "application/json")
+        if self.token:
+            request.add_header("Authorization", f"Bearer {self.token}")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read() or b"null")
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise RuntimeError(f"Broker {self.url}: {e.code} {e.read().decode('utf-8', 'ignore')}") from e
+
+    def enqueue(self, payload: Dict[str, Any], max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                priority: int = 0) -> str:
+        return self._request("POST", "/jobs", {"payload": payload, "max_attempts": max_attempts,
+                                               "priority": priority})["job_id"]
+
+    def lease(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        return self._request("POST", "/lease", {"worker_id": worker_id, "lease_seconds": lease_seconds})
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        return bool(self._request("POST", f"/jobs/{job_id}/heartbeat",
+                                  {"worker_id": worker_id, "lease_seconds": lease_seconds}))
+
+    def complete(self, job_id: str, worker_id: str, result: Any) -> bool:
+        return bool(self._request("POST", f"/jobs/{job_id}/complete", {"worker_id": worker_id, "result": result}))
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry: bool = True,
+             retry_delay: float = DEFAULT_RETRY_DELAY) -> Optional[str]:
+        return self._request("POST", f"/jobs/{job_id}/fail", {"worker_id": worker_id, "error": error,
+                                                               "retry": retry, "retry_delay": retry_delay})
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def stats(self) -> Dict[str, int]:
+        return self._request("GET", "/stats")
+
+
+class QueueBroker(ThreadingHTTPServer):
+    """Broker HTTP : sert une file locale (SQLite) aux workers distants."""
+
+    daemon_threads = True
+
+    def __init__(self, address, queue: JobQueue, token: Optional[str] = None):
+        super().__init__(address, _BrokerHandler)
+        self.queue = queue
+        self.token = token if token is not None else os.getenv("QUEUE_TOKEN")
+
+
+class _BrokerHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def finish(self):
+        # Chaque requête est servie par un nouveau thread : sa connexion à la file est fermée
+        try:
+            super().finish()
+        finally:
+            self.server.queue.release()
+
+    def _reply(self, status: int, payload: Any) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _authorized(self) -> bool:
+        token = self.server.token
+        if token and self.headers.get("Authorization") != f"Bearer {token}":
+            self._reply(401, {"error": "jeton invalide"})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        queue = self.server.queue
+        parts = self.path.strip("/").split("/")
+        if parts == ["stats"]:
+            return self._reply(200, queue.stats())
+        if len(parts) == 2 and parts[0] == "jobs":
+            job = queue.get(parts[1])
+            return self._reply(200, job) if job else self._reply(404, {"error": "travail inconnu"})
+        self._reply(404, {"error": "route inconnue"})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        queue = self.server.queue
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            parts = self.path.strip("/").split("/")
+            if parts == ["jobs"]:
+                job_id = queue.enqueue(body["payload"], max_attempts=body.get("max_attempts", DEFAULT_MAX_ATTEMPTS),
+                                       priority=body.get("priority", 0))
+                return self._reply(200, {"job_id": job_id})
+            if parts == ["lease"]:
+                return self._reply(200, queue.lease(body["worker_id"],
+                                                    body.get("lease_seconds", DEFAULT_LEASE_SECONDS)))
+            if len(parts) == 3 and parts[0] == "jobs":
+                job_id, action = parts[1], parts[2]
+                if action == "heartbeat":
+                    return self._reply(200, queue.heartbeat(job_id, body["worker_id"],
+                                                            body.get("lease_seconds", DEFAULT_LEASE_SECONDS)))
+                if action == "complete":
+                    return self._reply(200, queue.complete(job_id, body["worker_id"], body.get("result")))
+                if action == "fail":
+                    return self._reply(200, queue.fail(job_id, body["worker_id"], body.get("error", ""),
+                                                       retry=body.get("retry", True),
+                                                       retry_delay=body.get("retry_delay", DEFAULT_RETRY_DELAY)))
+            self._reply(404, {"error": "route inconnue"})
+        except (KeyError, ValueError) as e:
+            self._reply(400, {"error": f"requête invalide: {e}"})
+        except Exception as e:
+            print(f"⚠️ Erreur du broker: {e}")
+            self._reply(500, {"error": str(e)})
+
+
+def start_broker(queue: JobQueue, host: str = "127.0.0.1", port: int = 0,
+                 token: Optional[str] = None) -> QueueBroker:
+    """
+    Démarre un broker dans un thread.
+
+    Args:
+        queue: File servie
+        host: Adresse d'écoute
+        port: Port d'écoute (0: port libre choisi par le système)
+        token: Jeton partagé exigé des clients (par défaut: QUEUE_TOKEN)
+
+    Returns:
+        Broker démarré (adresse dans `server_address`)
+    """
+    broker = QueueBroker((host, port), queue, token=token)
+    threading.Thread(target=broker.serve_forever, daemon=True).start()
+    return broker
+
+
+def open_queue(spec: Optional[str] = None) -> JobQueue:
+    """
+    Ouvre une file à partir de son adresse.
+
+    Args:
+        spec: "http(s)://hôte:port" pour un broker, sinon chemin d'une base SQLite
+              (par défaut: ARXIVBUDDY_QUEUE, puis la base locale)
+
+    Returns:
+        Instance de JobQueue
+    """
+    spec = spec or os.getenv("ARXIVBUDDY_QUEUE")
+    if spec and spec.startswith(("http://", "https://")):
+        return HTTPJobQueue(spec)
+    if spec and spec.startswith("sqlite://"):
+        spec = spec[len("sqlite://"):]
+    return SQLiteJobQueue(spec or None)
+
+
+class Worker:
+    """Boucle d'un worker : attribution, battements de cœur, résultat ou nouvelle tentative."""
+
+    # Erreurs dues au travail lui-même : inutile de le retenter
+    PERMANENT_ERRORS = (TypeError, ValueError, KeyError)
+
+    def __init__(self, queue: JobQueue, handler: Callable[[Dict[str, Any]], Any],
+                 worker_id: Optional[str] = None, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 poll_interval: float = 1.0, retry_delay: float = DEFAULT_RETRY_DELAY):
+        """
+        Initialise le worker.
+
+        Args:
+            queue: File de travaux
+            handler: Fonction exécutant un travail (payload → résultat sérialisable en JSON)
+            worker_id: Identifiant du worker (par défaut: hôte, processus et suffixe aléatoire)
+            lease_seconds: Durée du bail, prolongé au tiers de sa durée
+            poll_interval: Attente quand la file est vide
+            retry_delay: Délai avant une nouvelle tentative
+        """
+        self.queue = queue
+        self.handler = handler
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.processed = 0
+        self.failed = 0
+
+    def _keep_alive(self, job_id: str, done: threading.Event, lost: threading.Event) -> None:
+        try:
+            while not done.wait(self.lease_seconds / 3):
+                try:
+                    if not self.queue.heartbeat(job_id, self.worker_id, self.lease_seconds):
+                        lost.set()
+                        return
+                except Exception as e:
+                    # Broker momentanément injoignable : le prochain battement réessaie
+                    print(f"⚠️ Battement de cœur impossible pour {job_id}: {e}")
+        finally:
+            # Un thread de battements par travail : sa connexion ne lui survit pas
+            self.queue.release()
+
+    def run_once(self) -> bool:
+        """
+        Exécute au plus un travail.
+
+        Returns:
+            True si un travail a été attribué
+        """
+        job = self.queue.lease(self.worker_id, self.lease_seconds)
+        if job is None:
+            return False
+        job_id = job["job_id"]
+        done, lost = threading.Event(), threading.Event()
+        keeper = threading.Thread(target=self._keep_alive, args=(job_id, done, lost), daemon=True)
+        keeper.start()
+        try:
+            result = self.handler(job["payload"])
+        except Exception as e:
+            done.set()
+            self.failed += 1
+            status = self.queue.fail(job_id, self.worker_id, f"{type(e).__name__}: {e}",
+                                     retry=not isinstance(e, self.PERMANENT_ERRORS), retry_delay=self.retry_delay)
+            print(f"⚠️ Travail {job_id} en échec (tentative {job['attempts']}/{job['max_attempts']}, "
+                  f"{status or 'bail perdu'}): {e}")
+            return True
+        done.set()
+        keeper.join()
+        if lost.is_set() or not self.queue.complete(job_id, self.worker_id, result):
+            print(f"⚠️ Bail perdu pour {job_id} : résultat ignoré (travail réattribué)")
+        else:
+            self.processed += 1
+        return True
+
+    def run(self, max_jobs: Optional[int] = None, idle_timeout: Optional[float] = None,
+            stop: Optional[threading.Event] = None) -> int:
+        """
+        Traite les travaux jusqu'à l'arrêt.
+
+        Args:
+            max_jobs: Nombre maximal de travaux (None: illimité)
+            idle_timeout: S'arrête après cette durée sans travail (None: jamais)
+            stop: Événement d'arrêt
+
+        Returns:
+            Nombre de travaux traités
+        """
+        handled = 0
+        idle_since = time.monotonic()
+        while (max_jobs is None or handled < max_jobs) and not (stop and stop.is_set()):
+            try:
+                leased = self.run_once()
+            except (OSError, RuntimeError) as e:
+                print(f"⚠️ File injoignable: {e}")
+                leased = False
+            if leased:
+                handled += 1
+                idle_since = time.monotonic()
+                continue
+            if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                break
+            if stop:
+                stop.wait(self.poll_interval)
+            else:
+                time.sleep(self.poll_interval)
+        return handled
+
+
+# Paramètres de process_query acceptés dans un travail
+QUERY_PARAMETERS = ("query", "max_results", "french", "level", "translation", "deadline_seconds")
+# Options des travaux en plus des paramètres de process_query : "adaptive" allège le
+# pipeline pour tenir deadline_seconds (plan de lib.latency_planner)
+JOB_OPTIONS = QUERY_PARAMETERS + ("adaptive",)
+
+
+class QueryHandler:
+    """Exécute les travaux `process_query` avec une équipe d'agents créée une fois par worker."""
+
+    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
+        self.api_key = api_key
+        self.model = model
+        self._agents = None
+
+    def __call__(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if not payload.get("query"):
+            raise ValueError("Travail sans question ('query')")
+        if self._agents is None:
+            from .agents import ArxivAgents
+            self._agents = ArxivAgents(api_key=self.api_key, model=self.model)
+        start = time.perf_counter()
+        parameters = {key: payload[key] for key in QUERY_PARAMETERS if key in payload}
+        plan = None
+        if payload.get("adaptive") and payload.get("deadline_seconds"):
+            # Le temps passé dans la file est déjà pris sur le budget
+            waited = max(time.time() - payload.get("submitted", time.time()), 0.0)
+            plan = self._agents.plan_for_deadline(
+                max(payload["deadline_seconds"] - waited, 0.0), max_results=payload.get("max_results", 5),
+                french=payload.get("french", True), translation=payload.get("translation")
+            )
+            parameters["plan"] = plan
+        # Les erreurs remontent au worker : travail en échec, relancé selon ses tentatives
+        answer = self._agents.process_query(raise_errors=True, **parameters)
+        result = {"answer": answer, "elapsed": round(time.perf_counter() - start, 3)}
+        if plan is not None:
+            result["plan"] = plan.to_dict()
+        from .custom_embedder import embedding_stats
+        embedding = embedding_stats()
+        if embedding:
+            # Cumul du worker : taille des lots d'encodage et profondeur de file
+            result["embedding"] = {key: embedding[key] for key in
+                                   ("batches", "mean_batch", "p95_batch", "max_queue_depth", "mean_wait_ms")}
+        # RSS du worker après le travail : sert à dimensionner le nombre de workers par machine
+        return dict(result, **memory_snapshot())
+
+
+def submit_query(queue: JobQueue, query: str, **options) -> str:
+    """
+    Dépose une question à traiter par les workers.
+
+    Args:
+        queue: File de travaux
+        query: Question de l'utilisateur
+        **options: Autres paramètres de process_query (max_results, level...) et
+                   adaptive (pipeline allégé pour tenir deadline_seconds)
+
+    Returns:
+        Identifiant du travail
+    """
+    unknown = set(options) - set(JOB_OPTIONS)
+    if unknown:
+        raise ValueError(f"Paramètres inconnus: {', '.join(sorted(unknown))}")
+    payload = {"query": query, **options}
+    if options.get("adaptive"):
+        payload["submitted"] = time.time()
+    return queue.enqueue(payload)
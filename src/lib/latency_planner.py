@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Planification d'une requête sous contrainte de temps (`--deadline`).
+
+Le pipeline complet enchaîne jusqu'à huit tâches, quelle que soit l'urgence.
+Avant une requête à échéance, le planificateur estime la durée de chaque
+étape à partir des durées observées lors des requêtes précédentes
+(enregistrées dans une base locale), puis allège le pipeline, du moins
+coûteux en qualité au plus coûteux, jusqu'à tenir dans le budget :
+1. traduction confiée à la mise en forme plutôt qu'à une tâche dédiée ;
+2. moins d'articles (une seule vague d'analyses simultanées) ;
+3. résumé extractif local au lieu du résumé rédigé par le LLM ;
+4. pas de réponse pédagogique du professeur (réponse courte à la mise en forme) ;
+5. synthèse rédigée par la mise en forme (prompt fusionné) ;
+6. résumé extractif local de bout en bout, sans LLM.
+Le plan retenu indique ce qui a été omis, pour l'afficher avec la réponse.
+"""
+
+import os
+import math
+import time
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from .sqlite_store import get_database
+from .utils import get_cache_dir
+
+# Durées par défaut des étapes (secondes), tant que trop peu de mesures sont enregistrées ;
+# paper_analysis est la durée d'analyse d'un article
+DEFAULT_STAGE_SECONDS = {
+    "query_parser": 3.0,
+    "arxiv_search": 3.0,
+    "paper_analysis": 8.0,
+    "summary": 12.0,
+    "synthesis": 12.0,
+    "translation": 15.0,
+    "professor": 15.0,
+    "final_formatting": 10.0,
+    "extractive": 0.5,
+}
+# Mesures récentes prises en compte par étape, et quantile retenu (prudent plutôt que médian)
+PLANNER_SAMPLES = int(os.getenv("PLANNER_SAMPLES", "50"))
+PLANNER_QUANTILE = float(os.getenv("PLANNER_QUANTILE", "0.75"))
+# Part du budget visée par le plan (le reste absorbe les écarts d'estimation)
+DEADLINE_MARGIN = float(os.getenv("DEADLINE_MARGIN", "0.85"))
+# Nombre minimal de mesures avant de remplacer la durée par défaut
+MIN_SAMPLES = 3
+# Nombre minimal d'articles d'une réponse allégée
+MIN_PAPERS = 2
+
+
+class StageTimings:
+    """Durées observées des étapes du pipeline, conservées entre les exécutions."""
+
+    # Mesures conservées par étape
+    MAX_ROWS_PER_STAGE = 500
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialise la base des durées.
+
+        Args:
+            db_path: Chemin de la base (par défaut: <cache>/planner/timings.db)
+        """
+        self.db_path = db_path or os.path.join(get_cache_dir("planner"), "timings.db")
+        self.database = get_database(self.db_path)
+        self.database.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stage_timings (
+                stage TEXT NOT NULL,
+                seconds REAL NOT NULL,
+                recorded REAL NOT NULL
+            )
+            """
+        )
+        self.database.execute(
+            "CREATE INDEX IF NOT EXISTS stage_timings_recent ON stage_timings (stage, recorded)"
+        )
+
+    def record_many(self, durations: Dict[str, Iterable[float]]) -> int:
+        """
+        Enregistre les durées mesurées pendant une requête.
+
+        Args:
+            durations: Durées (secondes) par étape
+
+        Returns:
+            Nombre de mesures enregistrées
+        """
+        now = time.time()
+        rows = [(stage, float(seconds), now) for stage, values in durations.items() for seconds in values
+                if seconds >= 0]
+        if not rows:
+            return 0
+        with self.database.transaction() as connection:
+            connection.executemany("INSERT INTO stage_timings (stage, seconds, recorded) VALUES (?, ?, ?)", rows)
+            for stage in {row[0] for row in rows}:
+                connection.execute(
+                    """
+                    DELETE FROM stage_timings WHERE stage = ? AND rowid NOT IN (
+                        SELECT rowid FROM stage_timings WHERE stage = ? ORDER BY recorded DESC LIMIT ?
+                    )
+                    """,
+                    (stage, stage, self.MAX_ROWS_PER_STAGE)
+                )
+        return len(rows)
+
+    def estimate(self, stage: str) -> float:
+        """
+        Durée prévue d'une étape : quantile des mesures récentes, ou durée par défaut.
+
+        Args:
+            stage: Nom de l'étape (nom de la tâche, "paper_analysis" par article, "extractive")
+
+        Returns:
+            Durée en secondes
+        """
+        values = sorted(row[0] for row in self.database.query(
+            "SELECT seconds FROM stage_timings WHERE stage = ? ORDER BY recorded DESC LIMIT ?",
+            (stage, PLANNER_SAMPLES)
+        ))
+        if len(values) < MIN_SAMPLES:
+            return DEFAULT_STAGE_SECONDS.get(stage, 10.0)
+        return values[min(int(len(values) * PLANNER_QUANTILE), len(values) - 1)]
+
+    def estimates(self) -> Dict[str, float]:
+        """Durées prévues de toutes les étapes connues."""
+        return {stage: self.estimate(stage) for stage in DEFAULT_STAGE_SECONDS}
+
+
+class StageClock:
+    """Chronomètre des étapes d'une requête (durées à enregistrer dans StageTimings)."""
+
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._last = time.perf_counter()
+
+    def add(self, stage: str, seconds: float) -> None:
+        """Ajoute une mesure."""
+        with self._lock:
+            self.durations.setdefault(stage, []).append(seconds)
+
+    def restart(self) -> None:
+        """Repart de maintenant pour le prochain `lap`."""
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        """Attribue à une étape le temps écoulé depuis l'étape précédente (exécution séquentielle)."""
+        now = time.perf_counter()
+        self.add(stage, now - self._last)
+        self._last = now
+
+
+class PipelinePlan:
+    """Allègements retenus pour qu'une requête tienne dans son budget."""
+
+    def __init__(self, budget: float, max_results: int, translation: str):
+        self.budget = budget
+        self.max_results = max_results
+        self.translation = translation
+        self.extractive_summary = False
+        self.extractive_only = False
+        # Tâches omises (professor, synthesis)
+        self.skip: set = set()
+        self.estimate = 0.0
+        # Allègements appliqués, dans l'ordre, en clair
+        self.degradations: List[str] = []
+
+    @property
+    def fits(self) -> bool:
+        """Le plan tient dans le budget (marge comprise)."""
+        return self.estimate <= self.budget * DEADLINE_MARGIN
+
+    def describe(self) -> str:
+        """Résumé du plan pour l'affichage."""
+        head = f"estimation {self.estimate:.1f} s pour un budget de {self.budget:.0f} s"
+        if not self.degradations:
+            return f"{head} : pipeline complet"
+        return f"{head} ; allègements : " + "; ".join(self.degradations)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "budget": self.budget,
+            "estimate": round(self.estimate, 2),
+            "max_results": self.max_results,
+            "translation": self.translation,
+            "extractive_summary": self.extractive_summary,
+            "extractive_only": self.extractive_only,
+            "skipped": sorted(self.skip),
+            "degradations": list(self.degradations),
+        }
+
+
+class DeadlinePlanner:
+    """Choisit le pipeline le plus complet qui tient dans un budget de temps."""
+
+    def __init__(self, timings: Optional[StageTimings] = None):
+        """
+        Initialise le planificateur.
+
+        Args:
+            timings: Durées observées (par défaut: base partagée)
+        """
+        self.timings = timings or get_stage_timings()
+
+    @staticmethod
+    def estimate(plan: PipelinePlan, costs: Dict[str, float], workers: int, french: bool) -> float:
+        """
+        Durée prévue d'un plan (recherche et analyses en flux, tâches suivantes séquentielles).
+
+        Args:
+            plan: Plan à évaluer
+            costs: Durées prévues par étape
+            workers: Analyses d'articles simultanées
+            french: Sortie en français (tâche de traduction possible)
+
+        Returns:
+            Durée en secondes
+        """
+        if plan.extractive_only:
+            return costs["arxiv_search"] + costs["extractive"]
+        waves = math.ceil(plan.max_results / max(workers, 1))
+        total = costs["query_parser"] + costs["arxiv_search"] + waves * costs["paper_analysis"]
+        total += costs["extractive"] if plan.extractive_summary else costs["summary"]
+        for stage in ("synthesis", "professor"):
+            if stage not in plan.skip:
+                total += costs[stage]
+        if french and plan.translation == "separate":
+            total += costs["translation"]
+        return total + costs["final_formatting"]
+
+    def plan(self, budget: float, max_results: int = 5, french: bool = True, translation: str = "direct",
+             workers: int = 4) -> PipelinePlan:
+        """
+        Construit le plan d'une requête.
+
+        Args:
+            budget: Temps disponible (secondes)
+            max_results: Nombre d'articles demandé
+            french: Sortie en français
+            translation: Mode de traduction demandé (direct, merged, separate)
+            workers: Analyses d'articles simultanées (defaults.pipeline.stream_workers)
+
+        Returns:
+            PipelinePlan (pipeline complet s'il tient dans le budget ; sinon allégé,
+            jusqu'au résumé extractif sans LLM)
+        """
+        costs = self.timings.estimates()
+        plan = PipelinePlan(budget, max_results, translation)
+
+        def refresh() -> bool:
+            plan.estimate = self.estimate(plan, costs, workers, french)
+            return plan.fits
+
+        def merge_translation():
+            plan.translation = "merged"
+            return "traduction confiée à la mise en forme (pas de tâche dédiée)"
+
+        def fewer_papers():
+            count = max(min(plan.max_results, workers), MIN_PAPERS)
+            message = f"{count} articles au lieu de {plan.max_results}"
+            plan.max_results = count
+            return message
+
+        def extractive_summary():
+            plan.extractive_summary = True
+            return "résumé extractif local au lieu du résumé rédigé par le LLM"
+
+        def skip_professor():
+            plan.skip.add("professor")
+            return "réponse pédagogique du professeur omise (réponse courte à la mise en forme)"
+
+        def merge_synthesis():
+            plan.skip.add("synthesis")
+            return "synthèse rédigée par la mise en forme (prompt fusionné)"
+
+        def extractive_only():
+            plan.extractive_only = True
+            return "résumé extractif local de bout en bout, sans LLM"
+
+        steps = (
+            (lambda: french and plan.translation == "separate", merge_translation),
+            (lambda: plan.max_results > max(min(plan.max_results, workers), MIN_PAPERS), fewer_papers),
+            (lambda: True, extractive_summary),
+            (lambda: True, skip_professor),
+            (lambda: True, merge_synthesis),
+            (lambda: True, extractive_only),
+        )
+        if refresh():
+            return plan
+        for applicable, apply in steps:
+            if not applicable():
+                continue
+            plan.degradations.append(apply())
+            if refresh():
+                break
+        return plan
+
+
+_timings: Optional[StageTimings] = None
+_planner_lock = threading.Lock()
+
+
+def get_stage_timings() -> StageTimings:
+    """
+    Récupère la base partagée des durées d'étapes.
+
+    Returns:
+        Instance de StageTimings
+    """
+    global _timings
+    with _planner_lock:
+        if _timings is None:
+            _timings = StageTimings()
+    return _timings
+
+
+def record_timings(clock: StageClock) -> None:
+    """
+    Enregistre les durées d'une requête sans jamais interrompre l'appelant.
+
+    Args:
+        clock: Chronomètre de la requête
+    """
+    try:
+        get_stage_timings().record_many(clock.durations)
+    except Exception as e:
+        print(f"⚠️ Impossible d'enregistrer les durées des étapes: {e}")
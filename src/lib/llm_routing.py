@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Routage des appels LLM par agent et par tâche.
+
+Chaque agent (section `agents.<nom>.llm` de agents.yaml) et chaque tâche
+(`prompts.<nom>.llm`) peut utiliser son propre modèle, avec ses propres
+max_tokens, temperature et timeout, et un modèle de repli utilisé en cas de
+dépassement du délai (sans nouvel essai du modèle principal : l'ordonnanceur
+ne refait pas un appel en timeout quand un repli attend ; `num_retries`
+fixe le nombre de nouvelles tentatives de la route). Les appels sont mesurés par route (latence, jetons,
+coût estimé) pour choisir des modèles rapides sur les tâches mécaniques.
+"""
+
+import json
+import time
+import threading
+from typing import Any, Dict, List, Optional
+
+import litellm
+from crewai import LLM as CrewLLM
+
+from .llm_scheduler import DeadlineExceeded, retry_policy
+
+# Paramètres d'une route transmis au constructeur du LLM CrewAI
+ROUTE_KEYS = ("model", "api_key", "base_url", "temperature", "max_tokens", "timeout")
+
+
+def is_timeout_error(error: BaseException) -> bool:
+    """
+    Indique si une erreur d'appel LLM correspond à un dépassement de délai.
+
+    L'échéance de la requête (DeadlineExceeded) n'en est pas un : le repli
+    n'aurait pas plus de temps que le modèle principal.
+
+    Args:
+        error: Exception levée par litellm / CrewAI
+
+    Returns:
+        True pour un timeout
+    """
+    if isinstance(error, DeadlineExceeded):
+        return False
+    timeout_types = tuple(
+        cls for cls in (getattr(litellm, "Timeout", None), TimeoutError) if isinstance(cls, type)
+    )
+    if isinstance(error, timeout_types):
+        return True
+    message = str(error).lower()
+    return "timeout" in message or "timed out" in message
+
+
+class RouteReport:
+    """Statistiques d'appels par route et par modèle (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[tuple, Dict[str, Any]] = {}
+
+    def reset(self) -> None:
+        """Efface les statistiques."""
+        with self._lock:
+            self._routes.clear()
+
+    def _entry(self, route: str, model: str) -> Dict[str, Any]:
+        key = (route, model)
+        if key not in self._routes:
+            self._routes[key] = {
+                "calls": 0, "errors": 0, "timeouts": 0, "fallbacks": 0,
+                "latencies": [], "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0,
+                "cost_known": True,
+            }
+        return self._routes[key]
+
+    def record(self, route: str, model: str, latency: float, prompt_tokens: int = 0,
+               completion_tokens: int = 0, cost: Optional[float] = None,
+               error: bool = False, timeout: bool = False, fallback: bool = False) -> None:
+        """
+        Enregistre un appel.
+
+        Args:
+            route: Nom de la route (ex: "agent:query_parser", "task:final_formatting")
+            model: Modèle appelé
+            latency: Durée de l'appel en secondes
+            prompt_tokens: Jetons envoyés
+            completion_tokens: Jetons reçus
+            cost: Coût estimé en dollars (None si inconnu)
+            error: L'appel a échoué
+            timeout: L'échec est un dépassement de délai
+            fallback: L'appel a été redirigé vers le modèle de repli
+        """
+        with self._lock:
+            entry = self._entry(route, model)
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["timeouts"] += int(timeout)
+            entry["fallbacks"] += int(fallback)
+            entry["latencies"].append(latency)
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+            if cost is not None:
+                entry["cost"] += cost
+            elif not error:
+                entry["cost_known"] = False
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Résumé des statistiques par route.
+
+        Returns:
+            Liste de dictionnaires (route, modèle, appels, latences, jetons, coût)
+        """
+        rows = []
+        with self._lock:
+            for (route, model), entry in sorted(self._routes.items()):
+                latencies = sorted(entry["latencies"])
+                rows.append({
+                    "route": route,
+                    "model": model,
+                    "calls": entry["calls"],
+                    "errors": entry["errors"],
+                    "timeouts": entry["timeouts"],
+                    "fallbacks": entry["fallbacks"],
+                    "total_seconds": round(sum(latencies), 3),
+                    "p50_seconds": round(latencies[len(latencies) // 2], 3) if latencies else 0.0,
+                    "max_seconds": round(latencies[-1], 3) if latencies else 0.0,
+                    "prompt_tokens": entry["prompt_tokens"],
+                    "completion_tokens": entry["completion_tokens"],
+                    "cost_usd": round(entry["cost"], 6) if entry["cost_known"] else None,
+                })
+        return rows
+
+    def format(self) -> str:
+        """Tableau texte des statistiques par route."""
+        rows = self.summary()
+        if not rows:
+            return "Aucun appel LLM enregistré."
+        header = (f"{'route':<26}{'modèle':<36}{'appels':>7}{'échecs':>7}{'replis':>7}"
+                  f"{'total (s)':>11}{'p50 (s)':>9}{'jetons in/out':>16}{'coût ($)':>10}")
+        lines = [header, "-" * len(header)]
+        for row in rows:
+            cost = f"{row['cost_usd']:.4f}" if row["cost_usd"] is not None else "?"
+            tokens = f"{row['prompt_tokens']}/{row['completion_tokens']}"
+            lines.append(
+                f"{row['route'][:25]:<26}{row['model'][:35]:<36}{row['calls']:>7}{row['errors']:>7}"
+                f"{row['fallbacks']:>7}{row['total_seconds']:>11.1f}{row['p50_seconds']:>9.1f}"
+                f"{tokens:>16}{cost:>10}"
+            )
+        return "\n".join(lines)
+
+    def save(self, path: str) -> None:
+        """Enregistre le résumé au format JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+
+_report = RouteReport()
+
+
+def get_route_report() -> RouteReport:
+    """
+    Récupère le rapport partagé des appels LLM.
+
+    Returns:
+        Instance de RouteReport
+    """
+    return _report
+
+
+class RoutedLLM(CrewLLM):
+    """LLM CrewAI mesuré par route, avec modèle de repli en cas de timeout."""
+
+    def __init__(self, route: str, fallback: Optional[CrewLLM] = None, fallback_on_error: bool = False,
+                 num_retries: Optional[int] = None, input_cost_per_million: Optional[float] = None,
+                 output_cost_per_million: Optional[float] = None,
+                 report: Optional[RouteReport] = None, **kwargs):
+        """
+        Initialise le LLM.
+
+        Args:
+            route: Nom de la route (pour le rapport)
+            fallback: LLM de repli (optionnel)
+            fallback_on_error: Basculer aussi sur le repli pour les erreurs autres que les timeouts
+            num_retries: Nouvelles tentatives de l'ordonnanceur pour cette route (par défaut: les
+                         siennes ; aucune sur timeout avec un repli, aucune avec fallback_on_error)
+            input_cost_per_million: Prix des jetons envoyés (sinon: table de prix de litellm)
+            output_cost_per_million: Prix des jetons reçus (sinon: table de prix de litellm)
+            report: Rapport où enregistrer les appels (par défaut: rapport partagé)
+            **kwargs: Paramètres du LLM CrewAI (model, temperature, max_tokens, timeout...)
+        """
+        super().__init__(**kwargs)
+        self.route = route
+        self.fallback = fallback
+        self.fallback_on_error = fallback_on_error
+        self.num_retries = num_retries
+        self.input_cost_per_million = input_cost_per_million
+        self.output_cost_per_million = output_cost_per_million
+        self.report = report or get_route_report()
+
+    def _usage(self, messages: Any, response: Any) -> tuple:
+        """Estime les jetons échangés et le coût d'un appel."""
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        try:
+            prompt_tokens = litellm.token_counter(model=self.model, messages=messages)
+            completion_tokens = litellm.token_counter(model=self.model, text=str(response or ""))
+        except Exception:
+            return 0, 0, None
+
+        if self.input_cost_per_million is not None and self.output_cost_per_million is not None:
+            cost = (prompt_tokens * self.input_cost_per_million
+                    + completion_tokens * self.output_cost_per_million) / 1_000_000
+            return prompt_tokens, completion_tokens, cost
+        try:
+            prompt_cost, completion_cost = litellm.cost_per_token(
+                model=self.model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens
+            )
+            return prompt_tokens, completion_tokens, prompt_cost + completion_cost
+        except Exception:
+            return prompt_tokens, completion_tokens, None
+
+    def _retry_policy(self):
+        """Nouvelles tentatives de l'ordonnanceur : le repli remplace celles qu'il couvre."""
+        if self.fallback is None:
+            return retry_policy(self.num_retries)
+        return retry_policy(0 if self.fallback_on_error else self.num_retries, retry_timeouts=False)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None):
+        start = time.perf_counter()
+        try:
+            with self._retry_policy():
+                response = super().call(messages, tools=tools, callbacks=callbacks,
+                                        available_functions=available_functions)
+        except Exception as e:
+            timeout = is_timeout_error(e)
+            use_fallback = self.fallback is not None and (timeout or self.fallback_on_error)
+            self.report.record(self.route, self.model, time.perf_counter() - start,
+                               error=True, timeout=timeout, fallback=use_fallback)
+            if not use_fallback:
+                raise
+            reason = "délai dépassé" if timeout else "erreur"
+            print(f"⚠️ {self.route}: {self.model} en échec ({reason}), repli sur {self.fallback.model}")
+            return self.fallback.call(messages, tools=tools, callbacks=callbacks,
+                                      available_functions=available_functions)
+
+        prompt_tokens, completion_tokens, cost = self._usage(messages, response)
+        self.report.record(self.route, self.model, time.perf_counter() - start,
+                           prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cost=cost)
+        return response
+
+    async def acall(self, messages) -> str:
+        """
+        Appel asynchrone (`litellm.acompletion`), sans outils ni flux.
+
+        Mêmes paramètres, mesures et repli que `call` ; l'ordonnanceur installé
+        devant `litellm.acompletion` applique plafonds et échéance.
+
+        Args:
+            messages: Messages (ou texte d'un message utilisateur)
+
+        Returns:
+            Texte de la réponse
+        """
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        start = time.perf_counter()
+        try:
+            self._validate_call_params()
+            params = self._prepare_completion_params(messages)
+            params.pop("stream", None)
+            with self._retry_policy():
+                completion = await litellm.acompletion(**params)
+            response = completion.choices[0].message.content or ""
+        except Exception as e:
+            timeout = is_timeout_error(e)
+            use_fallback = self.fallback is not None and (timeout or self.fallback_on_error)
+            self.report.record(self.route, self.model, time.perf_counter() - start,
+                               error=True, timeout=timeout, fallback=use_fallback)
+            if not use_fallback:
+                raise
+            reason = "délai dépassé" if timeout else "erreur"
+            print(f"⚠️ {self.route}: {self.model} en échec ({reason}), repli sur {self.fallback.model}")
+            return await self.fallback.acall(messages)
+
+        prompt_tokens, completion_tokens, cost = self._usage(messages, response)
+        self.report.record(self.route, self.model, time.perf_counter() - start,
+                           prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cost=cost)
+        return response
+
+
+class LLMRouter:
+    """Construit les LLM de chaque route à partir de la configuration."""
+
+    def __init__(self, defaults: Dict[str, Any], report: Optional[RouteReport] = None):
+        """
+        Initialise le routeur.
+
+        Args:
+            defaults: Paramètres de la route par défaut (model, api_key, base_url,
+                      temperature, max_tokens, timeout)
+            report: Rapport où enregistrer les appels (par défaut: rapport partagé)
+        """
+        self.defaults = {key: value for key, value in defaults.items() if value is not None}
+        self.report = report or get_route_report()
+        self._cache: Dict[str, CrewLLM] = {}
+
+    def _build(self, route: str, settings: Dict[str, Any]) -> CrewLLM:
+        """Construit un LLM (et son repli) à partir de paramètres déjà fusionnés."""
+        fallback = None
+        if settings.get("fallback"):
+            # Le repli reprend les paramètres de la route, sauf ceux qu'il redéfinit
+            fallback_settings = {key: value for key, value in settings.items() if key != "fallback"}
+            fallback_settings.update(settings["fallback"])
+            fallback = self._build(route, fallback_settings)
+
+        params = {key: settings[key] for key in ROUTE_KEYS if settings.get(key) is not None}
+        try:
+            return RoutedLLM(
+                route=route,
+                fallback=fallback,
+                fallback_on_error=bool(settings.get("fallback_on_error", False)),
+                num_retries=settings.get("num_retries"),
+                input_cost_per_million=settings.get("input_cost_per_million"),
+                output_cost_per_million=settings.get("output_cost_per_million"),
+                report=self.report,
+                **params
+            )
+        except Exception as e:
+            print(f"⚠️ Erreur lors de l'initialisation du LLM ({route}): {e}")
+            print("Tentative avec une configuration simplifiée...")
+            return RoutedLLM(route=route, fallback=fallback, num_retries=settings.get("num_retries"),
+                             report=self.report,
+                             model=params["model"], api_key=params.get("api_key"))
+
+    def get(self, route: str, overrides: Optional[Dict[str, Any]] = None) -> CrewLLM:
+        """
+        Récupère le LLM d'une route.
+
+        Args:
+            route: Nom de la route
+            overrides: Section `llm` de la configuration de l'agent ou de la tâche
+                       (les clés absentes reprennent les valeurs par défaut)
+
+        Returns:
+            LLM CrewAI (instance partagée par route)
+        """
+        if route not in self._cache:
+            settings = dict(self.defaults)
+            settings.update(overrides or {})
+            self._cache[route] = self._build(route, settings)
+        return self._cache[route]
@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ordonnanceur des appels LLM d'ArxivBuddy.
+
+Tous les appels de CrewAI passent par `litellm.completion`. L'ordonnanceur
+s'intercale à cet endroit et ajoute :
+- des plafonds de concurrence global et par modèle ;
+- une échéance par requête utilisateur (`deadline`), propagée à chaque
+  appel sous forme de timeout ;
+- des tentatives supplémentaires avec attente exponentielle (et gigue) pour
+  les erreurs transitoires (timeout, 429, 5xx, connexion), que chaque route
+  peut restreindre (`retry_policy`, ex : pas de nouvel essai après un
+  timeout quand un modèle de repli attend) ;
+- des requêtes de couverture (hedging) : si un appel dépasse le p95 observé
+  pour son modèle, un doublon est lancé et la première réponse l'emporte.
+
+Les appels asynchrones (`litellm.acompletion`, voir lib.async_pipeline)
+passent par `acall`, qui partage les mêmes plafonds sans bloquer la boucle
+d'événements et annule le doublon perdant.
+
+Deux appels identiques simultanés (même modèle, mêmes messages et paramètres)
+n'en font qu'un : le second partage la réponse du premier (lib.coalescing).
+"""
+
+import time
+import asyncio
+import random
+import socket
+import threading
+import contextlib
+import contextvars
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# Statuts HTTP pour lesquels un nouvel essai a du sens
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+_RETRYABLE_NAMES = {
+    "RateLimitError", "Timeout", "APITimeoutError", "APIConnectionError",
+    "ServiceUnavailableError", "InternalServerError", "URLError", "RemoteDisconnected",
+}
+
+# Paramètres sans effet sur la réponse, ignorés pour reconnaître deux appels identiques
+_COALESCE_IGNORED = ("timeout", "callbacks")
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar("arxivbuddy_llm_deadline", default=None)
+# Politique de nouvelles tentatives de l'appel en cours : (max_retries ou None, retry_timeouts)
+_retry_policy: contextvars.ContextVar = contextvars.ContextVar("arxivbuddy_llm_retry_policy",
+                                                               default=(None, True))
+
+
+class DeadlineExceeded(TimeoutError):
+    """L'échéance de la requête est atteinte avant la fin de l'appel LLM."""
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    Indique si une erreur d'appel LLM est transitoire.
+
+    Args:
+        error: Exception levée par la fonction d'appel
+
+    Returns:
+        True si un nouvel essai peut réussir
+    """
+    if isinstance(error, DeadlineExceeded):
+        return False
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and status in RETRYABLE_STATUS:
+        return True
+    if isinstance(error, (TimeoutError, ConnectionError, socket.timeout)):
+        return True
+    return type(error).__name__ in _RETRYABLE_NAMES
+
+
+@contextlib.contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Fixe une échéance pour les appels LLM du contexte courant.
+
+    Les échéances s'imbriquent : la plus proche l'emporte.
+
+    Args:
+        seconds: Délai à partir de maintenant (None : pas d'échéance supplémentaire)
+    """
+    if seconds is None:
+        yield
+        return
+    current = _deadline.get()
+    target = time.monotonic() + seconds
+    token = _deadline.set(target if current is None else min(current, target))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Temps restant avant l'échéance courante (None si aucune échéance)."""
+    current = _deadline.get()
+    return None if current is None else current - time.monotonic()
+
+
+@contextlib.contextmanager
+def retry_policy(max_retries: Optional[int] = None, retry_timeouts: bool = True) -> Iterator[None]:
+    """
+    Restreint les nouvelles tentatives des appels LLM du contexte courant.
+
+    Utilisé par les routes (lib.llm_routing) : une route avec modèle de repli
+    ne refait pas un appel qui a dépassé son délai, le repli s'en charge.
+
+    Args:
+        max_retries: Nombre de nouvelles tentatives (None : celui de l'ordonnanceur)
+        retry_timeouts: Refaire aussi les appels qui ont dépassé leur délai
+    """
+    token = _retry_policy.set((max_retries, retry_timeouts))
+    try:
+        yield
+    finally:
+        _retry_policy.reset(token)
+
+
+def _retries_for(scheduler_retries: int) -> tuple:
+    max_retries, retry_timeouts = _retry_policy.get()
+    return (scheduler_retries if max_retries is None else max(max_retries, 0)), retry_timeouts
+
+
+def _is_timeout(error: BaseException) -> bool:
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return (isinstance(error, (TimeoutError, socket.timeout)) or status == 408
+            or type(error).__name__ in ("Timeout", "APITimeoutError"))
+
+
+class LLMScheduler:
+    """Plafonds de concurrence, échéances, nouvelles tentatives et hedging des appels LLM."""
+
+    def __init__(self, max_concurrency: int = 8, per_model_concurrency: Optional[Dict[str, int]] = None,
+                 default_model_concurrency: int = 4, max_retries: int = 2, backoff_base: float = 0.5,
+                 backoff_max: float = 8.0, hedge: bool = True, hedge_min_samples: int = 20,
+                 hedge_min_delay: float = 2.0, hedge_quantile: float = 0.95):
+        """
+        Initialise l'ordonnanceur.
+
+        Args:
+            max_concurrency: Nombre maximal d'appels simultanés, tous modèles confondus
+            per_model_concurrency: Plafond propre à certains modèles
+            default_model_concurrency: Plafond des autres modèles
+            max_retries: Nombre de nouvelles tentatives après une erreur transitoire
+            backoff_base: Attente initiale entre deux tentatives (secondes)
+            backoff_max: Attente maximale entre deux tentatives (secondes)
+            hedge: Active les requêtes de couverture
+            hedge_min_samples: Nombre de latences observées avant d'activer le hedging d'un modèle
+            hedge_min_delay: Délai minimal avant une requête de couverture (secondes)
+            hedge_quantile: Quantile de latence au-delà duquel la couverture est lancée
+        """
+        self.max_concurrency = max_concurrency
+        self.per_model_concurrency = dict(per_model_concurrency or {})
+        self.default_model_concurrency = default_model_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_quantile = hedge_quantile
+
+        self._global = threading.BoundedSemaphore(max_concurrency)
+        self._models: Dict[str, threading.BoundedSemaphore] = {}
+        self._latencies: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        # Les appels en cours et leurs doublons tournent dans ce pool (les threads
+        # d'un doublon perdant se terminent d'eux-mêmes à la réponse du serveur)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency * 2,
+                                            thread_name_prefix="llm-scheduler")
+        self._installed = None
+        self.counters = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+                         "deadline_exceeded": 0, "failures": 0}
+
+    @classmethod
+    def from_config(cls, config) -> "LLMScheduler":
+        """
+        Crée un ordonnanceur à partir de la section `scheduler` de la configuration.
+
+        Args:
+            config: Instance de Config
+
+        Returns:
+            Instance de LLMScheduler
+        """
+        settings = config.get("scheduler", default={}) or {}
+        return cls(
+            max_concurrency=settings.get("max_concurrency", 8),
+            per_model_concurrency=settings.get("per_model_concurrency"),
+            default_model_concurrency=settings.get("default_model_concurrency", 4),
+            max_retries=settings.get("max_retries", 2),
+            backoff_base=settings.get("backoff_base", 0.5),
+            backoff_max=settings.get("backoff_max", 8.0),
+            hedge=settings.get("hedge", True),
+            hedge_min_samples=settings.get("hedge_min_samples", 20),
+            hedge_min_delay=settings.get("hedge_min_delay", 2.0),
+        )
+
+    # ------------------------------------------------------------------
+    # Outils internes
+    # ------------------------------------------------------------------
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def _model_semaphore(self, model: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if model not in self._models:
+                limit = self.per_model_concurrency.get(model, self.default_model_concurrency)
+                self._models[model] = threading.BoundedSemaphore(limit)
+            return self._models[model]
+
+    def _acquire(self, model: str, timeout: Optional[float]) -> bool:
+        """Réserve une place du modèle puis une place globale (False si le délai expire)."""
+        # Le modèle d'abord : un appel en attente d'un modèle saturé n'occupe pas de place
+        # globale, qui reste disponible pour les appels aux autres modèles
+        start = time.monotonic()
+        semaphore = self._model_semaphore(model)
+        if not semaphore.acquire(timeout=timeout if timeout is None else max(timeout, 0)):
+            return False
+        left = None if timeout is None else max(timeout - (time.monotonic() - start), 0)
+        if not self._global.acquire(timeout=left):
+            semaphore.release()
+            return False
+        return True
+
+    def _release(self, model: str) -> None:
+        self._model_semaphore(model).release()
+        self._global.release()
+
+    def _record_latency(self, model: str, latency: float) -> None:
+        with self._lock:
+            self._latencies.setdefault(model, deque(maxlen=200)).append(latency)
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        """
+        Délai après lequel un doublon de l'appel est lancé pour ce modèle.
+
+        Returns:
+            Délai en secondes, ou None si le hedging n'est pas actif pour ce modèle
+        """
+        if not self.hedge:
+            return None
+        with self._lock:
+            samples = sorted(self._latencies.get(model, ()))
+        if len(samples) < self.hedge_min_samples:
+            return None
+        quantile = samples[min(int(len(samples) * self.hedge_quantile), len(samples) - 1)]
+        return max(quantile, self.hedge_min_delay)
+
+    def _attempt(self, completion: Callable[..., Any], params: Dict[str, Any], model: str,
+                 reserved: bool = False) -> Any:
+        """Exécute un appel en respectant les plafonds de concurrence et l'échéance."""
+        if not reserved and not self._acquire(model, remaining_time()):
+            raise DeadlineExceeded("Échéance atteinte en attente d'un créneau LLM")
+        try:
+            start = time.monotonic()
+            response = completion(**params)
+            self._record_latency(model, time.monotonic() - start)
+            return response
+        finally:
+            self._release(model)
+
+    def _hedged(self, completion: Callable[..., Any], params: Dict[str, Any], model: str,
+                delay: float, remaining: Optional[float]) -> Any:
+        """Lance l'appel, puis un doublon s'il dépasse `delay` ; la première réponse gagne."""
+        primary = self._executor.submit(contextvars.copy_context().run, self._attempt,
+                                        completion, params, model)
+        done, _ = wait([primary], timeout=delay if remaining is None else min(delay, remaining))
+        if done:
+            return primary.result()
+
+        # Le doublon n'attend pas : sans créneau libre, on se contente de l'appel initial
+        futures = [primary]
+        hedge = None
+        if self._acquire(model, 0):
+            hedge = self._executor.submit(contextvars.copy_context().run, self._attempt,
+                                          completion, params, model, True)
+            futures.append(hedge)
+            self._count("hedges")
+
+        error: Optional[BaseException] = None
+        pending = set(futures)
+        while pending:
+            left = remaining_time()
+            if left is not None and left <= 0:
+                break
+            done, pending = wait(pending, timeout=left, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                if future is hedge:
+                    self._count("hedge_wins")
+                return result
+        if error is not None:
+            raise error
+        raise DeadlineExceeded("Échéance atteinte pendant l'appel LLM")
+
+    async def _aacquire(self, model: str, timeout: Optional[float]) -> bool:
+        """Équivalent de `_acquire` pour une coroutine : les places sont guettées sans bloquer la boucle."""
+        limit = None if timeout is None else time.monotonic() + max(timeout, 0)
+        pause = 0.005
+        while not self._acquire(model, 0):
+            if limit is not None and time.monotonic() >= limit:
+                return False
+            await asyncio.sleep(pause)
+            pause = min(pause * 2, 0.1)
+        return True
+
+    async def _aattempt(self, acompletion: Callable[..., Any], params: Dict[str, Any], model: str,
+                        reserved: bool = False) -> Any:
+        """Exécute un appel asynchrone en respectant les plafonds de concurrence et l'échéance."""
+        if not reserved and not await self._aacquire(model, remaining_time()):
+            raise DeadlineExceeded("Échéance atteinte en attente d'un créneau LLM")
+        try:
+            start = time.monotonic()
+            left = remaining_time()
+            try:
+                response = await asyncio.wait_for(acompletion(**params), timeout=left)
+            except asyncio.TimeoutError:
+                # Seule l'expiration de l'échéance est un DeadlineExceeded ; un timeout du
+                # fournisseur reste une erreur transitoire (nouvelle tentative, repli)
+                left = remaining_time()
+                if left is not None and left <= 0:
+                    raise DeadlineExceeded("Échéance atteinte pendant l'appel LLM") from None
+                raise
+            self._record_latency(model, time.monotonic() - start)
+            return response
+        finally:
+            self._release(model)
+
+    async def _ahedged(self, acompletion: Callable[..., Any], params: Dict[str, Any], model: str,
+                       delay: float, remaining: Optional[float]) -> Any:
+        """Version asynchrone de `_hedged` : le doublon perdant est annulé."""
+        primary = asyncio.ensure_future(self._aattempt(acompletion, params, model))
+        done, _ = await asyncio.wait([primary], timeout=delay if remaining is None else min(delay, remaining))
+        if done:
+            return primary.result()
+
+        futures = [primary]
+        hedge = None
+        if self._acquire(model, 0):
+            hedge = asyncio.ensure_future(self._aattempt(acompletion, params, model, True))
+            futures.append(hedge)
+            self._count("hedges")
+
+        error: Optional[BaseException] = None
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None:
+                        error = error or future.exception()
+                        continue
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    return future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+        raise error
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _coalescing(params: Dict[str, Any]):
+        """Groupe et clé de fusion d'un appel (None pour un appel en flux, jamais fusionné)."""
+        if params.get("stream"):
+            return None, None
+        # Import différé : lib.coalescing importe l'ordonnanceur (échéances)
+        from .coalescing import get_flight, make_key
+        return get_flight("llm"), make_key("llm", {key: value for key, value in params.items()
+                                                   if key not in _COALESCE_IGNORED})
+
+    def call(self, completion: Callable[..., Any], **params: Any) -> Any:
+        """
+        Exécute un appel LLM sous le contrôle de l'ordonnanceur.
+
+        Un appel identique à un appel en cours partage sa réponse.
+
+        Args:
+            completion: Fonction d'appel (ex: litellm.completion)
+            **params: Paramètres de l'appel (model, messages, timeout...)
+
+        Returns:
+            Réponse de la fonction d'appel
+        """
+        flight, key = self._coalescing(params)
+        if flight is None:
+            return self._call(completion, **params)
+        return flight.do(key, self._call, completion, **params)
+
+    def _call(self, completion: Callable[..., Any], **params: Any) -> Any:
+        self._count("calls")
+        model = str(params.get("model", ""))
+        configured_timeout = params.get("timeout")
+
+        max_retries, retry_timeouts = _retries_for(self.max_retries)
+        for attempt in range(max_retries + 1):
+            remaining = remaining_time()
+            if remaining is not None and remaining <= 0:
+                self._count("deadline_exceeded")
+                raise DeadlineExceeded("Échéance de la requête atteinte avant l'appel LLM")
+
+            # L'échéance se propage à l'appel sous forme de timeout
+            attempt_params = dict(params)
+            if remaining is not None:
+                attempt_params["timeout"] = min(configured_timeout or remaining, remaining)
+
+            try:
+                delay = None if params.get("stream") else self.hedge_delay(model)
+                if delay is None:
+                    return self._attempt(completion, attempt_params, model)
+                return self._hedged(completion, attempt_params, model, delay, remaining)
+            except DeadlineExceeded:
+                self._count("deadline_exceeded")
+                raise
+            except Exception as e:
+                if (attempt >= max_retries or not is_retryable_error(e)
+                        or (not retry_timeouts and _is_timeout(e))):
+                    self._count("failures")
+                    raise
+                backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                left = remaining_time()
+                if left is not None and backoff >= left:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                time.sleep(backoff)
+
+    async def acall(self, acompletion: Callable[..., Any], **params: Any) -> Any:
+        """
+        Exécute un appel LLM asynchrone sous le contrôle de l'ordonnanceur.
+
+        Mêmes règles que `call` (plafonds partagés avec les appels synchrones,
+        échéance, nouvelles tentatives, hedging, fusion des appels identiques),
+        sans bloquer la boucle d'événements.
+
+        Args:
+            acompletion: Coroutine d'appel (ex: litellm.acompletion)
+            **params: Paramètres de l'appel (model, messages, timeout...)
+
+        Returns:
+            Réponse de la coroutine d'appel
+        """
+        flight, key = self._coalescing(params)
+        if flight is None:
+            return await self._acall(acompletion, **params)
+        return await flight.ado(key, self._acall, acompletion, **params)
+
+    async def _acall(self, acompletion: Callable[..., Any], **params: Any) -> Any:
+        self._count("calls")
+        model = str(params.get("model", ""))
+        configured_timeout = params.get("timeout")
+
+        max_retries, retry_timeouts = _retries_for(self.max_retries)
+        for attempt in range(max_retries + 1):
+            remaining = remaining_time()
+            if remaining is not None and remaining <= 0:
+                self._count("deadline_exceeded")
+                raise DeadlineExceeded("Échéance de la requête atteinte avant l'appel LLM")
+
+            attempt_params = dict(params)
+            if remaining is not None:
+                attempt_params["timeout"] = min(configured_timeout or remaining, remaining)
+
+            try:
+                delay = None if params.get("stream") else self.hedge_delay(model)
+                if delay is None:
+                    return await self._aattempt(acompletion, attempt_params, model)
+                return await self._ahedged(acompletion, attempt_params, model, delay, remaining)
+            except DeadlineExceeded:
+                self._count("deadline_exceeded")
+                raise
+            except Exception as e:
+                if (attempt >= max_retries or not is_retryable_error(e)
+                        or (not retry_timeouts and _is_timeout(e))):
+                    self._count("failures")
+                    raise
+                backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                left = remaining_time()
+                if left is not None and backoff >= left:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                await asyncio.sleep(backoff)
+
+    def install(self) -> None:
+        """Place l'ordonnanceur devant `litellm.completion` et `litellm.acompletion` (sans effet s'il y est déjà)."""
+        import litellm
+
+        if self._installed is not None:
+            return
+        original = litellm.completion
+        original_async = getattr(litellm, "acompletion", None)
+        scheduler = self
+
+        def scheduled_completion(*args, **kwargs):
+            if args:
+                kwargs.setdefault("model", args[0])
+                if len(args) > 1:
+                    kwargs.setdefault("messages", args[1])
+            return scheduler.call(original, **kwargs)
+
+        async def scheduled_acompletion(*args, **kwargs):
+            if args:
+                kwargs.setdefault("model", args[0])
+                if len(args) > 1:
+                    kwargs.setdefault("messages", args[1])
+            return await scheduler.acall(original_async, **kwargs)
+
+        scheduled_completion.__wrapped__ = original
+        litellm.completion = scheduled_completion
+        if original_async is not None:
+            scheduled_acompletion.__wrapped__ = original_async
+            litellm.acompletion = scheduled_acompletion
+        self._installed = (original, original_async)
+
+    def uninstall(self) -> None:
+        """Rétablit `litellm.completion` et `litellm.acompletion`."""
+        import litellm
+
+        if self._installed is not None:
+            litellm.completion, original_async = self._installed
+            if original_async is not None:
+                litellm.acompletion = original_async
+            self._installed = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs de l'ordonnanceur et latence p95 observée par modèle."""
+        with self._lock:
+            stats = dict(self.counters)
+            latencies = {model: sorted(values) for model, values in self._latencies.items()}
+        stats["p95_seconds"] = {
+            model: round(values[min(int(len(values) * 0.95), len(values) - 1)], 3)
+            for model, values in latencies.items() if values
+        }
+        return stats
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(config=None) -> LLMScheduler:
+    """
+    Récupère l'ordonnanceur partagé.
+
+    Args:
+        config: Configuration utilisée à la première création (par défaut: get_config())
+
+    Returns:
+        Instance de LLMScheduler
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            if config is None:
+                from .config import get_config
+                config = get_config()
+            _scheduler = LLMScheduler.from_config(config)
+    return _scheduler
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Budget mémoire d'un processus ArxivBuddy.
+
+Un processus `ArxivAgents` garde en mémoire l'embedder multilingual-e5-large
+(~2 Go), les graphes HNSW et les dépendances de CrewAI, ce qui limite le
+nombre de workers par machine. Ce module fournit :
+- la mesure de la mémoire résidente (RSS) courante et de son pic ;
+- la libération des ressources inactives (embedder, index vectoriels) après
+  un délai configurable, par un thread de fond ;
+- le profil basse mémoire (`--low-memory`) : embedder plus petit et
+  quantifié, index parcourus par mappage mémoire plutôt que chargés.
+"""
+
+import gc
+import os
+import sys
+import time
+import ctypes
+import threading
+import weakref
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Délai d'inactivité avant libération des modèles et index (0 : jamais)
+DEFAULT_IDLE_SECONDS = float(os.getenv("MODEL_IDLE_SECONDS", "0"))
+# Délai appliqué par le profil basse mémoire si MODEL_IDLE_SECONDS n'est pas défini
+LOW_MEMORY_IDLE_SECONDS = 120.0
+
+_PROC_STATUS = "/proc/self/status"
+
+_libc = None
+
+
+def low_memory_enabled() -> bool:
+    """Indique si le profil basse mémoire est actif (ARXIVBUDDY_LOW_MEMORY)."""
+    return os.getenv("ARXIVBUDDY_LOW_MEMORY", "").lower() in ("1", "true", "yes", "on")
+
+
+def enable_low_memory() -> None:
+    """Active le profil basse mémoire pour le processus (et ses sous-processus)."""
+    os.environ["ARXIVBUDDY_LOW_MEMORY"] = "1"
+
+
+def idle_seconds() -> float:
+    """Délai d'inactivité avant libération des ressources (0 : désactivé)."""
+    value = os.getenv("MODEL_IDLE_SECONDS")
+    if value is not None:
+        return float(value)
+    return LOW_MEMORY_IDLE_SECONDS if low_memory_enabled() else DEFAULT_IDLE_SECONDS
+
+
+# ----------------------------------------------------------------------
+# Mesure de la mémoire résidente
+# ----------------------------------------------------------------------
+def _proc_status(field: str) -> Optional[int]:
+    """Lit un champ de /proc/self/status (en octets), ou None hors Linux."""
+    try:
+        with open(_PROC_STATUS, "rb") as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def rss_bytes() -> int:
+    """
+    Mémoire résidente courante du processus.
+
+    Returns:
+        RSS en octets (0 si la plateforme ne permet pas de la mesurer)
+    """
+    value = _proc_status(b"VmRSS:")
+    if value is not None:
+        return value
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    # Sans /proc ni psutil, le pic est la meilleure approximation disponible
+    return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    """
+    Pic de mémoire résidente du processus depuis son démarrage (ou depuis `reset_peak_rss`).
+
+    Returns:
+        Pic de RSS en octets (0 si la plateforme ne permet pas de le mesurer)
+    """
+    value = _proc_status(b"VmHWM:")
+    if value is not None:
+        return value
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kio sous Linux, octets sous macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+    return 0
+
+
+def reset_peak_rss() -> bool:
+    """
+    Remet le pic de RSS à la valeur courante (Linux uniquement).
+
+    Returns:
+        True si le pic a pu être réinitialisé
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def memory_snapshot() -> Dict[str, float]:
+    """
+    RSS courante et pic, en Mo.
+
+    Returns:
+        Dictionnaire {"rss_mb", "peak_rss_mb"}
+    """
+    return {"rss_mb": round(rss_bytes() / 1024 / 1024, 1),
+            "peak_rss_mb": round(peak_rss_bytes() / 1024 / 1024, 1)}
+
+
+def release_memory() -> None:
+    """
+    Rend au système la mémoire libérée par Python, PyTorch et l'allocateur C.
+
+    Sans `malloc_trim`, la glibc conserve les pages libérées par le modèle et
+    la RSS ne baisse pas après un déchargement.
+    """
+    global _libc
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    if sys.platform.startswith("linux"):
+        try:
+            if _libc is None:
+                _libc = ctypes.CDLL("libc.so.6")
+            _libc.malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+
+# ----------------------------------------------------------------------
+# Libération des ressources inactives
+# ----------------------------------------------------------------------
+class IdleReaper:
+    """
+    Libère les ressources inutilisées depuis plus de `idle_seconds`.
+
+    Une ressource expose `idle_for()` (secondes d'inactivité, ou None si elle
+    n'est pas chargée ou en cours d'utilisation) et `unload()`. Elle est
+    rechargée à la demande lors de sa prochaine utilisation.
+    """
+
+    def __init__(self, idle_seconds: float, interval: Optional[float] = None):
+        """
+        Initialise le collecteur.
+
+        Args:
+            idle_seconds: Délai d'inactivité avant libération (0 : désactivé)
+            interval: Période de vérification (par défaut: un quart du délai, entre 1 et 30 s)
+        """
+        self.idle_seconds = idle_seconds
+        self.interval = interval or min(max(idle_seconds / 4, 1.0), 30.0)
+        self.unloads = 0
+        self._resources: "weakref.WeakValueDictionary[str, Any]" = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, resource: Any) -> None:
+        """
+        Suit une ressource (référence faible : elle n'est pas maintenue en vie).
+
+        Args:
+            name: Nom affiché dans les statistiques
+            resource: Objet exposant idle_for() et unload()
+        """
+        with self._lock:
+            self._resources[name] = resource
+        if self.idle_seconds > 0:
+            self.start()
+
+    def sweep(self, force: bool = False) -> List[str]:
+        """
+        Libère les ressources inactives.
+
+        Args:
+            force: Si True, libère toutes les ressources chargées et inactives, quel que soit le délai
+
+        Returns:
+            Noms des ressources libérées
+        """
+        with self._lock:
+            resources = list(self._resources.items())
+        unloaded = []
+        for name, resource in resources:
+            idle = resource.idle_for()
+            if idle is None or (not force and idle < self.idle_seconds):
+                continue
+            if resource.unload():
+                unloaded.append(name)
+        if unloaded:
+            self.unloads += len(unloaded)
+            release_memory()
+        return unloaded
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠️ Libération des ressources inactives impossible: {e}")
+
+    def start(self) -> None:
+        """Démarre le thread de fond (sans effet s'il tourne déjà)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="arxivbuddy-reaper", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Arrête le thread de fond."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        État des ressources suivies.
+
+        Returns:
+            Dictionnaire {idle_seconds, unloads, resources: {nom: "chargé"/"libéré"}}
+        """
+        with self._lock:
+            resources = list(self._resources.items())
+        return {
+            "idle_seconds": self.idle_seconds,
+            "unloads": self.unloads,
+            "resources": {name: "libéré" if not resource.loaded else "chargé" for name, resource in resources}
+        }
+
+
+_reaper: Optional[IdleReaper] = None
+_reaper_lock = threading.Lock()
+
+
+def get_reaper() -> IdleReaper:
+    """
+    Récupère le collecteur partagé des ressources inactives.
+
+    Returns:
+        Instance de IdleReaper (délai: MODEL_IDLE_SECONDS, ou 120 s en basse mémoire)
+    """
+    global _reaper
+    with _reaper_lock:
+        if _reaper is None:
+            _reaper = IdleReaper(idle_seconds())
+    return _reaper
+
+
+class UsageTracker:
+    """
+    Suivi d'utilisation d'une ressource libérable (à combiner par héritage).
+
+    Les classes filles appellent `_touch()` à chaque utilisation, encadrent les
+    utilisations longues par `_begin()` / `_end()` et fournissent `loaded`.
+    """
+
+    _last_used: float = 0.0
+    _active: int = 0
+
+    def _touch(self) -> None:
+        self._last_used = time.monotonic()
+
+    def _begin(self) -> None:
+        self._active += 1
+        self._touch()
+
+    def _end(self) -> None:
+        self._active -= 1
+        self._touch()
+
+    def idle_for(self) -> Optional[float]:
+        """Secondes d'inactivité, ou None si la ressource n'est pas chargée ou en cours d'utilisation."""
+        if not self.loaded or self._active > 0:
+            return None
+        return time.monotonic() - self._last_used
@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Stockages et maintenance des mémoires CrewAI d'ArxivBuddy.
+
+Le répertoire de mémoire contient la base `arxivbuddy_ltm.db` (mémoire long
+terme), la base `chroma.sqlite3` et les segments HNSW des mémoires court terme
+et d'entités. Ce module borne leur croissance :
+- expiration (TTL) et éviction au-delà d'un nombre maximal d'entrées ;
+- déduplication des entrées quasi identiques (similarité cosinus) ;
+- compaction : reconstruction des index HNSW, suppression des segments
+  orphelins et VACUUM des bases SQLite.
+"""
+
+import os
+import re
+import json
+import time
+import atexit
+import shutil
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from crewai.memory.storage.ltm_sqlite_storage import LTMSQLiteStorage
+from crewai.memory.storage.rag_storage import RAGStorage
+
+from .sqlite_store import BatchWriter, get_database
+
+# Collections ChromaDB gérées par ArxivBuddy
+RAG_COLLECTIONS = ("short_term", "entity")
+
+LTM_DB_NAME = "arxivbuddy_ltm.db"
+CHROMA_DB_NAME = "chroma.sqlite3"
+MAINTENANCE_MARKER = ".last_maintenance"
+# Collection reconstruite par `compact` avant de remplacer l'originale
+COMPACT_SUFFIX = "__compact"
+
+_SEGMENT_DIR = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+def get_memory_storage_path() -> str:
+    """
+    Retourne le répertoire de stockage des mémoires CrewAI.
+
+    Les mémoires RAG n'acceptent que des vecteurs d'une seule dimension : avec
+    un autre modèle d'embedding que le modèle par défaut (profil basse
+    mémoire), elles sont rangées dans un sous-répertoire propre à ce modèle.
+
+    Returns:
+        Chemin défini par CREWAI_STORAGE_DIR (par défaut: ./arxivbuddy_memory)
+    """
+    from .custom_embedder import get_embedder
+
+    path = os.getenv("CREWAI_STORAGE_DIR", "./arxivbuddy_memory")
+    key = get_embedder().storage_key
+    return os.path.join(path, key) if key else path
+
+
+class TimestampedRAGStorage(RAGStorage):
+    """
+    Stockage RAG qui horodate chaque entrée.
+
+    L'horodatage `created_at` permet l'expiration des entrées, que ChromaDB
+    ne gère pas nativement.
+    """
+
+    def _generate_embedding(self, text: str, metadata: Dict[str, Any]) -> None:
+        metadata = dict(metadata or {})
+        metadata.setdefault("created_at", time.time())
+        super()._generate_embedding(text, metadata)
+
+
+class PooledLTMSQLiteStorage(LTMSQLiteStorage):
+    """
+    Stockage de mémoire long terme CrewAI reposant sur SQLiteDatabase.
+
+    Les sauvegardes sont regroupées par lots ; toute lecture vide d'abord
+    le lot en attente pour rester cohérente.
+    """
+
+    INSERT_SQL = (
+        "INSERT INTO long_term_memories (task_description, metadata, datetime, score) "
+        "VALUES (?, ?, ?, ?)"
+    )
+
+    def __init__(self, db_path: str, batch_size: int = 16, max_delay: float = 2.0) -> None:
+        self.database = get_database(db_path)
+        self.writer = BatchWriter(self.database, self.INSERT_SQL, batch_size=batch_size,
+                                  max_delay=max_delay)
+        super().__init__(db_path=db_path)
+        atexit.register(self.writer.flush)
+
+    def _initialize_db(self):
+        self.database.execute(
+            """
+            CREATE TABLE IF NOT EXISTS long_term_memories (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_description TEXT,
+                metadata TEXT,
+                datetime TEXT,
+                score REAL
+            )
+            """
+        )
+        self.database.execute(
+            "CREATE INDEX IF NOT EXISTS idx_ltm_task_description "
+            "ON long_term_memories (task_description, datetime)"
+        )
+
+    def save(self, task_description: str, metadata: Dict[str, Any], datetime: str,
+             score) -> None:
+        self.writer.add((task_description, json.dumps(metadata), datetime, score))
+
+    def load(self, task_description: str, latest_n: int) -> Optional[List[Dict[str, Any]]]:
+        self.writer.flush()
+        rows = self.database.query(
+            "SELECT metadata, datetime, score FROM long_term_memories "
+            "WHERE task_description = ? ORDER BY datetime DESC, score ASC LIMIT ?",
+            (task_description, int(latest_n))
+        )
+        if not rows:
+            return None
+        return [
+            {"metadata": json.loads(row[0]), "datetime": row[1], "score": row[2]}
+            for row in rows
+        ]
+
+    def reset(self) -> None:
+        self.writer.flush()
+        self.database.execute("DELETE FROM long_term_memories")
+
+
+def _dir_size(path: str) -> int:
+    """Taille totale d'un fichier ou d'un répertoire en octets."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+class MemoryMaintenance:
+    """Statistiques, élagage et compaction des mémoires d'ArxivBuddy."""
+
+    def __init__(self, storage_path: Optional[str] = None, ttl_days: Optional[float] = 30,
+                 max_entries: Optional[int] = 5000, dedup_threshold: Optional[float] = 0.97):
+        """
+        Initialise la maintenance.
+
+        Args:
+            storage_path: Répertoire de mémoire (par défaut: get_memory_storage_path())
+            ttl_days: Durée de vie des entrées en jours (None pour désactiver)
+            max_entries: Nombre maximal d'entrées par mémoire (None pour désactiver)
+            dedup_threshold: Similarité cosinus au-delà de laquelle deux entrées sont
+                des doublons (None pour désactiver)
+        """
+        self.storage_path = storage_path or get_memory_storage_path()
+        self.ttl_days = ttl_days
+        self.max_entries = max_entries
+        self.dedup_threshold = dedup_threshold
+
+    @classmethod
+    def from_config(cls, config, storage_path: Optional[str] = None) -> "MemoryMaintenance":
+        """
+        Crée une instance à partir de la section `memory` de la configuration.
+
+        Args:
+            config: Instance de Config
+            storage_path: Répertoire de mémoire (optionnel)
+
+        Returns:
+            Instance de MemoryMaintenance
+        """
+        return cls(
+            storage_path=storage_path,
+            ttl_days=config.get("memory", "ttl_days", default=30),
+            max_entries=config.get("memory", "max_entries", default=5000),
+            dedup_threshold=config.get("memory", "dedup_threshold", default=0.97)
+        )
+
+    @property
+    def ltm_path(self) -> str:
+        return os.path.join(self.storage_path, LTM_DB_NAME)
+
+    @property
+    def chroma_path(self) -> str:
+        return os.path.join(self.storage_path, CHROMA_DB_NAME)
+
+    def _cutoff(self) -> Optional[float]:
+        """Horodatage en dessous duquel une entrée est expirée."""
+        if not self.ttl_days:
+            return None
+        return time.time() - self.ttl_days * 86400
+
+    def _chroma_client(self):
+        """Ouvre le client ChromaDB persistant du répertoire de mémoire."""
+        import chromadb
+        from chromadb.config import Settings
+
+        return chromadb.PersistentClient(path=self.storage_path, settings=Settings(allow_reset=True))
+
+    def _collections(self, client) -> List[Any]:
+        """Liste les collections gérées qui existent dans la base."""
+        collections = []
+        for name in RAG_COLLECTIONS:
+            try:
+                collections.append(client.get_collection(name=name))
+            except Exception:
+                continue
+        return collections
+
+    # ------------------------------------------------------------------
+    # Statistiques
+    # ------------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        """
+        Collecte les statistiques des mémoires.
+
+        Returns:
+            Dictionnaire des tailles sur disque et du nombre d'entrées par mémoire
+        """
+        result: Dict[str, Any] = {"storage_path": self.storage_path, "files": {}, "memories": {}}
+        if not os.path.isdir(self.storage_path):
+            return result
+
+        for name in sorted(os.listdir(self.storage_path)):
+            result["files"][name] = _dir_size(os.path.join(self.storage_path, name))
+
+        if os.path.exists(self.ltm_path):
+            count, oldest, newest = get_database(self.ltm_path).query(
+                "SELECT COUNT(*), MIN(CAST(datetime AS REAL)), MAX(CAST(datetime AS REAL)) "
+                "FROM long_term_memories"
+            )[0]
+            result["memories"]["long_term"] = {"entries": count, "oldest": oldest, "newest": newest}
+
+        if os.path.exists(self.chroma_path):
+            client = self._chroma_client()
+            for collection in self._collections(client):
+                result["memories"][collection.name] = {"entries": collection.count()}
+            result["orphan_segments"] = self._orphan_segments()
+
+        return result
+
+    # ------------------------------------------------------------------
+    # Élagage
+    # ------------------------------------------------------------------
+    def prune(self, dry_run: bool = False) -> Dict[str, Dict[str, int]]:
+        """
+        Supprime les entrées expirées, en surnombre ou dupliquées.
+
+        Args:
+            dry_run: Si True, compte les entrées sans les supprimer
+
+        Returns:
+            Nombre d'entrées supprimées par mémoire et par motif
+        """
+        removed: Dict[str, Dict[str, int]] = {}
+        if os.path.exists(self.ltm_path):
+            removed["long_term"] = self._prune_ltm(dry_run)
+        if os.path.exists(self.chroma_path):
+            client = self._chroma_client()
+            for collection in self._collections(client):
+                removed[collection.name] = self._prune_collection(collection, dry_run)
+        return removed
+
+    def _prune_ltm(self, dry_run: bool) -> Dict[str, int]:
+        """Élague la table de mémoire long terme."""
+        counts = {"expired": 0, "duplicates": 0, "overflow": 0}
+        cutoff = self._cutoff()
+
+        with get_database(self.ltm_path).transaction() as conn:
+            if cutoff is not None:
+                counts["expired"] = conn.execute(
+                    "SELECT COUNT(*) FROM long_term_memories WHERE CAST(datetime AS REAL) < ?", (cutoff,)
+                ).fetchone()[0]
+                if not dry_run:
+                    conn.execute("DELETE FROM long_term_memories WHERE CAST(datetime AS REAL) < ?", (cutoff,))
+
+            # Doublons exacts : on conserve l'entrée la plus récente
+            duplicate_filter = (
+                "id NOT IN (SELECT MAX(id) FROM long_term_memories "
+                "GROUP BY task_description, metadata)"
+            )
+            counts["duplicates"] = conn.execute(
+                f"SELECT COUNT(*) FROM long_term_memories WHERE {duplicate_filter}"
+            ).fetchone()[0]
+            if not dry_run:
+                conn.execute(f"DELETE FROM long_term_memories WHERE {duplicate_filter}")
+
+            if self.max_entries:
+                overflow_filter = (
+                    "id NOT IN (SELECT id FROM long_term_memories "
+                    "ORDER BY CAST(datetime AS REAL) DESC LIMIT ?)"
+                )
+                counts["overflow"] = conn.execute(
+                    f"SELECT COUNT(*) FROM long_term_memories WHERE {overflow_filter}", (self.max_entries,)
+                ).fetchone()[0]
+                if not dry_run:
+                    conn.execute(f"DELETE FROM long_term_memories WHERE {overflow_filter}", (self.max_entries,))
+
+        return counts
+
+    def _prune_collection(self, collection, dry_run: bool) -> Dict[str, int]:
+        """Élague une collection ChromaDB (TTL, doublons, taille)."""
+        import numpy as np
+
+        counts = {"expired": 0, "duplicates": 0, "overflow": 0}
+        data = collection.get(include=["metadatas", "embeddings"])
+        ids = data["ids"]
+        if not ids:
+            return counts
+
+        # Les entrées sans horodatage (antérieures à TimestampedRAGStorage) sont
+        # considérées comme les plus anciennes, dans l'ordre d'insertion
+        created = np.array([
+            float((meta or {}).get("created_at", 0.0)) for meta in data["metadatas"]
+        ])
+        order = np.argsort(created, kind="stable")
+        to_delete = set()
+
+        cutoff = self._cutoff()
+        if cutoff is not None:
+            expired = [i for i in order if 0.0 < created[i] < cutoff]
+            counts["expired"] = len(expired)
+            to_delete.update(expired)
+
+        if self.dedup_threshold and data["embeddings"] is not None and len(data["embeddings"]):
+            embeddings = np.asarray(data["embeddings"], dtype=np.float32)
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+            # Parcours du plus récent au plus ancien : un ancien doublon d'une entrée gardée
+            # est supprimé. Les similarités sont calculées par blocs pour borner la mémoire.
+            candidates = [i for i in order[::-1] if i not in to_delete]
+            kept = np.zeros(len(ids), dtype=bool)
+            block_size = 1024
+            for start in range(0, len(candidates), block_size):
+                block = candidates[start:start + block_size]
+                similarities = embeddings[block] @ embeddings.T
+                for row, i in zip(similarities, block):
+                    if np.any(row[kept] >= self.dedup_threshold):
+                        to_delete.add(i)
+                        counts["duplicates"] += 1
+                    else:
+                        kept[i] = True
+
+        if self.max_entries:
+            remaining = [i for i in order if i not in to_delete]
+            overflow = remaining[:max(len(remaining) - self.max_entries, 0)]
+            counts["overflow"] = len(overflow)
+            to_delete.update(overflow)
+
+        if to_delete and not dry_run:
+            collection.delete(ids=[ids[i] for i in sorted(to_delete)])
+        return counts
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+    def _orphan_segments(self) -> List[str]:
+        """Liste les répertoires de segments HNSW qui ne sont plus référencés."""
+        if not os.path.exists(self.chroma_path):
+            return []
+        with sqlite3.connect(self.chroma_path) as conn:
+            referenced = {row[0] for row in conn.execute("SELECT id FROM segments")}
+        return [
+            name for name in os.listdir(self.storage_path)
+            if _SEGMENT_DIR.match(name) and os.path.isdir(os.path.join(self.storage_path, name))
+            and name not in referenced
+        ]
+
+    @staticmethod
+    def _copy_entries(data: Dict[str, Any], collection, batch: int = 1000) -> None:
+        """Ajoute (ou remplace) des entrées lues par `collection.get` dans une collection."""
+        import numpy as np
+
+        for start in range(0, len(data["ids"]), batch):
+            end = start + batch
+            collection.upsert(
+                ids=data["ids"][start:end],
+                documents=data["documents"][start:end],
+                metadatas=[meta or {"created_at": 0.0} for meta in data["metadatas"][start:end]],
+                embeddings=np.asarray(data["embeddings"][start:end], dtype=np.float32).tolist()
+            )
+
+    def _compact_marker(self, name: str) -> str:
+        """Fichier présent pendant le remplacement d'une collection par sa copie compactée."""
+        return os.path.join(self.storage_path, f".compact-{name}.json")
+
+    def _recover_compaction(self, client) -> List[str]:
+        """
+        Termine ou annule une compaction interrompue.
+
+        Sans fichier témoin, la copie temporaire était incomplète et l'originale
+        intacte : la copie est supprimée. Avec le fichier témoin, la copie est
+        complète et l'originale a pu être supprimée : la copie la remplace (ou, si
+        la collection a été recréée entre-temps, ses entrées y sont recopiées).
+
+        Returns:
+            Collections restaurées à partir de leur copie compactée
+        """
+        recovered = []
+        for name in RAG_COLLECTIONS:
+            marker = self._compact_marker(name)
+            try:
+                temporary = client.get_collection(name=name + COMPACT_SUFFIX)
+            except Exception:
+                temporary = None
+            if temporary is not None and not os.path.exists(marker):
+                client.delete_collection(name=name + COMPACT_SUFFIX)
+            elif temporary is not None:
+                try:
+                    original = client.get_collection(name=name)
+                except Exception:
+                    original = None
+                if original is None:
+                    temporary.modify(name=name)
+                else:
+                    self._copy_entries(temporary.get(include=["documents", "metadatas", "embeddings"]), original)
+                    client.delete_collection(name=name + COMPACT_SUFFIX)
+                print(f"⚠️ Compaction interrompue de la mémoire '{name}' terminée")
+                recovered.append(name)
+            if os.path.exists(marker):
+                os.remove(marker)
+        return recovered
+
+    def compact(self) -> Dict[str, Any]:
+        """
+        Reconstruit les index HNSW et compacte les bases SQLite.
+
+        Les index HNSW ne libèrent pas la place des entrées supprimées : chaque
+        collection est donc recréée à partir de ses embeddings existants (sans
+        recalcul). La copie est construite sous un nom temporaire et ne remplace
+        l'originale qu'une fois complète ; une compaction interrompue est
+        terminée ou annulée au lancement suivant. À exécuter lorsqu'aucune autre
+        instance n'utilise la mémoire.
+
+        Returns:
+            Taille du répertoire avant et après compaction, segments supprimés,
+            collections restaurées après une compaction interrompue
+        """
+        before = _dir_size(self.storage_path) if os.path.isdir(self.storage_path) else 0
+        removed_segments: List[str] = []
+        recovered: List[str] = []
+
+        if os.path.exists(self.chroma_path):
+            client = self._chroma_client()
+            recovered = self._recover_compaction(client)
+            for collection in self._collections(client):
+                data = collection.get(include=["documents", "metadatas", "embeddings"])
+                name, metadata = collection.name, collection.metadata
+                rebuilt = client.create_collection(name=name + COMPACT_SUFFIX, metadata=metadata)
+                try:
+                    self._copy_entries(data, rebuilt)
+                    if rebuilt.count() != len(data["ids"]):
+                        raise RuntimeError(f"copie incomplète ({rebuilt.count()} entrées sur {len(data['ids'])})")
+                except Exception:
+                    client.delete_collection(name=name + COMPACT_SUFFIX)
+                    raise
+                # Copie complète : à partir d'ici, une reprise termine le remplacement
+                with open(self._compact_marker(name), "w", encoding="utf-8") as f:
+                    json.dump({"collection": name, "entries": len(data["ids"])}, f)
+                client.delete_collection(name=name)
+                rebuilt.modify(name=name)
+                os.remove(self._compact_marker(name))
+
+            for name in self._orphan_segments():
+                shutil.rmtree(os.path.join(self.storage_path, name), ignore_errors=True)
+                removed_segments.append(name)
+
+        for db_path in (self.ltm_path, self.chroma_path):
+            if os.path.exists(db_path):
+                conn = sqlite3.connect(db_path)
+                try:
+                    conn.execute("VACUUM")
+                finally:
+                    conn.close()
+
+        after = _dir_size(self.storage_path) if os.path.isdir(self.storage_path) else 0
+        return {"bytes_before": before, "bytes_after": after, "removed_segments": removed_segments,
+                "recovered": recovered}
+
+    # ------------------------------------------------------------------
+    # Maintenance périodique
+    # ------------------------------------------------------------------
+    def maybe_run(self, interval_hours: Optional[float] = 24) -> bool:
+        """
+        Lance l'élagage si la dernière maintenance date de plus de `interval_hours`.
+
+        La compaction, plus coûteuse, reste une opération explicite
+        (`arxivbuddy memory compact`).
+
+        Args:
+            interval_hours: Intervalle minimal entre deux maintenances (None pour désactiver)
+
+        Returns:
+            True si la maintenance a été exécutée
+        """
+        if not interval_hours or not os.path.isdir(self.storage_path):
+            return False
+
+        marker = os.path.join(self.storage_path, MAINTENANCE_MARKER)
+        if os.path.exists(marker) and time.time() - os.path.getmtime(marker) < interval_hours * 3600:
+            return False
+
+        try:
+            self.prune()
+        except Exception as e:
+            print(f"⚠️ Erreur lors de la maintenance de la mémoire: {e}")
+            return False
+
+        with open(marker, "w", encoding="utf-8") as f:
+            f.write(str(time.time()))
+        return True
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Représentation compacte d'un article ArXiv.
+
+`Paper` remplace les dictionnaires construits dans les outils, le chercheur
+ArXiv et les bases locales : une classe à `__slots__` (pas de __dict__ par
+instance), des auteurs et catégories internés (partagés entre articles) et
+une date formatée une seule fois. Les articles sont persistés colonne par
+colonne dans la base locale (`paper_store`) ; les listes d'articles conservées
+avec les réponses archivées (`archive`) utilisent la sérialisation binaire :
+msgpack lorsqu'il est installé, sinon le module marshal de la bibliothèque
+standard.
+"""
+
+import sys
+import marshal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .utils import parse_arxiv_id
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    msgpack = None
+
+# Premier octet des données sérialisées : format utilisé
+_FORMAT_MSGPACK = b"\x01"
+_FORMAT_MARSHAL = b"\x02"
+
+# Anciennes clés des dictionnaires d'articles -> attributs de Paper
+_ALIASES = {
+    "id": "url",
+    "summary": "abstract",
+    "published_date": "published",
+}
+
+
+def _intern_all(values: Iterable[Any]) -> Tuple[str, ...]:
+    return tuple(sys.intern(str(value)) for value in values)
+
+
+class Paper:
+    """Article ArXiv (métadonnées)."""
+
+    __slots__ = ("arxiv_id", "version", "title", "authors", "abstract", "published",
+                 "pdf_url", "categories", "comment", "journal_ref", "doi")
+
+    def __init__(self, arxiv_id: str, version: Optional[int] = None, title: str = "",
+                 authors: Iterable[str] = (), abstract: str = "", published: str = "",
+                 pdf_url: str = "", categories: Iterable[str] = (), comment: str = "",
+                 journal_ref: str = "", doi: str = ""):
+        self.arxiv_id = sys.intern(arxiv_id)
+        self.version = version
+        self.title = title
+        self.authors = _intern_all(authors)
+        self.abstract = abstract
+        self.published = published
+        self.pdf_url = pdf_url
+        self.categories = _intern_all(categories)
+        self.comment = comment or ""
+        self.journal_ref = journal_ref or ""
+        self.doi = doi or ""
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_result(cls, result) -> "Paper":
+        """
+        Construit un article à partir d'un arxiv.Result.
+
+        Args:
+            result: Résultat de l'API ArXiv
+
+        Returns:
+            Instance de Paper
+        """
+        arxiv_id, version = parse_arxiv_id(result.entry_id)
+        return cls(
+            arxiv_id=arxiv_id,
+            version=version,
+            title=result.title,
+            authors=[author.name for author in result.authors],
+            abstract=result.summary,
+            published=result.published.strftime("%Y-%m-%d"),
+            pdf_url=result.pdf_url or "",
+            categories=result.categories,
+            comment=getattr(result, "comment", "") or "",
+            journal_ref=getattr(result, "journal_ref", "") or "",
+            doi=getattr(result, "doi", "") or "",
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional["Paper"]:
+        """
+        Construit un article à partir d'un dictionnaire (anciennes ou nouvelles clés).
+
+        Args:
+            data: Dictionnaire d'article (id/arxiv_id/url, summary/abstract, published/published_date)
+
+        Returns:
+            Instance de Paper, ou None si l'identifiant est absent
+        """
+        if isinstance(data, Paper):
+            return data
+        raw_id = data.get("arxiv_id") or data.get("id") or data.get("url")
+        if not raw_id:
+            return None
+        arxiv_id, version = parse_arxiv_id(str(raw_id))
+        if version is None:
+            version = data.get("version")
+        if version is None:
+            _, version = parse_arxiv_id(str(data.get("url") or data.get("id") or ""))
+        published = data.get("published") or data.get("published_date") or ""
+        if hasattr(published, "strftime"):
+            published = published.strftime("%Y-%m-%d")
+        return cls(
+            arxiv_id=arxiv_id,
+            version=version,
+            title=data.get("title", ""),
+            authors=data.get("authors", ()),
+            abstract=data.get("abstract") or data.get("summary") or "",
+            published=str(published)[:10],
+            pdf_url=data.get("pdf_url", "") or "",
+            categories=data.get("categories", ()),
+            comment=data.get("comment", ""),
+            journal_ref=data.get("journal_ref", ""),
+            doi=data.get("doi", ""),
+        )
+
+    # ------------------------------------------------------------------
+    # Accès
+    # ------------------------------------------------------------------
+    @property
+    def url(self) -> str:
+        """URL de la page de l'article (avec la version si elle est connue)."""
+        suffix = f"v{self.version}" if self.version else ""
+        return f"https://arxiv.org/abs/{self.arxiv_id}{suffix}"
+
+    def __getitem__(self, key: str) -> Any:
+        # Compatibilité avec le code qui manipulait des dictionnaires
+        name = _ALIASES.get(key, key)
+        if name != "url" and name not in self.__slots__:
+            raise KeyError(key)
+        value = getattr(self, name)
+        return list(value) if isinstance(value, tuple) else value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Paper) and self.to_tuple() == other.to_tuple()
+
+    def __hash__(self) -> int:
+        return hash((self.arxiv_id, self.version))
+
+    def __repr__(self) -> str:
+        return f"Paper({self.arxiv_id}v{self.version}, {self.title[:40]!r})"
+
+    def to_dict(self, extended: bool = False) -> Dict[str, Any]:
+        """
+        Convertit l'article en dictionnaire (format JSON des outils).
+
+        Args:
+            extended: Inclure commentaire, référence de journal et DOI
+
+        Returns:
+            Dictionnaire de l'article
+        """
+        data = {
+            "title": self.title,
+            "authors": list(self.authors),
+            "published_date": self.published,
+            "arxiv_id": self.arxiv_id,
+            "version": self.version,
+            "url": self.url,
+            "pdf_url": self.pdf_url,
+            "abstract": self.abstract,
+            "categories": list(self.categories),
+        }
+        if extended:
+            data.update(comment=self.comment, journal_ref=self.journal_ref, doi=self.doi)
+        return data
+
+    # ------------------------------------------------------------------
+    # Sérialisation
+    # ------------------------------------------------------------------
+    def to_tuple(self) -> tuple:
+        """Représentation positionnelle (ordre de __slots__)."""
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    @classmethod
+    def from_tuple(cls, values: Iterable[Any]) -> "Paper":
+        """Reconstruit un article à partir de `to_tuple()`."""
+        return cls(*values)
+
+    def to_bytes(self) -> bytes:
+        """Sérialise l'article en binaire."""
+        return pack_papers([self])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Paper":
+        """Désérialise un article produit par `to_bytes()`."""
+        return unpack_papers(data)[0]
+
+
+def pack_papers(papers: Iterable[Paper]) -> bytes:
+    """
+    Sérialise une liste d'articles en binaire (msgpack, ou marshal en repli).
+
+    Args:
+        papers: Articles
+
+    Returns:
+        Données binaires préfixées par le format utilisé
+    """
+    rows = [paper.to_tuple() for paper in papers]
+    if msgpack is not None:
+        return _FORMAT_MSGPACK + msgpack.packb(rows, use_bin_type=True)
+    return _FORMAT_MARSHAL + marshal.dumps(rows)
+
+
+def unpack_papers(data: bytes) -> List[Paper]:
+    """
+    Désérialise des articles produits par `pack_papers()`.
+
+    Args:
+        data: Données binaires
+
+    Returns:
+        Liste d'articles
+    """
+    header, payload = data[:1], data[1:]
+    if header == _FORMAT_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("Données au format msgpack : installez le paquet msgpack")
+        rows = msgpack.unpackb(payload, raw=False)
+    elif header == _FORMAT_MARSHAL:
+        rows = marshal.loads(payload)
+    else:
+        raise ValueError("Format de sérialisation d'articles inconnu")
+    return [Paper.from_tuple(row) for row in rows]
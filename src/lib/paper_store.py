@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Stockage local des articles rencontrés par ArxivBuddy et recherche sémantique.
+
+Chaque article renvoyé par les outils de recherche est enregistré dans une
+base SQLite. L'index sémantique encode les titres et résumés avec
+MultilingualE5Embedder et les ajoute de façon incrémentale à un index HNSW
+persistant (lib.vector_index).
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from .paper import Paper
+from .sqlite_store import get_database
+from .utils import caches_isolated, get_cache_dir
+
+
+class PaperStore:
+    """Base locale des métadonnées d'articles ArXiv."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialise la base.
+
+        Args:
+            db_path: Chemin de la base (par défaut: get_cache_dir("corpus")/papers.db)
+        """
+        self.db_path = db_path or os.path.join(get_cache_dir("corpus"), "papers.db")
+        self.database = get_database(self.db_path)
+        self.database.execute(
+            """
+            CREATE TABLE IF NOT EXISTS papers (
+                label INTEGER PRIMARY KEY AUTOINCREMENT,
+                paper_id TEXT NOT NULL UNIQUE,
+                version INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                authors TEXT NOT NULL,
+                abstract TEXT NOT NULL,
+                published TEXT,
+                categories TEXT NOT NULL,
+                pdf_url TEXT,
+                added REAL NOT NULL
+            )
+            """
+        )
+
+    def add(self, papers: Iterable[Union[Paper, Dict[str, Any]]]) -> int:
+        """
+        Enregistre des articles (la version la plus récente est conservée).
+
+        Args:
+            papers: Articles (Paper ou dictionnaires au format des outils)
+
+        Returns:
+            Nombre d'articles traités
+        """
+        rows = []
+        for paper in papers:
+            paper = Paper.from_dict(paper)
+            if paper is None:
+                continue
+            rows.append((
+                paper.arxiv_id, paper.version or 1, paper.title,
+                json.dumps(paper.authors, ensure_ascii=False), paper.abstract,
+                paper.published, json.dumps(paper.categories),
+                paper.pdf_url, time.time()
+            ))
+        if rows:
+            self.database.executemany(
+                """
+                INSERT INTO papers (paper_id, version, title, authors, abstract, published,
+                                    categories, pdf_url, added)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(paper_id) DO UPDATE SET
+                    version = MAX(version, excluded.version),
+                    pdf_url = CASE WHEN excluded.version >= version THEN excluded.pdf_url ELSE pdf_url END
+                """,
+                rows
+            )
+        return len(rows)
+
+    @staticmethod
+    def _row_to_paper(row) -> Paper:
+        _, paper_id, version, title, authors, abstract, published, categories, pdf_url = row
+        return Paper(
+            arxiv_id=paper_id,
+            version=version,
+            title=title,
+            authors=json.loads(authors),
+            abstract=abstract,
+            published=published or "",
+            pdf_url=pdf_url or "",
+            categories=json.loads(categories),
+        )
+
+    def get_many(self, labels: Iterable[int]) -> Dict[int, Paper]:
+        """
+        Récupère des articles par étiquette.
+
+        Args:
+            labels: Étiquettes (identifiants internes) des articles
+
+        Returns:
+            Dictionnaire {étiquette: article}
+        """
+        labels = [int(label) for label in labels]
+        if not labels:
+            return {}
+        placeholders = ",".join("?" * len(labels))
+        rows = self.database.query(
+            f"SELECT label, paper_id, version, title, authors, abstract, published, categories, pdf_url "
+            f"FROM papers WHERE label IN ({placeholders})", labels
+        )
+        return {row[0]: self._row_to_paper(row) for row in rows}
+
+    def get_by_ids(self, paper_ids: Iterable[str]) -> Dict[str, Paper]:
+        """
+        Récupère des articles par identifiant ArXiv.
+
+        Args:
+            paper_ids: Identifiants ArXiv (sans version)
+
+        Returns:
+            Dictionnaire {identifiant: article} (articles connus uniquement)
+        """
+        paper_ids = list(dict.fromkeys(paper_ids))
+        papers = {}
+        for start in range(0, len(paper_ids), 500):
+            chunk = paper_ids[start:start + 500]
+            rows = self.database.query(
+                f"SELECT label, paper_id, version, title, authors, abstract, published, categories, pdf_url "
+                f"FROM papers WHERE paper_id IN ({','.join('?' * len(chunk))})", chunk
+            )
+            papers.update((row[1], self._row_to_paper(row)) for row in rows)
+        return papers
+
+    def titles_after(self, label: int, batch_size: int = 5000) -> Iterable[List[tuple]]:
+        """
+        Parcourt par lots les titres des articles dont l'étiquette est supérieure à `label`.
+
+        Yields:
+            Lots de tuples (étiquette, identifiant ArXiv, titre)
+        """
+        while True:
+            rows = self.database.query(
+                "SELECT label, paper_id, title FROM papers WHERE label > ? ORDER BY label LIMIT ?",
+                (label, batch_size)
+            )
+            if not rows:
+                return
+            yield rows
+            label = rows[-1][0]
+
+    def iter_after(self, label: int, batch_size: int = 256) -> Iterable[List[tuple]]:
+        """
+        Parcourt par lots les articles dont l'étiquette est supérieure à `label`.
+
+        Yields:
+            Lots de tuples (étiquette, titre, résumé)
+        """
+        while True:
+            rows = self.database.query(
+                "SELECT label, title, abstract FROM papers WHERE label > ? ORDER BY label LIMIT ?",
+                (label, batch_size)
+            )
+            if not rows:
+                return
+            yield rows
+            label = rows[-1][0]
+
+    def count(self) -> int:
+        """Nombre d'articles enregistrés."""
+        return self.database.query("SELECT COUNT(*) FROM papers")[0][0]
+
+
+class SemanticPaperIndex:
+    """Recherche sémantique sur les articles de la base locale."""
+
+    def __init__(self, store: Optional[PaperStore] = None, index_dir: Optional[str] = None):
+        """
+        Initialise l'index sémantique.
+
+        Args:
+            store: Base d'articles (par défaut: get_paper_store())
+            index_dir: Répertoire de l'index (par défaut: get_cache_dir("corpus", "ann"),
+                suffixé du modèle d'embedding s'il diffère du modèle par défaut)
+        """
+        from .custom_embedder import get_embedder
+        from .vector_index import VectorIndex
+
+        self.store = store or get_paper_store()
+        self.embedder = get_embedder()
+        key = self.embedder.storage_key
+        self.index = VectorIndex(index_dir or get_cache_dir("corpus", f"ann-{key}" if key else "ann"),
+                                 self.embedder.dimension())
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._sync_pending = False
+        self._sync_thread: Optional[threading.Thread] = None
+
+    def sync(self, batch_size: int = 64) -> int:
+        """
+        Indexe les articles ajoutés à la base depuis la dernière synchronisation.
+
+        Args:
+            batch_size: Nombre de résumés encodés à la fois
+
+        Returns:
+            Nombre d'articles nouvellement indexés
+        """
+        # Verrou de l'index : un autre processus n'indexe pas les mêmes articles en même temps
+        with self._lock, self.index.locked():
+            watermark = self.index.max_label()
+            added = 0
+            for rows in self.store.iter_after(watermark, batch_size=batch_size):
+                texts = [f"{title}. {abstract}" for _, title, abstract in rows]
+                vectors = self.embedder.encode(texts, prefix="passage", batch_size=batch_size)
+                self.index.add([row[0] for row in rows], vectors, save=False)
+                added += len(rows)
+            if added:
+                self.index.save()
+            return added
+
+    def schedule_sync(self) -> None:
+        """Indexe en arrière-plan les articles nouvellement enregistrés (un seul thread à la fois)."""
+        with self._sync_lock:
+            self._sync_pending = True
+            if self._sync_thread is None:
+                self._sync_thread = threading.Thread(target=self._sync_loop, name="arxivbuddy-semantic-sync",
+                                                     daemon=True)
+                self._sync_thread.start()
+
+    def _sync_loop(self) -> None:
+        while True:
+            with self._sync_lock:
+                if not self._sync_pending:
+                    self._sync_thread = None
+                    return
+                self._sync_pending = False
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"⚠️ Indexation sémantique en arrière-plan impossible: {e}")
+                with self._sync_lock:
+                    self._sync_thread = None
+                return
+
+    def search(self, query: str, k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Recherche les articles les plus proches d'une question.
+
+        La recherche ne fait qu'interroger l'index : les articles enregistrés sont
+        indexés en arrière-plan (`record_papers`) ou par `arxivbuddy corpus sync`.
+
+        Args:
+            query: Question ou description en langage naturel
+            k: Nombre d'articles à retourner
+
+        Returns:
+            Articles triés par similarité décroissante (clé "score")
+        """
+        query_vector = self.embedder.encode([query], prefix="query")
+        labels, scores = self.index.search(query_vector, k=k)
+        papers = self.store.get_many(labels[0])
+        results = []
+        for label, score in zip(labels[0], scores[0]):
+            paper = papers.get(int(label))
+            if paper:
+                results.append(dict(paper.to_dict(), score=round(float(score), 4)))
+        return results
+
+
+_store: Optional[PaperStore] = None
+_semantic_index: Optional[SemanticPaperIndex] = None
+
+
+def get_paper_store() -> PaperStore:
+    """
+    Récupère l'instance partagée de la base d'articles.
+
+    Returns:
+        Instance de PaperStore
+    """
+    global _store
+    if _store is None:
+        _store = PaperStore()
+    return _store
+
+
+def get_semantic_index() -> SemanticPaperIndex:
+    """
+    Récupère l'instance partagée de l'index sémantique.
+
+    Returns:
+        Instance de SemanticPaperIndex
+    """
+    global _semantic_index
+    if _semantic_index is None:
+        _semantic_index = SemanticPaperIndex()
+        # Rattrapage des articles enregistrés depuis la dernière indexation
+        _semantic_index.schedule_sync()
+    return _semantic_index
+
+
+def record_papers(papers: Iterable[Union[Paper, Dict[str, Any]]]) -> None:
+    """
+    Enregistre des articles dans la base locale sans jamais interrompre l'appelant.
+
+    Si l'index sémantique est utilisé par le processus, les nouveaux articles y
+    sont ajoutés en arrière-plan. Sans effet sous cassette (caches isolés) : la
+    recherche sémantique ne dépend pas de l'ordre des enregistrements.
+
+    Args:
+        papers: Articles (Paper ou dictionnaires au format des outils)
+    """
+    if caches_isolated():
+        return
+    try:
+        added = get_paper_store().add(papers)
+    except Exception as e:
+        print(f"⚠️ Impossible d'enregistrer les articles dans la base locale: {e}")
+        return
+    if added and _semantic_index is not None:
+        _semantic_index.schedule_sync()
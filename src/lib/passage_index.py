@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Index de passages du texte intégral pour la recherche augmentée (RAG).
+
+Le texte de chaque article est découpé en fragments qui se chevauchent,
+encodés par lots avec MultilingualE5Embedder et stockés sous forme de
+matrice float16 mappée en mémoire (un fichier .npy par article et version).
+Pour une question, seuls les k fragments les plus proches sont renvoyés :
+les agents raisonnent sur quelques kilo-octets au lieu d'articles entiers.
+"""
+
+import os
+import re
+import mmap
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .custom_embedder import get_embedder
+from .fulltext import get_text_store
+from .utils import get_cache_dir
+
+_WORD = re.compile(rb"\S+")
+
+
+class PassageIndex:
+    """Index de fragments de texte intégral, par article et version."""
+
+    def __init__(self, cache_dir: Optional[str] = None, chunk_words: int = 200,
+                 overlap_words: int = 50, batch_size: int = 32):
+        """
+        Initialise l'index.
+
+        Args:
+            cache_dir: Répertoire des matrices (par défaut: get_cache_dir("passages"),
+                suffixé du modèle d'embedding s'il diffère du modèle par défaut)
+            chunk_words: Nombre de mots par fragment
+            overlap_words: Nombre de mots communs entre deux fragments consécutifs
+            batch_size: Taille des lots d'encodage
+        """
+        if overlap_words >= chunk_words:
+            raise ValueError("Le chevauchement doit être inférieur à la taille des fragments")
+        key = get_embedder().storage_key
+        self.cache_dir = cache_dir or get_cache_dir(f"passages-{key}" if key else "passages")
+        self.chunk_words = chunk_words
+        self.overlap_words = overlap_words
+        self.batch_size = batch_size
+
+    def _paths(self, paper_id: str, version: int) -> Tuple[str, str]:
+        """Chemins de la matrice de vecteurs et des positions des fragments."""
+        key = f"{paper_id.replace('/', '_')}v{version}"
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.f16.npy", f"{base}.spans.npy"
+
+    def _chunk_spans(self, mapped: mmap.mmap, end: int) -> np.ndarray:
+        """
+        Calcule les positions (en octets) des fragments d'un texte.
+
+        Args:
+            mapped: Texte mappé en mémoire
+            end: Position de fin du texte utile (avant les références)
+
+        Returns:
+            Tableau int64 (n, 2) des positions [début, fin] de chaque fragment
+        """
+        words = [(match.start(), match.end()) for match in _WORD.finditer(mapped, 0, end)]
+        if not words:
+            return np.zeros((0, 2), dtype=np.int64)
+
+        step = self.chunk_words - self.overlap_words
+        spans = []
+        for first in range(0, len(words), step):
+            last = min(first + self.chunk_words, len(words)) - 1
+            spans.append((words[first][0], words[last][1]))
+            if last == len(words) - 1:
+                break
+        return np.asarray(spans, dtype=np.int64)
+
+    def ensure_paper(self, paper: str) -> Tuple[str, int]:
+        """
+        Indexe un article s'il ne l'est pas déjà.
+
+        Args:
+            paper: ID ou URL ArXiv
+
+        Returns:
+            Tuple (identifiant, version)
+        """
+        paper_id, version, text_path, sections = get_text_store().fetch(paper)
+        vectors_path, spans_path = self._paths(paper_id, version)
+        if os.path.exists(vectors_path) and os.path.exists(spans_path):
+            return paper_id, version
+
+        embedder = get_embedder()
+        # Noms temporaires uniques : deux indexations simultanées du même article
+        # écrivent chacune leurs fichiers, le dernier renommage l'emporte
+        fd, tmp_vectors = tempfile.mkstemp(dir=self.cache_dir, suffix=".part.npy")
+        os.close(fd)
+        fd, tmp_spans = tempfile.mkstemp(dir=self.cache_dir, suffix=".part.npy")
+        os.close(fd)
+        try:
+            with open(text_path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if not size:
+                    raise ValueError(f"Texte intégral vide pour l'article {paper_id}v{version}")
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    # La bibliographie n'apporte rien aux réponses : elle est exclue
+                    end = sections["references"][0] if "references" in sections else size
+                    spans = self._chunk_spans(mapped, end)
+                    if not len(spans):
+                        raise ValueError(f"Aucun texte exploitable pour l'article {paper_id}v{version}")
+
+                    dimension = embedder.dimension()
+                    vectors = np.lib.format.open_memmap(
+                        tmp_vectors, mode="w+", dtype=np.float16, shape=(len(spans), dimension)
+                    )
+                    for start in range(0, len(spans), self.batch_size):
+                        batch = spans[start:start + self.batch_size]
+                        texts = [mapped[s:e].decode("utf-8", errors="ignore") for s, e in batch]
+                        vectors[start:start + len(batch)] = embedder.encode(
+                            texts, prefix="passage", batch_size=self.batch_size
+                        ).astype(np.float16)
+                    vectors.flush()
+                    del vectors
+
+            with open(tmp_spans, "wb") as f:
+                np.save(f, spans)
+            # Positions d'abord : la matrice de vecteurs marque l'article comme indexé
+            os.replace(tmp_spans, spans_path)
+            os.replace(tmp_vectors, vectors_path)
+        except BaseException:
+            for path in (tmp_vectors, tmp_spans):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        return paper_id, version
+
+    @staticmethod
+    def _section_of(offset: int, sections: Dict[str, List[int]]) -> Optional[str]:
+        """Section contenant une position du texte."""
+        for name, (start, end) in sections.items():
+            if start <= offset < end:
+                return name
+        return None
+
+    def retrieve(self, question: str, papers: List[str], k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Retourne les k fragments les plus pertinents pour une question.
+
+        Args:
+            question: Question en langage naturel
+            papers: IDs ou URLs ArXiv des articles à interroger
+            k: Nombre de fragments à renvoyer
+
+        Returns:
+            Liste de fragments triés par score décroissant
+        """
+        query = get_embedder().encode([question], prefix="query")[0]
+
+        candidates: List[Tuple[float, int, int]] = []
+        indexed = []
+        for paper in papers:
+            paper_id, version = self.ensure_paper(paper)
+            vectors_path, _ = self._paths(paper_id, version)
+            vectors = np.load(vectors_path, mmap_mode="r")
+            position = len(indexed)
+            indexed.append((paper_id, version))
+            # Produit scalaire par blocs : seuls les blocs lus sont convertis en float32
+            for start in range(0, len(vectors), 4096):
+                scores = np.asarray(vectors[start:start + 4096], dtype=np.float32) @ query
+                top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+                candidates.extend((float(scores[i]), position, start + int(i)) for i in top)
+
+        candidates.sort(reverse=True)
+        store = get_text_store()
+        passages = []
+        for score, position, chunk in candidates[:k]:
+            paper_id, version = indexed[position]
+            _, _, text_path, sections = store.fetch(f"{paper_id}v{version}")
+            _, spans_path = self._paths(paper_id, version)
+            start, end = np.load(spans_path, mmap_mode="r")[chunk]
+            with open(text_path, "rb") as f:
+                f.seek(int(start))
+                text = f.read(int(end - start)).decode("utf-8", errors="ignore")
+            passages.append({
+                "arxiv_id": paper_id,
+                "version": version,
+                "section": self._section_of(int(start), sections),
+                "score": round(score, 4),
+                "text": text.replace("\f", " ")
+            })
+        return passages
+
+
+_index: Optional[PassageIndex] = None
+
+
+def get_passage_index() -> PassageIndex:
+    """
+    Récupère l'instance partagée de l'index de passages.
+
+    Returns:
+        Instance de PassageIndex
+    """
+    global _index
+    if _index is None:
+        _index = PassageIndex()
+    return _index
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Profilage intégré du pipeline ArxivBuddy.
+
+Quatre modes sont disponibles :
+- cpu  : cProfile, un profil par phase (fichiers .prof lisibles par pstats,
+         snakeviz ou flameprof)
+- mem  : tracemalloc, pic et allocations principales par phase
+- wall : échantillonnage périodique des piles d'appels (faible surcoût),
+         au format "folded" compatible avec flamegraph.pl / speedscope
+- rss  : mémoire résidente du processus (RSS), pic et valeur en fin de
+         phase ; contrairement à tracemalloc, inclut le modèle d'embedding,
+         PyTorch et les index natifs
+
+Les phases suivies sont la recherche ArXiv (outils de recherche), la lecture
+du texte intégral (outils de sections et de passages), chaque tâche de
+l'équipage CrewAI et le calcul des embeddings.
+"""
+
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .memory_budget import memory_snapshot, peak_rss_bytes, reset_peak_rss, rss_bytes
+from .utils import create_output_directory, sanitize_filename
+
+PROFILE_MODES = ("cpu", "mem", "wall", "rss")
+
+# Phase englobante, active en dehors de toute phase spécifique
+ROOT_PHASE = "pipeline"
+
+# Outils de texte intégral (sections, passages) : les autres outils relèvent de la recherche
+FULLTEXT_TOOLS = frozenset({"get_paper_sections", "retrieve_passages"})
+
+
+def tool_phase(tool_name: Optional[str]) -> str:
+    """Phase de profilage d'un appel d'outil : "fulltext" ou "search"."""
+    return "fulltext" if tool_name in FULLTEXT_TOOLS else "search"
+
+
+class PipelineProfiler:
+    """Profileur par phase de `ArxivAgents.process_query`."""
+
+    def __init__(self, mode: str, output_dir: Optional[str] = None,
+                 sample_interval: float = 0.005):
+        """
+        Initialise le profileur.
+
+        Args:
+            mode: Mode de profilage (cpu, mem, wall, rss)
+            output_dir: Répertoire des rapports (par défaut: sous-dossier de create_output_directory)
+            sample_interval: Intervalle d'échantillonnage en secondes (modes wall et rss)
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Mode de profilage inconnu: '{mode}'")
+
+        self.mode = mode
+        self.sample_interval = sample_interval
+        if output_dir is None:
+            timestamp = datetime.now().strftime("%H%M%S")
+            output_dir = os.path.join(create_output_directory(), f"profile_{mode}_{timestamp}")
+        self.output_dir = output_dir
+
+        # Pile des phases actives par thread
+        self._stacks: Dict[int, List[str]] = defaultdict(lambda: [ROOT_PHASE])
+        self._lock = threading.Lock()
+
+        # Mesures communes à tous les modes
+        self.wall_times: Dict[str, float] = defaultdict(float)
+        self.calls: Counter = Counter()
+        self._started: Dict[int, List[float]] = defaultdict(list)
+
+        # Mode cpu : un profil par phase
+        self._profiles: Dict[str, cProfile.Profile] = {}
+
+        # Mode mem : pic et instantanés par phase
+        self.peaks: Dict[str, int] = defaultdict(int)
+        self._snapshots: Dict[int, List[Any]] = defaultdict(list)
+        self._memory_stats: Dict[str, List[Any]] = defaultdict(list)
+
+        # Mode wall : piles échantillonnées par phase
+        self._samples: Dict[str, Counter] = defaultdict(Counter)
+
+        # Mode rss : pic, valeur en fin de phase et croissance cumulée de la RSS
+        self.rss_peaks: Dict[str, int] = defaultdict(int)
+        self.rss_end: Dict[str, int] = {}
+        self.rss_growth: Dict[str, int] = defaultdict(int)
+        self._rss_started: Dict[int, List[int]] = defaultdict(list)
+        self._sampler: Optional[threading.Thread] = None
+        self._stop_sampling = threading.Event()
+
+        self._handlers: List[Any] = []
+        self._original_embedder_methods = {}
+
+    # ------------------------------------------------------------------
+    # Gestion des phases
+    # ------------------------------------------------------------------
+    def _current(self, thread_id: Optional[int] = None) -> str:
+        """Retourne la phase active du thread."""
+        if thread_id is None:
+            thread_id = threading.get_ident()
+        stack = self._stacks.get(thread_id)
+        return stack[-1] if stack else ROOT_PHASE
+
+    def enter(self, phase: str) -> None:
+        """
+        Entre dans une phase pour le thread courant.
+
+        Args:
+            phase: Nom de la phase (search, fulltext, task:<nom>, embedding...)
+        """
+        thread_id = threading.get_ident()
+        with self._lock:
+            previous = self._current(thread_id)
+            self._stacks[thread_id].append(phase)
+        self.calls[phase] += 1
+        self._started[thread_id].append(time.perf_counter())
+
+        if self.mode == "cpu":
+            self._switch_profile(previous, phase)
+        elif self.mode == "mem":
+            # Conserver le pic de la phase parente avant de le réinitialiser
+            _, peak = tracemalloc.get_traced_memory()
+            self.peaks[previous] = max(self.peaks[previous], peak)
+            self._snapshots[thread_id].append(tracemalloc.take_snapshot())
+            tracemalloc.reset_peak()
+        elif self.mode == "rss":
+            rss = rss_bytes()
+            self._rss_started[thread_id].append(rss)
+            self._record_rss(rss)
+
+    def exit(self, phase: str) -> None:
+        """
+        Sort d'une phase pour le thread courant.
+
+        Args:
+            phase: Nom de la phase quittée
+        """
+        thread_id = threading.get_ident()
+        with self._lock:
+            stack = self._stacks[thread_id]
+            if len(stack) <= 1 or stack[-1] != phase:
+                return
+            stack.pop()
+            parent = stack[-1]
+        self.wall_times[phase] += time.perf_counter() - self._started[thread_id].pop()
+
+        if self.mode == "cpu":
+            self._switch_profile(phase, parent)
+        elif self.mode == "mem":
+            _, peak = tracemalloc.get_traced_memory()
+            self.peaks[phase] = max(self.peaks[phase], peak)
+            self.peaks[parent] = max(self.peaks[parent], peak)
+            before = self._snapshots[thread_id].pop()
+            after = tracemalloc.take_snapshot()
+            self._memory_stats[phase].extend(after.compare_to(before, "lineno")[:25])
+        elif self.mode == "rss":
+            rss = rss_bytes()
+            self._record_rss(rss, extra=phase)
+            self.rss_end[phase] = rss
+            self.rss_growth[phase] += rss - self._rss_started[thread_id].pop()
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Contexte délimitant une phase.
+
+        Args:
+            name: Nom de la phase
+        """
+        self.enter(name)
+        try:
+            yield
+        finally:
+            self.exit(name)
+
+    def _switch_profile(self, from_phase: str, to_phase: str) -> None:
+        """Bascule le profil cProfile actif d'une phase à l'autre."""
+        current = self._profiles.get(from_phase)
+        if current is not None:
+            current.disable()
+        target = self._profiles.setdefault(to_phase, cProfile.Profile())
+        target.enable()
+
+    # ------------------------------------------------------------------
+    # Échantillonnage (modes wall et rss)
+    # ------------------------------------------------------------------
+    def _record_rss(self, rss: int, extra: Optional[str] = None) -> None:
+        """Attribue une mesure de RSS à toutes les phases actives (phases englobantes comprises)."""
+        with self._lock:
+            phases = {phase for stack in self._stacks.values() for phase in stack}
+        if extra:
+            phases.add(extra)
+        for phase in phases:
+            if rss > self.rss_peaks[phase]:
+                self.rss_peaks[phase] = rss
+
+    def _rss_loop(self) -> None:
+        """Boucle d'échantillonnage de la RSS : capte les pics survenus au milieu d'une phase."""
+        interval = max(self.sample_interval, 0.01)
+        while not self._stop_sampling.wait(interval):
+            self._record_rss(rss_bytes())
+
+    def _sample_loop(self) -> None:
+        """Boucle d'échantillonnage des piles de tous les threads profilés."""
+        own_id = threading.get_ident()
+        while not self._stop_sampling.wait(self.sample_interval):
+            frames = sys._current_frames()
+            for thread_id, frame in frames.items():
+                if thread_id == own_id or thread_id not in self._stacks:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                self._samples[self._current(thread_id)][";".join(stack)] += 1
+
+    # ------------------------------------------------------------------
+    # Interceptions (événements CrewAI, embedder)
+    # ------------------------------------------------------------------
+    def _install_hooks(self) -> None:
+        """Branche le profileur sur le bus d'événements CrewAI et l'embedder."""
+        from crewai.utilities.events import (
+            crewai_event_bus, TaskStartedEvent, TaskCompletedEvent, TaskFailedEvent,
+            ToolUsageStartedEvent, ToolUsageFinishedEvent, ToolUsageErrorEvent
+        )
+        from .custom_embedder import MultilingualE5Embedder
+
+        def task_phase(event) -> str:
+            task = getattr(event, "task", None)
+            name = getattr(task, "name", None) or "tâche"
+            return f"task:{name}"
+
+        handlers = [
+            (TaskStartedEvent, lambda source, event: self.enter(task_phase(event))),
+            (TaskCompletedEvent, lambda source, event: self.exit(task_phase(event))),
+            (TaskFailedEvent, lambda source, event: self.exit(task_phase(event))),
+            (ToolUsageStartedEvent, lambda source, event: self.enter(tool_phase(event.tool_name))),
+            (ToolUsageFinishedEvent, lambda source, event: self.exit(tool_phase(event.tool_name))),
+            (ToolUsageErrorEvent, lambda source, event: self.exit(tool_phase(event.tool_name))),
+        ]
+        for event_type, handler in handlers:
+            crewai_event_bus.register_handler(event_type, handler)
+        self._handlers = handlers
+
+        # __call__ sert aux mémoires CrewAI, encode aux index de passages et d'articles
+        profiler = self
+        for name in ("__call__", "encode"):
+            original = getattr(MultilingualE5Embedder, name)
+
+            def profiled(embedder, *args, _original=original, **kwargs):
+                with profiler.phase("embedding"):
+                    return _original(embedder, *args, **kwargs)
+
+            self._original_embedder_methods[name] = original
+            setattr(MultilingualE5Embedder, name, profiled)
+
+    def _remove_hooks(self) -> None:
+        """Retire les interceptions installées par `_install_hooks`."""
+        from crewai.utilities.events import crewai_event_bus
+        from .custom_embedder import MultilingualE5Embedder
+
+        # Le bus CrewAI n'expose pas de désinscription : on retire nos handlers directement
+        registered = getattr(crewai_event_bus, "_handlers", {})
+        for event_type, handler in self._handlers:
+            if handler in registered.get(event_type, []):
+                registered[event_type].remove(handler)
+        self._handlers = []
+
+        for name, original in self._original_embedder_methods.items():
+            setattr(MultilingualE5Embedder, name, original)
+        self._original_embedder_methods = {}
+
+    # ------------------------------------------------------------------
+    # Démarrage / arrêt
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        """Démarre le profilage et entre dans la phase racine."""
+        self._install_hooks()
+        # Enregistrer le thread principal avec la phase racine
+        self._stacks[threading.get_ident()] = [ROOT_PHASE]
+        self._started[threading.get_ident()].append(time.perf_counter())
+
+        if self.mode == "cpu":
+            self._switch_profile("", ROOT_PHASE)
+        elif self.mode == "mem":
+            tracemalloc.start(25)
+            self._snapshots[threading.get_ident()].append(tracemalloc.take_snapshot())
+        elif self.mode == "wall":
+            self._stop_sampling.clear()
+            self._sampler = threading.Thread(target=self._sample_loop, name="arxivbuddy-sampler", daemon=True)
+            self._sampler.start()
+        elif self.mode == "rss":
+            # Pic du processus mesuré à partir du début du profilage (Linux)
+            reset_peak_rss()
+            rss = rss_bytes()
+            self._rss_started[threading.get_ident()].append(rss)
+            self._record_rss(rss)
+            self._stop_sampling.clear()
+            self._sampler = threading.Thread(target=self._rss_loop, name="arxivbuddy-sampler", daemon=True)
+            self._sampler.start()
+
+    def stop(self) -> None:
+        """Arrête le profilage et ferme la phase racine."""
+        thread_id = threading.get_ident()
+        if self._started[thread_id]:
+            self.wall_times[ROOT_PHASE] += time.perf_counter() - self._started[thread_id].pop()
+        self.calls[ROOT_PHASE] += 1
+
+        if self.mode == "cpu":
+            for profile in self._profiles.values():
+                profile.disable()
+        elif self.mode == "mem":
+            _, peak = tracemalloc.get_traced_memory()
+            self.peaks[ROOT_PHASE] = max(self.peaks[ROOT_PHASE], peak)
+            if self._snapshots[thread_id]:
+                before = self._snapshots[thread_id].pop()
+                after = tracemalloc.take_snapshot()
+                self._memory_stats[ROOT_PHASE].extend(after.compare_to(before, "lineno")[:25])
+            tracemalloc.stop()
+        elif self.mode == "wall" and self._sampler is not None:
+            self._stop_sampling.set()
+            self._sampler.join()
+            self._sampler = None
+        elif self.mode == "rss":
+            if self._sampler is not None:
+                self._stop_sampling.set()
+                self._sampler.join()
+                self._sampler = None
+            rss = rss_bytes()
+            self._record_rss(rss)
+            # Le pic du noyau capte aussi les pointes plus brèves que l'échantillonnage
+            self.rss_peaks[ROOT_PHASE] = max(self.rss_peaks[ROOT_PHASE], peak_rss_bytes())
+            self.rss_end[ROOT_PHASE] = rss
+            if self._rss_started[thread_id]:
+                self.rss_growth[ROOT_PHASE] += rss - self._rss_started[thread_id].pop()
+
+        self._remove_hooks()
+
+    # ------------------------------------------------------------------
+    # Rapports
+    # ------------------------------------------------------------------
+    def write_reports(self) -> str:
+        """
+        Écrit un rapport par phase dans le répertoire de sortie.
+
+        Returns:
+            Chemin du répertoire contenant les rapports
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        phases = sorted(set(self.wall_times) | set(self._profiles) | set(self._samples))
+
+        for phase in phases:
+            base = os.path.join(self.output_dir, sanitize_filename(phase.replace(":", "_")))
+            if self.mode == "cpu" and phase in self._profiles:
+                profile = self._profiles[phase]
+                profile.dump_stats(f"{base}.prof")
+                with open(f"{base}.txt", "w", encoding="utf-8") as f:
+                    stats = pstats.Stats(profile, stream=f)
+                    stats.sort_stats("cumulative").print_stats(40)
+            elif self.mode == "mem":
+                with open(f"{base}.mem.txt", "w", encoding="utf-8") as f:
+                    f.write(f"Pic mémoire (tracemalloc): {self.peaks[phase] / 1024 / 1024:.1f} Mo\n\n")
+                    for stat in sorted(self._memory_stats[phase], key=lambda s: s.size_diff, reverse=True)[:25]:
+                        f.write(f"{stat}\n")
+            elif self.mode == "wall" and phase in self._samples:
+                with open(f"{base}.folded", "w", encoding="utf-8") as f:
+                    for stack, count in self._samples[phase].most_common():
+                        f.write(f"{stack} {count}\n")
+
+        if self.mode == "rss":
+            with open(os.path.join(self.output_dir, "rss.txt"), "w", encoding="utf-8") as f:
+                f.write(f"{'phase':<32}{'appels':>8}{'pic (Mo)':>12}{'fin (Mo)':>12}{'croissance (Mo)':>18}\n")
+                for phase in sorted(self.rss_peaks, key=self.rss_peaks.get, reverse=True):
+                    f.write(f"{phase:<32}{self.calls[phase]:>8}{self.rss_peaks[phase] / 1024 / 1024:>12.1f}"
+                            f"{self.rss_end.get(phase, 0) / 1024 / 1024:>12.1f}"
+                            f"{self.rss_growth[phase] / 1024 / 1024:>18.1f}\n")
+
+        if self.mode == "wall":
+            # Fichier global : chaque pile est préfixée par sa phase
+            with open(os.path.join(self.output_dir, "wall.folded"), "w", encoding="utf-8") as f:
+                for phase, samples in self._samples.items():
+                    for stack, count in samples.items():
+                        f.write(f"{phase};{stack} {count}\n")
+
+        with open(os.path.join(self.output_dir, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+        return self.output_dir
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Résume les mesures par phase.
+
+        Returns:
+            Dictionnaire {mode, process: {rss_mb, peak_rss_mb},
+            phases: {phase: {calls, wall_seconds, [peak_mb], [samples], [peak_rss_mb, end_rss_mb, rss_growth_mb]}}}
+        """
+        result = {}
+        for phase in sorted(self.wall_times, key=self.wall_times.get, reverse=True):
+            entry = {"calls": self.calls[phase], "wall_seconds": round(self.wall_times[phase], 4)}
+            if self.mode == "mem":
+                entry["peak_mb"] = round(self.peaks[phase] / 1024 / 1024, 2)
+            if self.mode == "wall":
+                entry["samples"] = sum(self._samples[phase].values())
+            if self.mode == "rss":
+                entry["peak_rss_mb"] = round(self.rss_peaks[phase] / 1024 / 1024, 1)
+                entry["end_rss_mb"] = round(self.rss_end.get(phase, 0) / 1024 / 1024, 1)
+                entry["rss_growth_mb"] = round(self.rss_growth[phase] / 1024 / 1024, 1)
+            result[phase] = entry
+        return {"mode": self.mode, "process": memory_snapshot(), "phases": result}
+
+
+@contextmanager
+def profile_run(mode: Optional[str], output_dir: Optional[str] = None):
+    """
+    Profile le bloc encapsulé si un mode est fourni.
+
+    Args:
+        mode: Mode de profilage (cpu, mem, wall, rss) ou None pour désactiver
+        output_dir: Répertoire des rapports (optionnel)
+
+    Yields:
+        Le profileur actif, ou None
+    """
+    if not mode:
+        yield None
+        return
+
+    profiler = PipelineProfiler(mode, output_dir=output_dir)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        profiler.write_reports()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Accès SQLite partagé et sûr en concurrence pour ArxivBuddy.
+
+Toutes les bases locales (mémoire long terme, caches) passent par ce module :
+- mode WAL, délai d'attente sur verrou et pragmas ajustés ;
+- une connexion par thread, réutilisée tant que le thread vit et fermée à sa
+  fin (les threads éphémères : requêtes HTTP, battements de cœur... ne
+  laissent pas de connexion ouverte) ;
+- transactions d'écriture `BEGIN IMMEDIATE` avec reprise sur verrou ;
+- écritures regroupées en lots (BatchWriter).
+"""
+
+import time
+import weakref
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",     # Sûr en mode WAL, beaucoup moins de fsync
+    "busy_timeout": 30000,       # ms d'attente avant "database is locked"
+    "temp_store": "MEMORY",
+    "cache_size": -16000,        # ~16 Mo de cache de pages
+    "mmap_size": 268435456,      # Lectures mappées en mémoire (256 Mo)
+    "foreign_keys": "ON",
+}
+
+
+class _ThreadConnection:
+    """Connexion d'un thread : sa destruction (fin du thread) ferme la connexion."""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+class SQLiteDatabase:
+    """Base SQLite avec une connexion par thread et des pragmas ajustés."""
+
+    def __init__(self, path: str, pragmas: Optional[Dict[str, Any]] = None,
+                 max_retries: int = 5):
+        """
+        Initialise l'accès à la base.
+
+        Args:
+            path: Chemin du fichier SQLite
+            pragmas: Pragmas à appliquer (par défaut: DEFAULT_PRAGMAS)
+            max_retries: Nombre de reprises d'une transaction sur verrou
+        """
+        self.path = str(path)
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        if pragmas:
+            self.pragmas.update(pragmas)
+        self.max_retries = max_retries
+
+        self._local = threading.local()
+        self._connections: Set[sqlite3.Connection] = set()
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Retourne la connexion du thread courant (créée à la première utilisation).
+
+        Returns:
+            Connexion SQLite configurée
+        """
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            # isolation_level=None : les transactions sont gérées explicitement
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.pragmas["busy_timeout"] / 1000,
+                isolation_level=None,
+                check_same_thread=False
+            )
+            for name, value in self.pragmas.items():
+                conn.execute(f"PRAGMA {name}={value}")
+            holder = self._local.holder = _ThreadConnection(conn)
+            with self._lock:
+                self._connections.add(conn)
+            # Les données locales d'un thread sont libérées à sa fin : la connexion est fermée
+            weakref.finalize(holder, self._discard, conn)
+        return holder.conn
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        """Ferme une connexion et l'oublie."""
+        with self._lock:
+            self._connections.discard(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def release_connection(self) -> None:
+        """Ferme la connexion du thread courant (rouverte à la prochaine utilisation)."""
+        holder = getattr(self._local, "holder", None)
+        if holder is not None:
+            del self._local.holder
+            self._discard(holder.conn)
+
+    def open_connections(self) -> int:
+        """Nombre de connexions ouvertes (une par thread vivant qui a utilisé la base)."""
+        with self._lock:
+            return len(self._connections)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Transaction d'écriture avec verrou pris dès le début (BEGIN IMMEDIATE).
+
+        Prendre le verrou en écriture immédiatement évite les interblocages
+        lecture → écriture entre processus ; en cas de verrou persistant la
+        transaction est retentée avec un délai croissant.
+
+        Yields:
+            Connexion du thread courant, dans une transaction ouverte
+        """
+        conn = self.connection()
+        for attempt in range(self.max_retries + 1):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                break
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) or attempt == self.max_retries:
+                    raise
+                time.sleep(0.05 * (2 ** attempt))
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> int:
+        """
+        Exécute une écriture dans sa propre transaction.
+
+        Args:
+            sql: Requête SQL
+            params: Paramètres de la requête
+
+        Returns:
+            Nombre de lignes modifiées
+        """
+        with self.transaction() as conn:
+            return conn.execute(sql, params).rowcount
+
+    def executemany(self, sql: str, rows: Iterable[Sequence[Any]]) -> int:
+        """
+        Exécute une écriture pour plusieurs lignes dans une seule transaction.
+
+        Args:
+            sql: Requête SQL
+            rows: Paramètres de chaque ligne
+
+        Returns:
+            Nombre de lignes modifiées
+        """
+        with self.transaction() as conn:
+            return conn.executemany(sql, rows).rowcount
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[Tuple]:
+        """
+        Exécute une lecture (hors transaction, grâce au mode WAL).
+
+        Args:
+            sql: Requête SQL
+            params: Paramètres de la requête
+
+        Returns:
+            Lignes résultats
+        """
+        return self.connection().execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        """Ferme toutes les connexions ouvertes par les threads."""
+        with self._lock:
+            connections, self._connections = self._connections, set()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+class BatchWriter:
+    """Regroupe des écritures et les applique par lots dans une seule transaction."""
+
+    def __init__(self, database: SQLiteDatabase, sql: str, batch_size: int = 64,
+                 max_delay: float = 1.0):
+        """
+        Initialise l'écrivain par lots.
+
+        Args:
+            database: Base cible
+            sql: Requête d'insertion paramétrée
+            batch_size: Nombre de lignes déclenchant une écriture
+            max_delay: Délai maximal (secondes) avant l'écriture d'un lot incomplet,
+                garanti par le thread d'écriture même si plus aucune ligne n'arrive
+        """
+        self.database = database
+        self.sql = sql
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._pending: List[Sequence[Any]] = []
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, row: Sequence[Any]) -> None:
+        """
+        Ajoute une ligne au lot courant.
+
+        Args:
+            row: Paramètres de la ligne
+        """
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+                # Premier élément du lot : le thread d'écriture l'écrira au plus tard après max_delay
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="arxivbuddy-batch-writer",
+                                                    daemon=True)
+                    self._thread.start()
+                self._wakeup.notify()
+            self._pending.append(row)
+            due = (len(self._pending) >= self.batch_size
+                   or time.monotonic() - self._oldest >= self.max_delay)
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Écrit les lignes en attente.
+
+        Returns:
+            Nombre de lignes écrites
+        """
+        with self._lock:
+            rows, self._pending = self._pending, []
+            self._oldest = None
+        if rows:
+            self.database.executemany(self.sql, rows)
+        return len(rows)
+
+    def _run(self) -> None:
+        """Thread d'écriture unique : écrit les lots incomplets à l'échéance de max_delay."""
+        while True:
+            with self._lock:
+                while self._oldest is None:
+                    self._wakeup.wait()
+                left = self._oldest + self.max_delay - time.monotonic()
+                if left > 0:
+                    # Réveillé plus tôt si le lot est écrit entre-temps ou si un nouveau commence
+                    self._wakeup.wait(left)
+                    continue
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Écriture différée du lot impossible: {e}")
+
+
+_databases: Dict[str, SQLiteDatabase] = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path: str, pragmas: Optional[Dict[str, Any]] = None) -> SQLiteDatabase:
+    """
+    Retourne l'instance partagée de la base pour un chemin donné.
+
+    Args:
+        path: Chemin du fichier SQLite
+        pragmas: Pragmas supplémentaires (appliqués à la première ouverture)
+
+    Returns:
+        Instance de SQLiteDatabase
+    """
+    key = str(Path(path).resolve()) if path != ":memory:" else path
+    with _databases_lock:
+        if key not in _databases:
+            _databases[key] = SQLiteDatabase(path, pragmas=pragmas)
+        return _databases[key]
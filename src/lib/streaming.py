@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Recherche et analyse des articles en flux.
+
+Dans le pipeline séquentiel, l'analyse ne commence qu'une fois la tâche de
+recherche terminée, reformulation de la liste par le LLM comprise. Ici, la
+recherche pousse chaque article dans une file bornée dès qu'il est lu dans le
+flux Atom d'ArXiv, et des workers d'analyse le consomment aussitôt : la
+latence de la recherche et celle des analyses se recouvrent au lieu de
+s'additionner. La file bornée freine la recherche si les analyses prennent du
+retard.
+"""
+
+import time
+import queue
+import threading
+import contextvars
+from typing import Any, Callable, Dict, List, Optional
+
+import arxiv
+
+from .arxiv_api import iter_results
+from .dedup import NearDuplicateFilter
+from .paper import Paper
+from .paper_store import record_papers
+from .translation_cache import attach_translations
+
+# Marqueur de fin de flux (un par worker)
+_DONE = object()
+
+
+class StreamResult:
+    """Articles et analyses d'une recherche en flux, dans l'ordre des résultats ArXiv."""
+
+    def __init__(self, papers: List[Dict[str, Any]], analyses: List[Dict[str, Any]],
+                 timings: Dict[str, float], duplicates_removed: int = 0):
+        self.papers = papers
+        self.analyses = analyses
+        self.timings = timings
+        self.duplicates_removed = duplicates_removed
+
+    def overlap(self) -> float:
+        """Temps gagné par rapport à une recherche suivie des analyses (secondes)."""
+        return max(self.timings.get("search", 0.0) + self.timings.get("analysis_busy", 0.0)
+                   / max(self.timings.get("workers", 1), 1) - self.timings.get("total", 0.0), 0.0)
+
+
+def _in_context(function: Callable, *args) -> threading.Thread:
+    """Thread qui hérite des variables de contexte de l'appelant (échéance, langue de sortie)."""
+    context = contextvars.copy_context()
+    return threading.Thread(target=context.run, args=(function, *args), daemon=True)
+
+
+def stream_search_analysis(search_query: str, max_results: int,
+                           analyze: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+                           workers: int = 4, queue_size: int = 4,
+                           sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance,
+                           sort_order: arxiv.SortOrder = arxiv.SortOrder.Descending,
+                           categories: Optional[List[str]] = None) -> StreamResult:
+    """
+    Recherche des articles et les analyse au fil de l'eau.
+
+    Args:
+        search_query: Requête ArXiv
+        max_results: Nombre d'articles retenus
+        analyze: Analyse d'un article (dictionnaire au format des outils → analyse, ou None)
+        workers: Nombre d'analyses simultanées
+        queue_size: Capacité de la file entre la recherche et les analyses
+        sort_by: Critère de tri
+        sort_order: Ordre de tri
+        categories: Catégories ArXiv à inclure
+
+    Returns:
+        StreamResult (articles, analyses réussies et durées des étapes)
+
+    Raises:
+        Exception: Erreur de la recherche, si aucun article n'a pu être lu
+    """
+    workers = max(1, min(workers, max_results))
+    items: queue.Queue = queue.Queue(maxsize=max(queue_size, 1))
+    papers: List[Dict[str, Any]] = []
+    analyses: Dict[int, Dict[str, Any]] = {}
+    errors: List[Exception] = []
+    dedup = NearDuplicateFilter()
+    timings: Dict[str, float] = {"workers": workers, "analysis_busy": 0.0}
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def produce():
+        found = []
+        try:
+            for result in iter_results(search_query, max_results, sort_by, sort_order,
+                                       categories=categories, predicate=dedup.accept):
+                paper = Paper.from_result(result)
+                found.append(paper)
+                data = attach_translations([paper.to_dict()])[0]
+                papers.append(data)
+                timings.setdefault("first_paper", time.perf_counter() - started)
+                items.put((len(papers) - 1, data))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            timings["search"] = time.perf_counter() - started
+            for _ in range(workers):
+                items.put(_DONE)
+        try:
+            record_papers(found)
+        except Exception as e:
+            print(f"⚠️ Impossible d'enregistrer les articles: {e}")
+
+    def consume():
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            index, paper = item
+            begin = time.perf_counter()
+            try:
+                analysis = analyze(paper)
+            except Exception as e:
+                print(f"⚠️ Analyse impossible pour {paper.get('arxiv_id')}: {e}")
+                analysis = None
+            with lock:
+                timings["analysis_busy"] += time.perf_counter() - begin
+                if analysis:
+                    analyses[index] = analysis
+
+    threads = [_in_context(produce)] + [_in_context(consume) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    timings["total"] = time.perf_counter() - started
+
+    if errors and not papers:
+        raise errors[0]
+    if errors:
+        print(f"⚠️ Recherche interrompue après {len(papers)} articles: {errors[0]}")
+    return StreamResult(papers, [analyses[index] for index in sorted(analyses)], timings,
+                        duplicates_removed=len(dedup.rejected))
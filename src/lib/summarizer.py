@@ -3,14 +3,218 @@
 
 """
 Module de résumé et vulgarisation d'articles scientifiques pour ArxivBuddy.
+
+Le résumé est extractif et entièrement local (aucun appel au LLM) :
+1. découpage des résumés (abstracts) en phrases ;
+2. pondération TF-IDF calculée en une seule passe sur les phrases de tous
+   les articles (matrice creuse CSR en NumPy) ;
+3. score de centralité TextRank de chaque phrase, combiné à sa similarité
+   avec le titre de l'article (et la question, si elle est fournie) ;
+4. sélection des phrases par MMR (pertinence moins redondance).
+
+Il sert de mode « expert » rapide et de pré-compresseur pour les tâches LLM.
 """
 
-from typing import List, Dict, Any
+from collections import Counter
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 import re
 
+import numpy as np
+
+# Découpage en phrases : ponctuation finale suivie d'une majuscule, d'un chiffre ou d'une parenthèse
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9(\["«À-Ý])')
+_ABBREVIATIONS = ("e.g.", "i.e.", "et al.", "fig.", "figs.", "eq.", "eqs.", "vs.", "cf.",
+                  "resp.", "approx.", "sec.", "tab.", "no.", "ref.", "refs.", "etc.")
+_WORD = re.compile(r"[a-zà-ÿ][a-zà-ÿ0-9\-]+")
+# Formulations qui annoncent la contribution ou le résultat principal d'un article
+_CUE = re.compile(r"\b(we (propose|present|introduce|show|find|demonstrate|develop)|"
+                  r"our (results|method|approach|model)|in this (paper|work))\b", re.IGNORECASE)
+
+STOPWORDS = frozenset("""
+a about above after again against all also although among an and any are as at be because been
+before being below between both but by can could did do does doing done due during each either
+et few for from further had has have having here how however if in into is it its itself just
+may more most much must no nor not of off on once only or other our out over own per same shall
+should since so some such than that the their them then there these they this those through thus
+to too under until up upon us use used using very via was we were what when where whether which
+while who whom why will with within without would yet
+le la les un une des et de du ce cette ces que qui dans sur pour par avec sans est sont au aux
+""".split())
+
+# Paramètres de sélection par niveau : part des phrases conservées, bornes, diversité,
+# et pénalité sur les phrases longues (les débutants préfèrent les phrases courtes)
+LEVEL_SETTINGS = {
+    "expert": {"ratio": 0.5, "min_sentences": 3, "max_sentences": 6, "diversity": 0.3, "long_sentence_penalty": 0.0},
+    "medium": {"ratio": 0.35, "min_sentences": 2, "max_sentences": 4, "diversity": 0.3, "long_sentence_penalty": 0.3},
+    "beginner": {"ratio": 0.25, "min_sentences": 1, "max_sentences": 3, "diversity": 0.4, "long_sentence_penalty": 0.6},
+}
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Découpe un texte en phrases (en tenant compte des abréviations courantes).
+
+    Args:
+        text: Texte à découper
+
+    Returns:
+        Liste de phrases
+    """
+    text = re.sub(r'\s+', ' ', text or '').strip()
+    if not text:
+        return []
+
+    sentences: List[str] = []
+    for piece in _SENTENCE_BOUNDARY.split(text):
+        # Recoller les morceaux coupés après une abréviation ou trop courts pour être une phrase
+        if sentences and (sentences[-1].lower().endswith(_ABBREVIATIONS) or len(piece.split()) < 3):
+            sentences[-1] = f"{sentences[-1]} {piece}"
+        else:
+            sentences.append(piece)
+    return sentences
+
+
+def tokenize(text: str) -> List[str]:
+    """Mots significatifs (minuscules, sans mots vides) d'un texte."""
+    return [word for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+class TfidfMatrix:
+    """Matrice TF-IDF creuse (CSR) normalisée ligne par ligne, construite en une passe."""
+
+    def __init__(self, documents: Sequence[List[str]]):
+        """
+        Construit la matrice.
+
+        Args:
+            documents: Listes de mots (une par ligne de la matrice)
+        """
+        vocabulary: Dict[str, int] = {}
+        indices: List[int] = []
+        counts: List[int] = []
+        indptr = [0]
+        for tokens in documents:
+            for word, count in Counter(tokens).items():
+                indices.append(vocabulary.setdefault(word, len(vocabulary)))
+                counts.append(count)
+            indptr.append(len(indices))
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        rows = len(documents)
+
+        # IDF lissé sur l'ensemble des lignes, TF sous-linéaire
+        document_frequency = np.bincount(self.indices, minlength=len(vocabulary))
+        idf = np.log((1 + rows) / (1 + document_frequency)) + 1.0
+        data = (1.0 + np.log(np.asarray(counts, dtype=np.float32))) * idf[self.indices]
+
+        lengths = np.diff(self.indptr)
+        squares = np.zeros(rows, dtype=np.float64)
+        np.add.at(squares, np.repeat(np.arange(rows), lengths), data.astype(np.float64) ** 2)
+        norms = np.sqrt(squares)
+        norms[norms == 0] = 1.0
+        self.data = (data / np.repeat(norms, lengths)).astype(np.float32)
+
+    def dense(self, rows: Sequence[int]) -> np.ndarray:
+        """
+        Extrait des lignes sous forme dense, restreintes aux colonnes qu'elles utilisent.
+
+        Args:
+            rows: Indices des lignes
+
+        Returns:
+            Matrice (len(rows), nombre de mots distincts des lignes)
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        starts, ends = self.indptr[rows], self.indptr[rows + 1]
+        lengths = ends - starts
+        if not lengths.sum():
+            return np.zeros((len(rows), 1), dtype=np.float32)
+        positions = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)])
+        columns, local = np.unique(self.indices[positions], return_inverse=True)
+        matrix = np.zeros((len(rows), len(columns)), dtype=np.float32)
+        matrix[np.repeat(np.arange(len(rows)), lengths), local] = self.data[positions]
+        return matrix
+
+
+def textrank(similarity: np.ndarray, damping: float = 0.85,
+             iterations: int = 50, tolerance: float = 1e-6) -> np.ndarray:
+    """
+    Centralité TextRank (PageRank sur le graphe de similarité des phrases).
+
+    Args:
+        similarity: Matrice de similarité (n, n)
+        damping: Facteur d'amortissement
+        iterations: Nombre maximal d'itérations
+        tolerance: Seuil de convergence (norme L1)
+
+    Returns:
+        Scores (n,) de somme 1
+    """
+    n = len(similarity)
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    weights = np.clip(similarity, 0.0, None)
+    np.fill_diagonal(weights, 0.0)
+    out_degree = weights.sum(axis=1, keepdims=True)
+    # Les phrases sans voisin répartissent leur score uniformément
+    transition = np.divide(weights, out_degree, out=np.full_like(weights, 1.0 / n), where=out_degree > 0)
+
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1.0 - damping) / n + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tolerance:
+            return updated
+        scores = updated
+    return scores
+
+
+def mmr_select(relevance: np.ndarray, similarity: np.ndarray, k: int, diversity: float = 0.3,
+               lengths: Optional[np.ndarray] = None, budget: Optional[int] = None) -> List[int]:
+    """
+    Sélection MMR (Maximal Marginal Relevance).
+
+    Args:
+        relevance: Pertinence de chaque élément
+        similarity: Similarité entre éléments (n, n)
+        k: Nombre maximal d'éléments
+        diversity: Poids de la pénalité de redondance (0 = pertinence seule)
+        lengths: Longueur de chaque élément (pour le budget)
+        budget: Longueur totale maximale des éléments sélectionnés
+
+    Returns:
+        Indices sélectionnés, dans l'ordre d'origine (les quasi-doublons d'un élément
+        déjà sélectionné sont écartés)
+    """
+    n = len(relevance)
+    if n == 0 or k <= 0:
+        return []
+    span = relevance.max() - relevance.min()
+    relevance = (relevance - relevance.min()) / span if span > 0 else np.ones(n, dtype=np.float32)
+
+    selected: List[int] = []
+    available = np.ones(n, dtype=bool)
+    redundancy = np.zeros(n, dtype=np.float32)
+    used = 0
+    while len(selected) < k:
+        if budget is not None and lengths is not None:
+            available &= used + lengths <= budget
+        if not available.any():
+            break
+        scores = np.where(available, (1.0 - diversity) * relevance - diversity * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        available &= similarity[best] < 0.95
+        redundancy = np.maximum(redundancy, similarity[best])
+        if lengths is not None:
+            used += int(lengths[best])
+    return sorted(selected)
+
+
 class Summarizer:
     """Classe pour le résumé et la vulgarisation d'articles scientifiques."""
-    
+
     def __init__(self):
         """Initialise le résumeur avec les configurations par défaut."""
         self.modes = {
@@ -18,58 +222,197 @@ class Summarizer:
             "medium": "Simplifie légèrement tout en gardant la rigueur scientifique",
             "beginner": "Vulgarise au maximum, utilise des analogies et évite le jargon"
         }
-    
-    def simplify_abstract(self, abstract: str, level: str = "medium") -> str:
+
+    # ------------------------------------------------------------------
+    # Moteur extractif
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _relevance(sentences: List[str], similarity: np.ndarray, anchors: int, lengths: np.ndarray,
+                   long_sentence_penalty: float) -> np.ndarray:
         """
-        Simplifie un résumé d'article selon le niveau spécifié.
-        
+        Pertinence des phrases d'un bloc [ancres..., phrases...].
+
         Args:
-            abstract: Texte du résumé (abstract) de l'article
-            level: Niveau de simplification (expert, medium, beginner)
-            
+            sentences: Phrases du bloc
+            similarity: Similarité cosinus du bloc
+            anchors: Nombre de lignes d'ancrage en tête du bloc (titre, question)
+            lengths: Nombre de mots de chaque phrase
+            long_sentence_penalty: Pénalité appliquée aux phrases de plus de 25 mots
+
         Returns:
-            Résumé simplifié
+            Pertinence (n,) de chaque phrase
         """
-        # Cette méthode est un placeholder - dans l'implémentation réelle, 
-        # on utiliserait un LLM via CrewAI pour faire la simplification
-        
-        # Nettoyer le texte basiquement
-        clean_abstract = re.sub(r'\s+', ' ', abstract).strip()
-        
-        # Création d'un message pour indiquer ce qui serait fait
-        level_description = self.modes.get(level, self.modes["medium"])
-        result = f"[Résumé simplifié ({level}): {level_description}]\n\n{clean_abstract}"
-        
-        return result
-    
-    def summarize_papers(self, papers: List[Dict[str, Any]], level: str = "medium") -> Dict[str, Any]:
+        centrality = textrank(similarity[anchors:, anchors:])
+        centrality = centrality / centrality.max() if len(centrality) and centrality.max() > 0 else centrality
+        relevance = 0.7 * centrality
+        if anchors:
+            relevance = relevance + 0.3 * similarity[:anchors, anchors:].max(axis=0)
+        relevance = relevance + 0.2 * np.array([bool(_CUE.search(sentence)) for sentence in sentences])
+        if long_sentence_penalty:
+            relevance = relevance / (1.0 + long_sentence_penalty * np.maximum(lengths - 25, 0) / 25.0)
+        return relevance
+
+    def _sentence_count(self, total: int, settings: Dict[str, Any]) -> int:
+        k = int(round(settings["ratio"] * total))
+        return max(min(k, settings["max_sentences"]), min(settings["min_sentences"], total))
+
+    def summarize_papers(self, papers: List[Dict[str, Any]], level: str = "medium",
+                         query: Optional[str] = None, global_sentences: int = 5) -> Dict[str, Any]:
         """
         Résume une liste d'articles selon le niveau spécifié.
-        
+
+        Toutes les phrases de tous les articles sont pondérées en une seule passe
+        TF-IDF ; chaque article est ensuite résumé par TextRank + MMR, et le
+        résumé global sélectionne les phrases les plus représentatives de l'ensemble.
+
         Args:
-            papers: Liste de dictionnaires représentant les articles
+            papers: Liste d'articles (Paper ou dictionnaires)
             level: Niveau de simplification (expert, medium, beginner)
-            
+            query: Question de l'utilisateur (oriente la sélection si fournie)
+            global_sentences: Nombre de phrases du résumé global
+
         Returns:
             Dictionnaire contenant le résumé global et les résumés individuels
         """
-        # Cette méthode est un placeholder - dans l'implémentation réelle,
-        # on utiliserait un LLM via CrewAI pour faire les résumés
-        
-        paper_summaries = []
+        settings = LEVEL_SETTINGS.get(level, LEVEL_SETTINGS["medium"])
+
+        # Lignes de la matrice : [question], puis pour chaque article [titre, phrases...]
+        documents: List[List[str]] = []
+        query_row = None
+        if query:
+            query_row = len(documents)
+            documents.append(tokenize(query))
+        blocks: List[Tuple[int, List[str]]] = []
         for paper in papers:
-            simplified = self.simplify_abstract(paper.get('summary', ''), level)
+            sentences = split_sentences(paper.get('abstract') or paper.get('summary') or '')
+            blocks.append((len(documents), sentences))
+            documents.append(tokenize(paper.get('title', '')))
+            documents.extend(tokenize(sentence) for sentence in sentences)
+        matrix = TfidfMatrix(documents)
+
+        paper_summaries = []
+        candidates: List[Tuple[int, int, str]] = []
+        for position, (paper, (title_row, sentences)) in enumerate(zip(papers, blocks)):
+            rows = [title_row] + list(range(title_row + 1, title_row + 1 + len(sentences)))
+            if query_row is not None:
+                rows = [query_row] + rows
+            anchors = len(rows) - len(sentences)
+
+            selected: List[int] = []
+            if sentences:
+                vectors = matrix.dense(rows)
+                similarity = vectors @ vectors.T
+                lengths = np.array([len(sentence.split()) for sentence in sentences], dtype=np.float32)
+                relevance = self._relevance(sentences, similarity, anchors, lengths,
+                                            settings["long_sentence_penalty"])
+                selected = mmr_select(relevance, similarity[anchors:, anchors:],
+                                      self._sentence_count(len(sentences), settings), settings["diversity"])
+                candidates.extend((position, title_row + 1 + i, sentences[i]) for i in selected)
+
             paper_summaries.append({
                 'title': paper.get('title', 'Sans titre'),
                 'authors': paper.get('authors', []),
-                'summary': simplified,
+                'summary': " ".join(sentences[i] for i in selected),
+                'sentences': [sentences[i] for i in selected],
                 'id': paper.get('id', '')
             })
-        
-        # Création d'un résumé global (placeholder)
-        global_summary = f"[Résumé global des {len(papers)} articles au niveau {level}]"
-        
+
+        # Résumé global : phrases représentatives de l'ensemble (ou proches de la question)
+        global_summary = ""
+        if candidates:
+            rows = [row for _, row, _ in candidates]
+            vectors = matrix.dense(rows + ([query_row] if query_row is not None else []))
+            similarity = vectors @ vectors.T
+            sentence_similarity = similarity[:len(rows), :len(rows)]
+            if query_row is not None:
+                relevance = similarity[-1, :len(rows)]
+            else:
+                relevance = sentence_similarity.mean(axis=1)
+            chosen = mmr_select(relevance, sentence_similarity, global_sentences, diversity=0.5)
+            global_summary = "\n".join(f"• {candidates[i][2]} [{candidates[i][0] + 1}]" for i in chosen)
+
         return {
             'global_summary': global_summary,
             'paper_summaries': paper_summaries
-        }
\ No newline at end of file
+        }
+
+    def simplify_abstract(self, abstract: str, level: str = "medium") -> str:
+        """
+        Simplifie un résumé d'article selon le niveau spécifié.
+
+        Args:
+            abstract: Texte du résumé (abstract) de l'article
+            level: Niveau de simplification (expert, medium, beginner)
+
+        Returns:
+            Résumé simplifié (phrases essentielles du résumé)
+        """
+        result = self.summarize_papers([{'abstract': abstract}], level=level)
+        return result['paper_summaries'][0]['summary']
+
+    def compress(self, text: str, max_chars: int, query: Optional[str] = None) -> str:
+        """
+        Réduit un texte aux phrases les plus importantes dans une limite de caractères.
+
+        Utilisé comme pré-compresseur avant l'envoi d'un long texte à un LLM.
+
+        Args:
+            text: Texte à compresser
+            max_chars: Nombre maximal de caractères du résultat
+            query: Question orientant la sélection (optionnel)
+
+        Returns:
+            Texte compressé (phrases dans l'ordre d'origine)
+        """
+        text = re.sub(r'\s+', ' ', text or '').strip()
+        if len(text) <= max_chars:
+            return text
+        sentences = split_sentences(text)
+        documents = ([tokenize(query)] if query else []) + [tokenize(sentence) for sentence in sentences]
+        anchors = 1 if query else 0
+        vectors = TfidfMatrix(documents).dense(range(len(documents)))
+        similarity = vectors @ vectors.T
+        lengths = np.array([len(sentence) + 1 for sentence in sentences])
+        relevance = self._relevance(sentences, similarity, anchors, lengths.astype(np.float32), 0.0)
+        selected = mmr_select(relevance, similarity[anchors:, anchors:], len(sentences),
+                              diversity=0.3, lengths=lengths, budget=max_chars)
+        if not selected:
+            return text[:max_chars]
+        return " ".join(sentences[i] for i in selected)
+
+    def to_markdown(self, query: str, summary: Dict[str, Any], papers: List[Any], level: str = "medium") -> str:
+        """
+        Met en forme un résumé extractif en Markdown.
+
+        Args:
+            query: Question de l'utilisateur
+            summary: Résultat de `summarize_papers`
+            papers: Articles résumés (même ordre que `summary['paper_summaries']`)
+            level: Niveau de simplification utilisé
+
+        Returns:
+            Document Markdown
+        """
+        lines = [
+            "### Résultat de votre question :",
+            f"*{query}*",
+            "",
+            f"_Résumé extractif local ({level}) : {self.modes.get(level, self.modes['medium'])}_",
+            "",
+            "---",
+            "",
+            "#### 🔍 Synthèse :",
+            summary['global_summary'] or "Aucun article trouvé.",
+            "",
+            "#### 📚 Articles :",
+        ]
+        for position, (paper, paper_summary) in enumerate(zip(papers, summary['paper_summaries']), start=1):
+            authors = ", ".join(list(paper_summary['authors'])[:3])
+            lines.extend([
+                "",
+                f"**[{position}] {paper_summary['title']}** — {authors}",
+                f"<{paper.get('url', '') or paper_summary['id']}>",
+                "",
+                paper_summary['summary'],
+            ])
+        return "\n".join(lines) + "\n"
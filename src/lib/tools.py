@@ -6,6 +6,8 @@ Outils pour ArxivBuddy.
 
 Ce module contient les outils utilisés par les agents CrewAI d'ArxivBuddy
 pour interagir avec l'API ArXiv et traiter les articles scientifiques.
+Deux appels simultanés d'un outil avec les mêmes arguments (ex: deux agents
+ou deux requêtes lançant la même recherche) partagent une seule exécution.
 """
 
 import os
@@ -15,12 +17,24 @@ import arxiv
 from datetime import datetime, timedelta
 from crewai.tools import tool, BaseTool
 
+from .arxiv_api import date_window, iter_results
+from .coalescing import coalesced
+from .dedup import NearDuplicateFilter
+from .paper import Paper
+from .fulltext import get_text_store, MAIN_SECTIONS
+from .citation_graph import get_citation_graph
+from .passage_index import get_passage_index
+from .paper_store import get_paper_store, get_semantic_index, record_papers
+from .summarizer import Summarizer
+from .translation_cache import attach_translations
+
 # Configuration par défaut
 MAX_RESULTS = int(os.getenv('ARXIV_MAX_RESULTS', '5'))
 SORT_CRITERION = getattr(arxiv.SortCriterion, os.getenv('ARXIV_SORT_BY', 'Relevance'))
 SORT_ORDER = getattr(arxiv.SortOrder, os.getenv('ARXIV_SORT_ORDER', 'Descending'))
 
 @tool("search_arxiv")
+@coalesced("search_arxiv")
 def search_arxiv(query: str, max_results: int = 5, categories: str = None) -> str:
     """
     Recherche des articles sur ArXiv selon une requête et des catégories optionnelles.
@@ -34,47 +48,24 @@ def search_arxiv(query: str, max_results: int = 5, categories: str = None) -> st
         Résultats de recherche au format JSON
     """
     try:
-        # Préparer la requête
-        search_query = query
-        
-        # Ajouter les filtres de catégorie si spécifiés
-        if categories:
-            cat_list = [cat.strip() for cat in categories.split(",")]
-            cat_filter = " AND (" + " OR ".join([f"cat:{cat}" for cat in cat_list]) + ")"
-            search_query += cat_filter
-        
-        # Configuration de la recherche
-        search = arxiv.Search(
-            query=search_query,
-            max_results=max_results,
-            sort_by=SORT_CRITERION,
-            sort_order=SORT_ORDER,
-        )
-        
-        # Récupérer les résultats
+        cat_list = [cat.strip() for cat in categories.split(",")] if categories else None
+        
+        # Les versions et quasi-doublons sont écartés et remplacés par les candidats suivants
+        dedup = NearDuplicateFilter()
         papers = []
-        for result in search.results():
-            # Extraire les informations pertinentes
-            paper = {
-                "id": result.entry_id,
-                "title": result.title,
-                "authors": [author.name for author in result.authors],
-                "summary": result.summary,
-                "published": result.published.strftime("%Y-%m-%d"),
-                "pdf_url": result.pdf_url,
-                "categories": result.categories
-            }
-            papers.append(paper)
-            
-            # Arrêter si on a atteint le nombre maximal de résultats
-            if len(papers) >= max_results:
-                break
+        for result in iter_results(query, max_results, SORT_CRITERION, SORT_ORDER,
+                                   categories=cat_list, predicate=dedup.accept):
+            papers.append(Paper.from_result(result))
+        
+        # Enregistrer les articles dans la base locale (recherche sémantique)
+        record_papers(papers)
         
         # Convertir en JSON
         result_json = {
             "query": query,
-            "papers": papers,
-            "total_results": len(papers)
+            "papers": attach_translations([paper.to_dict() for paper in papers]),
+            "total_results": len(papers),
+            "duplicates_removed": len(dedup.rejected)
         }
         
         return json.dumps(result_json, ensure_ascii=False, indent=2)
@@ -83,6 +74,7 @@ def search_arxiv(query: str, max_results: int = 5, categories: str = None) -> st
         return json.dumps({"error": f"Erreur lors de la recherche sur ArXiv: {str(e)}"})
 
 @tool("get_papers_by_query")
+@coalesced("get_papers_by_query")
 def get_papers_by_query(query: str, max_results: int = 5, sort_by: str = "relevance", date_range_days: int = 365) -> str:
     """
     Version plus avancée de la recherche ArXiv avec options de tri et de filtrage par date.
@@ -105,45 +97,26 @@ def get_papers_by_query(query: str, max_results: int = 5, sort_by: str = "releva
         }
         sort_criterion = sort_criterion_map.get(sort_by.lower(), SORT_CRITERION)
         
-        # Configuration de la recherche
-        search = arxiv.Search(
-            query=query,
-            max_results=max_results * 2,  # Récupérer plus pour filtrer par date
-            sort_by=sort_criterion,
-            sort_order=SORT_ORDER,
-        )
+        # Filtre de date appliqué côté serveur (submittedDate), résultats paginés
+        window = date_window(date_range_days)
+        start_date, end_date = window if window else (None, None)
         
-        # Récupérer et filtrer les résultats
+        dedup = NearDuplicateFilter()
         papers = []
-        cutoff_date = datetime.now() - timedelta(days=date_range_days) if date_range_days else None
-        
-        for result in search.results():
-            # Filtrer par date si nécessaire
-            if cutoff_date and result.published < cutoff_date:
-                continue
-                
-            # Extraire les informations pertinentes
-            paper = {
-                "title": result.title,
-                "authors": [author.name for author in result.authors],
-                "published_date": result.published.strftime("%Y-%m-%d"),
-                "arxiv_id": result.entry_id.split('/')[-1],
-                "url": result.entry_id,
-                "pdf_url": result.pdf_url,
-                "abstract": result.summary,
-                "categories": result.categories
-            }
-            papers.append(paper)
-            
-            # Arrêter si on a atteint le nombre maximal de résultats
-            if len(papers) >= max_results:
-                break
+        for result in iter_results(query, max_results, sort_criterion, SORT_ORDER,
+                                   start_date=start_date, end_date=end_date,
+                                   predicate=dedup.accept):
+            papers.append(Paper.from_result(result))
+        
+        # Enregistrer les articles dans la base locale (recherche sémantique)
+        record_papers(papers)
         
         # Convertir en JSON
         result_json = {
             "query": query,
-            "papers": papers,
-            "total_results": len(papers)
+            "papers": attach_translations([paper.to_dict() for paper in papers]),
+            "total_results": len(papers),
+            "duplicates_removed": len(dedup.rejected)
         }
         
         return json.dumps(result_json, ensure_ascii=False, indent=2)
@@ -152,6 +125,7 @@ def get_papers_by_query(query: str, max_results: int = 5, sort_by: str = "releva
         return json.dumps({"error": f"Erreur lors de la recherche sur ArXiv: {str(e)}"})
 
 @tool("get_paper_by_id")
+@coalesced("get_paper_by_id")
 def get_paper_by_id(paper_id: str) -> str:
     """
     Récupère un article spécifique par son ID ArXiv.
@@ -176,26 +150,16 @@ def get_paper_by_id(paper_id: str) -> str:
             return json.dumps({"error": f"Article non trouvé avec l'ID: {paper_id}"})
         
         # Extraire les informations
-        paper = {
-            "title": result.title,
-            "authors": [author.name for author in result.authors],
-            "published_date": result.published.strftime("%Y-%m-%d"),
-            "arxiv_id": paper_id,
-            "url": result.entry_id,
-            "pdf_url": result.pdf_url,
-            "abstract": result.summary,
-            "categories": result.categories,
-            "comment": result.comment if hasattr(result, 'comment') else "",
-            "journal_ref": result.journal_ref if hasattr(result, 'journal_ref') else "",
-            "doi": result.doi if hasattr(result, 'doi') else ""
-        }
+        paper = Paper.from_result(result)
+        record_papers([paper])
         
-        return json.dumps(paper, ensure_ascii=False, indent=2)
+        return json.dumps(paper.to_dict(extended=True), ensure_ascii=False, indent=2)
         
     except Exception as e:
         return json.dumps({"error": f"Erreur lors de la récupération de l'article: {str(e)}"})
 
 @tool("get_paper_abstract")
+@coalesced("get_paper_abstract")
 def get_paper_abstract(paper_id: str) -> str:
     """
     Récupère uniquement le résumé (abstract) d'un article ArXiv.
@@ -220,14 +184,143 @@ def get_paper_abstract(paper_id: str) -> str:
             return json.dumps({"error": f"Article non trouvé avec l'ID: {paper_id}"})
         
         # Extraire le résumé et les informations de base
+        paper = Paper.from_result(result)
         abstract_info = {
-            "title": result.title,
-            "authors": [author.name for author in result.authors],
-            "abstract": result.summary,
-            "arxiv_id": paper_id
+            "title": paper.title,
+            "authors": list(paper.authors),
+            "abstract": paper.abstract,
+            "arxiv_id": paper.arxiv_id
         }
         
         return json.dumps(abstract_info, ensure_ascii=False, indent=2)
         
     except Exception as e:
-        return json.dumps({"error": f"Erreur lors de la récupération du résumé: {str(e)}"})
\ No newline at end of file
+        return json.dumps({"error": f"Erreur lors de la récupération du résumé: {str(e)}"})
+
+@tool("get_paper_sections")
+@coalesced("get_paper_sections")
+def get_paper_sections(paper_id: str, sections: str = None, max_chars: int = 4000) -> str:
+    """
+    Récupère les sections du texte intégral d'un article ArXiv (introduction,
+    méthode, résultats, conclusion) à partir de son PDF.
+    
+    Args:
+        paper_id: ID ArXiv de l'article, avec ou sans version (ex: "2107.12345v2")
+        sections: Sections souhaitées séparées par des virgules
+                  (par défaut: "introduction,method,results,conclusion")
+        max_chars: Nombre maximal de caractères par section (par défaut: 4000) ; une section
+                   plus longue est réduite à ses phrases les plus importantes
+        
+    Returns:
+        Sections de l'article au format JSON
+    """
+    try:
+        names = [name.strip().lower() for name in sections.split(",")] if sections else list(MAIN_SECTIONS)
+        # Lecture bornée, puis compression extractive locale plutôt qu'une simple troncature
+        result = get_text_store().get_sections(paper_id, names=names,
+                                               max_chars=max_chars * 8 if max_chars else None)
+        if max_chars:
+            summarizer = Summarizer()
+            result["sections"] = {
+                name: summarizer.compress(text, max_chars) for name, text in result["sections"].items()
+            }
+        return json.dumps(result, ensure_ascii=False, indent=2)
+        
+    except Exception as e:
+        return json.dumps({"error": f"Erreur lors de la récupération du texte intégral: {str(e)}"})
+
+
+@tool("retrieve_passages")
+@coalesced("retrieve_passages")
+def retrieve_passages(question: str, paper_ids: str, k: int = 5) -> str:
+    """
+    Recherche dans le texte intégral des articles les passages les plus pertinents
+    pour une question, sans charger les articles entiers.
+    
+    Args:
+        question: Question ou point à éclaircir
+        paper_ids: IDs ArXiv des articles séparés par des virgules (ex: "2107.12345,2301.00001v2")
+        k: Nombre de passages à retourner (par défaut: 5)
+        
+    Returns:
+        Passages pertinents au format JSON
+    """
+    try:
+        papers = [paper.strip() for paper in paper_ids.split(",") if paper.strip()]
+        if not papers:
+            return json.dumps({"error": "Aucun ID d'article fourni"})
+        
+        passages = get_passage_index().retrieve(question, papers, k=k)
+        result_json = {
+            "question": question,
+            "passages": passages,
+            "total_results": len(passages)
+        }
+        return json.dumps(result_json, ensure_ascii=False, indent=2)
+        
+    except Exception as e:
+        return json.dumps({"error": f"Erreur lors de la recherche de passages: {str(e)}"})
+
+
+@tool("semantic_search_papers")
+@coalesced("semantic_search_papers")
+def semantic_search_papers(query: str, max_results: int = 5) -> str:
+    """
+    Recherche sémantique (par le sens, pas par mots-clés) parmi tous les articles
+    déjà rencontrés et conservés localement. Ne nécessite aucun appel à ArXiv.
+    
+    Args:
+        query: Question ou description en langage naturel
+        max_results: Nombre maximum de résultats (par défaut: 5)
+        
+    Returns:
+        Résultats de recherche au format JSON
+    """
+    try:
+        papers = get_semantic_index().search(query, k=max_results)
+        result_json = {
+            "query": query,
+            "papers": attach_translations(papers),
+            "total_results": len(papers)
+        }
+        return json.dumps(result_json, ensure_ascii=False, indent=2)
+        
+    except Exception as e:
+        return json.dumps({"error": f"Erreur lors de la recherche sémantique: {str(e)}"})
+
+
+@tool("related_papers")
+@coalesced("related_papers")
+def related_papers(paper_ids: str, depth: int = 1, max_results: int = 10) -> str:
+    """
+    Trouve les articles liés à un ou plusieurs articles grâce au graphe local des
+    citations (références communes, articles cités ensemble, citations directes),
+    en quelques millisecondes et sans appel à ArXiv.
+    
+    Args:
+        paper_ids: IDs ArXiv des articles de départ séparés par des virgules (ex: "2107.12345,2301.00001")
+        depth: Niveaux d'expansion (1 : voisins directs, 2 : voisins des voisins ; par défaut: 1)
+        max_results: Nombre maximum d'articles liés (par défaut: 10)
+        
+    Returns:
+        Articles liés au format JSON, avec le détail du score
+    """
+    try:
+        seeds = [paper.strip() for paper in paper_ids.split(",") if paper.strip()]
+        if not seeds:
+            return json.dumps({"error": "Aucun ID d'article fourni"})
+        
+        # Lecture seule : le graphe est mis à jour à la mise en cache des textes intégraux
+        related = get_citation_graph().related(seeds, depth=min(max(depth, 1), 3), k=max_results)
+        known = get_paper_store().get_by_ids(entry["arxiv_id"] for entry in related)
+        papers = [dict(known[entry["arxiv_id"]].to_dict(), **entry) if entry["arxiv_id"] in known else entry
+                  for entry in related]
+        result_json = {
+            "seeds": seeds,
+            "papers": attach_translations(papers),
+            "total_results": len(papers)
+        }
+        return json.dumps(result_json, ensure_ascii=False, indent=2)
+        
+    except Exception as e:
+        return json.dumps({"error": f"Erreur lors de la recherche d'articles liés: {str(e)}"})
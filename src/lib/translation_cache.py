@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cache des résumés d'articles traduits.
+
+L'agent d'analyse rédige, pour chaque article, une phrase résumant son apport
+dans la langue de sortie (champ `résumé_traduit`). Ces phrases sont
+enregistrées dans la base locale des articles, par identifiant, version et
+langue ; les outils de recherche les rattachent ensuite aux articles déjà
+rencontrés pour que les agents les reprennent au lieu de les réécrire.
+"""
+
+import os
+import time
+import contextlib
+import contextvars
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .sqlite_store import get_database
+from .utils import caches_isolated, extract_json, get_cache_dir, parse_arxiv_id
+
+# Champ des articles portant le résumé traduit
+TRANSLATED_FIELD = "résumé_traduit"
+
+_language: contextvars.ContextVar = contextvars.ContextVar("arxivbuddy_output_language", default=None)
+
+
+@contextlib.contextmanager
+def output_language(language: Optional[str]) -> Iterator[None]:
+    """
+    Fixe la langue de sortie des outils pour le contexte courant.
+
+    Args:
+        language: Code de langue (ex: "fr"), None pour désactiver les traductions
+    """
+    token = _language.set(language)
+    try:
+        yield
+    finally:
+        _language.reset(token)
+
+
+def current_language() -> Optional[str]:
+    """Langue de sortie courante (None si aucune)."""
+    return _language.get()
+
+
+class TranslationCache:
+    """Résumés traduits par article, version et langue."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialise le cache.
+
+        Args:
+            db_path: Chemin de la base (par défaut: la base locale des articles)
+        """
+        self.db_path = db_path or os.path.join(get_cache_dir("corpus"), "papers.db")
+        self.database = get_database(self.db_path)
+        self.database.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                paper_id TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                language TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                added REAL NOT NULL,
+                PRIMARY KEY (paper_id, version, language)
+            )
+            """
+        )
+
+    def get_many(self, papers: Iterable[Any], language: str) -> Dict[str, str]:
+        """
+        Récupère les résumés traduits d'articles.
+
+        Args:
+            papers: Articles (Paper, dictionnaires ou identifiants ArXiv)
+            language: Code de langue
+
+        Returns:
+            Dictionnaire {arxiv_id: résumé traduit} (version identique uniquement)
+        """
+        keys = {}
+        for paper in papers:
+            raw = paper if isinstance(paper, str) else paper.get("arxiv_id") or paper.get("url") or ""
+            arxiv_id, version = parse_arxiv_id(str(raw))
+            if not arxiv_id:
+                continue
+            if version is None and not isinstance(paper, str):
+                version = paper.get("version")
+            keys[arxiv_id] = version or 1
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        rows = self.database.query(
+            f"SELECT paper_id, version, summary FROM translations "
+            f"WHERE language = ? AND paper_id IN ({placeholders})",
+            [language, *keys]
+        )
+        return {paper_id: summary for paper_id, version, summary in rows if keys[paper_id] == version}
+
+    def _known_versions(self, paper_ids: List[str]) -> Dict[str, int]:
+        """Versions des articles enregistrés dans la base locale (table papers)."""
+        if not paper_ids:
+            return {}
+        placeholders = ",".join("?" * len(paper_ids))
+        try:
+            rows = self.database.query(
+                f"SELECT paper_id, version FROM papers WHERE paper_id IN ({placeholders})", paper_ids
+            )
+        except Exception:
+            return {}
+        return dict(rows)
+
+    def add(self, summaries: Dict[str, str], language: str) -> int:
+        """
+        Enregistre des résumés traduits.
+
+        Args:
+            summaries: Dictionnaire {identifiant ArXiv (avec ou sans version): résumé traduit}
+            language: Code de langue
+
+        Returns:
+            Nombre de résumés enregistrés
+        """
+        parsed = {}
+        for raw_id, summary in summaries.items():
+            arxiv_id, version = parse_arxiv_id(str(raw_id))
+            if arxiv_id and summary and summary.strip():
+                parsed[arxiv_id] = (version, summary.strip())
+        # Les agents citent souvent l'identifiant sans version : celle de la base locale fait foi
+        known = self._known_versions([arxiv_id for arxiv_id, (version, _) in parsed.items() if version is None])
+        rows = [
+            (arxiv_id, version or known.get(arxiv_id, 1), language, summary, time.time())
+            for arxiv_id, (version, summary) in parsed.items()
+        ]
+        if rows:
+            self.database.executemany(
+                "INSERT OR REPLACE INTO translations (paper_id, version, language, summary, added) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+
+def extract_translated_summaries(analysis_output: str) -> Dict[str, str]:
+    """
+    Extrait les résumés traduits de la sortie de l'agent d'analyse.
+
+    Args:
+        analysis_output: Sortie brute de la tâche paper_analysis
+
+    Returns:
+        Dictionnaire {arxiv_id: résumé traduit}
+    """
+    data = extract_json(analysis_output or "")
+    analyses = data.get("paper_analyses", []) if isinstance(data, dict) else []
+    summaries = {}
+    for analysis in analyses:
+        if isinstance(analysis, dict) and analysis.get("arxiv_id") and analysis.get(TRANSLATED_FIELD):
+            summaries[str(analysis["arxiv_id"])] = str(analysis[TRANSLATED_FIELD])
+    return summaries
+
+
+_cache: Optional[TranslationCache] = None
+
+
+def get_translation_cache() -> TranslationCache:
+    """
+    Récupère l'instance partagée du cache de traductions.
+
+    Returns:
+        Instance de TranslationCache
+    """
+    global _cache
+    if _cache is None:
+        _cache = TranslationCache()
+    return _cache
+
+
+def attach_translations(papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Ajoute aux articles leur résumé traduit dans la langue de sortie courante, s'il est en cache.
+
+    Sans effet sous cassette (caches isolés) : les prompts ne dépendent pas du cache.
+
+    Args:
+        papers: Articles au format des outils (modifiés sur place)
+
+    Returns:
+        Les mêmes articles
+    """
+    language = current_language()
+    if not language or not papers or caches_isolated():
+        return papers
+    try:
+        cached = get_translation_cache().get_many(papers, language)
+    except Exception as e:
+        print(f"⚠️ Impossible de lire le cache de traductions: {e}")
+        return papers
+    for paper in papers:
+        if paper.get("arxiv_id") in cached:
+            paper[TRANSLATED_FIELD] = cached[paper["arxiv_id"]]
+    return papers
+
+
+def record_translations(analysis_output: str, language: str) -> int:
+    """
+    Enregistre les résumés traduits d'une analyse sans jamais interrompre l'appelant.
+
+    Sans effet sous cassette (caches isolés).
+
+    Args:
+        analysis_output: Sortie brute de la tâche paper_analysis
+        language: Code de langue
+
+    Returns:
+        Nombre de résumés enregistrés
+    """
+    if caches_isolated():
+        return 0
+    try:
+        return get_translation_cache().add(extract_translated_summaries(analysis_output), language)
+    except Exception as e:
+        print(f"⚠️ Impossible d'enregistrer les traductions: {e}")
+        return 0
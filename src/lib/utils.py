@@ -7,11 +7,130 @@ Utilitaires généraux pour ArxivBuddy.
 
 import os
 import re
+import sys
 import json
+import shutil
+import tempfile
+import threading
+import contextlib
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterator, Optional, Tuple
 from datetime import datetime
 
+# Identifiants ArXiv : nouveau format (2107.12345v2) et ancien format (hep-th/9901001v1)
+ARXIV_ID_PATTERN = re.compile(r'(\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})(?:v(\d+))?')
+
+def get_cache_dir(*parts: str) -> str:
+    """
+    Retourne (et crée) un répertoire de cache d'ArxivBuddy.
+    
+    Args:
+        *parts: Sous-répertoires éventuels (ex: "pdf")
+        
+    Returns:
+        Chemin du répertoire, sous ARXIVBUDDY_CACHE_DIR (par défaut: ~/.cache/arxivbuddy)
+    """
+    base_dir = os.getenv("ARXIVBUDDY_CACHE_DIR", os.path.expanduser("~/.cache/arxivbuddy"))
+    path = os.path.join(base_dir, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+# Instances partagées adossées au répertoire de cache : (module de lib, attribut)
+_CACHE_SINGLETONS = (
+    ("paper_store", "_store"), ("paper_store", "_semantic_index"), ("translation_cache", "_cache"),
+    ("fulltext", "_store"), ("passage_index", "_index"), ("citation_graph", "_graph"),
+    ("archive", "_archive"), ("latency_planner", "_timings"),
+)
+_isolation_depth = 0
+_isolation_lock = threading.Lock()
+
+
+def _reset_cache_singletons() -> None:
+    """Oublie les instances partagées déjà créées : elles seront recréées dans le cache courant."""
+    package = __name__.rpartition(".")[0]
+    for name, attribute in _CACHE_SINGLETONS:
+        module = sys.modules.get(f"{package}.{name}")
+        if module is not None:
+            setattr(module, attribute, None)
+
+
+def caches_isolated() -> bool:
+    """Indique si les caches locaux sont isolés (cassette active, voir `isolated_caches`)."""
+    return _isolation_depth > 0
+
+
+@contextlib.contextmanager
+def isolated_caches() -> Iterator[str]:
+    """
+    Isole l'exécution des caches locaux de la machine (enregistrement et rejeu de cassettes).
+
+    Les résumés traduits, les articles connus, l'index sémantique, le graphe de
+    citations et les textes intégraux en cache entrent dans les sorties des
+    outils, donc dans les prompts : pour qu'un rejeu reproduise les appels LLM
+    enregistrés, l'exécution part d'un répertoire de cache vide, jeté à la
+    fin, et n'y enrichit ni les traductions ni la base d'articles.
+
+    Yields:
+        Répertoire de cache temporaire
+    """
+    global _isolation_depth
+    directory = tempfile.mkdtemp(prefix="arxivbuddy_isolated_")
+    previous = os.environ.get("ARXIVBUDDY_CACHE_DIR")
+    with _isolation_lock:
+        _isolation_depth += 1
+        os.environ["ARXIVBUDDY_CACHE_DIR"] = directory
+        _reset_cache_singletons()
+    try:
+        yield directory
+    finally:
+        with _isolation_lock:
+            _isolation_depth -= 1
+            if previous is None:
+                os.environ.pop("ARXIVBUDDY_CACHE_DIR", None)
+            else:
+                os.environ["ARXIVBUDDY_CACHE_DIR"] = previous
+            _reset_cache_singletons()
+        shutil.rmtree(directory, ignore_errors=True)
+
+def parse_arxiv_id(value: str) -> Tuple[str, Optional[int]]:
+    """
+    Extrait l'identifiant ArXiv et sa version d'un ID, d'une URL ou d'un entry_id.
+    
+    Args:
+        value: ID ou URL (ex: "http://arxiv.org/abs/2107.12345v2")
+        
+    Returns:
+        Tuple (identifiant sans version, version ou None)
+    """
+    match = ARXIV_ID_PATTERN.search(value or "")
+    if not match:
+        return (value or "").strip(), None
+    version = int(match.group(2)) if match.group(2) else None
+    return match.group(1), version
+
+def extract_json(text: str) -> Any:
+    """
+    Extrait l'objet JSON d'une réponse d'agent (éventuellement entourée de texte).
+    
+    Args:
+        text: Réponse brute
+        
+    Returns:
+        Objet JSON décodé, ou None si aucun objet valide n'est trouvé
+    """
+    start, end = (text or "").find("{"), (text or "").rfind("}")
+    if start < 0 or end <= start:
+        return None
+    candidate = text[start:end + 1]
+    try:
+        return json.loads(candidate)
+    except ValueError:
+        # Commentaires "// ..." tolérés dans les formats d'exemple des prompts
+        try:
+            return json.loads(re.sub(r"^\s*//.*$", "", candidate, flags=re.MULTILINE))
+        except ValueError:
+            return None
+
 def create_output_directory() -> str:
     """
     Crée un répertoire de sortie pour les résultats d'ArxivBuddy.
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Index vectoriel persistant (plus proches voisins approchés) pour ArxivBuddy.
+
+Les vecteurs sont ajoutés de façon incrémentale dans :
+- un fichier binaire float16 en ajout seul, mappé en mémoire, qui sert de
+  référence pour la recherche exacte et la reconstruction ;
+- un graphe HNSW (hnswlib, installé avec chromadb) pour des requêtes en
+  quelques millisecondes sur des centaines de milliers de vecteurs.
+
+Si hnswlib n'est pas disponible, ou dans le profil basse mémoire, la
+recherche exacte NumPy par blocs sur le fichier mappé est utilisée : le
+système peut alors récupérer les pages de l'index à tout moment. Le graphe
+HNSW chargé est libéré après une période d'inactivité (lib.memory_budget).
+
+Plusieurs processus (workers de la file, CLI) peuvent ajouter des vecteurs au
+même index : les ajouts sont sérialisés par un verrou de fichier, et les
+étiquettes (qui font foi pour le nombre de vecteurs) ne sont écrites qu'après
+les vecteurs, synchronisés sur disque.
+"""
+
+import os
+import json
+import threading
+import contextlib
+from typing import Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .memory_budget import UsageTracker, get_reaper, low_memory_enabled
+
+try:
+    import hnswlib
+except ImportError:  # pragma: no cover - dépend de l'installation de chromadb
+    hnswlib = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows : verrou limité au processus
+    fcntl = None
+
+# Largeur de recherche HNSW à la requête (64 donnait un rappel@10 insuffisant
+# au-delà de quelques centaines de milliers de vecteurs)
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "256"))
+
+
+class VectorIndex(UsageTracker):
+    """Index de vecteurs unitaires (similarité cosinus) persistant sur disque."""
+
+    def __init__(self, directory: str, dimension: int, m: int = 16,
+                 ef_construction: int = 200, ef_search: int = HNSW_EF_SEARCH,
+                 use_hnsw: Optional[bool] = None):
+        """
+        Initialise (ou recharge) l'index.
+
+        Args:
+            directory: Répertoire de l'index
+            dimension: Dimension des vecteurs
+            m: Nombre de voisins par nœud du graphe HNSW
+            ef_construction: Largeur de recherche à la construction
+            ef_search: Largeur de recherche à la requête (compromis rappel / latence)
+            use_hnsw: Si False, recherche exacte sur le fichier mappé, sans graphe en mémoire
+                (par défaut: désactivé dans le profil basse mémoire)
+        """
+        self.directory = directory
+        self.dimension = dimension
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.use_hnsw = (not low_memory_enabled()) if use_hnsw is None else use_hnsw
+        os.makedirs(directory, exist_ok=True)
+
+        self.vectors_path = os.path.join(directory, "vectors.f16")
+        self.labels_path = os.path.join(directory, "labels.i64")
+        self.hnsw_path = os.path.join(directory, "hnsw.bin")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.lock_path = os.path.join(directory, "index.lock")
+
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_file = None
+        self._hnsw = None
+        self._loaded_mtime = None
+        self._dirty = False
+        self._check_meta()
+        get_reaper().register(f"index:{directory}", self)
+
+    # ------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------
+    def _check_meta(self) -> None:
+        """Vérifie la cohérence de la dimension avec l'index existant."""
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("dimension") != self.dimension:
+                raise ValueError(
+                    f"Dimension incompatible avec l'index existant: {meta.get('dimension')} != {self.dimension}"
+                )
+        else:
+            self._write_meta()
+
+    def _write_meta(self) -> None:
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump({"dimension": self.dimension, "m": self.m,
+                       "ef_construction": self.ef_construction}, f)
+
+    @contextlib.contextmanager
+    def locked(self) -> Iterator[None]:
+        """
+        Verrou exclusif de l'index, entre threads et entre processus (réentrant).
+
+        À tenir autour d'une lecture suivie d'ajouts (ex : dernière étiquette
+        indexée puis ajout des suivantes) pour que deux processus n'ajoutent
+        pas les mêmes vecteurs.
+        """
+        with self._lock:
+            if self._lock_depth == 0 and fcntl is not None:
+                self._lock_file = open(self.lock_path, "a+")
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and self._lock_file is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def __len__(self) -> int:
+        if not os.path.exists(self.labels_path):
+            return 0
+        return os.path.getsize(self.labels_path) // 8
+
+    def _vectors(self) -> np.ndarray:
+        """Matrice float16 (n, dimension) mappée en mémoire."""
+        count = len(self)
+        if not count:
+            return np.zeros((0, self.dimension), dtype=np.float16)
+        return np.memmap(self.vectors_path, dtype=np.float16, mode="r", shape=(count, self.dimension))
+
+    def _labels(self) -> np.ndarray:
+        """Étiquettes des vecteurs, dans l'ordre d'ajout."""
+        if not len(self):
+            return np.zeros(0, dtype=np.int64)
+        return np.fromfile(self.labels_path, dtype=np.int64)
+
+    def max_label(self) -> int:
+        """Plus grande étiquette indexée (0 si l'index est vide)."""
+        labels = self._labels()
+        return int(labels.max()) if len(labels) else 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._hnsw is not None
+
+    def _load_hnsw(self):
+        """Charge le graphe HNSW (ou le recharge s'il a été modifié par un autre processus)."""
+        if hnswlib is None or not self.use_hnsw:
+            return None
+        self._touch()
+        mtime = os.path.getmtime(self.hnsw_path) if os.path.exists(self.hnsw_path) else None
+        if self._hnsw is not None and mtime == self._loaded_mtime:
+            return self._hnsw
+
+        index = hnswlib.Index(space="ip", dim=self.dimension)
+        capacity = max(len(self), 1024)
+        if mtime is not None:
+            index.load_index(self.hnsw_path, max_elements=capacity)
+        else:
+            index.init_index(max_elements=capacity, ef_construction=self.ef_construction, M=self.m)
+        # Vecteurs ajoutés sans graphe (profil basse mémoire) : rattrapage dans l'ordre d'ajout
+        indexed = index.get_current_count()
+        if indexed < len(self):
+            index.resize_index(max(len(self), index.get_max_elements()))
+            vectors, labels = self._vectors(), self._labels()
+            for start in range(indexed, len(labels), 10000):
+                index.add_items(np.asarray(vectors[start:start + 10000], dtype=np.float32),
+                                labels[start:start + 10000])
+            self._dirty = True
+        index.set_ef(self.ef_search)
+        self._hnsw = index
+        self._loaded_mtime = mtime
+        return index
+
+    def unload(self) -> bool:
+        """
+        Libère le graphe HNSW (rechargé depuis le disque à la prochaine recherche).
+
+        Returns:
+            True si un graphe chargé a été libéré
+        """
+        with self._lock:
+            if self._hnsw is None:
+                return False
+            # Un graphe modifié mais non enregistré serait perdu
+            if self._dirty:
+                self.save()
+            self._hnsw = None
+            self._loaded_mtime = None
+            return True
+
+    def save(self) -> None:
+        """Enregistre le graphe HNSW sur disque."""
+        with self.locked():
+            if self._hnsw is None:
+                return
+            tmp_path = f"{self.hnsw_path}.part"
+            self._hnsw.save_index(tmp_path)
+            os.replace(tmp_path, self.hnsw_path)
+            self._loaded_mtime = os.path.getmtime(self.hnsw_path)
+            self._dirty = False
+
+    # ------------------------------------------------------------------
+    # Ajout et recherche
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def add(self, labels: Sequence[int], vectors: np.ndarray, save: bool = True) -> None:
+        """
+        Ajoute des vecteurs à l'index.
+
+        Args:
+            labels: Étiquettes entières (uniques) des vecteurs
+            vectors: Matrice (n, dimension)
+            save: Si True, enregistre le graphe HNSW après l'ajout
+        """
+        vectors = self._normalize(vectors)
+        labels = np.asarray(labels, dtype=np.int64)
+        if len(labels) != len(vectors):
+            raise ValueError("Le nombre d'étiquettes ne correspond pas au nombre de vecteurs")
+        if not len(labels):
+            return
+
+        with self.locked():
+            # Vecteurs d'un ajout interrompu avant l'écriture de ses étiquettes : écartés
+            count = len(self)
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(count * self.dimension * 2)
+                f.write(vectors.astype(np.float16).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            # Les étiquettes font foi : écrites seulement une fois les vecteurs sur disque
+            with open(self.labels_path, "ab") as f:
+                f.truncate(count * 8)
+                f.write(labels.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            index = self._load_hnsw()
+            if index is not None:
+                needed = index.get_current_count() + len(labels)
+                if needed > index.get_max_elements():
+                    index.resize_index(max(needed, index.get_max_elements() * 2))
+                index.add_items(vectors, labels)
+                self._dirty = True
+                if save:
+                    self.save()
+
+    def search(self, queries: np.ndarray, k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recherche approchée des k plus proches voisins.
+
+        Args:
+            queries: Vecteur(s) de requête (dimension) ou (n, dimension)
+            k: Nombre de voisins
+
+        Returns:
+            Tuple (étiquettes (n, k), similarités cosinus (n, k))
+        """
+        queries = self._normalize(queries)
+        count = len(self)
+        if not count:
+            empty = np.zeros((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        k = min(k, count)
+
+        with self._lock:
+            index = self._load_hnsw()
+            if index is None:
+                return self.exact_search(queries, k)
+            k = min(k, index.get_current_count())
+            index.set_ef(max(self.ef_search, k))
+            labels, distances = index.knn_query(queries, k=k)
+        # Espace "ip" : distance = 1 - produit scalaire
+        return labels.astype(np.int64), (1.0 - distances).astype(np.float32)
+
+    def exact_search(self, queries: np.ndarray, k: int = 10,
+                     block_size: int = 8192) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recherche exacte par produit scalaire NumPy (référence pour le rappel).
+
+        Args:
+            queries: Vecteur(s) de requête
+            k: Nombre de voisins
+            block_size: Nombre de vecteurs convertis en float32 à la fois (borne la mémoire temporaire)
+
+        Returns:
+            Tuple (étiquettes (n, k), similarités cosinus (n, k))
+        """
+        queries = self._normalize(queries)
+        vectors = self._vectors()
+        all_labels = self._labels()
+        k = min(k, len(vectors))
+
+        best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), k), dtype=np.int64)
+        for start in range(0, len(vectors), block_size):
+            block = np.asarray(vectors[start:start + block_size], dtype=np.float32)
+            scores = queries @ block.T
+            merged_scores = np.concatenate([best_scores, scores], axis=1)
+            merged_rows = np.concatenate(
+                [best_rows, np.broadcast_to(np.arange(start, start + len(block)), scores.shape)], axis=1
+            )
+            top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(merged_scores, top, axis=1)
+            best_rows = np.take_along_axis(merged_rows, top, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        return all_labels[best_rows], best_scores
+
+    def rebuild(self) -> None:
+        """Reconstruit le graphe HNSW à partir du fichier de vecteurs."""
+        if hnswlib is None:
+            return
+        with self._lock:
+            vectors = self._vectors()
+            labels = self._labels()
+            index = hnswlib.Index(space="ip", dim=self.dimension)
+            index.init_index(max_elements=max(len(labels), 1024),
+                             ef_construction=self.ef_construction, M=self.m)
+            for start in range(0, len(labels), 10000):
+                index.add_items(np.asarray(vectors[start:start + 10000], dtype=np.float32),
+                                labels[start:start + 10000])
+            index.set_ef(self.ef_search)
+            self._hnsw = index
+            self.save()
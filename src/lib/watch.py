@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Abonnements à une question permanente (`arxivbuddy watch`).
+
+Un abonnement conserve une requête et un filigrane : la date de soumission du
+dernier article vu. Chaque exécution ne demande à ArXiv que les articles
+soumis depuis le filigrane (avec une fenêtre de recouvrement pour les
+annonces tardives), du plus ancien au plus récent, écarte ceux déjà présents
+dans le digest, résume localement les seuls nouveaux articles et les ajoute au
+digest cumulé. Le filigrane n'avance que jusqu'au dernier article parcouru :
+les articles au-delà du plafond d'une exécution sont repris par la suivante.
+Le coût d'une mise à jour dépend du nombre de nouveaux articles, pas du sujet.
+"""
+
+import os
+import json
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import arxiv
+
+from .arxiv_api import MAX_PAGES, iter_results, page_size_for
+from .dedup import NearDuplicateFilter
+from .paper import Paper
+from .paper_store import record_papers
+from .sqlite_store import get_database
+from .summarizer import Summarizer
+from .translation_cache import get_translation_cache
+from .utils import extract_keywords, get_cache_dir, parse_arxiv_id
+
+# Les articles peuvent être annoncés quelques jours après leur soumission
+OVERLAP_DAYS = float(os.getenv("WATCH_OVERLAP_DAYS", "3"))
+# Période couverte par la première exécution d'un abonnement
+INITIAL_DAYS = float(os.getenv("WATCH_INITIAL_DAYS", "7"))
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class WatchStore:
+    """Abonnements et entrées de leurs digests (SQLite)."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialise la base des abonnements.
+
+        Args:
+            db_path: Chemin de la base (par défaut: get_cache_dir("watch")/watch.db)
+        """
+        self.db_path = db_path or os.path.join(get_cache_dir("watch"), "watch.db")
+        self.database = get_database(self.db_path)
+        with self.database.transaction() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS subscriptions (
+                    name TEXT PRIMARY KEY,
+                    question TEXT NOT NULL,
+                    search_query TEXT NOT NULL,
+                    categories TEXT NOT NULL,
+                    max_results INTEGER NOT NULL,
+                    level TEXT NOT NULL,
+                    watermark TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_run REAL
+                )
+                """
+            )
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS digest_entries (
+                    name TEXT NOT NULL,
+                    paper_id TEXT NOT NULL,
+                    version INTEGER,
+                    published TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    authors TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    added REAL NOT NULL,
+                    PRIMARY KEY (name, paper_id)
+                )
+                """
+            )
+
+    _COLUMNS = ("name", "question", "search_query", "categories", "max_results", "level",
+                "watermark", "created", "last_run")
+
+    def _row_to_subscription(self, row) -> Dict[str, Any]:
+        subscription = dict(zip(self._COLUMNS, row))
+        subscription["categories"] = json.loads(subscription["categories"])
+        return subscription
+
+    def add(self, name: str, question: str, categories: Optional[List[str]] = None,
+            max_results: int = 20, level: str = "medium", since_days: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Crée (ou remplace) un abonnement.
+
+        Args:
+            name: Nom de l'abonnement
+            question: Question permanente
+            categories: Catégories ArXiv à surveiller (optionnel)
+            max_results: Nombre maximal de nouveaux articles par exécution
+            level: Niveau de simplification des résumés
+            since_days: Période couverte par la première exécution (jours, par défaut: WATCH_INITIAL_DAYS)
+
+        Returns:
+            Abonnement créé
+        """
+        search_query = " ".join(extract_keywords(question, max_keywords=6)) or question
+        since_days = INITIAL_DAYS if since_days is None else since_days
+        watermark = (_utc_now() - timedelta(days=since_days)).isoformat()
+        self.database.execute(
+            "INSERT OR REPLACE INTO subscriptions VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL)",
+            (name, question, search_query, json.dumps(categories or []), max_results, level,
+             watermark, time.time())
+        )
+        self.database.execute("DELETE FROM digest_entries WHERE name = ?", (name,))
+        return self.get(name)
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Récupère un abonnement (None s'il n'existe pas)."""
+        rows = self.database.query(f"SELECT {', '.join(self._COLUMNS)} FROM subscriptions WHERE name = ?",
+                                   (name,))
+        return self._row_to_subscription(rows[0]) if rows else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Liste les abonnements avec le nombre d'articles de leur digest."""
+        subscriptions = [
+            self._row_to_subscription(row) for row in
+            self.database.query(f"SELECT {', '.join(self._COLUMNS)} FROM subscriptions ORDER BY name")
+        ]
+        counts = dict(self.database.query("SELECT name, COUNT(*) FROM digest_entries GROUP BY name"))
+        for subscription in subscriptions:
+            subscription["papers"] = counts.get(subscription["name"], 0)
+        return subscriptions
+
+    def remove(self, name: str) -> bool:
+        """Supprime un abonnement et son digest."""
+        removed = self.database.execute("DELETE FROM subscriptions WHERE name = ?", (name,))
+        self.database.execute("DELETE FROM digest_entries WHERE name = ?", (name,))
+        return removed > 0
+
+    def seen_ids(self, name: str) -> set:
+        """Identifiants des articles déjà présents dans le digest."""
+        return {row[0] for row in self.database.query(
+            "SELECT paper_id FROM digest_entries WHERE name = ?", (name,))}
+
+    def count_since(self, name: str, day: str) -> int:
+        """Nombre d'articles du digest soumis depuis une date (YYYY-MM-DD)."""
+        rows = self.database.query(
+            "SELECT COUNT(*) FROM digest_entries WHERE name = ? AND published >= ?", (name, day))
+        return rows[0][0] if rows else 0
+
+    def record_run(self, name: str, entries: List[tuple], watermark: str) -> None:
+        """
+        Ajoute les nouvelles entrées au digest et avance le filigrane (une transaction).
+
+        Args:
+            name: Nom de l'abonnement
+            entries: Tuples (paper_id, version, published, title, authors, url, summary)
+            watermark: Nouveau filigrane (date ISO de la soumission du dernier article parcouru)
+        """
+        now = time.time()
+        with self.database.transaction() as connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO digest_entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(name, *entry, now) for entry in entries]
+            )
+            connection.execute(
+                "UPDATE subscriptions SET watermark = MAX(watermark, ?), last_run = ? WHERE name = ?",
+                (watermark, now, name)
+            )
+
+    def entries(self, name: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Entrées du digest, des plus récentes aux plus anciennes."""
+        sql = ("SELECT paper_id, version, published, title, authors, url, summary, added "
+               "FROM digest_entries WHERE name = ? ORDER BY published DESC, added DESC")
+        params: tuple = (name,)
+        if limit:
+            sql += " LIMIT ?"
+            params = (name, limit)
+        return [
+            {"arxiv_id": paper_id, "version": version, "published": published, "title": title,
+             "authors": json.loads(authors), "url": url, "summary": summary, "added": added}
+            for paper_id, version, published, title, authors, url, summary, added
+            in self.database.query(sql, params)
+        ]
+
+
+class Watcher:
+    """Exécute les abonnements et produit leurs digests."""
+
+    def __init__(self, store: Optional[WatchStore] = None, summarizer: Optional[Summarizer] = None):
+        self.store = store or WatchStore()
+        self.summarizer = summarizer or Summarizer()
+
+    def run(self, name: str, max_pages: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Met à jour un abonnement avec les articles soumis depuis son filigrane.
+
+        Args:
+            name: Nom de l'abonnement
+            max_pages: Budget de pages ArXiv (par défaut: ARXIV_MAX_PAGES)
+
+        Returns:
+            Dictionnaire (new_papers, more, watermark, elapsed) ; `more` indique que le
+            plafond de l'abonnement a été atteint (d'autres articles attendent l'exécution suivante)
+
+        Raises:
+            KeyError: Abonnement inconnu
+        """
+        subscription = self.store.get(name)
+        if subscription is None:
+            raise KeyError(f"Abonnement inconnu: {name}")
+        started = time.perf_counter()
+
+        watermark = datetime.fromisoformat(subscription["watermark"])
+        start = watermark - timedelta(days=OVERLAP_DAYS)
+        seen = self.store.seen_ids(name)
+        dedup = NearDuplicateFilter()
+        last_fetched = [watermark]
+
+        def is_new(result: arxiv.Result) -> bool:
+            # Résultats croissants : le dernier parcouru borne ce qui a été vu
+            last_fetched[0] = max(last_fetched[0], result.published.astimezone(timezone.utc))
+            return parse_arxiv_id(result.entry_id)[0] not in seen and dedup.accept(result)
+
+        # Les articles déjà vus de la fenêtre de recouvrement ne consomment pas le budget de pages
+        page_size = page_size_for(subscription["max_results"], filtered=True)
+        overlap_pages = math.ceil(self.store.count_since(name, start.strftime("%Y-%m-%d")) / page_size)
+
+        # Seuls les articles soumis depuis le filigrane (moins le recouvrement) sont demandés,
+        # du plus ancien au plus récent : un plafond atteint laisse les plus récents à la suite
+        results = list(iter_results(
+            subscription["search_query"], subscription["max_results"],
+            sort_by=arxiv.SortCriterion.SubmittedDate, sort_order=arxiv.SortOrder.Ascending,
+            categories=subscription["categories"] or None,
+            start_date=start,
+            predicate=is_new, max_pages=(max_pages or MAX_PAGES) + overlap_pages
+        ))
+
+        papers = [Paper.from_result(result) for result in results]
+        entries = []
+        if papers:
+            record_papers(papers)
+            summaries = self.summarizer.summarize_papers(
+                [paper.to_dict() for paper in papers], level=subscription["level"],
+                query=subscription["question"]
+            )["paper_summaries"]
+            # Les résumés déjà traduits par le pipeline complet sont préférés
+            try:
+                translated = get_translation_cache().get_many(papers, "fr")
+            except Exception:
+                translated = {}
+            for paper, summary in zip(papers, summaries):
+                entries.append((
+                    paper.arxiv_id, paper.version, paper.published, paper.title,
+                    json.dumps(list(paper.authors), ensure_ascii=False), paper.url,
+                    translated.get(paper.arxiv_id) or summary["summary"]
+                ))
+        # Le filigrane n'avance que jusqu'au dernier article parcouru, jamais au-delà
+        watermark = last_fetched[0]
+
+        self.store.record_run(name, entries, watermark.isoformat())
+        return {
+            "new_papers": len(entries),
+            "more": len(results) >= subscription["max_results"],
+            "watermark": watermark.isoformat(),
+            "elapsed": time.perf_counter() - started,
+        }
+
+    def digest_markdown(self, name: str, limit: int = 100) -> str:
+        """
+        Met en forme le digest cumulé d'un abonnement.
+
+        Args:
+            name: Nom de l'abonnement
+            limit: Nombre maximal d'articles affichés
+
+        Returns:
+            Document Markdown
+        """
+        subscription = self.store.get(name)
+        if subscription is None:
+            raise KeyError(f"Abonnement inconnu: {name}")
+        entries = self.store.entries(name, limit=limit)
+        lines = [
+            f"### Veille : {subscription['name']}",
+            f"*{subscription['question']}*",
+            "",
+            f"_{len(entries)} articles, dernière soumission vue : {subscription['watermark'][:16]} UTC_",
+            "",
+            "---",
+        ]
+        current_day = None
+        for entry in entries:
+            if entry["published"] != current_day:
+                current_day = entry["published"]
+                lines.extend(["", f"#### 📅 {current_day}"])
+            authors = ", ".join(entry["authors"][:3])
+            lines.extend([
+                "",
+                f"**{entry['title']}** — {authors}",
+                f"<{entry['url']}>",
+                "",
+                entry["summary"],
+            ])
+        return "\n".join(lines) + "\n"
+
+
+_store: Optional[WatchStore] = None
+
+
+def get_watch_store() -> WatchStore:
+    """
+    Récupère l'instance partagée de la base des abonnements.
+
+    Returns:
+        Instance de WatchStore
+    """
+    global _store
+    if _store is None:
+        _store = WatchStore()
+    return _store
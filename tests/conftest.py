@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Configuration des tests : modules purs Python de lib, sans CrewAI ni réseau.
+
+Usage:
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Cache d'ArxivBuddy isolé dans un répertoire temporaire."""
+    monkeypatch.setenv("ARXIVBUDDY_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
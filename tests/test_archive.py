@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests de l'archive des réponses (lib.archive)."""
+
+import pytest
+
+from lib import archive as archive_module
+from lib.archive import ResultArchive, cited_papers, fts_query
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return ResultArchive(str(tmp_path / "archive"))
+
+
+def test_round_trip(archive):
+    answer = "Les modèles de diffusion pour les protéines (voir 2401.00001v2 et arxiv.org/abs/hep-th/9901001)."
+    result_id = archive.add("diffusion protéines", answer, papers=["2312.00009"], model="test/model",
+                            level="medium", seconds=1.5)
+    entry = archive.get(result_id)
+    assert entry["answer"] == answer
+    assert entry["query"] == "diffusion protéines"
+    assert entry["model"] == "test/model"
+    assert entry["papers"] == ["2312.00009", "2401.00001", "hep-th/9901001"]
+    assert entry["metadata"] == {"level": "medium", "seconds": 1.5}
+    assert archive.get(result_id + 1) is None
+    assert [item["id"] for item in archive.recent()] == [result_id]
+
+
+def test_full_text_search(archive):
+    ids = archive.add_many([
+        {"query": "graph neural networks", "answer": "Les réseaux de neurones sur graphes propagent des messages."},
+        {"query": "diffusion", "answer": "Les modèles de diffusion génèrent des structures de protéines."},
+        {"query": "protéines", "answer": "Repliement des protéines et alignements multiples."},
+    ])
+    assert len(ids) == 3
+    if not archive.full_text:
+        pytest.skip("FTS5 indisponible")
+    # Recherche dans les réponses, accents ignorés, dernier mot en préfixe
+    results = archive.search("proteines")
+    assert {result["id"] for result in results} == {ids[1], ids[2]}
+    # La question pèse double : la réponse dont la question correspond vient en premier
+    assert results[0]["id"] == ids[2]
+    assert "protéines" in results[0]["snippet"]
+    assert [result["id"] for result in archive.search("mess")] == [ids[0]]
+    assert archive.search("!!") == []
+
+
+def test_segments_are_rotated(archive, monkeypatch):
+    monkeypatch.setattr(archive_module, "SEGMENT_BYTES", 1)
+    first = archive.add("première", "réponse " * 50)
+    second = archive.add("seconde", "autre réponse " * 50)
+    assert archive.stats()["segments"] == 2
+    assert archive.get(first)["query"] == "première"
+    assert archive.get(second)["answer"].startswith("autre réponse")
+
+
+def test_corrupted_record_is_detected(archive):
+    result_id = archive.add("question", "réponse " * 20)
+    path = archive._segment_path(0)
+    data = bytearray(open(path, "rb").read())
+    data[12] ^= 0xFF
+    open(path, "wb").write(bytes(data))
+    with pytest.raises(ValueError):
+        archive.get(result_id)
+
+
+def test_helpers():
+    assert fts_query("graph neural") == '"graph" "neural"*'
+    assert fts_query("?!") == ""
+    assert cited_papers("2401.00001, 2401.00001v3 puis 2402.12345.") == ["2401.00001", "2402.12345"]
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests de la construction des requêtes ArXiv et du parcours paginé (lib.arxiv_api)."""
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+arxiv_api = pytest.importorskip("lib.arxiv_api")
+
+
+def test_date_window_is_rounded_to_the_day():
+    assert arxiv_api.date_window(None) is None
+    assert arxiv_api.date_window(0) is None
+    start, end = arxiv_api.date_window(7)
+    assert (start.hour, start.minute, start.tzinfo) == (0, 0, timezone.utc)
+    assert (end.hour, end.minute) == (23, 59)
+    assert end.date() - start.date() == timedelta(days=7)
+    # Bornes stables dans la journée : même requête, mêmes clés de cache
+    assert arxiv_api.date_window(7) == (start, end)
+
+
+def test_build_query_filters():
+    assert arxiv_api.build_query("all:llm") == "all:llm"
+    assert arxiv_api.build_query("all:llm", ["cs.CL", "cs.LG"]) == "(all:llm) AND (cat:cs.CL OR cat:cs.LG)"
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    end = datetime(2024, 1, 31, 23, 59, tzinfo=timezone.utc)
+    assert (arxiv_api.build_query("all:llm", start_date=start, end_date=end)
+            == "(all:llm) AND submittedDate:[202401010000 TO 202401312359]")
+    # Sans date de début, la borne inférieure est ouverte ; les dates avec fuseau sont converties en UTC
+    paris = timezone(timedelta(hours=1))
+    assert (arxiv_api.build_query("all:llm", end_date=datetime(2024, 2, 1, 0, 30, tzinfo=paris))
+            == "(all:llm) AND submittedDate:[190001010000 TO 202401312330]")
+
+
+def test_build_query_with_date_window_is_stable():
+    window = arxiv_api.date_window(30)
+    assert arxiv_api.build_query("all:rag", None, *window) == arxiv_api.build_query("all:rag", None, *window)
+    assert arxiv_api.build_query("all:rag", None, *window).endswith("2359]")
+
+
+def test_page_size_for():
+    assert arxiv_api.page_size_for(5) == 5
+    assert arxiv_api.page_size_for(5, filtered=True) == 10
+    assert arxiv_api.page_size_for(1000) == arxiv_api.PAGE_SIZE
+    assert arxiv_api.page_size_for(0) == 1
+
+
+def test_iter_results_filters_and_stops_early(monkeypatch):
+    base = datetime(2024, 1, 15, tzinfo=timezone.utc)
+    results = [SimpleNamespace(entry_id=f"http://arxiv.org/abs/2401.0000{n}v1", published=base + timedelta(days=n))
+               for n in range(8)]
+    pulled = []
+
+    class FakeClient:
+        def results(self, search):
+            pulled.append(search.query)
+            for result in results:
+                pulled.append(result)
+                yield result
+
+    monkeypatch.setattr(arxiv_api, "get_arxiv_client", lambda page_size: FakeClient())
+    found = list(arxiv_api.iter_results("all:llm", 2, start_date=base + timedelta(days=2),
+                                        predicate=lambda result: not result.entry_id.endswith("3v1")))
+    assert [result.entry_id[-7:] for result in found] == ["00002v1", "00004v1"]
+    assert pulled[0].startswith("(all:llm) AND submittedDate:[202401170000 TO ")
+    # La recherche s'arrête dès que deux résultats sont retenus
+    assert len(pulled) == 1 + 5
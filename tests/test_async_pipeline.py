@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests des variantes asynchrones des outils et de leur usage par le pipeline (lib.async_pipeline)."""
+
+import json
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+async_pipeline = pytest.importorskip("lib.async_pipeline")
+
+
+class FakeTools:
+    """Faux module lib.tools : chaque outil renvoie la réponse prévue et enregistre son thread."""
+
+    def __init__(self, **responses):
+        self.calls = []
+        for name in ("search_arxiv", "get_paper_sections", "retrieve_passages",
+                     "semantic_search_papers", "related_papers"):
+            setattr(self, name, SimpleNamespace(func=self._tool(name, responses.get(name, {}))))
+
+    def _tool(self, name, response):
+        def func(*args):
+            self.calls.append((name, args, threading.current_thread().name))
+            return json.dumps(response)
+        return func
+
+
+@pytest.fixture
+def fake_tools(monkeypatch):
+    def install(**responses):
+        tools = FakeTools(**responses)
+        monkeypatch.setattr(async_pipeline, "_tools", lambda: tools)
+        return tools
+    return install
+
+
+def test_tool_variants_run_in_their_pools(fake_tools):
+    tools = fake_tools(semantic_search_papers={"papers": []})
+
+    async def main():
+        await async_pipeline.asemantic_search_papers("question", 3)
+        await async_pipeline.asearch_arxiv("llm", 2)
+
+    asyncio.run(main())
+    assert [(name, args) for name, args, _ in tools.calls] == [("semantic_search_papers", ("question", 3)),
+                                                               ("search_arxiv", ("llm", 2, None))]
+    assert tools.calls[0][2].startswith("arxivbuddy-embedding")
+    assert tools.calls[1][2].startswith("arxivbuddy-io")
+
+
+def test_fulltext_evidence_prefers_passages(fake_tools):
+    tools = fake_tools(retrieve_passages={"passages": [{"section": "results", "text": "95 % de précision",
+                                                        "score": 0.9, "arxiv_id": "2401.00001"}]})
+    evidence = asyncio.run(async_pipeline.afulltext_evidence("précision ?", "2401.00001", passages=2))
+    assert evidence == {"full_text_passages": [{"section": "results", "text": "95 % de précision"}]}
+    assert [name for name, _, _ in tools.calls] == ["retrieve_passages"]
+    assert asyncio.run(async_pipeline.afulltext_evidence("précision ?", "2401.00001", passages=0)) == {}
+
+
+def test_fulltext_evidence_falls_back_to_sections(fake_tools):
+    tools = fake_tools(retrieve_passages={"error": "index indisponible"},
+                       get_paper_sections={"sections": {"conclusion": "Conclusion."}})
+    evidence = asyncio.run(async_pipeline.afulltext_evidence("précision ?", "2401.00001"))
+    assert evidence == {"full_text_sections": {"conclusion": "Conclusion."}}
+    assert [name for name, _, _ in tools.calls] == ["retrieve_passages", "get_paper_sections"]
+
+
+def test_local_papers_merge_both_sources(fake_tools):
+    tools = fake_tools(
+        semantic_search_papers={"papers": [{"arxiv_id": "2401.00001", "title": "Déjà trouvé"},
+                                           {"arxiv_id": "2301.00005", "title": "Corpus", "abstract": "..."}]},
+        related_papers={"papers": [{"arxiv_id": "2301.00005", "title": "Corpus"},
+                                   {"arxiv_id": "2201.00007", "title": "Cité"}]},
+    )
+    papers = asyncio.run(async_pipeline.alocal_papers("question", ["2401.00001"], max_results=4))
+    assert [(paper["arxiv_id"], paper["source"]) for paper in papers] == [
+        ("2301.00005", "semantic_search_papers"), ("2201.00007", "related_papers")]
+    assert ("related_papers", ("2401.00001", 1, 4)) in [(name, args) for name, args, _ in tools.calls]
+    assert asyncio.run(async_pipeline.alocal_papers("question", [], max_results=0)) == []
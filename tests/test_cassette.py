@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests de l'enregistrement et du rejeu (lib.cassette) et de l'isolation des caches locaux."""
+
+import os
+import json
+import asyncio
+
+import pytest
+
+from lib import translation_cache
+from lib.translation_cache import (TRANSLATED_FIELD, attach_translations, get_translation_cache, output_language,
+                                   record_translations)
+from lib.utils import caches_isolated, isolated_caches
+
+PAPER = {"arxiv_id": "2401.00001", "title": "Protein language models", "abstract": "We study..."}
+
+
+def analysis(summary):
+    return json.dumps({"paper_analyses": [{"arxiv_id": PAPER["arxiv_id"], TRANSLATED_FIELD: summary}]},
+                      ensure_ascii=False)
+
+
+def test_isolated_caches_use_a_throwaway_directory(cache_dir):
+    record_translations(analysis("Résumé en cache"), "fr")
+    with output_language("fr"):
+        assert attach_translations([dict(PAPER)])[0][TRANSLATED_FIELD] == "Résumé en cache"
+
+    with isolated_caches() as directory:
+        assert caches_isolated()
+        assert os.environ["ARXIVBUDDY_CACHE_DIR"] == directory
+        # Les instances partagées sont recréées dans le répertoire isolé
+        assert translation_cache._cache is None
+        with output_language("fr"):
+            assert TRANSLATED_FIELD not in attach_translations([dict(PAPER)])[0]
+        assert record_translations(analysis("Autre résumé"), "fr") == 0
+
+    assert not caches_isolated()
+    assert not os.path.exists(directory)
+    assert os.environ["ARXIVBUDDY_CACHE_DIR"] == str(cache_dir)
+    assert get_translation_cache().get_many([dict(PAPER)], "fr") == {PAPER["arxiv_id"]: "Résumé en cache"}
+
+
+def test_http_keys_ignore_date_bounds():
+    cassette = pytest.importorskip("lib.cassette")
+    first = cassette._http_key("GET", "http://export.arxiv.org/api/query",
+                               {"search_query": "all:llm AND submittedDate:[202401010000 TO 202401312359]"})
+    second = cassette._http_key("GET", "http://export.arxiv.org/api/query",
+                                {"search_query": "all:llm AND submittedDate:[202402010000 TO 202402292359]"})
+    assert first == second
+    assert "submittedDate" in first
+    other = cassette._http_key("GET", "http://export.arxiv.org/api/query", {"search_query": "all:rag"})
+    assert other != first
+
+
+def fake_response(litellm, content):
+    return litellm.ModelResponse(choices=[{"index": 0, "finish_reason": "stop",
+                                           "message": {"role": "assistant", "content": content}}])
+
+
+def pipeline(litellm):
+    """Pipeline réduit : sortie d'outil (avec traductions en cache) → prompt → LLM → traductions."""
+    with output_language("fr"):
+        papers = attach_translations([dict(PAPER)])
+    response = litellm.completion(model="fake/model", messages=[{"role": "user", "content": json.dumps(papers)}])
+    content = response.choices[0].message.content
+    record_translations(content, "fr")
+    return content
+
+
+def test_record_then_replay_on_the_same_machine(tmp_path, monkeypatch):
+    cassette_module = pytest.importorskip("lib.cassette")
+    litellm = pytest.importorskip("litellm")
+    calls = []
+
+    def completion(**kwargs):
+        calls.append(kwargs)
+        return fake_response(litellm, analysis("Modèles de langage pour les protéines"))
+
+    monkeypatch.setattr(litellm, "completion", completion)
+    path = str(tmp_path / "run.json")
+    with cassette_module.Cassette(path, mode="record"):
+        recorded = pipeline(litellm)
+    assert len(calls) == 1
+
+    # L'enregistrement n'a pas rempli le cache de la machine : le rejeu construit le même prompt
+    with cassette_module.Cassette(path, mode="replay", latency="zero"):
+        assert pipeline(litellm) == recorded
+    assert len(calls) == 1
+
+
+def test_replay_of_async_calls(tmp_path, monkeypatch):
+    cassette_module = pytest.importorskip("lib.cassette")
+    litellm = pytest.importorskip("litellm")
+
+    async def acompletion(**kwargs):
+        return fake_response(litellm, "réponse asynchrone")
+
+    monkeypatch.setattr(litellm, "acompletion", acompletion)
+    messages = [{"role": "user", "content": "question"}]
+    path = str(tmp_path / "async.json")
+    with cassette_module.Cassette(path, mode="record"):
+        asyncio.run(litellm.acompletion(model="fake/model", messages=messages))
+
+    async def failing(**kwargs):
+        raise AssertionError("appel réseau pendant le rejeu")
+
+    monkeypatch.setattr(litellm, "acompletion", failing)
+    with cassette_module.Cassette(path, mode="replay", latency="zero"):
+        response = asyncio.run(litellm.acompletion(model="fake/model", messages=messages))
+    assert response.choices[0].message.content == "réponse asynchrone"
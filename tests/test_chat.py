@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests de l'aiguillage des questions de suivi et des sessions de chat (lib.chat)."""
+
+import pytest
+
+from lib.chat import ChatSession, SessionStore, classify_followup, resolve_paper_reference
+
+PAPERS = [{"arxiv_id": f"2401.0000{n}", "title": f"Article {n}"} for n in range(1, 6)]
+
+
+@pytest.mark.parametrize("question, route, indices", [
+    ("Que propose le deuxième article ?", "paper", [1]),
+    ("What does the last paper conclude?", "paper", [4]),
+    ("Détaille [3]", "paper", [2]),
+    ("Explique la méthode de 2401.00004", "paper", [3]),
+    ("Compare les deux premiers articles", "papers", [0, 1]),
+    ("Compare the first and the third paper", "papers", [0, 2]),
+    ("Résume les articles 2 à 4", "papers", [1, 2, 3]),
+    ("the last two papers", "papers", [3, 4]),
+    ("Quelles limites communes ressortent ?", "context", []),
+    ("Trouve-moi d'autres articles comme le deuxième", "search", []),
+    ("find newer papers on this topic", "search", []),
+    ("nouvelle recherche sur les GNN", "search", []),
+])
+def test_classify_followup(question, route, indices):
+    assert classify_followup(question, PAPERS) == (route, indices)
+
+
+def test_without_papers_every_question_is_a_search():
+    assert classify_followup("Que propose le deuxième article ?", []) == ("search", [])
+
+
+def test_out_of_range_references_are_ignored():
+    assert classify_followup("Que dit le dixième article ?", PAPERS) == ("context", [])
+    assert resolve_paper_reference("Compare [1] et [2]", PAPERS) is None
+
+
+def test_sessions_round_trip(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.db"))
+    session = ChatSession(query="GNN", papers=PAPERS[:2], answer="Réponse")
+    session.add_turn("user", "Et le premier ?")
+    store.save(session)
+    loaded = store.load(session.session_id)
+    assert loaded.papers == PAPERS[:2]
+    assert loaded.turns == [{"role": "user", "content": "Et le premier ?"}]
+    assert [row[0] for row in store.list()] == [session.session_id]
+    assert store.delete(session.session_id)
+    assert store.load(session.session_id) is None
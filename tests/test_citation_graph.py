@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests du graphe local des citations (lib.citation_graph)."""
+
+import threading
+
+import pytest
+
+from lib.citation_graph import CitationGraph, TitleMatcher, extract_citations
+from lib.paper_store import get_paper_store
+
+# 11 et 12 citent les mêmes références (couplage) ; 13 et 14 citent 11 et 10 (co-citation de 11 et 10)
+REFERENCES = {
+    "2401.00011": ["2301.00001", "2301.00002", "2301.00003"],
+    "2401.00012": ["2301.00001", "2301.00002"],
+    "2401.00013": ["2401.00011", "2301.00010"],
+    "2401.00014": ["2401.00011", "2301.00010"],
+}
+
+
+@pytest.fixture
+def graph(tmp_path):
+    graph = CitationGraph(str(tmp_path / "citations"))
+    graph.add_many(REFERENCES)
+    return graph
+
+
+def test_related_combines_coupling_cocitation_and_direct_links(graph):
+    related = {entry["arxiv_id"]: entry for entry in graph.related(["2401.00011v2"], k=20)}
+    assert "2401.00011" not in related
+    assert related["2401.00012"]["coupling"] > 0
+    assert related["2301.00010"]["cocitation"] > 0
+    assert related["2301.00003"]["cited"] == 1
+    assert related["2401.00013"]["citing"] == 1
+    # Références citées par deux articles : poids 1 / log2(4) chacune
+    assert related["2401.00012"]["coupling"] == pytest.approx(1.0)
+    top = graph.related(["2401.00011"], k=3)
+    assert len(top) == 3
+    assert [entry["score"] for entry in top] == sorted((entry["score"] for entry in top), reverse=True)
+
+
+def test_related_depth_reaches_further(graph):
+    graph.add_references("2301.00010", ["2201.00042"])
+    assert "2201.00042" not in {entry["arxiv_id"] for entry in graph.related(["2401.00011"], k=50)}
+    assert "2201.00042" in {entry["arxiv_id"] for entry in graph.related(["2401.00011"], depth=2, k=50)}
+
+
+def test_related_follows_updates(graph):
+    assert graph.related(["unknown"]) == []
+    assert graph.related(["2401.00011"], k=0) == []
+    generation = graph.stats()["generation"]
+    graph.add_references("2401.00012", ["2301.00009"])
+    assert graph.stats()["generation"] == generation + 1
+    assert "2401.00012" not in {entry["arxiv_id"] for entry in graph.related(["2401.00011"], k=20)
+                                if "coupling" in entry}
+
+
+def test_extract_citations():
+    references = ("[1] A. Author. arXiv:2107.12345v2. [2] arxiv.org/abs/math.AG/0101001. "
+                  "[3] B. Author. Self-super-\nvised learning of protein structure representations. 2023.")
+    matcher = TitleMatcher([("2302.00001", "Self-Supervised Learning of Protein Structure Representations"),
+                            ("2302.00002", "Short title")])
+    assert extract_citations(references) == {"2107.12345", "math/0101001"}
+    assert extract_citations(references, matcher) == {"2107.12345", "math/0101001", "2302.00001"}
+    assert len(matcher) == 1
+
+
+class FakeTextStore:
+    """Faux cache de texte intégral : bibliographies en mémoire, lectures enregistrées."""
+
+    def __init__(self, references):
+        self.references = references
+        self.reads = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def get_sections(self, paper, names=None):
+        self.gate.wait()
+        self.reads.append(paper)
+        return {"sections": {"references": self.references[paper.split("v")[0]]}}
+
+
+def test_scheduled_sync_reads_only_new_papers(graph):
+    store = FakeTextStore({"2401.00020": "arXiv:2301.00001 arXiv:2301.00002",
+                           "2401.00021": "arXiv:2301.00003"})
+    store.gate.clear()
+    graph.schedule_sync("2401.00020", 1, store)
+    # Demandes arrivées pendant l'extraction : regroupées, la plus récente version retenue
+    graph.schedule_sync("2401.00021", 1, store)
+    graph.schedule_sync("2401.00021", 2, store)
+    graph.schedule_sync("2401.00021", 1, store)
+    store.gate.set()
+    assert graph.wait_sync(timeout=5)
+    assert sorted(store.reads) == ["2401.00020v1", "2401.00021v2"]
+    related = {entry["arxiv_id"] for entry in graph.related(["2401.00020"], k=20)}
+    assert {"2401.00011", "2401.00012", "2301.00001"} <= related
+
+    # Version déjà traitée : pas de nouvelle lecture
+    assert not graph.sync_paper("2401.00020", 1, store)
+    assert len(store.reads) == 2
+
+
+def test_titles_added_later_are_recognized(graph):
+    title = "Self-Supervised Learning of Protein Structure Representations"
+    store = FakeTextStore({"2401.00030": f"[1] B. Author. {title}. 2023.",
+                           "2401.00031": f"[7] {title}."})
+    assert graph.sync_paper("2401.00030", 1, store)
+    get_paper_store().add([{"arxiv_id": "2302.00001", "title": title}])
+    assert graph.sync_paper("2401.00031", 1, store)
+    cited_by = {entry["arxiv_id"] for entry in graph.related(["2302.00001"], k=20) if "citing" in entry}
+    assert cited_by == {"2401.00031"}
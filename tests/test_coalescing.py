@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests de la fusion des appels identiques (lib.coalescing)."""
+
+import time
+import asyncio
+import threading
+
+import pytest
+
+from lib import coalescing
+from lib.coalescing import SingleFlight, coalesced, make_key
+from lib.llm_scheduler import DeadlineExceeded, deadline
+from lib.translation_cache import output_language
+
+
+def run_threads(count, target):
+    results = [None] * count
+    errors = [None] * count
+
+    def run(index):
+        try:
+            results[index] = target()
+        except BaseException as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_make_key_depends_on_all_parts():
+    assert make_key("a", {"x": 1, "y": 2}) == make_key("a", {"y": 2, "x": 1})
+    assert make_key("a", 1) != make_key("a", 2)
+    assert make_key("a", 1) != make_key("b", 1)
+
+
+def test_do_runs_identical_calls_once():
+    flight = SingleFlight("test")
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "réponse"
+
+    results, errors = run_threads(8, lambda: flight.do("clé", slow))
+    assert errors == [None] * 8
+    assert results == ["réponse"] * 8
+    assert len(calls) == 1
+    stats = flight.stats()
+    assert stats["leaders"] == 1
+    assert stats["shared"] == 7
+
+
+def test_do_shares_leader_error():
+    flight = SingleFlight("test")
+
+    def failing():
+        time.sleep(0.1)
+        raise ValueError("échec")
+
+    _, errors = run_threads(4, lambda: flight.do("clé", failing))
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert flight.stats()["leaders"] == 1
+
+
+def test_do_follower_gives_up_on_its_own_deadline():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    leader = threading.Thread(target=flight.do, args=("clé", release.wait, 5))
+    leader.start()
+    time.sleep(0.05)
+    try:
+        with deadline(0.05), pytest.raises(DeadlineExceeded):
+            flight.do("clé", lambda: "jamais")
+    finally:
+        release.set()
+        leader.join()
+    assert flight.stats()["abandoned"] == 1
+
+
+def test_do_without_coalescing(monkeypatch):
+    monkeypatch.setattr(coalescing, "COALESCE", False)
+    flight = SingleFlight("test")
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+
+    run_threads(4, lambda: flight.do("clé", slow))
+    assert len(calls) == 4
+
+
+def test_ado_runs_identical_calls_once():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def slow(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return value * 2
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("clé", slow, 21) for _ in range(10)))
+
+    assert asyncio.run(main()) == [42] * 10
+    assert calls == [21]
+
+
+def test_ado_leader_does_not_retry_its_own_deadline():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def expired():
+        calls.append(1)
+        raise DeadlineExceeded("échéance du meneur")
+
+    async def main():
+        with deadline(5):
+            await flight.ado("clé", expired)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(asyncio.wait_for(main(), 2))
+    assert calls == [1]
+    assert flight.stats()["retries"] == 0
+
+
+def test_ado_cancels_shared_task_without_waiters():
+    flight = SingleFlight("test")
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def main():
+        waiter = asyncio.ensure_future(flight.ado("clé", slow))
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    assert cancelled == [1]
+    assert flight.stats()["cancelled"] == 1
+
+
+def test_coalesced_key_includes_output_language():
+    flight = SingleFlight("test")
+    calls = []
+
+    @coalesced("outil", flight)
+    def tool(query: str, limit: int = 5) -> str:
+        """Outil de test."""
+        calls.append(query)
+        time.sleep(0.1)
+        return query
+
+    def call(language):
+        with output_language(language):
+            return tool("q")
+
+    run_threads(2, lambda: call("fr"))
+    assert calls == ["q"]
+
+    languages = iter(["fr", "en"])
+    lock = threading.Lock()
+
+    def call_next():
+        with lock:
+            language = next(languages)
+        return call(language)
+
+    run_threads(2, call_next)
+    assert calls == ["q"] * 3
+    assert tool.__doc__ == "Outil de test."
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests du filtre des versions et quasi-doublons (lib.dedup)."""
+
+from lib.dedup import NearDuplicateFilter, deduplicate
+from lib.paper import Paper
+
+ABSTRACT = ("We introduce a retrieval augmented language model that conditions generation on passages "
+            "retrieved from a large corpus and evaluate it on open domain question answering benchmarks.")
+
+
+def paper(arxiv_id, title="Retrieval augmented generation", abstract=ABSTRACT):
+    return {"arxiv_id": arxiv_id, "title": title, "abstract": abstract}
+
+
+def test_other_versions_are_rejected():
+    dedup = NearDuplicateFilter()
+    assert dedup.accept({"url": "https://arxiv.org/abs/2401.00001v1", "title": "A", "abstract": "x"})
+    assert not dedup.accept({"id": "http://arxiv.org/abs/2401.00001v3", "title": "B", "abstract": "y"})
+    assert dedup.rejected == [{"arxiv_id": "2401.00001", "title": "B", "duplicate_of": "2401.00001"}]
+
+
+def test_same_title_is_rejected():
+    dedup = NearDuplicateFilter()
+    assert dedup.accept(paper("2401.00001", title="Retrieval-Augmented Generation!"))
+    assert not dedup.accept(paper("2402.00002", title="retrieval augmented   generation",
+                                  abstract="A different abstract."))
+
+
+def test_near_duplicate_abstract_is_rejected():
+    dedup = NearDuplicateFilter()
+    assert dedup.accept(paper("2401.00001", title="RAG for open domain QA"))
+    # Une seule phrase ajoutée : la similarité de Jaccard reste au-dessus du seuil
+    near = paper("2402.00002", title="Retrieval augmented LMs for open domain QA",
+                 abstract=ABSTRACT + " Code is available.")
+    assert dedup.find_duplicate(near) == "2401.00001"
+    assert not dedup.accept(near)
+
+
+def test_distinct_papers_are_kept():
+    papers = [
+        paper("2401.00001"),
+        paper("2401.00002", title="Protein structure prediction",
+              abstract="We predict the three dimensional structure of proteins from their amino acid sequence."),
+        paper("2401.00001v2"),
+    ]
+    assert [p["arxiv_id"] for p in deduplicate(papers)] == ["2401.00001", "2401.00002"]
+
+
+def test_signatures_are_reproducible():
+    first, second = NearDuplicateFilter(), NearDuplicateFilter()
+    assert (first.signature(ABSTRACT) == second.signature(ABSTRACT)).all()
+    assert first.signature("") is None
+
+
+def test_accepts_paper_records():
+    dedup = NearDuplicateFilter()
+    assert dedup.accept(Paper("2401.00001", 1, "Retrieval augmented generation", abstract=ABSTRACT))
+    assert not dedup.accept(Paper("2401.00001", 2, "Retrieval augmented generation, revised", abstract="..."))
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests du regroupement des encodages concurrents (lib.embedding_batcher)."""
+
+import time
+import threading
+
+import numpy as np
+import pytest
+
+from lib.embedding_batcher import EmbeddingBatcher
+
+
+class FakeModel:
+    """Faux modèle : le vecteur d'un texte est (numéro du texte, 1), chaque appel est enregistré."""
+
+    def __init__(self):
+        self.batches = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def encode(self, texts, batch_size):
+        self.gate.wait()
+        self.batches.append(list(texts))
+        return np.array([[float(text.split()[-1]), 1.0] for text in texts])
+
+
+def test_concurrent_requests_share_a_batch():
+    model = FakeModel()
+    batcher = EmbeddingBatcher(model.encode, window_ms=0, max_batch=64)
+    # Le premier lot bloque le thread d'encodage : les demandes suivantes s'accumulent
+    model.gate.clear()
+    first = batcher.submit(["passage: 0"], normalize=False)
+    while batcher.stats()["batches"] < 1:
+        time.sleep(0.001)
+    futures = [batcher.submit([f"passage: {n}", f"passage: {n + 100}"], normalize=False) for n in range(1, 6)]
+    model.gate.set()
+
+    assert first.result(timeout=5).tolist() == [[0.0, 1.0]]
+    for n, future in enumerate(futures, start=1):
+        assert future.result(timeout=5).tolist() == [[float(n), 1.0], [float(n + 100), 1.0]]
+    assert len(model.batches) == 2
+    assert len(model.batches[1]) == 10
+    stats = batcher.stats()
+    assert stats["requests"] == 6
+    assert stats["batches"] == 2
+    assert stats["texts"] == 11
+    assert stats["queue_depth"] == 0
+
+
+def test_batches_are_capped():
+    model = FakeModel()
+    batcher = EmbeddingBatcher(model.encode, window_ms=0, max_batch=4)
+    model.gate.clear()
+    futures = [batcher.submit([f"passage: {n}"]) for n in range(9)]
+    model.gate.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert max(len(batch) for batch in model.batches) <= 4
+    assert sum(len(batch) for batch in model.batches) == 9
+
+
+def test_vectors_are_normalized():
+    model = FakeModel()
+    batcher = EmbeddingBatcher(model.encode, window_ms=0)
+    vectors = batcher.encode(["passage: 3", "passage: 4"])
+    assert vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+
+
+def test_large_requests_bypass_the_thread():
+    model = FakeModel()
+    batcher = EmbeddingBatcher(model.encode, window_ms=0, max_batch=4)
+    vectors = batcher.encode([f"passage: {n}" for n in range(6)], normalize=False)
+    assert vectors[:, 0].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+    assert batcher.stats()["direct"] == 1
+    assert batcher.stats()["batches"] == 0
+
+
+def test_errors_reach_every_caller_of_the_batch():
+    def failing(texts, batch_size):
+        raise RuntimeError("modèle indisponible")
+
+    batcher = EmbeddingBatcher(failing, window_ms=0)
+    with pytest.raises(RuntimeError):
+        batcher.encode(["passage: 1"])
+    assert batcher.stats()["errors"] == 1
+    # Le thread d'encodage survit à l'erreur
+    with pytest.raises(RuntimeError):
+        batcher.encode(["passage: 2"])
+    assert batcher.stats()["errors"] == 2
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests de la file de travaux SQLite (lib.job_queue) : bails, heartbeat et nouvelles tentatives."""
+
+import time
+import threading
+
+import pytest
+
+from lib.job_queue import HTTPJobQueue, JobQueue, SQLiteJobQueue, Worker, start_broker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SQLiteJobQueue(str(tmp_path / "jobs.db"))
+
+
+def test_lease_and_complete(queue):
+    job_id = queue.enqueue({"query": "transformers"})
+    job = queue.lease("worker-1")
+    assert job["job_id"] == job_id
+    assert job["payload"] == {"query": "transformers"}
+    assert job["attempts"] == 1
+    assert queue.lease("worker-2") is None
+
+    assert queue.complete(job_id, "worker-1", {"answer": 42})
+    done = queue.get(job_id)
+    assert done["status"] == "done"
+    assert done["result"] == {"answer": 42}
+    assert queue.stats() == {"queued": 0, "leased": 0, "done": 1, "failed": 0}
+
+
+def test_lease_follows_priority(queue):
+    low = queue.enqueue({"n": 1})
+    high = queue.enqueue({"n": 2}, priority=5)
+    assert queue.lease("worker")["job_id"] == high
+    assert queue.lease("worker")["job_id"] == low
+
+
+def test_expired_lease_is_reassigned(queue):
+    job_id = queue.enqueue({"n": 1})
+    queue.lease("worker-1", lease_seconds=0.05)
+    time.sleep(0.1)
+    job = queue.lease("worker-2")
+    assert job["job_id"] == job_id
+    assert job["attempts"] == 2
+    # L'ancien worker ne détient plus le travail
+    assert not queue.complete(job_id, "worker-1", "trop tard")
+    assert not queue.heartbeat(job_id, "worker-1")
+    assert queue.complete(job_id, "worker-2", "ok")
+
+
+def test_heartbeat_extends_lease(queue):
+    job_id = queue.enqueue({"n": 1})
+    queue.lease("worker-1", lease_seconds=0.1)
+    for _ in range(3):
+        time.sleep(0.05)
+        assert queue.heartbeat(job_id, "worker-1", lease_seconds=0.1)
+    assert queue.lease("worker-2") is None
+    assert queue.get(job_id)["worker"] == "worker-1"
+
+
+def test_fail_requeues_with_backoff_then_fails(queue):
+    job_id = queue.enqueue({"n": 1}, max_attempts=2)
+    queue.lease("worker")
+    assert queue.fail(job_id, "worker", "erreur", retry_delay=60) == "queued"
+    # Nouvelle tentative différée
+    assert queue.lease("worker") is None
+
+    job_id = queue.enqueue({"n": 2}, max_attempts=2)
+    queue.lease("worker")
+    assert queue.fail(job_id, "worker", "erreur 1", retry_delay=0) == "queued"
+    assert queue.lease("worker")["attempts"] == 2
+    assert queue.fail(job_id, "worker", "erreur 2", retry_delay=0) == "failed"
+    failed = queue.get(job_id)
+    assert failed["status"] == "failed"
+    assert failed["error"] == "erreur 2"
+
+
+def test_fail_without_retry(queue):
+    job_id = queue.enqueue({"n": 1}, max_attempts=3)
+    queue.lease("worker")
+    assert queue.fail(job_id, "worker", "erreur définitive", retry=False) == "failed"
+    assert queue.fail(job_id, "worker", "encore") is None
+
+
+def test_expired_lease_on_last_attempt_fails(queue):
+    job_id = queue.enqueue({"n": 1}, max_attempts=1)
+    queue.lease("worker-1", lease_seconds=0.05)
+    time.sleep(0.1)
+    assert queue.lease("worker-2") is None
+    job = queue.get(job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "bail expiré"
+
+
+def test_concurrent_workers_never_share_a_job(queue):
+    job_ids = {queue.enqueue({"n": n}) for n in range(40)}
+    leased = []
+    lock = threading.Lock()
+
+    def worker(name):
+        while True:
+            job = queue.lease(name)
+            if job is None:
+                return
+            with lock:
+                leased.append(job["job_id"])
+            queue.complete(job["job_id"], name, "ok")
+
+    threads = [threading.Thread(target=worker, args=(f"worker-{index}",)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(leased) == sorted(job_ids)
+    assert queue.stats()["done"] == 40
+
+
+def test_wait_returns_finished_job(queue):
+    job_id = queue.enqueue({"n": 1})
+    with pytest.raises(TimeoutError):
+        queue.wait(job_id, timeout=0.05, poll_interval=0.01)
+    queue.complete(queue.lease("worker")["job_id"], "worker", "ok")
+    assert queue.wait(job_id, timeout=1, poll_interval=0.01)["result"] == "ok"
+    with pytest.raises(KeyError):
+        queue.wait("inconnu", timeout=0.1)
+
+
+def test_job_queue_is_abstract():
+    with pytest.raises(TypeError):
+        JobQueue()
+
+
+def test_broker_round_trip_without_leaking_connections(queue):
+    broker = start_broker(queue, token="secret")
+    try:
+        client = HTTPJobQueue(f"http://127.0.0.1:{broker.server_address[1]}", token="secret")
+        job_ids = [client.enqueue({"n": n}) for n in range(30)]
+        job = client.lease("distant")
+        assert job["job_id"] == job_ids[0]
+        assert client.heartbeat(job["job_id"], "distant")
+        assert client.complete(job["job_id"], "distant", {"ok": True})
+        assert client.get(job["job_id"])["result"] == {"ok": True}
+        assert client.stats()["queued"] == 29
+        with pytest.raises(RuntimeError):
+            HTTPJobQueue(client.url, token="faux").get(job["job_id"])
+    finally:
+        broker.shutdown()
+        broker.server_close()
+    # Seule la connexion du thread de test reste ouverte
+    assert queue.database.open_connections() == 1
+
+
+def test_worker_heartbeats_do_not_leak_connections(queue):
+    for n in range(5):
+        queue.enqueue({"n": n})
+
+    def handler(payload):
+        time.sleep(0.05)
+        return payload["n"] * 2
+
+    worker = Worker(queue, handler, worker_id="worker", lease_seconds=0.03, poll_interval=0.01)
+    assert worker.run(idle_timeout=0.05) == 5
+    assert worker.processed == 5
+    assert queue.stats()["done"] == 5
+    time.sleep(0.05)
+    assert queue.database.open_connections() == 1
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests du planificateur d'échéance (lib.latency_planner), avec les durées par défaut des étapes."""
+
+import pytest
+
+from lib.latency_planner import DEFAULT_STAGE_SECONDS, DeadlinePlanner, StageTimings
+
+
+@pytest.fixture
+def timings(tmp_path):
+    return StageTimings(str(tmp_path / "timings.db"))
+
+
+@pytest.fixture
+def planner(timings):
+    return DeadlinePlanner(timings)
+
+
+def test_full_pipeline_when_budget_allows(planner):
+    # 3 + 3 + 2 vagues d'analyses (8) + résumé, synthèse, professeur, mise en forme = 71 s
+    plan = planner.plan(100, max_results=5)
+    assert plan.degradations == []
+    assert plan.estimate == pytest.approx(71.0)
+    assert plan.fits
+
+
+def test_separate_translation_is_merged_first(planner):
+    plan = planner.plan(100, max_results=5, translation="separate")
+    assert plan.translation == "merged"
+    assert len(plan.degradations) == 1
+    assert plan.max_results == 5
+    # En anglais, pas de tâche de traduction à retirer
+    assert planner.plan(100, max_results=5, french=False, translation="separate").degradations == []
+
+
+def test_degradations_are_applied_in_order(planner):
+    plan = planner.plan(60, max_results=8)
+    assert plan.max_results == 4
+    assert plan.extractive_summary
+    assert plan.skip == {"professor"}
+    assert not plan.extractive_only
+    assert len(plan.degradations) == 3
+    assert plan.fits
+
+
+def test_tiny_budget_falls_back_to_extractive_only(planner):
+    plan = planner.plan(5, max_results=5)
+    assert plan.extractive_only
+    assert plan.estimate == pytest.approx(DEFAULT_STAGE_SECONDS["arxiv_search"] + DEFAULT_STAGE_SECONDS["extractive"])
+    assert plan.to_dict()["degradations"][-1] == plan.degradations[-1]
+
+
+def test_recorded_timings_replace_defaults(planner, timings):
+    # Moins de MIN_SAMPLES mesures : durée par défaut
+    timings.record_many({"summary": [1.0, 1.0]})
+    assert timings.estimate("summary") == DEFAULT_STAGE_SECONDS["summary"]
+    timings.record_many({"summary": [1.0, 2.0, 3.0, 4.0], "paper_analysis": [1.0] * 5, "professor": [-1.0]})
+    assert timings.estimate("summary") == 3.0
+    assert timings.estimate("professor") == DEFAULT_STAGE_SECONDS["professor"]
+    # Analyses rapides : 60 s suffisent désormais au pipeline complet
+    assert planner.plan(60, max_results=8).degradations == []
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests de l'ordonnanceur des appels LLM (lib.llm_scheduler), avec de faux fournisseurs."""
+
+import time
+import asyncio
+import threading
+import itertools
+
+import pytest
+
+from lib.llm_scheduler import DeadlineExceeded, LLMScheduler, deadline, retry_policy
+
+_messages = itertools.count()
+
+
+def params(model="modèle"):
+    """Paramètres d'un appel unique (messages distincts : pas de fusion entre tests)."""
+    return {"model": model, "messages": [{"role": "user", "content": f"question {next(_messages)}"}]}
+
+
+class FlakyCompletion:
+    """Faux fournisseur : lève les erreurs de `errors` dans l'ordre, puis répond."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "réponse"
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def scheduler(**kwargs):
+    kwargs.setdefault("backoff_base", 0.0)
+    kwargs.setdefault("hedge", False)
+    return LLMScheduler(**kwargs)
+
+
+def test_global_and_model_concurrency_caps():
+    llm = scheduler(max_concurrency=3, per_model_concurrency={"lent": 1}, default_model_concurrency=2)
+    lock = threading.Lock()
+    running = {"lent": 0, "rapide": 0}
+    peaks = {"lent": 0, "rapide": 0, "total": 0}
+
+    def completion(model, **kwargs):
+        with lock:
+            running[model] += 1
+            peaks[model] = max(peaks[model], running[model])
+            peaks["total"] = max(peaks["total"], sum(running.values()))
+        time.sleep(0.05)
+        with lock:
+            running[model] -= 1
+        return model
+
+    threads = [threading.Thread(target=llm.call, args=(completion,), kwargs=params(model))
+               for model in ["lent", "rapide"] * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peaks["lent"] == 1
+    assert peaks["rapide"] == 2
+    assert peaks["total"] <= 3
+    assert llm.stats()["calls"] == 8
+
+
+def test_retries_transient_errors():
+    llm = scheduler(max_retries=2)
+    completion = FlakyCompletion(ProviderError(503), ConnectionError("coupure"))
+    assert llm.call(completion, **params()) == "réponse"
+    assert completion.calls == 3
+    assert llm.stats()["retries"] == 2
+
+
+def test_does_not_retry_permanent_errors():
+    llm = scheduler(max_retries=2)
+    completion = FlakyCompletion(ProviderError(400))
+    with pytest.raises(ProviderError):
+        llm.call(completion, **params())
+    assert completion.calls == 1
+    assert llm.stats()["failures"] == 1
+
+
+def test_gives_up_after_max_retries():
+    llm = scheduler(max_retries=1)
+    completion = FlakyCompletion(ProviderError(429), ProviderError(429), ProviderError(429))
+    with pytest.raises(ProviderError):
+        llm.call(completion, **params())
+    assert completion.calls == 2
+
+
+@pytest.mark.parametrize("policy, calls", [
+    ({}, 3),
+    ({"retry_timeouts": False}, 1),
+    ({"max_retries": 0}, 1),
+    ({"max_retries": 5}, 6),
+])
+def test_retry_policy_limits_retries(policy, calls):
+    llm = scheduler(max_retries=2)
+    completion = FlakyCompletion(*[TimeoutError("délai")] * 10)
+    with retry_policy(**policy), pytest.raises(TimeoutError):
+        llm.call(completion, **params())
+    assert completion.calls == calls
+
+
+def test_retry_policy_keeps_other_errors_retryable():
+    llm = scheduler(max_retries=2)
+    completion = FlakyCompletion(ProviderError(503))
+    with retry_policy(retry_timeouts=False):
+        assert llm.call(completion, **params()) == "réponse"
+    assert completion.calls == 2
+
+
+def test_expired_deadline_skips_the_call():
+    llm = scheduler()
+    completion = FlakyCompletion()
+    with deadline(0), pytest.raises(DeadlineExceeded):
+        llm.call(completion, **params())
+    assert completion.calls == 0
+
+
+def test_deadline_is_propagated_as_timeout():
+    llm = scheduler()
+    seen = {}
+
+    def completion(**kwargs):
+        seen.update(kwargs)
+        return "réponse"
+
+    with deadline(10):
+        llm.call(completion, timeout=60, **params())
+    assert 0 < seen["timeout"] <= 10
+
+
+def test_hedged_request_wins_over_slow_call():
+    llm = scheduler(hedge=True, hedge_min_samples=1, hedge_min_delay=0.05)
+    llm.call(lambda **kwargs: "amorce", **params())
+    calls = itertools.count()
+
+    def completion(**kwargs):
+        if next(calls) == 0:
+            time.sleep(1.0)
+            return "lent"
+        return "couverture"
+
+    start = time.monotonic()
+    assert llm.call(completion, **params()) == "couverture"
+    assert time.monotonic() - start < 0.8
+    stats = llm.stats()
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+def test_identical_calls_are_coalesced():
+    llm = scheduler()
+    calls = []
+
+    def completion(**kwargs):
+        calls.append(1)
+        time.sleep(0.1)
+        return "réponse"
+
+    request = params()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(llm.call(completion, **request)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["réponse"] * 4
+    assert len(calls) == 1
+
+
+def test_async_provider_timeout_is_retried():
+    llm = scheduler(max_retries=2)
+    calls = []
+
+    async def acompletion(**kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise asyncio.TimeoutError()
+        return "réponse"
+
+    async def main():
+        with deadline(5):
+            return await llm.acall(acompletion, **params())
+
+    assert asyncio.run(asyncio.wait_for(main(), 3)) == "réponse"
+    assert len(calls) == 2
+
+
+def test_async_deadline_expiry_raises_deadline_exceeded():
+    llm = scheduler(max_retries=2)
+
+    async def acompletion(**kwargs):
+        await asyncio.sleep(1)
+        return "trop tard"
+
+    async def main():
+        with deadline(0.1):
+            return await llm.acall(acompletion, **params())
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(asyncio.wait_for(main(), 3))
+    assert time.monotonic() - start < 0.5
+
+
+def test_async_retry_policy_without_timeout_retries():
+    llm = scheduler(max_retries=2)
+    calls = []
+
+    async def acompletion(**kwargs):
+        calls.append(1)
+        raise asyncio.TimeoutError()
+
+    async def main():
+        with retry_policy(retry_timeouts=False):
+            return await llm.acall(acompletion, **params())
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(asyncio.wait_for(main(), 3))
+    assert len(calls) == 1
+
+
+def test_async_hedge_cancels_the_loser():
+    llm = scheduler(hedge=True, hedge_min_samples=1, hedge_min_delay=0.05)
+    cancelled = []
+    calls = itertools.count()
+
+    async def warmup(**kwargs):
+        return "amorce"
+
+    async def acompletion(**kwargs):
+        if next(calls) == 0:
+            try:
+                await asyncio.sleep(1.0)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+            return "lent"
+        return "couverture"
+
+    async def main():
+        await llm.acall(warmup, **params())
+        result = await llm.acall(acompletion, **params())
+        await asyncio.sleep(0.01)
+        return result
+
+    assert asyncio.run(main()) == "couverture"
+    assert cancelled == [1]
+    assert llm.stats()["hedge_wins"] == 1
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests de la représentation compacte des articles (lib.paper)."""
+
+from datetime import datetime
+
+import pytest
+
+from lib import paper as paper_module
+from lib.paper import Paper, pack_papers, unpack_papers
+
+OLD_FORMAT = {
+    "id": "http://arxiv.org/abs/2401.00001v2",
+    "title": "Protein language models",
+    "authors": ["Ada Lovelace", "Alan Turing"],
+    "summary": "We study protein language models.",
+    "published_date": "2024-01-02",
+    "pdf_url": "http://arxiv.org/pdf/2401.00001v2",
+    "categories": ["q-bio.QM", "cs.LG"],
+}
+
+
+def test_from_dict_reads_old_keys():
+    paper = Paper.from_dict(OLD_FORMAT)
+    assert (paper.arxiv_id, paper.version) == ("2401.00001", 2)
+    assert paper.abstract == OLD_FORMAT["summary"]
+    assert paper.published == "2024-01-02"
+    assert paper.url == "https://arxiv.org/abs/2401.00001v2"
+    # Les anciennes clés restent lisibles sur l'objet
+    assert paper["summary"] == paper["abstract"] == OLD_FORMAT["summary"]
+    assert paper["published_date"] == "2024-01-02"
+    assert paper["id"] == paper.url
+    assert paper["authors"] == OLD_FORMAT["authors"]
+    assert paper.get("unknown", "défaut") == "défaut"
+    with pytest.raises(KeyError):
+        paper["unknown"]
+
+
+def test_from_dict_reads_new_keys():
+    paper = Paper.from_dict({"arxiv_id": "2401.00001", "version": 3, "abstract": "Résumé",
+                             "published": datetime(2024, 1, 2, 15, 30)})
+    assert (paper.arxiv_id, paper.version, paper.abstract, paper.published) == ("2401.00001", 3, "Résumé",
+                                                                                "2024-01-02")
+    assert Paper.from_dict({"title": "Sans identifiant"}) is None
+    assert Paper.from_dict(paper) is paper
+
+
+def test_to_dict_round_trip():
+    paper = Paper.from_dict(OLD_FORMAT)
+    data = paper.to_dict()
+    assert data["published_date"] == "2024-01-02"
+    assert Paper.from_dict(data) == paper
+    assert "doi" in paper.to_dict(extended=True)
+
+
+def test_authors_are_interned():
+    first, second = Paper.from_dict(OLD_FORMAT), Paper.from_dict(dict(OLD_FORMAT))
+    assert first.authors[0] is second.authors[0]
+
+
+def test_pack_round_trip():
+    papers = [Paper.from_dict(OLD_FORMAT), Paper("2402.00002", None, "Sans version")]
+    assert unpack_papers(pack_papers(papers)) == papers
+    assert Paper.from_bytes(papers[0].to_bytes()) == papers[0]
+
+
+def test_pack_falls_back_to_marshal(monkeypatch):
+    monkeypatch.setattr(paper_module, "msgpack", None)
+    data = pack_papers([Paper.from_dict(OLD_FORMAT)])
+    assert data[:1] == b"\x02"
+    assert unpack_papers(data) == [Paper.from_dict(OLD_FORMAT)]
+    with pytest.raises(ValueError):
+        unpack_papers(b"\x09" + data[1:])
+
+
+def test_archive_keeps_known_papers(tmp_path):
+    from lib.archive import ResultArchive
+    from lib.paper_store import get_paper_store
+
+    get_paper_store().add([OLD_FORMAT])
+    archive = ResultArchive(str(tmp_path / "archive"))
+    result_id = archive.add("protéines", "Voir 2401.00001 et 2402.99999.", papers=["2401.00001"])
+    # La base des articles peut être vidée : l'archive garde sa copie
+    get_paper_store().database.execute("DELETE FROM papers")
+    assert archive.paper_details(result_id) == [Paper.from_dict(OLD_FORMAT)]
+    assert archive.get(result_id)["papers"] == ["2401.00001", "2402.99999"]
+    assert archive.paper_details(archive.add("autre", "Pas d'article.")) == []
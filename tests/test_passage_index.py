@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests du découpage des textes intégraux en fragments (lib.passage_index)."""
+
+import mmap
+from types import SimpleNamespace
+
+import pytest
+
+passage_index = pytest.importorskip("lib.passage_index")
+
+
+@pytest.fixture
+def make_index(monkeypatch, tmp_path):
+    # Aucun modèle chargé : seul le suffixe du répertoire de cache est lu
+    monkeypatch.setattr(passage_index, "get_embedder", lambda: SimpleNamespace(storage_key=""))
+
+    def make(**kwargs):
+        return passage_index.PassageIndex(str(tmp_path / "passages"), **kwargs)
+    return make
+
+
+def spans_of(index, text, end=None, tmp_path=None):
+    path = tmp_path / "text.txt"
+    path.write_bytes(text.encode("utf-8"))
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        spans = index._chunk_spans(mapped, len(mapped) if end is None else end)
+        return spans, [mapped[start:stop].decode("utf-8") for start, stop in spans]
+
+
+def test_chunks_overlap(make_index, tmp_path):
+    text = " ".join(f"w{n}" for n in range(10))
+    spans, chunks = spans_of(make_index(chunk_words=4, overlap_words=1), text, tmp_path=tmp_path)
+    assert chunks == ["w0 w1 w2 w3", "w3 w4 w5 w6", "w6 w7 w8 w9"]
+    assert spans.dtype.name == "int64"
+    assert spans.shape == (3, 2)
+
+
+def test_last_chunk_is_not_repeated(make_index, tmp_path):
+    text = " ".join(f"w{n}" for n in range(5))
+    _, chunks = spans_of(make_index(chunk_words=4, overlap_words=2), text, tmp_path=tmp_path)
+    assert chunks == ["w0 w1 w2 w3", "w2 w3 w4"]
+
+
+def test_spans_are_byte_offsets_and_stop_before_references(make_index, tmp_path):
+    text = "Modèle  à\tdiffusion\n\nRésultats clés. References [1] Autre."
+    end = len(text[:text.index("References")].encode("utf-8"))
+    spans, chunks = spans_of(make_index(chunk_words=3, overlap_words=1), text, end=end, tmp_path=tmp_path)
+    assert chunks == ["Modèle  à\tdiffusion", "diffusion\n\nRésultats clés."]
+    assert spans[-1][1] <= end
+
+
+def test_empty_text_has_no_chunk(make_index, tmp_path):
+    spans, _ = spans_of(make_index(), " \n\t ", tmp_path=tmp_path)
+    assert spans.shape == (0, 2)
+
+
+def test_overlap_must_be_smaller_than_chunks(make_index):
+    with pytest.raises(ValueError):
+        make_index(chunk_words=50, overlap_words=50)
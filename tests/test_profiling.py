@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests de l'attribution des appels d'outils aux phases du profileur (lib.profiling)."""
+
+import pytest
+
+from lib.profiling import ROOT_PHASE, PipelineProfiler, tool_phase
+
+
+@pytest.mark.parametrize("tool_name, phase", [
+    ("search_arxiv", "search"),
+    ("get_papers_by_query", "search"),
+    ("get_paper_by_id", "search"),
+    ("get_paper_abstract", "search"),
+    ("semantic_search_papers", "search"),
+    ("related_papers", "search"),
+    ("get_paper_sections", "fulltext"),
+    ("retrieve_passages", "fulltext"),
+])
+def test_tool_phase(tool_name, phase):
+    assert tool_phase(tool_name) == phase
+
+
+def test_tool_phases_are_timed_separately(tmp_path):
+    profiler = PipelineProfiler("wall", output_dir=str(tmp_path))
+    for tool_name in ("search_arxiv", "retrieve_passages", "get_paper_sections"):
+        profiler.enter(tool_phase(tool_name))
+        profiler.exit(tool_phase(tool_name))
+    assert profiler.calls["search"] == 1
+    assert profiler.calls["fulltext"] == 2
+    assert set(profiler.wall_times) == {"search", "fulltext"}
+    assert profiler._current() == ROOT_PHASE
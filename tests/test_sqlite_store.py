@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests de l'accès SQLite partagé (lib.sqlite_store) : reprise de BEGIN IMMEDIATE et écritures par lots."""
+
+import time
+import sqlite3
+import threading
+
+import pytest
+
+from lib.sqlite_store import BatchWriter, SQLiteDatabase
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "test.db")
+
+
+def make_database(path, **kwargs):
+    # busy_timeout court : le verrou est rendu par SQLite et repris par la boucle de reprise
+    database = SQLiteDatabase(path, pragmas={"busy_timeout": 10}, **kwargs)
+    database.execute("CREATE TABLE IF NOT EXISTS items (value INTEGER)")
+    return database
+
+
+def hold_write_lock(path, seconds):
+    """Verrou d'écriture tenu par une autre connexion pendant `seconds` secondes."""
+    other = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")
+
+    def release():
+        time.sleep(seconds)
+        other.execute("COMMIT")
+        other.close()
+
+    thread = threading.Thread(target=release)
+    thread.start()
+    return thread
+
+
+def test_transaction_retries_begin_immediate(path):
+    database = make_database(path, max_retries=5)
+    holder = hold_write_lock(path, 0.2)
+    try:
+        assert database.execute("INSERT INTO items (value) VALUES (1)") == 1
+    finally:
+        holder.join()
+    assert database.query("SELECT value FROM items") == [(1,)]
+
+
+def test_transaction_gives_up_after_max_retries(path):
+    database = make_database(path, max_retries=0)
+    holder = hold_write_lock(path, 0.3)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            database.execute("INSERT INTO items (value) VALUES (1)")
+    finally:
+        holder.join()
+
+
+def test_transaction_rolls_back_on_error(path):
+    database = make_database(path)
+    with pytest.raises(ValueError):
+        with database.transaction() as connection:
+            connection.execute("INSERT INTO items (value) VALUES (1)")
+            raise ValueError("abandon")
+    assert database.query("SELECT COUNT(*) FROM items") == [(0,)]
+
+
+def test_batch_writer_flushes_full_batches(path):
+    database = make_database(path)
+    writer = BatchWriter(database, "INSERT INTO items (value) VALUES (?)", batch_size=3, max_delay=60)
+    writer.add((1,))
+    writer.add((2,))
+    assert database.query("SELECT COUNT(*) FROM items") == [(0,)]
+    writer.add((3,))
+    assert database.query("SELECT COUNT(*) FROM items") == [(3,)]
+    writer.add((4,))
+    assert writer.flush() == 1
+    assert writer.flush() == 0
+
+
+def test_batch_writer_enforces_max_delay_without_new_rows(path):
+    database = make_database(path)
+    writer = BatchWriter(database, "INSERT INTO items (value) VALUES (?)", batch_size=100, max_delay=0.1)
+    writer.add((1,))
+    writer.add((2,))
+    assert database.query("SELECT COUNT(*) FROM items") == [(0,)]
+    time.sleep(0.3)
+    assert database.query("SELECT COUNT(*) FROM items") == [(2,)]
+
+
+def test_batch_writer_uses_a_single_writer_thread(path):
+    database = make_database(path)
+    writer = BatchWriter(database, "INSERT INTO items (value) VALUES (?)", batch_size=100, max_delay=0.02)
+    before = threading.active_count()
+    for value in range(10):
+        writer.add((value,))
+        time.sleep(0.05)
+    assert database.query("SELECT COUNT(*) FROM items") == [(10,)]
+    assert threading.active_count() <= before + 1
+    # Thread principal et thread d'écriture
+    assert database.open_connections() == 2
+
+
+def test_thread_connections_are_closed_when_threads_exit(path):
+    database = make_database(path)
+    threads = [threading.Thread(target=database.execute, args=("INSERT INTO items (value) VALUES (?)", (n,)))
+               for n in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert database.query("SELECT COUNT(*) FROM items") == [(20,)]
+    assert database.open_connections() == 1
+
+
+def test_release_connection_reopens_on_next_use(path):
+    database = make_database(path)
+    assert database.open_connections() == 1
+    database.release_connection()
+    assert database.open_connections() == 0
+    assert database.query("SELECT COUNT(*) FROM items") == [(0,)]
+    assert database.open_connections() == 1